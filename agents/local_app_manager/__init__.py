@@ -5,6 +5,10 @@
 并提供对代理的引用导出
 """
 
+# 有界会话存储和会话服务
+from .session_store import SessionStore
+from .bounded_session_service import BoundedSessionService
+
 # 导入主项目中的agent
 try:
     from ...agent import app_agent, runner, session_service
@@ -0,0 +1,204 @@
+"""
+有界的ADK会话服务，替代InMemorySessionService供多用户代理服务使用。
+
+- 历史窗口：会话事件超过max_events（再加四分之一的余量，分批裁剪）时，只保留最近的
+  max_events个事件，裁剪点对齐到用户消息，不会拆开一轮对话中的工具调用和结果；
+  被裁掉的事件压缩为摘要，保存在会话状态的history_summary中，代理指令可以通过
+  {history_summary?}引用；
+- 淘汰和持久化：由SessionStore按LRU和空闲时间淘汰会话，可选写入SQLite；
+- 指标：stats()返回内存中的会话数、估计字节数、淘汰/载入次数和裁剪的事件数。
+"""
+import os
+import time
+import uuid
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+
+from .session_store import AGENT_MAX_SESSIONS, AGENT_SESSION_DB, AGENT_SESSION_IDLE_TTL, SessionKey, SessionStore
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 每个会话保留的最近事件数
+AGENT_MAX_HISTORY_EVENTS = int(os.getenv('AGENT_MAX_HISTORY_EVENTS', '40'))
+
+# 历史摘要的最大字符数
+AGENT_HISTORY_SUMMARY_CHARS = int(os.getenv('AGENT_HISTORY_SUMMARY_CHARS', '2000'))
+
+# 会话状态中保存历史摘要的键
+SUMMARY_KEY = 'history_summary'
+
+# 摘要中每个事件保留的最大字符数
+_SUMMARY_LINE_CHARS = 200
+
+# 不写入会话状态的临时键前缀
+_TEMP_PREFIX = 'temp:'
+
+
+def _event_text(event: Event) -> str:
+    if not event.content or not event.content.parts:
+        return ''
+    return ' '.join(part.text.strip() for part in event.content.parts if getattr(part, 'text', None))
+
+
+def summarize_events(previous: Optional[str], events: List[Event],
+                     limit: int = AGENT_HISTORY_SUMMARY_CHARS) -> str:
+    """
+    把被裁掉的事件追加到历史摘要中（每个事件一行，只保留文本），超过limit时丢弃最早的行
+
+    Args:
+        previous: 原有摘要
+        events: 被裁掉的事件
+        limit: 摘要的最大字符数
+
+    Returns:
+        str: 新的摘要
+    """
+    lines = previous.splitlines() if previous else []
+    for event in events:
+        text = _event_text(event)
+        if text:
+            lines.append(f"{event.author}: {text[:_SUMMARY_LINE_CHARS]}")
+    summary = "\n".join(lines)
+    if len(summary) > limit:
+        summary = summary[-limit:]
+        # 从完整的一行开始
+        summary = summary[summary.find("\n") + 1:] if "\n" in summary else summary
+    return summary
+
+
+class BoundedSessionService(BaseSessionService):
+    """内存占用有界的会话服务：历史窗口、LRU/空闲淘汰和可选的SQLite持久化"""
+
+    def __init__(self, max_sessions: int = AGENT_MAX_SESSIONS, idle_ttl: float = AGENT_SESSION_IDLE_TTL,
+                 db_path: Optional[str] = AGENT_SESSION_DB or None, max_events: int = AGENT_MAX_HISTORY_EVENTS,
+                 summary_chars: int = AGENT_HISTORY_SUMMARY_CHARS,
+                 summarizer: Optional[Callable[[Optional[str], List[Event], int], str]] = None):
+        """
+        Args:
+            max_sessions: 内存中最多保留的会话数
+            idle_ttl: 空闲淘汰时间（秒），0表示不按空闲时间淘汰
+            db_path: 被淘汰会话的SQLite数据库文件，None表示不持久化
+            max_events: 每个会话保留的最近事件数，0表示不裁剪
+            summary_chars: 历史摘要的最大字符数
+            summarizer: 摘要函数(原摘要, 被裁掉的事件, 最大字符数)，默认为summarize_events
+        """
+        super().__init__()
+        self.store: SessionStore[Session] = SessionStore(
+            lambda session: session.model_dump_json(), Session.model_validate_json,
+            max_sessions=max_sessions, idle_ttl=idle_ttl, db_path=db_path)
+        self.max_events = max_events
+        self.summary_chars = summary_chars
+        self.summarizer = summarizer or summarize_events
+        self.trimmed_events = 0
+        self.trims = 0
+
+    @staticmethod
+    def _key(app_name: str, user_id: str, session_id: str) -> SessionKey:
+        return app_name, user_id, session_id
+
+    async def create_session(self, *, app_name: str, user_id: str, state: Optional[Dict[str, Any]] = None,
+                             session_id: Optional[str] = None) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        key = self._key(app_name, user_id, session_id)
+        if self.store.get(key) is not None:
+            raise ValueError(f"会话已存在: {session_id}")
+        session = Session(id=session_id, app_name=app_name, user_id=user_id, state=dict(state or {}),
+                          last_update_time=time.time())
+        self.store.put(key, session)
+        return session
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                          config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        session = self.store.get(self._key(app_name, user_id, session_id))
+        if session is None or config is None:
+            return session
+        events = session.events
+        if config.after_timestamp:
+            events = [event for event in events if event.timestamp >= config.after_timestamp]
+        if config.num_recent_events:
+            events = events[-config.num_recent_events:]
+        return session.model_copy(update={'events': list(events)})
+
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        sessions = []
+        for session_id in self.store.session_ids(app_name, user_id):
+            # 只列出会话，不把数据库中的会话载入内存
+            session = self.store.peek(self._key(app_name, user_id, session_id))
+            if session is not None:
+                sessions.append(session.model_copy(update={'events': []}))
+            else:
+                sessions.append(Session(id=session_id, app_name=app_name, user_id=user_id))
+        return ListSessionsResponse(sessions=sessions)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        self.store.delete(self._key(app_name, user_id, session_id))
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        if event.partial:
+            return event
+        session.last_update_time = event.timestamp
+
+        key = self._key(session.app_name, session.user_id, session.id)
+        stored = self.store.get(key)
+        if stored is None:
+            # 会话已被淘汰且没有持久化：以调用方持有的会话为准重新放回
+            self.store.put(key, session)
+            stored = session
+        elif stored is not session:
+            # 调用方持有的是副本（例如get_session按config过滤后的会话），同步到存储的会话
+            stored.events.append(event)
+            if event.actions and event.actions.state_delta:
+                for name, value in event.actions.state_delta.items():
+                    if not name.startswith(_TEMP_PREFIX):
+                        stored.state[name] = value
+            stored.last_update_time = event.timestamp
+
+        if not self._window(stored):
+            self.store.resize(key, self.store.size_of(key) + len(event.model_dump_json()))
+        else:
+            self.store.resize(key, len(stored.model_dump_json()))
+        return event
+
+    def _window(self, session: Session) -> bool:
+        """
+        裁剪会话历史，被裁掉的事件并入摘要
+
+        Returns:
+            bool: 是否进行了裁剪
+        """
+        if not self.max_events or len(session.events) <= self.max_events + max(self.max_events // 4, 1):
+            return False
+        cut = len(session.events) - self.max_events
+        # 对齐到之后的第一条用户消息，不拆开一轮对话；当前这一轮还没结束时暂不裁剪
+        cut = next((index for index in range(cut, len(session.events)) if session.events[index].author == 'user'),
+                   None)
+        if not cut:
+            return False
+        dropped = session.events[:cut]
+        session.state[SUMMARY_KEY] = self.summarizer(session.state.get(SUMMARY_KEY), dropped, self.summary_chars)
+        del session.events[:cut]
+        self.trimmed_events += cut
+        self.trims += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        内存占用和淘汰统计
+
+        Returns:
+            Dict[str, Any]: SessionStore.stats()以及裁剪次数和裁剪掉的事件数
+        """
+        stats = self.store.stats()
+        stats.update({'history_trims': self.trims, 'trimmed_events': self.trimmed_events,
+                      'max_events': self.max_events})
+        return stats
+
+    def close(self) -> None:
+        """把内存中的会话写入数据库（如已配置）"""
+        self.store.close()
@@ -0,0 +1,264 @@
+"""
+有界会话存储，让长期运行的多用户代理服务的内存占用保持稳定。
+
+内存中最多保留max_sessions个会话，超出时淘汰最久未访问的会话（LRU），
+空闲超过idle_ttl秒的会话也会被淘汰。配置了SQLite数据库时，被淘汰的会话
+序列化后写入数据库，再次访问时重新载入内存；未配置时被淘汰的会话直接丢弃。
+
+存储本身与会话的具体类型无关，通过serialize/deserialize在对象和文本之间转换，
+ADK会话服务（bounded_session_service.BoundedSessionService）在其上实现历史窗口和摘要。
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 内存中最多保留的会话数
+AGENT_MAX_SESSIONS = int(os.getenv('AGENT_MAX_SESSIONS', '1000'))
+
+# 会话空闲多久（秒）后被淘汰，0表示不按空闲时间淘汰
+AGENT_SESSION_IDLE_TTL = float(os.getenv('AGENT_SESSION_IDLE_TTL', '1800'))
+
+# 被淘汰会话的SQLite数据库文件，为空表示不持久化
+AGENT_SESSION_DB = os.getenv('AGENT_SESSION_DB', '')
+
+# 两次空闲淘汰检查之间的最小间隔（秒）
+_SWEEP_INTERVAL = 5.0
+
+# 会话键：(app_name, user_id, session_id)
+SessionKey = Tuple[str, str, str]
+
+T = TypeVar('T')
+
+
+class _Entry(Generic[T]):
+    __slots__ = ('value', 'size', 'last_access')
+
+    def __init__(self, value: T, size: int, last_access: float):
+        self.value = value
+        self.size = size
+        self.last_access = last_access
+
+
+class SessionStore(Generic[T]):
+    """按LRU和空闲时间淘汰的会话存储，可选SQLite持久化层"""
+
+    def __init__(self, serialize: Callable[[T], str], deserialize: Callable[[str], T],
+                 max_sessions: int = AGENT_MAX_SESSIONS, idle_ttl: float = AGENT_SESSION_IDLE_TTL,
+                 db_path: Optional[str] = AGENT_SESSION_DB or None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            serialize: 会话对象转换为文本（写入数据库）
+            deserialize: 文本转换为会话对象（从数据库载入）
+            max_sessions: 内存中最多保留的会话数
+            idle_ttl: 空闲淘汰时间（秒），0表示不按空闲时间淘汰
+            db_path: SQLite数据库文件，None表示不持久化
+            clock: 时钟函数（秒）
+        """
+        self.serialize = serialize
+        self.deserialize = deserialize
+        self.max_sessions = max(max_sessions, 1)
+        self.idle_ttl = idle_ttl
+        self.clock = clock
+        self._entries: 'OrderedDict[SessionKey, _Entry[T]]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._last_sweep = clock()
+        self._bytes = 0
+        self.peak_bytes = 0
+        self.peak_sessions = 0
+        self.evicted_lru = 0
+        self.evicted_idle = 0
+        self.dropped = 0
+        self.persisted = 0
+        self.restored = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS sessions (app_name TEXT, user_id TEXT, session_id TEXT, "
+                             "data TEXT, updated REAL, PRIMARY KEY (app_name, user_id, session_id))")
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: SessionKey) -> Optional[T]:
+        """
+        获取会话：在内存中时标记为最近访问，否则从数据库载入
+
+        Args:
+            key: 会话键
+
+        Returns:
+            Optional[T]: 会话对象，不存在时返回None
+        """
+        with self._lock:
+            self._sweep()
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.last_access = self.clock()
+                self._entries.move_to_end(key)
+                return entry.value
+            data = self._load(key)
+            if data is None:
+                return None
+            value = self.deserialize(data)
+            self.restored += 1
+            self._insert(key, value, len(data))
+            return value
+
+    def put(self, key: SessionKey, value: T, size: Optional[int] = None) -> None:
+        """
+        保存会话（新建或替换）
+
+        Args:
+            key: 会话键
+            value: 会话对象
+            size: 会话占用内存的估计（字节），默认按序列化后的长度计算
+        """
+        with self._lock:
+            self._sweep()
+            self._insert(key, value, len(self.serialize(value)) if size is None else size)
+
+    def resize(self, key: SessionKey, size: int) -> None:
+        """更新会话占用内存的估计（字节），并标记为最近访问"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            self._bytes += size - entry.size
+            self.peak_bytes = max(self.peak_bytes, self._bytes)
+            entry.size = size
+            entry.last_access = self.clock()
+            self._entries.move_to_end(key)
+
+    def peek(self, key: SessionKey) -> Optional[T]:
+        """获取内存中的会话，不更新访问顺序，也不从数据库载入"""
+        entry = self._entries.get(key)
+        return entry.value if entry else None
+
+    def size_of(self, key: SessionKey) -> int:
+        entry = self._entries.get(key)
+        return entry.size if entry else 0
+
+    def delete(self, key: SessionKey) -> None:
+        """删除会话（包括数据库中的副本）"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.size
+            if self._db is not None:
+                self._db.execute("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key)
+                self._db.commit()
+
+    def session_ids(self, app_name: str, user_id: str) -> List[str]:
+        """用户的所有会话编号（内存中和数据库中的）"""
+        with self._lock:
+            ids = {key[2] for key in self._entries if key[0] == app_name and key[1] == user_id}
+            if self._db is not None:
+                rows = self._db.execute("SELECT session_id FROM sessions WHERE app_name = ? AND user_id = ?",
+                                        (app_name, user_id))
+                ids.update(row[0] for row in rows)
+        return sorted(ids)
+
+    def _insert(self, key: SessionKey, value: T, size: int) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        self._entries[key] = _Entry(value, size, self.clock())
+        self._bytes += size
+        while len(self._entries) > self.max_sessions:
+            self._evict(next(iter(self._entries)), idle=False)
+        self.peak_bytes = max(self.peak_bytes, self._bytes)
+        self.peak_sessions = max(self.peak_sessions, len(self._entries))
+
+    def _sweep(self) -> None:
+        """淘汰空闲超时的会话（最久未访问的在前，遇到未超时的即停止）"""
+        now = self.clock()
+        if not self.idle_ttl or now - self._last_sweep < min(_SWEEP_INTERVAL, self.idle_ttl):
+            return
+        self._last_sweep = now
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry.last_access < self.idle_ttl:
+                break
+            self._evict(key, idle=True)
+
+    def _evict(self, key: SessionKey, idle: bool) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        if idle:
+            self.evicted_idle += 1
+        else:
+            self.evicted_lru += 1
+        if not self._persist(key, entry.value):
+            self.dropped += 1
+
+    def _persist(self, key: SessionKey, value: T) -> bool:
+        """把会话写入数据库，未配置数据库或写入失败时返回False"""
+        if self._db is None:
+            return False
+        try:
+            self._db.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)",
+                             (*key, self.serialize(value), time.time()))
+            self._db.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"持久化会话失败: {key}, {str(e)}")
+            return False
+        self.persisted += 1
+        return True
+
+    def _load(self, key: SessionKey) -> Optional[str]:
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT data FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                               key).fetchone()
+        if row is None:
+            return None
+        # 载入内存后以内存中的副本为准，淘汰时重新写入
+        self._db.execute("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key)
+        self._db.commit()
+        return row[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        内存占用和淘汰统计
+
+        Returns:
+            Dict[str, Any]: 内存中的会话数和估计字节数、峰值、各类淘汰次数和数据库中的会话数
+        """
+        with self._lock:
+            stored = None
+            if self._db is not None:
+                stored = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            return {
+                'sessions': len(self._entries),
+                'max_sessions': self.max_sessions,
+                'estimated_bytes': self._bytes,
+                'peak_bytes': self.peak_bytes,
+                'peak_sessions': self.peak_sessions,
+                'evicted_lru': self.evicted_lru,
+                'evicted_idle': self.evicted_idle,
+                'dropped': self.dropped,
+                'persisted': self.persisted,
+                'restored': self.restored,
+                'stored_sessions': stored,
+            }
+
+    def close(self) -> None:
+        """把内存中的会话全部写入数据库（如已配置）并关闭数据库"""
+        with self._lock:
+            if self._db is None:
+                return
+            for key, entry in self._entries.items():
+                self._persist(key, entry.value)
+            self._entries.clear()
+            self._bytes = 0
+            self._db.close()
+            self._db = None
@@ -10,15 +10,15 @@
 
 import os
 import sys
+import time
 import logging
 import argparse
-from typing import List, Dict, Tuple, Any, Optional
+from typing import Awaitable, Callable, Iterable, List, Dict, Tuple, Any, Optional
 
-# 导入dotenv处理环境变量
-from dotenv import load_dotenv
+from utils.startup import load_environment, lazy_import
 
 # 加载环境变量（配置文件），用于控制应用行为
-load_dotenv()
+load_environment()
 
 # 配置日志
 logging.basicConfig(
@@ -26,58 +26,279 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(),
-        logging.FileHandler('app.log', encoding='utf-8')
+        # 延迟到第一条日志时才创建/打开日志文件
+        logging.FileHandler('app.log', encoding='utf-8', delay=True)
     ]
 )
 logger = logging.getLogger(__name__)
 
 # 导入命令处理模块
 from utils.nlp_processor import NLPProcessor
-import commands.open_app as open_app
-import commands.close_app as close_app
-import commands.uninstall_app as uninstall_app
-import commands.list_running as list_running
-import commands.list_installed as list_installed
-import commands.volume_control as volume_control
-import commands.brightness_control as brightness_control
-import commands.file_operations as file_operations
-import commands.weather_query as weather_query
+from utils.async_utils import run_sync, run_blocking
+from utils.system_utils import SystemUtils
+from utils.command_plan import CommandPlan, PlanResult, PlanScheduler, PlanStep
+from utils.app_records import ListingQuery, ProcessRecord
+from utils.warmup import start_warmup
+from utils.tree_delete import DEFAULT_SESSION, DeletionStats, pending_deletions
+from commands.backend import get_backend
+
+# 命令模块及其平台后端在第一次执行对应命令时才加载
+weather_query = lazy_import('commands.weather_query')
 
 # 是否需要确认卸载
 CONFIRM_UNINSTALL = os.getenv('CONFIRM_UNINSTALL', 'True').lower() in ('true', '1', 't')
 
+# 是否需要确认删除目录
+CONFIRM_DELETE = os.getenv('CONFIRM_DELETE', 'True').lower() in ('true', '1', 't')
+
+# 解析结果为单个字符串时，对应的参数名
+_PRIMARY_PARAMETER = {
+    NLPProcessor.CMD_OPEN: 'app_name',
+    NLPProcessor.CMD_CLOSE: 'app_name',
+    NLPProcessor.CMD_UNINSTALL: 'app_name',
+    NLPProcessor.CMD_LIST_RUNNING: 'filter',
+    NLPProcessor.CMD_LIST_INSTALLED: 'filter',
+    NLPProcessor.CMD_WEATHER: 'location',
+    NLPProcessor.CMD_LIST_SUBDIRECTORIES: 'directory_path',
+    NLPProcessor.CMD_LIST_FILES: 'directory',
+    NLPProcessor.CMD_DISK_USAGE: 'directory_path',
+}
+
+# 列表排序字段的显示名称
+_SORT_LABELS = {'cpu': 'CPU', 'memory': '内存', 'name': '名称'}
+
+# 细分的音量/亮度命令对应的设备和操作
+_ADJUSTMENT_COMMANDS = {
+    NLPProcessor.CMD_GET_VOLUME: ('volume', 'get'),
+    NLPProcessor.CMD_SET_VOLUME: ('volume', 'set'),
+    NLPProcessor.CMD_INCREASE_VOLUME: ('volume', 'increase'),
+    NLPProcessor.CMD_DECREASE_VOLUME: ('volume', 'decrease'),
+    NLPProcessor.CMD_MUTE: ('volume', 'mute'),
+    NLPProcessor.CMD_UNMUTE: ('volume', 'unmute'),
+    NLPProcessor.CMD_GET_BRIGHTNESS: ('brightness', 'get'),
+    NLPProcessor.CMD_SET_BRIGHTNESS: ('brightness', 'set'),
+    NLPProcessor.CMD_INCREASE_BRIGHTNESS: ('brightness', 'increase'),
+    NLPProcessor.CMD_DECREASE_BRIGHTNESS: ('brightness', 'decrease'),
+}
+
+
+class CommandHooks:
+    """
+    process_command_async各阶段的扩展点
+    
+    默认直接解析并在共享线程池中执行会阻塞的操作；Web服务在此基础上按命令类型限制并发、
+    记录各阶段耗时并流式推送解析结果，处理流程本身只有这一份。
+    """
+    
+    async def parse(self, parse: Callable[[], Awaitable[Any]]) -> Any:
+        """执行解析，parse为发起解析的协程函数"""
+        return await parse()
+    
+    async def parsed(self, parsed: Optional[Dict[str, Any]]) -> None:
+        """解析完成：单条命令为规整后的解析结果，多步骤计划为{'command_type': 'plan', 'steps': [...]}"""
+    
+    async def execute(self, command_type: Optional[str], func: Callable[..., Tuple[bool, str]],
+                      *args: Any) -> Tuple[bool, str]:
+        """执行会阻塞的操作，command_type为所属的命令类型（确认命令为confirmation）"""
+        return await run_blocking(func, *args)
+    
+    def plan_finished(self, result: PlanResult) -> None:
+        """多步骤计划执行完成"""
+    
+    def progress(self, stats: DeletionStats) -> None:
+        """删除目录的进度，在执行删除的工作线程中调用"""
+
+
+class CommandTypeHooks(CommandHooks):
+    """记录解析出的命令类型（多步骤计划记录各步骤的类型），用于统计第一条命令用到的预热任务"""
+    
+    def __init__(self):
+        self.command_types: List[str] = []
+    
+    async def parsed(self, parsed: Optional[Dict[str, Any]]) -> None:
+        if not parsed:
+            return
+        if parsed.get('command_type') == 'plan':
+            self.command_types.extend(parsed.get('steps') or [])
+        else:
+            self.command_types.append(parsed.get('command_type'))
+
+
+def process_command(command_text: str, timeout: Optional[float] = None,
+                    hooks: Optional[CommandHooks] = None) -> Tuple[bool, str]:
+    """
+    处理用户输入的命令（process_command_async的同步封装）
+    
+    Args:
+        command_text: 用户输入的命令文本
+        timeout: 命令解析的时间预算（秒）
+        hooks: 各阶段的扩展点
+        
+    Returns:
+        Tuple[bool, str]: 执行结果（成功/失败）和结果消息
+    """
+    return run_sync(process_command_async(command_text, timeout, hooks=hooks))
+
 
-def process_command(command_text: str) -> Tuple[bool, str]:
+async def process_command_async(command_text: str, timeout: Optional[float] = None,
+                                session: str = DEFAULT_SESSION,
+                                hooks: Optional[CommandHooks] = None) -> Tuple[bool, str]:
     """
-    处理用户输入的命令
+    异步处理用户输入的命令
+    
+    命令解析使用异步HTTP请求，会阻塞的系统操作在线程池中执行，
+    因此同一个事件循环可以同时处理大量命令。
     
     Args:
         command_text: 用户输入的命令文本
+        timeout: 命令解析的时间预算（秒）
+        session: 会话标识（删除确认只在同一会话中有效）
+        hooks: 各阶段的扩展点，默认为CommandHooks()
         
     Returns:
         Tuple[bool, str]: 执行结果（成功/失败）和结果消息
     """
     if not command_text:
         return False, "请输入命令"
+    hooks = hooks or CommandHooks()
     
     logger.info(f"用户输入: {command_text}")
     
+    # 确认类命令不需要解析
+    if is_confirmation(command_text):
+        return await hooks.execute('confirmation', handle_confirmation, command_text, session, hooks.progress)
+    
+    # 可能包含多个操作时，一次解析出执行计划
+    if NLPProcessor.is_multi_step(command_text):
+        plan = await hooks.parse(lambda: NLPProcessor.parse_plan_async(command_text, timeout))
+        if plan and len(plan) > 1:
+            await hooks.parsed({'command_type': 'plan', 'steps': [step.command_type for step in plan.steps]})
+            return await execute_plan(plan, session, hooks)
+        parsed = plan.steps[0].as_parsed() if plan else NLPProcessor.parse_command_local(command_text)
+    else:
+        # 使用NLP处理器解析命令
+        parsed = await hooks.parse(lambda: NLPProcessor.parse_command_async(command_text, timeout))
+    
+    parsed_result = normalize_parsed_result(parsed)
+    await hooks.parsed(parsed_result)
+    command_type = parsed_result.get('command_type') if parsed_result else None
+    return await hooks.execute(command_type, execute_command, command_text, parsed_result, session, hooks.progress)
+
+
+def execute_plan_step(step: PlanStep, session: str = DEFAULT_SESSION,
+                      progress: Optional[Callable[[DeletionStats], None]] = None) -> Tuple[bool, str]:
+    """
+    执行计划中的单个步骤
+    
+    Args:
+        step: 计划步骤
+        session: 会话标识（删除确认只在同一会话中有效）
+        progress: 删除目录的进度回调（在执行删除的工作线程中调用）
+        
+    Returns:
+        Tuple[bool, str]: 执行结果（成功/失败）和结果消息
+    """
+    return execute_command(step.description, normalize_parsed_result(step.as_parsed()), session, progress)
+
+
+async def execute_plan(plan: CommandPlan, session: str = DEFAULT_SESSION,
+                       hooks: Optional[CommandHooks] = None) -> Tuple[bool, str]:
+    """
+    按依赖关系执行多步骤计划，互不依赖的步骤同时执行，失败只影响依赖它的步骤
+    
+    Args:
+        plan: 执行计划
+        session: 会话标识
+        hooks: 各阶段的扩展点，默认为CommandHooks()
+        
+    Returns:
+        Tuple[bool, str]: 全部步骤是否成功和包含每步结果及耗时的报告
+    """
+    hooks = hooks or CommandHooks()
+    
+    async def execute(step: PlanStep) -> Tuple[bool, str]:
+        return await hooks.execute(step.command_type, execute_plan_step, step, session, hooks.progress)
+    
+    try:
+        result = await PlanScheduler().run(plan, execute)
+    except ValueError as e:
+        logger.warning(f"执行计划不合法: {str(e)}")
+        return False, f"无法执行该计划: {str(e)}"
+    
+    logger.info(f"执行计划完成: {result.timings()}")
+    hooks.plan_finished(result)
+    return result.success, result.report()
+
+
+def is_confirmation(command_text: str) -> bool:
+    """
+    判断是否为卸载/删除的确认命令
+    
+    Args:
+        command_text: 用户输入的命令文本
+        
+    Returns:
+        bool: 是确认命令返回True
+    """
+    return "确认卸载" in command_text or "确认删除" in command_text
+
+
+def handle_confirmation(command_text: str, session: str = DEFAULT_SESSION,
+                        progress: Optional[Callable[[DeletionStats], None]] = None) -> Optional[Tuple[bool, str]]:
+    """
+    处理卸载/删除的确认命令
+    
+    删除目录的确认只有在同一会话中先对该目录做过dry-run时才会执行。
+    
+    Args:
+        command_text: 用户输入的命令文本
+        session: 会话标识
+        progress: 删除目录的进度回调（在执行删除的工作线程中调用）
+        
+    Returns:
+        Optional[Tuple[bool, str]]: 是确认命令时返回执行结果，否则返回None
+    """
+    # 特殊处理删除目录的确认（需在卸载确认之前检查，因为两者都包含"确认删除"）
+    if command_text.startswith("确认删除目录"):
+        directory_path = command_text.replace("确认删除目录", "", 1).strip()
+        if not directory_path or not pending_deletions.consume(session, SystemUtils.resolve_path(directory_path)):
+            logger.warning(f"拒绝没有对应删除请求的确认: {directory_path}")
+            return False, f"没有待确认的删除请求: {directory_path}，请先发出删除该目录的命令"
+        logger.info(f"用户确认删除目录: {directory_path}")
+        return delete_directory(directory_path, confirmed=True, progress=progress)
+    
     # 特殊处理卸载命令的确认
-    if "确认卸载" in command_text or "确认删除" in command_text:
+    if is_confirmation(command_text):
         # 从命令中提取应用名称
         app_name = command_text.replace("确认卸载", "").replace("确认删除", "").strip()
         logger.info(f"用户确认卸载应用: {app_name}")
-        return uninstall_app.uninstall(app_name)
+        return get_backend().uninstall_app(app_name)
     
-    # 使用NLP处理器解析命令
-    parsed_result = NLPProcessor.parse_command(command_text)
+    return None
+
+
+def execute_command(command_text: str, parsed_result: Optional[Dict[str, Any]],
+                    session: str = DEFAULT_SESSION,
+                    progress: Optional[Callable[[DeletionStats], None]] = None) -> Tuple[bool, str]:
+    """
+    执行已解析的命令
     
+    Args:
+        command_text: 用户输入的命令文本（用于提示信息）
+        parsed_result: normalize_parsed_result返回的解析结果
+        session: 会话标识（删除确认只在同一会话中有效）
+        progress: 删除目录的进度回调（在执行删除的工作线程中调用）
+        
+    Returns:
+        Tuple[bool, str]: 执行结果（成功/失败）和结果消息
+    """
     if not parsed_result or not parsed_result.get('command_type'):
         logger.warning(f"无法解析命令: {command_text}")
-        return False, f"无法理解命令: {command_text}\n请尝试使用更明确的表述，例如"打开Chrome"或"关闭微信"。"
+        return False, f"无法理解命令: {command_text}\n请尝试使用更明确的表述，例如“打开Chrome”或“关闭微信”。"
     
     command_type = parsed_result['command_type']
     parameters = parsed_result.get('parameters', {})
+    backend = get_backend()
     
     logger.info(f"解析结果: 命令类型={command_type}, 参数={parameters}")
     
@@ -88,13 +309,13 @@ def process_command(command_text: str) -> Tuple[bool, str]:
             app_name = parameters.get('app_name')
             if not app_name:
                 return False, "需要指定应用名称"
-            return open_app.open(app_name)
+            return backend.open_app(app_name)
             
         elif command_type == NLPProcessor.CMD_CLOSE:
             app_name = parameters.get('app_name')
             if not app_name:
                 return False, "需要指定应用名称"
-            return close_app.close(app_name)
+            return backend.close_app(app_name)
             
         elif command_type == NLPProcessor.CMD_UNINSTALL:
             app_name = parameters.get('app_name')
@@ -103,86 +324,99 @@ def process_command(command_text: str) -> Tuple[bool, str]:
                 
             # 如果需要确认卸载
             if CONFIRM_UNINSTALL:
-                return True, f"您确定要卸载 {app_name} 吗？如果确认，请输入"确认卸载 {app_name}""
+                return True, f"您确定要卸载 {app_name} 吗？如果确认，请输入“确认卸载 {app_name}”"
             else:
-                return uninstall_app.uninstall(app_name)
+                return backend.uninstall_app(app_name)
                 
         elif command_type == NLPProcessor.CMD_LIST_RUNNING:
-            success, result = list_running.list_running()
+            success, result = backend.list_running()
             if success:
-                return success, format_app_list(result, "正在运行的应用")
+                query = ListingQuery.from_parameters(parameters, command_text)
+                return success, format_app_list(result, "正在运行的应用", query)
             return success, result
             
         elif command_type == NLPProcessor.CMD_LIST_INSTALLED:
-            success, result = list_installed.list_installed()
+            success, result = backend.list_installed()
             if success:
-                return success, format_app_list(result, "已安装的应用")
+                query = ListingQuery.from_parameters(parameters, command_text)
+                return success, format_app_list(result, "已安装的应用", query)
             return success, result
             
         # 设备控制命令
+        elif command_type in _ADJUSTMENT_COMMANDS:
+            device, action = _ADJUSTMENT_COMMANDS[command_type]
+            return control_device(device, action, parameters.get('value'))
+            
         elif command_type == NLPProcessor.CMD_VOLUME:
             action = parameters.get('action')
             value = parameters.get('value')
-            return volume_control.control_volume(action, value)
+            return control_device('volume', action, value)
             
         elif command_type == NLPProcessor.CMD_BRIGHTNESS:
             action = parameters.get('action')
             value = parameters.get('value')
-            return brightness_control.control_brightness(action, value)
+            return control_device('brightness', action, value)
             
         # 文件操作命令
         elif command_type == NLPProcessor.CMD_LIST_FILES:
             directory = parameters.get('directory')
-            return file_operations.list_files(directory)
+            return backend.list_files(directory)
             
         elif command_type == NLPProcessor.CMD_CREATE_FILE:
             file_path = parameters.get('file_path')
             content = parameters.get('content', '')
-            return file_operations.create_file(file_path, content)
+            return backend.create_file(file_path, content)
             
         elif command_type == NLPProcessor.CMD_CREATE_DIRECTORY:
             directory_path = parameters.get('directory_path')
-            return file_operations.create_directory(directory_path)
+            return backend.create_directory(directory_path)
             
         elif command_type == NLPProcessor.CMD_DELETE_FILE:
             file_path = parameters.get('file_path')
-            return file_operations.delete_file(file_path)
+            return backend.delete_file(file_path)
             
         elif command_type == NLPProcessor.CMD_DELETE_DIRECTORY:
             directory_path = parameters.get('directory_path')
-            return file_operations.delete_directory(directory_path)
+            return delete_directory(directory_path, confirmed=not CONFIRM_DELETE, session=session, progress=progress)
             
         elif command_type == NLPProcessor.CMD_MOVE_FILE:
             source_path = parameters.get('source_path')
             target_path = parameters.get('target_path')
-            return file_operations.move_file(source_path, target_path)
+            return backend.move_file(source_path, target_path)
             
         elif command_type == NLPProcessor.CMD_COPY_FILE:
             source_path = parameters.get('source_path')
             target_path = parameters.get('target_path')
-            return file_operations.copy_file(source_path, target_path)
+            return backend.copy_file(source_path, target_path)
             
         elif command_type == NLPProcessor.CMD_RENAME_FILE:
             source_path = parameters.get('source_path')
             target_path = parameters.get('target_path')
-            return file_operations.rename_file(source_path, target_path)
+            return backend.rename_file(source_path, target_path)
             
         elif command_type == NLPProcessor.CMD_READ_FILE:
             file_path = parameters.get('file_path')
-            return file_operations.read_file(file_path)
+            return backend.read_file(file_path, parameters.get('mode'),
+                                     lines=parameters.get('lines', 100),
+                                     start=parameters.get('start', 1),
+                                     page=parameters.get('page', 1))
             
         elif command_type == NLPProcessor.CMD_WRITE_FILE:
             file_path = parameters.get('file_path')
             content = parameters.get('content', '')
-            return file_operations.write_file(file_path, content)
+            return backend.write_file(file_path, content)
             
         elif command_type == NLPProcessor.CMD_LIST_SUBDIRECTORIES:
             directory_path = parameters.get('directory_path')
-            success, result = file_operations.list_subdirectories(directory_path)
+            success, result = backend.list_subdirectories(directory_path)
             if success and isinstance(result, list):
                 return success, format_directory_list(result, f"{directory_path}中的子目录")
             return success, result
             
+        elif command_type == NLPProcessor.CMD_DISK_USAGE:
+            directory_path = parameters.get('directory_path') or os.path.expanduser("~")
+            return backend.disk_usage(directory_path, parameters.get('top', 10))
+            
         # 其他命令
         elif command_type == NLPProcessor.CMD_WEATHER:
             location = parameters.get('location', '当前位置')
@@ -197,6 +431,74 @@ def process_command(command_text: str) -> Tuple[bool, str]:
         return False, f"执行命令时出错: {str(e)}"
 
 
+def control_device(device: str, action: str, value: Any = None) -> Tuple[bool, str]:
+    """
+    调节音量或亮度
+    
+    Args:
+        device: volume或brightness
+        action: get/set/increase/decrease/mute/unmute
+        value: 目标值或步长
+        
+    Returns:
+        Tuple[bool, str]: 执行结果（成功/失败）和结果消息
+    """
+    return get_backend().control_device(device, action, value)
+
+
+def delete_directory(directory_path: str, confirmed: bool = False,
+                     session: str = DEFAULT_SESSION,
+                     progress: Optional[Callable[[DeletionStats], None]] = None) -> Tuple[bool, str]:
+    """
+    删除目录，未确认时先评估删除影响并请求确认
+    
+    Args:
+        directory_path: 目录路径
+        confirmed: 用户是否已确认删除
+        session: 会话标识，dry-run记录在该会话中，之后的确认必须来自同一会话
+        progress: 删除目录的进度回调（在执行删除的工作线程中调用）
+        
+    Returns:
+        Tuple[bool, str]: 执行结果（成功/失败）和结果消息
+    """
+    success, message = get_backend().delete_directory(directory_path, confirmed, progress)
+    if success and not confirmed:
+        pending_deletions.issue(session, SystemUtils.resolve_path(directory_path))
+    return success, message
+
+
+def normalize_parsed_result(parsed: Any) -> Optional[Dict[str, Any]]:
+    """
+    将NLPProcessor.parse_command返回的(命令类型, 参数)元组统一为字典格式
+    
+    Args:
+        parsed: 解析结果，元组或字典
+        
+    Returns:
+        Optional[Dict[str, Any]]: 包含command_type和parameters的字典
+    """
+    if not parsed or isinstance(parsed, dict):
+        return parsed
+    
+    command_type, parameter = parsed
+    if isinstance(parameter, dict):
+        parameters = dict(parameter)
+        # 文件类命令：由目录和名称拼出完整路径
+        if 'path' in parameters:
+            path = parameters['path'] or '.'
+            directory = SystemUtils.find_directory_by_name(path) or SystemUtils.resolve_path(path)
+            full_path = os.path.join(directory, parameters['name']) if parameters.get('name') else directory
+            parameters.setdefault('file_path', full_path)
+            parameters.setdefault('directory_path', full_path)
+    elif parameter is None:
+        parameters = {}
+    else:
+        key = _PRIMARY_PARAMETER.get(command_type, 'value')
+        parameters = {key: parameter}
+    
+    return {'command_type': command_type, 'parameters': parameters}
+
+
 def format_result(success: bool, message: str) -> str:
     """
     格式化结果输出
@@ -212,39 +514,45 @@ def format_result(success: bool, message: str) -> str:
     return f"{prefix}{message}"
 
 
-def format_app_list(app_list: List[Dict[str, Any]], title: str) -> str:
+def format_app_list(app_list: Iterable[Any], title: str, query: Optional[ListingQuery] = None) -> str:
     """
-    格式化应用列表输出
+    格式化应用列表输出（标题加筛选、排序后的当前页）
+    
+    列表在遍历时完成筛选和分页，输出只包含当前页，长度与列表总长无关。
     
     Args:
-        app_list: 应用列表
+        app_list: 应用或进程条目（字典、字符串或记录，可以是生成器）
         title: 标题
+        query: 筛选、排序和分页条件，默认显示第一页
         
     Returns:
         str: 格式化后的应用列表
     """
-    if not app_list:
-        return f"{title}:\n  无应用"
-        
-    formatted_list = [f"{title}:"]
+    query = query or ListingQuery()
+    conditions = []
+    if query.keyword:
+        conditions.append(f"名称含“{query.keyword}”")
+    if query.sort_by:
+        conditions.append(f"按{_SORT_LABELS[query.sort_by]}排序")
+    lines = [f"{title}（{'，'.join(conditions)}）:" if conditions else f"{title}:"]
     
-    # 检查列表项的格式
-    if isinstance(app_list[0], dict):
-        # 如果是字典列表，提取名称和其他信息
-        for app in app_list:
-            app_name = app.get('name', 'Unknown')
-            app_pid = app.get('pid', '')
-            
-            if app_pid:
-                formatted_list.append(f"  {app_name} (PID: {app_pid})")
-            else:
-                formatted_list.append(f"  {app_name}")
-    else:
-        # 如果是字符串列表，直接添加
-        for app in app_list:
-            formatted_list.append(f"  {app}")
-            
-    return "\n".join(formatted_list)
+    records, total = query.select(app_list)
+    if not records:
+        lines.append("  无应用" if query.page == 1 else f"  第{query.page}页没有内容（共{total}项）")
+        return "\n".join(lines)
+    
+    for record in records:
+        if not isinstance(record, ProcessRecord):
+            lines.append(f"  {record.name}")
+        elif query.sort_by in ('cpu', 'memory'):
+            lines.append(f"  {record.name} (PID: {record.pid}, CPU: {record.cpu:.1f}%, 内存: {record.memory:.1f}%)")
+        else:
+            lines.append(f"  {record.name} (PID: {record.pid})")
+    
+    shown = (query.page - 1) * query.page_size + len(records)
+    if total > shown:
+        lines.append(f"  第{query.page}页，共{total}项；查看更多请在命令后加上“第{query.page + 1}页”")
+    return "\n".join(lines)
 
 
 def format_directory_list(directories: List[Dict[str, Any]], title: str) -> str:
@@ -280,22 +588,52 @@ def format_directory_list(directories: List[Dict[str, Any]], title: str) -> str:
     return "\n".join(formatted_list)
 
 
+def profile_startup(command_text: str) -> None:
+    """
+    启动分析模式：输出冷启动时按模块的导入耗时树、启动预算检查结果和第一条命令的cProfile报告
+    
+    Args:
+        command_text: 用于分析的第一条命令
+    """
+    from utils.startup import STARTUP_BUDGET_MS, check_startup_budget, format_import_tree, profile_call
+    
+    ok, import_ms, records = check_startup_budget('app', cwd=os.path.dirname(os.path.abspath(__file__)))
+    print("启动导入耗时（新解释器中 import app）:")
+    print(format_import_tree(records))
+    print(f"\n导入app耗时: {import_ms:.1f}ms，预算: {STARTUP_BUDGET_MS:.0f}ms，{'通过' if ok else '超出预算'}")
+    
+    result, report = profile_call(process_command, command_text)
+    print(f"\n第一条命令“{command_text}”: {format_result(*result)}")
+    print(report)
+
+
 def main():
     """
     应用程序主入口函数
     """
     parser = argparse.ArgumentParser(description='本地应用管理助手')
     parser.add_argument('command', nargs='?', help='要执行的命令')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='分析启动时各模块的导入耗时，并用cProfile分析第一条命令')
+    parser.add_argument('--no-warmup', action='store_true',
+                        help='交互模式下不在后台预热（用于对比第一条命令的耗时）')
     args = parser.parse_args()
     
     try:
+        if args.profile_startup:
+            profile_startup(args.command or "查看当前音量")
+            return
+        
         # 如果提供了命令行参数，执行命令并退出
         if args.command:
             result = process_command(args.command)
             print(format_result(*result))
             return
             
-        # 否则进入交互模式
+        # 否则进入交互模式，打印欢迎信息的同时在后台预热
+        warmup = None if args.no_warmup else start_warmup()
+        first_command = True
+        
         print("欢迎使用本地应用管理助手！")
         print("您可以输入自然语言命令，例如：")
         print("  - 打开Chrome")
@@ -317,8 +655,19 @@ def main():
                     continue
                 
                 # 处理命令并显示结果
-                result = process_command(command)
+                started = time.perf_counter()
+                hooks = CommandTypeHooks() if first_command else None
+                result = process_command(command, hooks=hooks)
                 print(result)
+                
+                # 记录第一条命令的耗时和预热节省的时间
+                if first_command and not is_confirmation(command):
+                    first_command = False
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    if warmup:
+                        logger.info(warmup.first_command_report(started, elapsed_ms, command, hooks.command_types))
+                    else:
+                        logger.info(f"第一条命令耗时{elapsed_ms:.0f}ms（未预热）")
             
             except KeyboardInterrupt:
                 print("\n程序已被用户中断")
@@ -329,6 +678,11 @@ def main():
                 print(f"发生错误: {str(e)}")
             
         print("程序已退出")
+    
+    except Exception as e:
+        logger.exception(f"程序运行出错: {str(e)}")
+        print(f"程序运行出错: {str(e)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
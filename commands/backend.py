@@ -0,0 +1,323 @@
+"""
+命令执行后端，把会触及操作系统的操作集中到一个可替换的接口上。
+
+app.execute_command只通过get_backend()执行操作：默认的SystemBackend调用原有的命令模块，
+SimulatedBackend（commands.simulated_backend）在内存中模拟文件系统、进程表和设备，
+压测和正确性测试可以在任意Linux CI机器上运行，且解析和分发走的是完全相同的代码路径。
+
+通过环境变量EXECUTION_BACKEND选择：system（默认）或simulated。
+"""
+import os
+import logging
+import importlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+from utils.system_utils import SystemUtils
+from utils.tree_delete import TreeDeleter, DeletionStats
+from utils.file_transfer import FileTransfer, TransferProgress
+from utils.helper_pool import close_application, open_application, uninstall_application
+from utils.inventory_watcher import get_watcher
+from utils.adjustment_scheduler import handle_adjustment
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 使用的执行后端：system或simulated
+EXECUTION_BACKEND = os.getenv('EXECUTION_BACKEND', 'system').lower()
+
+
+class ExecutionBackend:
+    """
+    命令执行后端接口
+    
+    所有方法返回(是否成功, 结果)，结果为消息或列表，与对应的命令模块一致。
+    """
+    
+    name = 'base'
+    
+    # 应用
+    def open_app(self, app_name: str) -> Tuple[bool, str]:
+        raise NotImplementedError
+    
+    def close_app(self, app_name: str) -> Tuple[bool, str]:
+        raise NotImplementedError
+    
+    def uninstall_app(self, app_name: str) -> Tuple[bool, str]:
+        raise NotImplementedError
+    
+    def list_running(self) -> Tuple[bool, Any]:
+        raise NotImplementedError
+    
+    def list_installed(self) -> Tuple[bool, Any]:
+        raise NotImplementedError
+    
+    # 设备
+    def control_device(self, device: str, action: str, value: Any = None) -> Tuple[bool, str]:
+        raise NotImplementedError
+    
+    # 文件
+    def list_files(self, directory: Optional[str]) -> Tuple[bool, Any]:
+        raise NotImplementedError
+    
+    def list_subdirectories(self, directory_path: Optional[str]) -> Tuple[bool, Any]:
+        raise NotImplementedError
+    
+    def create_file(self, file_path: str, content: str = '') -> Tuple[bool, str]:
+        raise NotImplementedError
+    
+    def create_directory(self, directory_path: str) -> Tuple[bool, str]:
+        raise NotImplementedError
+    
+    def delete_file(self, file_path: str) -> Tuple[bool, str]:
+        raise NotImplementedError
+    
+    def delete_directory(self, directory_path: str, confirmed: bool = False,
+                         progress: Optional[Callable[[DeletionStats], None]] = None) -> Tuple[bool, str]:
+        raise NotImplementedError
+    
+    def move_file(self, source_path: str, target_path: str) -> Tuple[bool, str]:
+        raise NotImplementedError
+    
+    def copy_file(self, source_path: str, target_path: str) -> Tuple[bool, str]:
+        raise NotImplementedError
+    
+    def rename_file(self, source_path: str, target_path: str) -> Tuple[bool, str]:
+        raise NotImplementedError
+    
+    def read_file(self, file_path: str, mode: Optional[str] = None, lines: int = 100,
+                  start: int = 1, page: int = 1) -> Tuple[bool, str]:
+        raise NotImplementedError
+    
+    def write_file(self, file_path: str, content: str = '') -> Tuple[bool, str]:
+        raise NotImplementedError
+    
+    def disk_usage(self, directory_path: Optional[str], top: int = 10) -> Tuple[bool, str]:
+        raise NotImplementedError
+
+
+class SystemBackend(ExecutionBackend):
+    """
+    在真实系统上执行，调用commands.*中的命令模块
+    
+    命令模块在每次调用时按名称解析（首次使用时才加载），当前环境缺少某个模块或其依赖时
+    只有对应的操作返回失败，后端本身和其他操作不受影响。
+    """
+    
+    name = 'system'
+    
+    @staticmethod
+    def _call(module: str, function: str, *args: Any,
+              fallback: Optional[Callable[..., Tuple[bool, Any]]] = None) -> Tuple[bool, Any]:
+        """
+        调用commands.<module>中的函数
+        
+        Args:
+            module: 命令模块名，如open_app
+            function: 函数名
+            *args: 位置参数
+            fallback: 模块无法导入时改为调用的函数（参数相同）
+        
+        Returns:
+            Tuple[bool, Any]: 函数的返回值；模块无法导入且没有fallback时返回(False, 错误信息)
+        """
+        try:
+            handler = getattr(importlib.import_module(f'commands.{module}'), function)
+        except (ImportError, AttributeError) as e:
+            if fallback is not None:
+                logger.info(f"命令模块commands.{module}不可用，改用{fallback.__name__}: {str(e)}")
+                return fallback(*args)
+            logger.warning(f"命令模块commands.{module}不可用: {str(e)}")
+            return False, f"当前环境不支持该操作（commands.{module}不可用: {str(e)}）"
+        return handler(*args)
+    
+    def open_app(self, app_name: str) -> Tuple[bool, str]:
+        return self._call('open_app', 'open', app_name, fallback=open_application)
+    
+    def close_app(self, app_name: str) -> Tuple[bool, str]:
+        return self._call('close_app', 'close', app_name, fallback=close_application)
+    
+    def uninstall_app(self, app_name: str) -> Tuple[bool, str]:
+        return self._call('uninstall_app', 'uninstall', app_name, fallback=uninstall_application)
+    
+    def list_running(self) -> Tuple[bool, Any]:
+        # 实时清单已启动时直接读取当前快照，不再扫描进程
+        watcher = get_watcher()
+        processes = watcher.running() if watcher else None
+        if processes is not None:
+            return True, processes
+        return self._call('list_running', 'list_running')
+    
+    def list_installed(self) -> Tuple[bool, Any]:
+        watcher = get_watcher()
+        apps = watcher.installed() if watcher else None
+        if apps is not None:
+            return True, apps
+        return self._call('list_installed', 'list_installed')
+    
+    def control_device(self, device: str, action: str, value: Any = None) -> Tuple[bool, str]:
+        """调节音量或亮度，优先使用合并调节请求的调度器"""
+        result = handle_adjustment(device, action, value)
+        if result is not None:
+            return result
+        
+        # 当前平台没有可用的控制通道，回退到原有实现
+        if device == 'volume':
+            return self._call('volume_control', 'control_volume', action, value)
+        return self._call('brightness_control', 'control_brightness', action, value)
+    
+    def list_files(self, directory: Optional[str]) -> Tuple[bool, Any]:
+        return self._call('file_operations', 'list_files', directory)
+    
+    def list_subdirectories(self, directory_path: Optional[str]) -> Tuple[bool, Any]:
+        return self._call('file_operations', 'list_subdirectories', directory_path)
+    
+    def create_file(self, file_path: str, content: str = '') -> Tuple[bool, str]:
+        return self._call('file_operations', 'create_file', file_path, content)
+    
+    def create_directory(self, directory_path: str) -> Tuple[bool, str]:
+        return self._call('file_operations', 'create_directory', directory_path)
+    
+    def delete_file(self, file_path: str) -> Tuple[bool, str]:
+        return self._call('file_operations', 'delete_file', file_path)
+    
+    def delete_directory(self, directory_path: str, confirmed: bool = False,
+                         progress: Optional[Callable[[DeletionStats], None]] = None) -> Tuple[bool, str]:
+        """删除目录，未确认时先评估删除影响并请求确认，progress在删除过程中（工作线程内）接收进度"""
+        if not directory_path:
+            return False, "需要指定目录路径"
+        
+        directory_path = SystemUtils.resolve_path(directory_path)
+        if not os.path.isdir(directory_path):
+            return False, f"目录不存在: {directory_path}"
+        if TreeDeleter.is_protected(directory_path):
+            return False, f"不允许删除受保护的目录: {directory_path}"
+        
+        if not confirmed:
+            stats = TreeDeleter.dry_run(directory_path)
+            return True, (f"{directory_path} 中包含{stats.impact()}。"
+                          f"如果确认删除，请输入“确认删除目录 {directory_path}”")
+        
+        def report(stats: DeletionStats) -> None:
+            logger.info(f"删除进度: 已删除{stats.removed_files}个文件")
+            if progress:
+                progress(stats)
+        
+        stats = TreeDeleter.delete(directory_path, stats=DeletionStats(report))
+        if stats.errors:
+            return False, f"删除目录未完全成功: {directory_path}，{stats.summary()}"
+        return True, f"成功删除目录: {directory_path}，{stats.summary()}"
+    
+    @staticmethod
+    def _transfer(label: str, transfer: Any, source_path: str, target_path: str) -> Tuple[bool, str]:
+        """
+        用FileTransfer复制或移动文件/目录（零拷贝、并行复制目录树，中断后再次执行时续传）
+        
+        Args:
+            label: 操作名称（复制/移动）
+            transfer: FileTransfer.copy或FileTransfer.move
+            source_path: 源路径
+            target_path: 目标路径，为已存在的目录时复制/移动到其中
+            
+        Returns:
+            Tuple[bool, str]: 执行结果（成功/失败）和结果消息
+        """
+        if not source_path or not target_path:
+            return False, "需要指定源路径和目标路径"
+        
+        source = SystemUtils.resolve_path(source_path)
+        target = SystemUtils.resolve_path(target_path)
+        if not os.path.lexists(source):
+            return False, f"文件不存在: {source}"
+        if not os.path.isdir(target) and not os.path.isdir(os.path.dirname(target)):
+            return False, f"目标目录不存在: {os.path.dirname(target)}"
+        
+        def report(progress: TransferProgress) -> None:
+            logger.info(f"{label}进度: {progress.bytes_done}/{progress.total_bytes}字节")
+        
+        try:
+            progress = transfer(source, target, progress=TransferProgress(report))
+        except OSError as e:
+            logger.error(f"{label}失败: {source} -> {target}, {str(e)}")
+            return False, f"{label}失败: {str(e)}"
+        if progress.errors:
+            return False, f"{label}未完全成功: {source} -> {target}，{progress.summary()}，再次执行可续传"
+        return True, f"成功{label}: {source} -> {target}，{progress.summary()}"
+    
+    def move_file(self, source_path: str, target_path: str) -> Tuple[bool, str]:
+        return self._transfer('移动', FileTransfer.move, source_path, target_path)
+    
+    def copy_file(self, source_path: str, target_path: str) -> Tuple[bool, str]:
+        return self._transfer('复制', FileTransfer.copy, source_path, target_path)
+    
+    def rename_file(self, source_path: str, target_path: str) -> Tuple[bool, str]:
+        return self._call('file_operations', 'rename_file', source_path, target_path)
+    
+    def read_file(self, file_path: str, mode: Optional[str] = None, lines: int = 100,
+                  start: int = 1, page: int = 1) -> Tuple[bool, str]:
+        # 指定了读取方式时使用分页读取，避免把大文件整体载入内存
+        if mode:
+            from utils.file_reader import FileReader
+            return FileReader.read(file_path, mode, lines=lines, start=start, page=page)
+        return self._call('file_operations', 'read_file', file_path)
+    
+    def write_file(self, file_path: str, content: str = '') -> Tuple[bool, str]:
+        return self._call('file_operations', 'write_file', file_path, content)
+    
+    def disk_usage(self, directory_path: Optional[str], top: int = 10) -> Tuple[bool, str]:
+        return self._call('disk_usage', 'disk_usage', directory_path, top)
+
+
+_backend: Optional[ExecutionBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name: str = EXECUTION_BACKEND) -> ExecutionBackend:
+    """
+    按名称创建执行后端
+    
+    Args:
+        name: system或simulated
+    
+    Returns:
+        ExecutionBackend: 执行后端
+    
+    Raises:
+        ValueError: 未知的后端名称
+    """
+    if name == 'system':
+        return SystemBackend()
+    if name == 'simulated':
+        from commands.simulated_backend import SimulatedBackend
+        return SimulatedBackend()
+    raise ValueError(f"未知的执行后端: {name}")
+
+
+def get_backend() -> ExecutionBackend:
+    """获取进程内共享的执行后端"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+                logger.info(f"使用执行后端: {_backend.name}")
+    return _backend
+
+
+def set_backend(backend: ExecutionBackend) -> None:
+    """替换共享的执行后端"""
+    global _backend
+    _backend = backend
+
+
+@contextmanager
+def use_backend(backend: ExecutionBackend) -> Iterator[ExecutionBackend]:
+    """在with块内临时使用指定的执行后端"""
+    global _backend
+    previous = _backend
+    _backend = backend
+    try:
+        yield backend
+    finally:
+        _backend = previous
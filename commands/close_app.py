@@ -4,18 +4,19 @@
 import logging
 import os
 from typing import Tuple, Optional
-from dotenv import load_dotenv
 
 from utils.app_finder import AppFinder
 from utils.platform_utils import PlatformUtils
 from utils.device_utils import DeviceUtils
 from utils.mac_utils import MacAppController
+from utils.helper_pool import close_application
+from utils.startup import load_environment
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
 # 加载环境变量
-load_dotenv()
+load_environment()
 
 
 def close(app_name: str) -> Tuple[bool, str]:
@@ -38,6 +39,13 @@ def close(app_name: str) -> Tuple[bool, str]:
         logger.warning(f"未找到精确匹配的应用: {app_name}，尝试使用原始名称关闭")
         resolved_app_name = app_name
     
+    # 首先通过常驻辅助进程调用平台工具，省去每次启动子进程的开销
+    success, message = close_application(resolved_app_name)
+    if success:
+        logger.info(message)
+        return True, message
+    logger.info(f"辅助进程无法关闭应用，尝试其他方式: {message}")
+    
     # 检查是否可以使用设备特定功能
     use_device_utils = DeviceUtils.is_available()
     
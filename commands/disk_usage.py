@@ -0,0 +1,48 @@
+"""
+磁盘占用查询命令实现，统计目录大小并列出占用最大的条目。
+"""
+import os
+import logging
+from typing import Optional, Tuple
+
+from utils.disk_usage import DiskUsage
+from utils.system_utils import SystemUtils
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def disk_usage(directory_path: Optional[str], top: int = 10) -> Tuple[bool, str]:
+    """
+    执行磁盘占用查询命令
+    
+    Args:
+        directory_path: 要统计的目录，为空时统计当前目录
+        top: 列出最大的条目数
+        
+    Returns:
+        Tuple[bool, str]: 执行结果（成功/失败）和结果消息
+    """
+    directory_path = SystemUtils.resolve_path(directory_path or '.')
+    logger.info(f"执行磁盘占用查询: {directory_path}, top={top}")
+    
+    if not os.path.isdir(directory_path):
+        return False, f"目录不存在: {directory_path}"
+    
+    try:
+        top = int(top or 10)
+        total_size, total_count, entries, stats = DiskUsage.top_entries(directory_path, top)
+    except (OSError, ValueError) as e:
+        logger.error(f"统计目录大小失败: {str(e)}")
+        return False, f"统计目录大小失败: {str(e)}"
+    
+    lines = [f"{directory_path} 共占用 {SystemUtils.format_size(total_size)}（{total_count}个文件）"]
+    if entries:
+        lines.append(f"占用最大的{len(entries)}项:")
+        width = max(len(SystemUtils.format_size(size)) for _, size, _ in entries)
+        for index, (name, size, is_dir) in enumerate(entries, 1):
+            suffix = os.sep if is_dir else ''
+            lines.append(f"  {index:>2}. {SystemUtils.format_size(size):>{width}}  {name}{suffix}")
+    
+    logger.info(f"磁盘占用查询完成: 重新扫描{stats['scanned']}个目录, 缓存命中{stats['cache_hits']}个")
+    return True, "\n".join(lines)
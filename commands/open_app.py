@@ -7,6 +7,7 @@ from typing import Tuple
 from utils.app_finder import AppFinder
 from utils.device_utils import DeviceUtils
 from utils.platform_utils import PlatformUtils
+from utils.helper_pool import open_application
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -40,7 +41,13 @@ def open(app_name: str) -> Tuple[bool, str]:
         
     logger.info(f"找到应用: {actual_app_name}")
     
-    # 优先使用DeviceUtils如果可用
+    # 首先通过常驻辅助进程调用平台工具，省去每次启动子进程的开销
+    success, message = open_application(actual_app_name)
+    if success:
+        return True, message
+    logger.info(f"辅助进程无法打开应用，尝试其他方式: {message}")
+    
+    # 其次使用DeviceUtils如果可用
     try:
         # 尝试导入DeviceUtils模块
         success, message = DeviceUtils.open_application(actual_app_name)
@@ -0,0 +1,401 @@
+"""
+模拟执行后端，在内存中模拟文件系统、进程表、已安装应用和音量/亮度。
+
+不会触及真实系统，可用于压测（utils.replay）和正确性测试。每种操作可以配置模拟延迟，
+通过环境变量SIMULATED_LATENCY设置，格式为“操作=秒”，用逗号分隔，例如:
+
+    SIMULATED_LATENCY=default=0.002,open_app=0.05,uninstall_app=0.5
+
+音量/亮度同样经过AdjustmentScheduler合并调节，只是控制通道换成了内存中的值。
+"""
+import os
+import time
+import logging
+import itertools
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from commands.backend import ExecutionBackend
+from utils.system_utils import SystemUtils
+from utils.tree_delete import DeletionStats, TreeDeleter
+from utils.adjustment_scheduler import AdjustmentScheduler, ControlChannel, apply_adjustment
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 各操作的模拟延迟（秒）
+SIMULATED_LATENCY = os.getenv('SIMULATED_LATENCY', 'default=0.002')
+
+# 默认已安装的应用
+DEFAULT_APPS = ('Google Chrome', 'Safari', 'Firefox', '微信', 'QQ', '钉钉', '企业微信', 'Visual Studio Code',
+                'PyCharm', 'Terminal', 'Spotify', 'QQ音乐', '网易云音乐', 'WPS Office', 'Microsoft Word',
+                'Microsoft Excel', 'Zoom', '腾讯会议', 'Notion', 'Typora')
+
+# 默认正在运行的进程：(名称, CPU%, 内存%)
+DEFAULT_PROCESSES = (('systemd', 0.1, 0.2), ('Finder', 0.5, 1.1), ('Google Chrome', 12.3, 8.4),
+                     ('微信', 2.1, 3.5), ('Terminal', 0.8, 0.9), ('python', 4.2, 1.6))
+
+
+def parse_latency(spec: str) -> Dict[str, float]:
+    """
+    解析模拟延迟配置
+    
+    Args:
+        spec: “操作=秒”的逗号分隔列表
+    
+    Returns:
+        Dict[str, float]: 操作到延迟（秒）的映射，default为未列出操作的延迟
+    """
+    latency = {}
+    for item in spec.split(','):
+        name, _, value = item.partition('=')
+        try:
+            latency[name.strip()] = max(float(value), 0.0)
+        except ValueError:
+            if item.strip():
+                logger.warning(f"忽略无效的模拟延迟配置: {item}")
+    return latency
+
+
+class SimulatedChannel(ControlChannel):
+    """内存中的音量/亮度"""
+    
+    name = 'simulated'
+    
+    def __init__(self, level: int = 50, latency: float = 0.0):
+        self.level = level
+        self.muted = False
+        self.latency = latency
+    
+    def get_level(self) -> Optional[int]:
+        return self.level
+    
+    def set_level(self, level: int) -> bool:
+        if self.latency:
+            time.sleep(self.latency)
+        self.level = level
+        return True
+    
+    def set_muted(self, muted: bool) -> bool:
+        self.muted = muted
+        return True
+
+
+class SimulatedBackend(ExecutionBackend):
+    """在内存中模拟命令的效果"""
+    
+    name = 'simulated'
+    
+    def __init__(self, apps: Iterable[str] = DEFAULT_APPS,
+                 processes: Iterable[Tuple[str, float, float]] = DEFAULT_PROCESSES,
+                 latency: Optional[Dict[str, float]] = None, seed_directories: bool = True):
+        """
+        Args:
+            apps: 已安装的应用
+            processes: 正在运行的进程（名称, CPU%, 内存%）
+            latency: 各操作的模拟延迟（秒），默认读取SIMULATED_LATENCY
+            seed_directories: 是否创建用户主目录和系统标准目录
+        """
+        self.latency = parse_latency(SIMULATED_LATENCY) if latency is None else latency
+        self.operations: Counter = Counter()
+        self.installed: Dict[str, str] = {name: f"/Applications/{name}.app" for name in apps}
+        self._pids = itertools.count(1000)
+        self.processes: Dict[int, Dict[str, Any]] = {}
+        for name, cpu, memory in processes:
+            self._spawn(name, cpu, memory)
+        self.files: Dict[str, str] = {}
+        self.directories: Set[str] = set()
+        self._lock = threading.RLock()
+        if seed_directories:
+            for path in [os.path.expanduser('~'), *SystemUtils.get_standard_directories().values()]:
+                self._make_directories(self._path(path))
+        self._schedulers = {
+            'volume': AdjustmentScheduler(SimulatedChannel(50, self.latency.get('set_volume', 0.0))),
+            'brightness': AdjustmentScheduler(SimulatedChannel(70, self.latency.get('set_brightness', 0.0))),
+        }
+    
+    def _operation(self, name: str) -> None:
+        """记录一次操作并模拟其耗时"""
+        self.operations[name] += 1
+        delay = self.latency.get(name, self.latency.get('default', 0.0))
+        if delay:
+            time.sleep(delay)
+    
+    @staticmethod
+    def _path(path: Optional[str]) -> str:
+        return os.path.normpath(SystemUtils.resolve_path(path or '.'))
+    
+    def _spawn(self, name: str, cpu: float = 0.5, memory: float = 1.0) -> int:
+        pid = next(self._pids)
+        self.processes[pid] = {'name': name, 'pid': pid, 'cpu': cpu, 'memory': memory,
+                               'path': self.installed.get(name, '')}
+        return pid
+    
+    def _find_app(self, app_name: str) -> Optional[str]:
+        """按名称查找已安装的应用：先精确匹配（忽略大小写），再按包含关系匹配"""
+        wanted = app_name.strip().casefold()
+        for name in self.installed:
+            if name.casefold() == wanted:
+                return name
+        return next((name for name in self.installed if wanted in name.casefold()), None)
+    
+    def _running(self, app_name: str) -> List[int]:
+        wanted = app_name.strip().casefold()
+        return [pid for pid, process in self.processes.items()
+                if process['name'].casefold() == wanted or wanted in process['name'].casefold()]
+    
+    def _make_directories(self, path: str) -> None:
+        while path not in self.directories:
+            self.directories.add(path)
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+    
+    def _children(self, path: str) -> Tuple[List[str], List[str]]:
+        """目录下的直接子目录和文件"""
+        prefix = path.rstrip(os.sep) + os.sep
+        directories = sorted(d for d in self.directories if d.startswith(prefix) and os.sep not in d[len(prefix):])
+        files = sorted(f for f in self.files if f.startswith(prefix) and os.sep not in f[len(prefix):])
+        return directories, files
+    
+    def _tree(self, path: str) -> Tuple[List[str], List[str]]:
+        """目录下的所有子目录和文件"""
+        prefix = path.rstrip(os.sep) + os.sep
+        return ([d for d in self.directories if d.startswith(prefix)],
+                [f for f in self.files if f.startswith(prefix)])
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """当前模拟状态，用于正确性测试中的断言"""
+        with self._lock:
+            return {
+                'installed': sorted(self.installed),
+                'running': sorted(process['name'] for process in self.processes.values()),
+                'files': dict(self.files),
+                'directories': sorted(self.directories),
+                'volume': self._schedulers['volume'].current(),
+                'brightness': self._schedulers['brightness'].current(),
+                'muted': self._schedulers['volume'].channel.muted,
+            }
+    
+    # 应用
+    def open_app(self, app_name: str) -> Tuple[bool, str]:
+        self._operation('open_app')
+        with self._lock:
+            name = self._find_app(app_name)
+            if not name:
+                return False, f"找不到应用: {app_name}"
+            if not self._running(name):
+                self._spawn(name)
+        return True, f"成功打开应用: {name}"
+    
+    def close_app(self, app_name: str) -> Tuple[bool, str]:
+        self._operation('close_app')
+        with self._lock:
+            name = self._find_app(app_name) or app_name
+            pids = self._running(name)
+            if not pids:
+                return False, f"关闭应用程序失败: {name}。可能该应用未在运行。"
+            for pid in pids:
+                del self.processes[pid]
+        return True, f"成功关闭应用程序: {name}"
+    
+    def uninstall_app(self, app_name: str) -> Tuple[bool, str]:
+        self._operation('uninstall_app')
+        with self._lock:
+            name = self._find_app(app_name)
+            if not name:
+                return False, f"找不到应用: {app_name}"
+            for pid in self._running(name):
+                del self.processes[pid]
+            del self.installed[name]
+        return True, f"成功卸载应用: {name}"
+    
+    def list_running(self) -> Tuple[bool, Any]:
+        self._operation('list_running')
+        with self._lock:
+            return True, [dict(process) for process in self.processes.values()]
+    
+    def list_installed(self) -> Tuple[bool, Any]:
+        self._operation('list_installed')
+        with self._lock:
+            return True, [{'name': name, 'path': path} for name, path in sorted(self.installed.items())]
+    
+    # 设备
+    def control_device(self, device: str, action: str, value: Any = None) -> Tuple[bool, str]:
+        self._operation(f"{action}_{device}")
+        scheduler = self._schedulers.get(device)
+        if scheduler is None:
+            return False, f"不支持的设备: {device}"
+        return apply_adjustment(scheduler, device, action, value)
+    
+    # 文件
+    def list_files(self, directory: Optional[str]) -> Tuple[bool, Any]:
+        self._operation('list_files')
+        path = self._path(directory)
+        with self._lock:
+            if path not in self.directories:
+                return False, f"目录不存在: {path}"
+            directories, files = self._children(path)
+        entries = [os.path.basename(d) + os.sep for d in directories] + [os.path.basename(f) for f in files]
+        if not entries:
+            return True, f"{path} 是空目录"
+        return True, f"{path} 中的文件:\n" + "\n".join(f"  {entry}" for entry in entries)
+    
+    def list_subdirectories(self, directory_path: Optional[str]) -> Tuple[bool, Any]:
+        self._operation('list_subdirectories')
+        path = self._path(directory_path)
+        with self._lock:
+            if path not in self.directories:
+                return False, f"目录不存在: {path}"
+            directories, _ = self._children(path)
+        return True, [{'name': os.path.basename(d), 'path': d} for d in directories]
+    
+    def create_file(self, file_path: str, content: str = '') -> Tuple[bool, str]:
+        self._operation('create_file')
+        path = self._path(file_path)
+        with self._lock:
+            if path in self.files or path in self.directories:
+                return False, f"文件已存在: {path}"
+            if os.path.dirname(path) not in self.directories:
+                return False, f"目录不存在: {os.path.dirname(path)}"
+            self.files[path] = content or ''
+        return True, f"成功创建文件: {path}"
+    
+    def create_directory(self, directory_path: str) -> Tuple[bool, str]:
+        self._operation('create_directory')
+        path = self._path(directory_path)
+        with self._lock:
+            if path in self.files:
+                return False, f"已存在同名文件: {path}"
+            if path in self.directories:
+                return True, f"目录已存在: {path}"
+            self._make_directories(path)
+        return True, f"成功创建目录: {path}"
+    
+    def delete_file(self, file_path: str) -> Tuple[bool, str]:
+        self._operation('delete_file')
+        path = self._path(file_path)
+        with self._lock:
+            if path not in self.files:
+                return False, f"文件不存在: {path}"
+            del self.files[path]
+        return True, f"成功删除文件: {path}"
+    
+    def delete_directory(self, directory_path: str, confirmed: bool = False,
+                         progress: Optional[Callable[[DeletionStats], None]] = None) -> Tuple[bool, str]:
+        self._operation('delete_directory')
+        if not directory_path:
+            return False, "需要指定目录路径"
+        path = self._path(directory_path)
+        with self._lock:
+            if path not in self.directories:
+                return False, f"目录不存在: {path}"
+            if TreeDeleter.is_protected(path):
+                return False, f"不允许删除受保护的目录: {path}"
+            directories, files = self._tree(path)
+            size = sum(len(self.files[f].encode('utf-8')) for f in files)
+            if not confirmed:
+                return True, (f"{path} 中包含{len(files)}个文件、{len(directories)}个文件夹，"
+                              f"共{SystemUtils.format_size(size)}。如果确认删除，请输入“确认删除目录 {path}”")
+            for f in files:
+                del self.files[f]
+            self.directories.difference_update(directories)
+            self.directories.discard(path)
+        if progress:
+            stats = DeletionStats()
+            stats.add_removed(len(files), len(directories) + 1)
+            stats.finish()
+            progress(stats)
+        return True, f"成功删除目录: {path}，已删除{len(files)}个文件、{len(directories) + 1}个文件夹"
+    
+    def _transfer(self, operation: str, source_path: str, target_path: str, keep_source: bool) -> Tuple[bool, str]:
+        self._operation(operation)
+        source, target = self._path(source_path), self._path(target_path)
+        with self._lock:
+            if target in self.directories:
+                target = os.path.join(target, os.path.basename(source))
+            if source not in self.files:
+                return False, f"文件不存在: {source}"
+            if os.path.dirname(target) not in self.directories:
+                return False, f"目标目录不存在: {os.path.dirname(target)}"
+            if target in self.files or target in self.directories:
+                return False, f"目标已存在: {target}"
+            self.files[target] = self.files[source]
+            if not keep_source:
+                del self.files[source]
+        return True, f"{source} -> {target}"
+    
+    def move_file(self, source_path: str, target_path: str) -> Tuple[bool, str]:
+        success, message = self._transfer('move_file', source_path, target_path, keep_source=False)
+        return success, f"成功移动文件: {message}" if success else message
+    
+    def copy_file(self, source_path: str, target_path: str) -> Tuple[bool, str]:
+        success, message = self._transfer('copy_file', source_path, target_path, keep_source=True)
+        return success, f"成功复制文件: {message}" if success else message
+    
+    def rename_file(self, source_path: str, target_path: str) -> Tuple[bool, str]:
+        # 新名称不含目录时在原目录下重命名
+        if target_path and os.sep not in target_path:
+            target_path = os.path.join(os.path.dirname(self._path(source_path)), target_path)
+        success, message = self._transfer('rename_file', source_path, target_path, keep_source=False)
+        return success, f"成功重命名文件: {message}" if success else message
+    
+    def read_file(self, file_path: str, mode: Optional[str] = None, lines: int = 100,
+                  start: int = 1, page: int = 1) -> Tuple[bool, str]:
+        self._operation('read_file')
+        path = self._path(file_path)
+        with self._lock:
+            if path not in self.files:
+                return False, f"文件不存在: {path}"
+            content = self.files[path]
+        if not mode:
+            return True, content
+        all_lines = content.splitlines()
+        lines = max(int(lines or 100), 1)
+        if mode == 'tail':
+            selected = all_lines[-lines:]
+        elif mode == 'range':
+            selected = all_lines[max(int(start or 1), 1) - 1:][:lines]
+        elif mode == 'page':
+            selected = all_lines[(max(int(page or 1), 1) - 1) * lines:][:lines]
+        else:
+            selected = all_lines[:lines]
+        return True, "\n".join(selected)
+    
+    def write_file(self, file_path: str, content: str = '') -> Tuple[bool, str]:
+        self._operation('write_file')
+        path = self._path(file_path)
+        with self._lock:
+            if path in self.directories:
+                return False, f"路径是目录: {path}"
+            if os.path.dirname(path) not in self.directories:
+                return False, f"目录不存在: {os.path.dirname(path)}"
+            self.files[path] = content or ''
+        return True, f"成功写入文件: {path}"
+    
+    def disk_usage(self, directory_path: Optional[str], top: int = 10) -> Tuple[bool, str]:
+        self._operation('disk_usage')
+        path = self._path(directory_path)
+        with self._lock:
+            if path not in self.directories:
+                return False, f"目录不存在: {path}"
+            _, files = self._tree(path)
+            sizes = {f: len(self.files[f].encode('utf-8')) for f in files}
+            directories, children = self._children(path)
+            entries = [(os.path.basename(f), sizes[f], False) for f in children]
+            prefix_sizes = Counter()
+            for f, size in sizes.items():
+                for d in directories:
+                    if f.startswith(d + os.sep):
+                        prefix_sizes[d] += size
+                        break
+            entries += [(os.path.basename(d), prefix_sizes[d], True) for d in directories]
+        entries = sorted(entries, key=lambda entry: -entry[1])[:max(int(top or 10), 1)]
+        lines = [f"{path} 共占用 {SystemUtils.format_size(sum(sizes.values()))}（{len(sizes)}个文件）"]
+        if entries:
+            lines.append(f"占用最大的{len(entries)}项:")
+            for index, (name, size, is_dir) in enumerate(entries, 1):
+                lines.append(f"  {index:>2}. {SystemUtils.format_size(size):>8}  {name}{os.sep if is_dir else ''}")
+        return True, "\n".join(lines)
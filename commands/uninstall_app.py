@@ -4,15 +4,16 @@
 import os
 import logging
 from typing import Tuple, Optional
-from dotenv import load_dotenv
 
 from utils.app_finder import AppFinder
 from utils.platform_utils import PlatformUtils
 from utils.device_utils import DeviceUtils
 from utils.mac_utils import MacAppController
+from utils.helper_pool import uninstall_application
+from utils.startup import load_environment
 
 # 加载环境变量
-load_dotenv()
+load_environment()
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -41,6 +42,13 @@ def uninstall(app_name: str) -> Tuple[bool, str]:
         logger.error(error_msg)
         return False, error_msg
     
+    # 首先通过辅助进程池调用平台工具（Windows上复用常驻PowerShell进程）
+    success, message = uninstall_application(resolved_app_name)
+    if success:
+        logger.info(message)
+        return True, message
+    logger.info(f"辅助进程无法卸载应用，尝试其他方式: {message}")
+    
     # 检查是否可以使用设备特定功能
     use_device_utils = DeviceUtils.is_available()
     
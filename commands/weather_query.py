@@ -0,0 +1,44 @@
+"""
+天气查询命令实现，通过天气缓存获取指定地点的天气。
+"""
+import logging
+from typing import Tuple
+
+from utils.weather_cache import get_weather_cache
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def query_weather(location: str = '当前位置') -> Tuple[bool, str]:
+    """
+    执行天气查询命令
+    
+    Args:
+        location: 地点，默认为当前位置
+        
+    Returns:
+        Tuple[bool, str]: 执行结果（成功/失败）和结果消息
+    """
+    logger.info(f"执行天气查询命令: {location}")
+    
+    try:
+        data, source = get_weather_cache().get(location)
+    except Exception as e:
+        logger.error(f"查询天气失败: {str(e)}")
+        return False, f"查询天气失败: {str(e)}"
+    
+    logger.info(f"天气数据来源: {source}")
+    
+    lines = [f"{data.get('location', location)}的天气: {data.get('condition', '未知')}"]
+    if data.get('temperature') is not None:
+        temperature = f"  温度: {data['temperature']}°C"
+        if data.get('feels_like') is not None:
+            temperature += f"（体感{data['feels_like']}°C）"
+        lines.append(temperature)
+    if data.get('humidity') is not None:
+        lines.append(f"  湿度: {data['humidity']}%")
+    if data.get('wind'):
+        lines.append(f"  风: {data['wind']}")
+    
+    return True, "\n".join(lines)
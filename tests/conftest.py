@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# 测试不访问网络、不训练本地模型，命令默认在模拟后端上执行
+os.environ.setdefault('USE_DEEPSEEK', 'False')
+os.environ.setdefault('INTENT_CLASSIFIER', 'False')
+os.environ.setdefault('EXECUTION_BACKEND', 'simulated')
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cwd(tmp_path, monkeypatch):
+    """每个测试在临时目录中运行，日志、缓存等相对路径的文件不会写进仓库"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
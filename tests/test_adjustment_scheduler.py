@@ -0,0 +1,150 @@
+import time
+
+import pytest
+
+from utils import adjustment_scheduler
+from utils.adjustment_scheduler import AdjustmentScheduler, ControlChannel, _PersistentProcess, apply_adjustment
+
+
+class _Channel(ControlChannel):
+    name = 'test'
+
+    def __init__(self, level=50, fail_after=None):
+        self.level = level
+        self.writes = []
+        self.reads = 0
+        self.fail_after = fail_after
+
+    def get_level(self):
+        self.reads += 1
+        return self.level
+
+    def set_level(self, level):
+        self.writes.append(level)
+        if self.fail_after is not None and len(self.writes) > self.fail_after:
+            return False
+        self.level = level
+        return True
+
+
+def test_first_request_is_written_synchronously():
+    channel = _Channel()
+    scheduler = AdjustmentScheduler(channel, window=0.2, max_delay=0.5)
+    assert apply_adjustment(scheduler, 'volume', 'set', 30) == (True, '音量已设置为 30%')
+    assert channel.writes == [30]
+
+
+def test_burst_is_merged_after_first_write():
+    channel = _Channel()
+    scheduler = AdjustmentScheduler(channel, window=0.1, max_delay=0.5)
+    assert scheduler.adjust(10) == (60, True)
+    for expected in (70, 80, 90):
+        assert scheduler.adjust(10) == (expected, None)
+    assert scheduler.wait(2)
+    assert channel.writes == [60, 90]
+    assert scheduler.requests == 4 and scheduler.applied == 2
+
+
+def test_synchronous_failure_is_reported():
+    scheduler = AdjustmentScheduler(_Channel(fail_after=0), window=0.05)
+    assert apply_adjustment(scheduler, 'brightness', 'set', 40) == (False, '亮度调节失败')
+
+
+def test_deferred_failure_is_reported_on_next_request():
+    channel = _Channel(fail_after=1)
+    scheduler = AdjustmentScheduler(channel, window=0.05, max_delay=0.2)
+    assert apply_adjustment(scheduler, 'volume', 'increase', None)[0]
+    success, message = apply_adjustment(scheduler, 'volume', 'increase', None)
+    assert success and '合并' in message
+    assert scheduler.wait(2)
+
+    success, message = apply_adjustment(scheduler, 'volume', 'get')
+    assert not success and '70%' in message
+    # 失败只报告一次
+    assert apply_adjustment(scheduler, 'volume', 'get') == (True, '当前音量: 60%')
+
+
+def test_cached_level_expires(monkeypatch):
+    monkeypatch.setattr(adjustment_scheduler, 'ADJUST_LEVEL_TTL', 0.05)
+    channel = _Channel(level=40)
+    scheduler = AdjustmentScheduler(channel)
+    assert scheduler.current() == 40
+    channel.level = 15  # 例如用户按了键盘上的音量键
+    assert scheduler.current() == 40
+    time.sleep(0.06)
+    assert scheduler.current() == 15
+    assert channel.reads == 2
+
+
+def test_adjust_uses_fresh_level(monkeypatch):
+    monkeypatch.setattr(adjustment_scheduler, 'ADJUST_LEVEL_TTL', 0)
+    channel = _Channel(level=40)
+    scheduler = AdjustmentScheduler(channel, window=0)
+    scheduler.current()
+    channel.level = 10
+    assert scheduler.adjust(5) == (15, True)
+
+
+def test_persistent_process_reports_stderr():
+    process = _PersistentProcess(['/bin/sh', '-c', 'while read line; do echo "bad: $line" >&2; done'])
+    try:
+        assert process.send('sset Master 300%')
+        deadline = time.monotonic() + 5
+        while not process.errors and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert list(process.errors) == ['bad: sset Master 300%']
+        assert process.error_count == 1
+    finally:
+        process.close()
+
+
+def _state_process(tmp_path, setup=None):
+    """模拟控制进程：以bad开头的命令报告错误，其余命令记录到文件"""
+    log = tmp_path / 'commands.log'
+    script = (f'while read line; do case "$line" in bad*) echo "error: $line" >&2;; '
+              f'*) echo "$line" >> "{log}";; esac; done')
+    return _PersistentProcess(['/bin/sh', '-c', script], setup=setup), log
+
+
+def _logged(log):
+    return log.read_text().splitlines() if log.exists() else []
+
+
+def test_send_confirmed_waits_for_effect(tmp_path):
+    process, log = _state_process(tmp_path)
+    try:
+        assert process.send_confirmed('set 30', lambda: 'set 30' in _logged(log), timeout=5)
+    finally:
+        process.close()
+
+
+def test_send_confirmed_fails_on_reported_error(tmp_path):
+    process, log = _state_process(tmp_path)
+    try:
+        started = time.monotonic()
+        assert not process.send_confirmed('bad control', lambda: False, timeout=5)
+        assert time.monotonic() - started < 4
+        assert process.error_count == 1
+    finally:
+        process.close()
+
+
+def test_send_confirmed_times_out_when_not_applied(tmp_path):
+    process, _ = _state_process(tmp_path)
+    try:
+        assert not process.send_confirmed('set 30', lambda: False, timeout=0.1)
+    finally:
+        process.close()
+
+
+def test_setup_is_resent_after_restart(tmp_path):
+    process, log = _state_process(tmp_path, setup=['init'])
+    try:
+        assert process.send_confirmed('one', lambda: 'one' in _logged(log), timeout=5)
+        process._process.kill()
+        process._process.wait()
+        assert process.send_confirmed('two', lambda: 'two' in _logged(log), timeout=5)
+        assert _logged(log) == ['init', 'one', 'init', 'two']
+        assert process.starts == 2
+    finally:
+        process.close()
@@ -0,0 +1,40 @@
+import app
+from utils.app_records import AppRecord, ListingQuery, ProcessRecord
+
+
+def _processes(count):
+    # 生成器：列表在筛选和分页时才被遍历
+    return ({'name': f'proc{i:03d}', 'pid': i + 1, 'cpu': i % 7, 'memory': i % 11} for i in range(count))
+
+
+def test_select_pages_and_counts():
+    records, total = ListingQuery(page=2, page_size=10).select(_processes(35))
+    assert total == 35
+    assert [r.name for r in records] == [f'proc{i:03d}' for i in range(10, 20)]
+    assert all(isinstance(r, ProcessRecord) for r in records)
+
+
+def test_select_filters_and_sorts():
+    records, total = ListingQuery(keyword='PROC00', sort_by='cpu', page_size=3).select(_processes(35))
+    assert total == 10
+    assert [r.cpu for r in records] == [6, 5, 4]
+
+
+def test_query_from_text():
+    query = ListingQuery.from_parameters({}, '运行中的含chrome的进程按内存排序第2页')
+    assert (query.keyword, query.sort_by, query.page) == ('chrome', 'memory', 2)
+
+
+def test_format_app_list_shows_only_current_page():
+    text = app.format_app_list(_processes(120), '正在运行的应用', ListingQuery(sort_by='memory', page_size=5))
+    lines = text.splitlines()
+    assert lines[0] == '正在运行的应用（按内存排序）:'
+    assert len(lines) == 7
+    assert 'CPU' in lines[1] and '内存: 10.0%' in lines[1]
+    assert '共120项' in lines[-1] and '第2页' in lines[-1]
+
+
+def test_format_app_list_empty_pages():
+    assert app.format_app_list([], '已安装的应用') == '已安装的应用:\n  无应用'
+    text = app.format_app_list([AppRecord('QQ')], '已安装的应用', ListingQuery(page=3))
+    assert text.endswith('第3页没有内容（共1项）')
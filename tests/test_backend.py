@@ -0,0 +1,44 @@
+import sys
+
+from commands.backend import SystemBackend, create_backend
+from utils.startup import MissingModule, lazy_import
+
+
+def test_lazy_import_missing_module_defers_error():
+    module = lazy_import('commands.no_such_module')
+    assert isinstance(module, MissingModule)
+    assert not module
+    assert 'commands.no_such_module' not in sys.modules
+    try:
+        module.run
+    except ModuleNotFoundError as e:
+        assert e.name == 'commands.no_such_module'
+    else:
+        raise AssertionError('访问缺失模块的属性应抛出ModuleNotFoundError')
+
+
+def test_lazy_import_existing_module():
+    module = lazy_import('commands.weather_query')
+    assert callable(module.query_weather)
+
+
+def test_system_backend_can_be_constructed():
+    backend = create_backend('system')
+    assert isinstance(backend, SystemBackend)
+    assert backend.name == 'system'
+
+
+def test_system_backend_reports_unavailable_module(monkeypatch):
+    backend = SystemBackend()
+    monkeypatch.setitem(sys.modules, 'commands.list_running', None)
+    success, message = backend._call('list_running', 'list_running')
+    assert success is False
+    assert 'commands.list_running' in message
+
+
+def test_system_backend_disk_usage(tmp_path):
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'a.bin').write_bytes(b'x' * 4096)
+    success, report = SystemBackend().disk_usage(str(tmp_path), 5)
+    assert success
+    assert 'data' in report
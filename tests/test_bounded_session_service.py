@@ -0,0 +1,130 @@
+import asyncio
+import importlib
+import os
+import sys
+import types
+
+import pytest
+
+pytest.importorskip('google.adk')
+from google.adk.events import Event  # noqa: E402
+from google.genai import types as genai_types  # noqa: E402
+
+# 包的__init__会导入主项目的agent，这里只加载会话服务本身（保留包结构以支持相对导入）
+_PACKAGE = '_bounded_session_service_tests'
+if _PACKAGE not in sys.modules:
+    _package = types.ModuleType(_PACKAGE)
+    _package.__path__ = [os.path.join(os.path.dirname(__file__), os.pardir, 'agents', 'local_app_manager')]
+    sys.modules[_PACKAGE] = _package
+service_module = importlib.import_module(f'{_PACKAGE}.bounded_session_service')
+BoundedSessionService = service_module.BoundedSessionService
+SUMMARY_KEY = service_module.SUMMARY_KEY
+summarize_events = service_module.summarize_events
+
+
+def _event(author, text):
+    role = 'user' if author == 'user' else 'model'
+    return Event(author=author, invocation_id='test',
+                 content=genai_types.Content(role=role, parts=[genai_types.Part(text=text)]))
+
+
+def _service(**kwargs):
+    kwargs.setdefault('db_path', None)
+    kwargs.setdefault('idle_ttl', 0)
+    return BoundedSessionService(**kwargs)
+
+
+async def _round(service, session, index):
+    """一轮对话：用户消息、工具调用和代理回复"""
+    await service.append_event(session, _event('user', f'问题{index}'))
+    await service.append_event(session, _event('agent', f'调用{index}'))
+    await service.append_event(session, _event('agent', f'回答{index}'))
+
+
+def test_history_window_trims_on_user_turn_boundaries():
+    async def run():
+        service = _service(max_events=4)
+        session = await service.create_session(app_name='app', user_id='u', session_id='s')
+        for index in range(6):
+            await _round(service, session, index)
+            # 保留的历史总是从一轮对话的开头开始
+            assert session.events[0].author == 'user'
+            assert len(session.events) % 3 == 0
+        return service, session
+
+    service, session = asyncio.run(run())
+    assert [event.content.parts[0].text for event in session.events][-3:] == ['问题5', '调用5', '回答5']
+    assert len(session.events) <= 4 + 1
+    assert service.trimmed_events == 18 - len(session.events)
+    summary = session.state[SUMMARY_KEY]
+    assert summary.splitlines()[0] == 'user: 问题0'
+    assert '问题5' not in summary
+    assert service.stats()['history_trims'] == service.trims > 0
+
+
+def test_window_waits_for_the_current_turn_to_finish():
+    async def run():
+        service = _service(max_events=2)
+        session = await service.create_session(app_name='app', user_id='u', session_id='s')
+        await service.append_event(session, _event('user', '问题'))
+        for index in range(5):
+            await service.append_event(session, _event('agent', f'步骤{index}'))
+        return service, session
+
+    service, session = asyncio.run(run())
+    # 只有一轮对话时不拆开它
+    assert len(session.events) == 6 and service.trims == 0
+
+
+def test_summary_is_capped_at_whole_lines():
+    events = [_event('user', f'第{index}条消息' + 'x' * 20) for index in range(20)]
+    summary = summarize_events('agent: 更早的摘要', events, limit=120)
+    assert len(summary) <= 120
+    assert all(line.startswith('user: 第') for line in summary.splitlines())
+    assert summary.splitlines()[-1].startswith('user: 第19条消息')
+
+    async def run():
+        service = _service(max_events=3, summary_chars=80)
+        session = await service.create_session(app_name='app', user_id='u', session_id='s')
+        for index in range(10):
+            await _round(service, session, index)
+        return session
+
+    assert len(asyncio.run(run()).state[SUMMARY_KEY]) <= 80
+
+
+def test_evicted_session_is_put_back_on_append():
+    async def run():
+        service = _service(max_sessions=1)
+        first = await service.create_session(app_name='app', user_id='u', session_id='first')
+        await service.create_session(app_name='app', user_id='u', session_id='second')
+        # 没有持久化：first已被淘汰
+        assert service.store.peek(('app', 'u', 'first')) is None
+
+        await service.append_event(first, _event('user', '还在吗'))
+        restored = await service.get_session(app_name='app', user_id='u', session_id='first')
+        return service, first, restored
+
+    service, first, restored = asyncio.run(run())
+    assert restored is first
+    assert [event.content.parts[0].text for event in restored.events] == ['还在吗']
+    assert service.store.size_of(('app', 'u', 'first')) > 0
+
+
+def test_append_to_filtered_copy_updates_stored_session():
+    async def run():
+        service = _service()
+        session = await service.create_session(app_name='app', user_id='u', session_id='s')
+        await _round(service, session, 0)
+        config = service_module.GetSessionConfig(num_recent_events=1)
+        copy = await service.get_session(app_name='app', user_id='u', session_id='s', config=config)
+        assert copy is not session and len(copy.events) == 1
+
+        event = _event('user', '继续')
+        event.actions.state_delta = {'topic': '音量', 'temp:scratch': 1}
+        await service.append_event(copy, event)
+        return session
+
+    session = asyncio.run(run())
+    assert len(session.events) == 4
+    assert session.state['topic'] == '音量' and 'temp:scratch' not in session.state
@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.command_plan import (STATUS_DONE, STATUS_FAILED, STATUS_SKIPPED, CommandPlan, PlanScheduler,
+                                PlanStep)
+
+
+def _run(plan, execute, **kwargs):
+    return asyncio.run(PlanScheduler(**kwargs).run(plan, execute))
+
+
+def _executor(latency=0.1, failing=()):
+    calls = []
+
+    async def execute(step):
+        calls.append(step.step_id)
+        await asyncio.sleep(latency)
+        if step.step_id in failing:
+            return False, f'{step.step_id}失败'
+        return True, f'{step.step_id}完成'
+    return execute, calls
+
+
+def test_independent_steps_overlap():
+    plan = CommandPlan([PlanStep(1, 'open', 'QQ'), PlanStep(2, 'open', 'Spotify'), PlanStep(3, 'mute')])
+    execute, _ = _executor(latency=0.2)
+
+    started = time.perf_counter()
+    result = _run(plan, execute)
+    assert time.perf_counter() - started < 0.5
+    assert result.success
+    # 三个步骤几乎同时开始
+    assert max(timing['start_ms'] for timing in result.timings()) < 100
+
+
+def test_dependent_step_waits_for_its_dependency():
+    plan = CommandPlan([PlanStep(1, 'create_directory'), PlanStep(2, 'open', depends_on=[1])])
+    execute, _ = _executor(latency=0.1)
+
+    first, second = _run(plan, execute).results
+    assert second.start_ms >= first.start_ms + first.elapsed_ms - 1
+
+
+def test_failed_step_skips_only_its_dependents():
+    plan = CommandPlan([
+        PlanStep(1, 'create_directory'),
+        PlanStep(2, 'open', 'QQ'),
+        PlanStep(3, 'read_file', depends_on=[1]),
+        PlanStep(4, 'delete_file', depends_on=[3]),
+        PlanStep(5, 'mute', depends_on=[2]),
+    ])
+    execute, calls = _executor(latency=0.01, failing={'1'})
+
+    result = _run(plan, execute)
+    assert [step.status for step in result.results] == [
+        STATUS_FAILED, STATUS_DONE, STATUS_SKIPPED, STATUS_SKIPPED, STATUS_DONE]
+    assert sorted(calls) == ['1', '2', '5']
+    assert '1' in result.results[2].message
+    assert not result.success
+
+
+def test_exception_and_timeout_fail_the_step():
+    async def execute(step):
+        if step.step_id == '1':
+            raise RuntimeError('boom')
+        await asyncio.sleep(1)
+        return True, ''
+
+    plan = CommandPlan([PlanStep(1, 'open'), PlanStep(2, 'open')])
+    first, second = _run(plan, execute, step_timeout=0.05).results
+    assert first.status == STATUS_FAILED and 'boom' in first.message
+    assert second.status == STATUS_FAILED and '超时' in second.message
+
+
+def test_max_concurrency_limits_parallel_steps():
+    running = []
+    peak = []
+
+    async def execute(step):
+        running.append(step.step_id)
+        peak.append(len(running))
+        await asyncio.sleep(0.02)
+        running.remove(step.step_id)
+        return True, ''
+
+    plan = CommandPlan([PlanStep(i, 'open') for i in range(5)])
+    assert _run(plan, execute, max_concurrency=2).success
+    assert max(peak) == 2
+
+
+@pytest.mark.parametrize('steps, error', [
+    ([PlanStep(1, 'open', depends_on=[2]), PlanStep(2, 'open', depends_on=[1])], '循环依赖'),
+    ([PlanStep(1, 'open', depends_on=[9])], '不存在'),
+    ([PlanStep(1, 'open'), PlanStep(1, 'close')], '重复'),
+])
+def test_invalid_plan_raises(steps, error):
+    execute, calls = _executor()
+    with pytest.raises(ValueError, match=error):
+        _run(CommandPlan(steps), execute)
+    assert calls == []
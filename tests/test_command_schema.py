@@ -0,0 +1,81 @@
+import pytest
+
+from utils.command_schema import Field, SchemaError, loads_json, repair_prompt, validate
+
+
+def test_int_field_coercion_and_clamping():
+    field = Field('value', 'int', required=True, minimum=0, maximum=100)
+
+    assert field.coerce('80%', 'set_volume') == 80
+    assert field.coerce(' 42.6 ', 'set_volume') == 43
+    assert field.coerce(150, 'set_volume') == 100
+    assert field.coerce('-5', 'set_volume') == 0
+    with pytest.raises(SchemaError) as error:
+        field.coerce(True, 'set_volume')
+    assert error.value.command_type == 'set_volume'
+    with pytest.raises(SchemaError):
+        field.coerce('很大', 'set_volume')
+    with pytest.raises(SchemaError):
+        field.coerce('', 'set_volume')
+
+
+def test_optional_int_falls_back_to_default():
+    field = Field('value', 'int', default=10, minimum=0, maximum=100)
+
+    assert field.coerce('一点', 'increase_volume') == 10
+    assert field.coerce(None, 'increase_volume') == 10
+
+
+def test_name_path_and_choice_fields():
+    assert Field('app_name', 'name').coerce(' “Chrome”。 ', 'open') == 'Chrome'
+    # 名称开头的英文句点保留
+    assert Field('name', 'name').coerce('.bashrc', 'read_file') == '.bashrc'
+    assert Field('path', 'path').coerce('"~/下载"', 'read_file') == '~/下载'
+    assert Field('items', 'str_list').coerce(['a', ' ', None, ' b '], 'x') == ['a', 'b']
+    assert Field('items', 'str_list').coerce('a', 'x') == ['a']
+
+    sort = Field('sort', choices=('cpu', 'memory'))
+    assert sort.coerce('CPU', 'list_running') == 'cpu'
+    assert sort.coerce('disk', 'list_running') is None
+    with pytest.raises(SchemaError):
+        Field('sort', required=True, choices=('cpu',)).coerce('disk', 'list_running')
+    with pytest.raises(SchemaError):
+        Field('app_name', 'name').coerce({'a': 1}, 'open')
+
+
+def test_validate_scalar_and_object_parameters():
+    assert validate('open', {'app_name': ' Chrome '}) == ('open', 'Chrome')
+    assert validate('set_volume', {'value': '80%'}) == ('set_volume', 80)
+    assert validate('get_volume', {'anything': 1}) == ('get_volume', None)
+    # 没有声明格式的命令类型参数原样返回
+    assert validate('custom', {'x': 1}) == ('custom', {'x': 1})
+
+    _, parameter = validate('list_running', 'chrome')
+    assert parameter == {'filter': 'chrome', 'page': 1}
+
+    _, parameter = validate('read_file', {'name': 'app.log', 'mode': 'TAIL', 'lines': '20行', 'extra': 'kept'})
+    assert parameter == {'name': 'app.log', 'mode': 'tail', 'lines': 20, 'start': 1, 'page': 1,
+                         'path': '.', 'path_alternatives': [], 'extra': 'kept'}
+
+    with pytest.raises(SchemaError) as error:
+        validate('delete_file', {'path': '/tmp'})
+    assert error.value.command_type == 'delete_file'
+
+
+def test_loads_json_and_repair_prompt():
+    content = '```json\n{"command_type": "open", // 打开\n "parameter": "Chrome",}\n```'
+    assert loads_json(content) == {'command_type': 'open', 'parameter': 'Chrome'}
+    with pytest.raises(SchemaError):
+        loads_json('不是JSON')
+
+    prompt = repair_prompt('把音量调到很大', '{}', SchemaError('缺少参数value', 'set_volume'), ['set_volume'])
+    assert '缺少参数value' in prompt
+    assert '"command_type": "set_volume", "parameter": 0-100的整数（必填）' in prompt
+
+
+@pytest.mark.parametrize('command_type', ['create_directory', 'delete_file', 'delete_directory', 'read_file'])
+def test_name_only_parameter_defaults_to_current_directory(command_type):
+    assert validate(command_type, 'test')[1]['path'] == '.'
+    assert validate(command_type, {'name': 'test'})[1]['path'] == '.'
+    # 不带名称的命令不设置默认路径，由命令模块决定
+    assert 'path' not in validate('disk_usage', {})[1]
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+import utils.disk_usage as disk_usage
+from utils.disk_usage import DiskUsage
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    DiskUsage.clear_cache()
+    yield
+    DiskUsage.clear_cache()
+
+
+def _make_tree(root, count):
+    for index in range(count):
+        directory = root / f'd{index}'
+        directory.mkdir()
+        (directory / 'file.bin').write_bytes(b'x' * (index + 1))
+
+
+def test_measure_totals_and_cache_hits(tmp_path):
+    _make_tree(tmp_path, 3)
+
+    totals, stats = DiskUsage.measure(str(tmp_path), workers=2)
+    assert totals[str(tmp_path)] == (6, 3)
+    assert stats == {'scanned': 4, 'cache_hits': 0}
+
+    totals, stats = DiskUsage.measure(str(tmp_path), workers=2)
+    assert totals[str(tmp_path)] == (6, 3)
+    assert stats == {'scanned': 0, 'cache_hits': 4}
+
+    (tmp_path / 'd0' / 'new.bin').write_bytes(b'yy')
+    totals, stats = DiskUsage.measure(str(tmp_path), workers=2)
+    assert totals[str(tmp_path)] == (8, 4)
+    assert stats == {'scanned': 1, 'cache_hits': 3}
+
+
+def test_cache_is_bounded_lru(tmp_path, monkeypatch):
+    monkeypatch.setattr(disk_usage, 'DISK_USAGE_CACHE_SIZE', 3)
+    _make_tree(tmp_path, 5)
+
+    DiskUsage.measure(str(tmp_path), workers=1)
+    assert len(DiskUsage._cache) == 3
+
+    # 最近使用的条目保留，较早的被淘汰
+    recent = str(tmp_path / 'd0')
+    DiskUsage._scan_dir(recent, {'scanned': 0, 'cache_hits': 0})
+    DiskUsage._scan_dir(str(tmp_path), {'scanned': 0, 'cache_hits': 0})
+    assert list(DiskUsage._cache)[-2:] == [recent, str(tmp_path)]
+    assert len(DiskUsage._cache) == 3
+
+    # 结果不受淘汰影响
+    totals, _ = DiskUsage.measure(str(tmp_path), workers=1)
+    assert totals[str(tmp_path)] == (15, 5)
+    assert len(DiskUsage._cache) == 3
+
+
+def test_in_place_growth_needs_clear_cache(tmp_path):
+    target = tmp_path / 'log.txt'
+    target.write_bytes(b'a' * 10)
+    mtime_ns = os.stat(tmp_path).st_mtime_ns
+    DiskUsage.measure(str(tmp_path), workers=1)
+
+    # 原地追加不改变目录的修改时间，缓存结果保持不变（见模块说明）
+    with open(target, 'ab') as handle:
+        handle.write(b'b' * 5)
+    os.utime(tmp_path, ns=(mtime_ns, mtime_ns))
+    totals, _ = DiskUsage.measure(str(tmp_path), workers=1)
+    assert totals[str(tmp_path)] == (10, 1)
+
+    DiskUsage.clear_cache()
+    totals, _ = DiskUsage.measure(str(tmp_path), workers=1)
+    assert totals[str(tmp_path)] == (15, 1)
@@ -0,0 +1,52 @@
+import pytest
+
+from utils.file_reader import INDEX_STRIDE, FileReader
+
+
+@pytest.fixture
+def numbered(tmp_path):
+    path = tmp_path / 'numbers.txt'
+    total = INDEX_STRIDE * 3 + 17
+    path.write_text(''.join(f'第{i}行\n' for i in range(1, total + 1)), encoding='utf-8')
+    return str(path), total
+
+
+def test_range_read_across_index_checkpoints(numbered):
+    path, _ = numbered
+    start = INDEX_STRIDE - 2
+    assert FileReader.read_lines(path, start, 5) == [f'第{i}行' for i in range(start, start + 5)]
+    # 向后跳过多个检查点，再回到已建立索引的位置
+    assert FileReader.read_lines(path, INDEX_STRIDE * 3 + 1, 2) == [f'第{INDEX_STRIDE * 3 + i}行' for i in (1, 2)]
+    assert FileReader.read_lines(path, 10, 1) == ['第10行']
+
+
+def test_range_read_past_end(numbered):
+    path, total = numbered
+    assert FileReader.read_lines(path, total - 1, 10) == [f'第{total - 1}行', f'第{total}行']
+    assert FileReader.read_lines(path, total + 1, 10) == []
+
+
+def test_head_tail_and_pages(numbered):
+    path, total = numbered
+    assert FileReader.head(path, 2) == ['第1行', '第2行']
+    assert FileReader.tail(path, 2) == [f'第{total - 1}行', f'第{total}行']
+    lines, has_more = FileReader.page(path, 2, 100)
+    assert lines[0] == '第101行' and len(lines) == 100 and has_more
+    lines, has_more = FileReader.page(path, total // 100 + 1, 100)
+    assert lines[-1] == f'第{total}行' and not has_more
+
+
+def test_range_read_sees_file_changes(tmp_path):
+    path = tmp_path / 'log.txt'
+    path.write_text('a\nb\n', encoding='utf-8')
+    assert FileReader.read_lines(str(path), 2, 5) == ['b']
+    with open(path, 'a', encoding='utf-8') as log:
+        log.write('c\nd\n')
+    assert FileReader.read_lines(str(path), 2, 5) == ['b', 'c', 'd']
+
+
+def test_range_read_utf16(tmp_path):
+    path = tmp_path / 'utf16.txt'
+    path.write_text('一\n二\n三\n', encoding='utf-16')
+    assert FileReader.read_lines(str(path), 2, 2) == ['二', '三']
+    assert FileReader.tail(str(path), 1) == ['三']
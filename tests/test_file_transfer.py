@@ -0,0 +1,129 @@
+import errno
+import os
+
+import pytest
+
+from commands.backend import SystemBackend
+from utils.file_transfer import RESUME_MARKER, FileTransfer
+
+
+@pytest.fixture
+def source_tree(tmp_path):
+    src = tmp_path / 'photos'
+    (src / '2024').mkdir(parents=True)
+    (src / 'a.jpg').write_bytes(os.urandom(4096))
+    (src / '2024' / 'b.jpg').write_bytes(os.urandom(8192))
+    (src / '2024' / 'c.jpg').write_bytes(b'c' * 100)
+    return src
+
+
+def _files(root):
+    return {os.path.relpath(os.path.join(directory, name), root): open(os.path.join(directory, name), 'rb').read()
+            for directory, _, names in os.walk(root) for name in names}
+
+
+def _interrupt_on(monkeypatch, name):
+    """复制到指定文件时失败，模拟中断"""
+    copy_file = FileTransfer.copy_file
+
+    def failing(src, dst, progress=None, resume=True):
+        if os.path.basename(src) == name:
+            raise OSError(errno.EIO, '模拟中断', src)
+        return copy_file(src, dst, progress, resume)
+    monkeypatch.setattr(FileTransfer, 'copy_file', staticmethod(failing))
+
+
+def test_copy_file_resumes_from_part(tmp_path):
+    src = tmp_path / 'video.bin'
+    data = os.urandom(300000)
+    src.write_bytes(data)
+    dst = tmp_path / 'copy.bin'
+    part = FileTransfer._part_path(str(dst), os.stat(src))
+    with open(part, 'wb') as part_file:
+        part_file.write(data[:100000])
+
+    progress = FileTransfer.copy(str(src), str(dst))
+    assert dst.read_bytes() == data
+    assert progress.bytes_resumed == 100000
+    assert not os.path.exists(part)
+
+
+def test_part_of_changed_source_is_not_resumed(tmp_path):
+    src = tmp_path / 'video.bin'
+    src.write_bytes(b'old' * 1000)
+    dst = tmp_path / 'copy.bin'
+    stale = FileTransfer._part_path(str(dst), os.stat(src))
+    with open(stale, 'wb') as part_file:
+        part_file.write(b'old' * 500)
+
+    src.write_bytes(b'new' * 2000)
+    progress = FileTransfer.copy(str(src), str(dst))
+    assert dst.read_bytes() == b'new' * 2000
+    assert progress.bytes_resumed == 0
+
+
+def test_interrupted_tree_copy_resumes_into_same_target(tmp_path, source_tree, monkeypatch):
+    dst = tmp_path / 'backup'
+    with monkeypatch.context() as patch:
+        _interrupt_on(patch, 'b.jpg')
+        progress = FileTransfer.copy(str(source_tree), str(dst))
+    assert progress.errors
+    assert (dst / RESUME_MARKER).exists()
+
+    progress = FileTransfer.copy(str(source_tree), str(dst))
+    assert not progress.errors
+    assert progress.files_skipped == 2
+    assert not (dst / 'photos').exists()
+    assert _files(dst) == _files(source_tree)
+
+
+def test_completed_target_directory_is_copied_into(tmp_path, source_tree):
+    dst = tmp_path / 'backup'
+    dst.mkdir()
+    FileTransfer.copy(str(source_tree), str(dst))
+    assert _files(dst / 'photos') == _files(source_tree)
+
+
+def test_partial_target_from_other_source_is_copied_into(tmp_path, source_tree):
+    dst = tmp_path / 'backup'
+    dst.mkdir()
+    (dst / RESUME_MARKER).write_text(str(tmp_path / 'other'), encoding='utf-8')
+    FileTransfer.copy(str(source_tree), str(dst))
+    assert _files(dst / 'photos') == _files(source_tree)
+
+
+def test_interrupted_cross_device_move_resumes(tmp_path, source_tree, monkeypatch):
+    expected = _files(source_tree)
+    dst = tmp_path / 'archive'
+
+    def cross_device(src, target):
+        raise OSError(errno.EXDEV, '跨设备', src)
+    monkeypatch.setattr(os, 'rename', cross_device)
+
+    with monkeypatch.context() as patch:
+        _interrupt_on(patch, 'c.jpg')
+        with pytest.raises(OSError):
+            FileTransfer.move(str(source_tree), str(dst))
+    assert source_tree.exists()
+
+    FileTransfer.move(str(source_tree), str(dst))
+    assert not source_tree.exists()
+    assert _files(dst) == expected
+
+
+def test_system_backend_uses_file_transfer(tmp_path, source_tree):
+    backend = SystemBackend()
+    success, message = backend.copy_file(str(source_tree), str(tmp_path / 'backup'))
+    assert success, message
+    assert _files(tmp_path / 'backup') == _files(source_tree)
+
+    target = tmp_path / 'moved'
+    target.mkdir()
+    success, message = backend.move_file(str(source_tree / 'a.jpg'), str(target))
+    assert success, message
+    assert (target / 'a.jpg').exists() and not (source_tree / 'a.jpg').exists()
+
+    success, message = backend.copy_file(str(tmp_path / 'missing'), str(target))
+    assert not success and '不存在' in message
+    success, message = backend.copy_file(str(target / 'a.jpg'), str(tmp_path / 'no' / 'such' / 'dir'))
+    assert not success and '目标目录不存在' in message
@@ -0,0 +1,142 @@
+import shutil
+
+import pytest
+
+from commands.backend import SystemBackend
+from utils import helper_pool
+from utils.app_records import AppRecord
+from utils.helper_pool import HelperPool, PowerShellKind, ShellKind
+
+
+@pytest.fixture
+def pool():
+    helper = HelperPool(size=1, kind=ShellKind(), enabled=True)
+    yield helper
+    helper.close()
+
+
+@pytest.mark.parametrize('argument', ['a; touch pwned', '$(touch pwned)', '`touch pwned`', "it's", 'a\nb', '*'])
+def test_arguments_are_passed_literally(pool, tmp_path, argument):
+    code, output = pool.run_argv(['printf', '%s', argument])
+    assert code == 0
+    assert output == argument.strip()
+    assert not (tmp_path / 'pwned').exists()
+
+
+def test_oneshot_execs_argv_without_a_shell(tmp_path):
+    helper = HelperPool(size=1, kind=ShellKind(), enabled=False)
+    assert ShellKind().oneshot_argv(['printf', '%s', 'x']) == ['printf', '%s', 'x']
+    assert helper.run_argv(['printf', '%s', 'x; touch pwned']) == (0, 'x; touch pwned')
+    assert not (tmp_path / 'pwned').exists()
+    assert helper.stats()['oneshot_count'] == 1
+
+
+@pytest.mark.parametrize('setting, shell, powershell', [
+    ('auto', False, True), ('true', True, True), ('false', False, False),
+])
+def test_pool_enabled_by_default_only_for_powershell(monkeypatch, setting, shell, powershell):
+    monkeypatch.setattr(helper_pool, 'HELPER_POOL', setting)
+    assert HelperPool(kind=ShellKind()).enabled is shell
+    assert HelperPool(kind=PowerShellKind()).enabled is powershell
+
+
+def test_command_strings_are_rejected():
+    with pytest.raises(TypeError):
+        helper_pool.run_helper_command('xdg-open https://example.com')
+
+
+def test_powershell_quoting():
+    kind = PowerShellKind()
+    assert kind.quote(['Start-Process', "C:\\Apps\\it's.lnk"]) == "& 'Start-Process' 'C:\\Apps\\it''s.lnk'"
+    # 参数名原样传递，其余参数都是字面量字符串
+    assert kind.quote(['Stop-Process', '-Name', '$(calc)']) == "& 'Stop-Process' -Name '$(calc)'"
+    assert kind.quote(['Stop-Process', '-Name', '-x; calc']) == "& 'Stop-Process' -Name '-x; calc'"
+    assert kind.oneshot_argv(['Get-Process'])[-1] == "& 'Get-Process'"
+    with pytest.raises(ValueError):
+        kind.quote(['Start-Process', 'a\nb'])
+
+
+@pytest.mark.parametrize('system, path, expected', [
+    ('Linux', '/usr/share/applications/code.desktop', ['gio', 'launch', '/usr/share/applications/code.desktop']),
+    ('Linux', '', ['gtk-launch', 'Visual Studio Code']),
+    ('Darwin', '', ['open', '-a', 'Visual Studio Code']),
+    ('Darwin', '/Applications/Visual Studio Code.app', ['open', '/Applications/Visual Studio Code.app']),
+    ('Windows', '', ['Start-Process', 'Visual Studio Code']),
+])
+def test_open_app_argv(monkeypatch, system, path, expected):
+    monkeypatch.setattr(helper_pool.platform, 'system', lambda: system)
+    assert helper_pool.open_app_argv('Visual Studio Code', path) == expected
+
+
+@pytest.mark.parametrize('system, expected', [
+    ('Linux', ['pkill', '-x', 'Say "hi"']),
+    ('Darwin', ['osascript', '-e', 'quit app "Say \\"hi\\""']),
+    ('Windows', ['Stop-Process', '-Name', 'Say "hi"']),
+])
+def test_close_app_argv(monkeypatch, system, expected):
+    monkeypatch.setattr(helper_pool.platform, 'system', lambda: system)
+    assert helper_pool.close_app_argv('Say "hi"') == expected
+
+
+@pytest.mark.parametrize('system, path, expected', [
+    ('Linux', '/var/lib/flatpak/exports/share/applications/org.gimp.GIMP.desktop',
+     ['flatpak', 'uninstall', '-y', '--noninteractive', 'org.gimp.GIMP']),
+    ('Linux', '/var/lib/snapd/desktop/applications/spotify_spotify.desktop', ['snap', 'remove', 'spotify']),
+    ('Linux', '/usr/share/applications/gimp.desktop', None),
+    ('Darwin', '', ['osascript', '-e', 'tell application "Finder" to delete POSIX file "/Applications/GIMP.app"']),
+    ('Windows', '', ['Uninstall-Package', '-Name', 'GIMP', '-Force']),
+])
+def test_uninstall_app_argv(monkeypatch, system, path, expected):
+    monkeypatch.setattr(helper_pool.platform, 'system', lambda: system)
+    assert helper_pool.uninstall_app_argv('GIMP', path) == expected
+
+
+class _Inventory:
+    def installed(self):
+        return (AppRecord('Visual Studio Code', '/usr/share/applications/code.desktop'),)
+
+    def running(self):
+        return ()
+
+
+def test_backend_opens_and_closes_through_the_pool(monkeypatch):
+    calls = []
+
+    def run(argv, timeout=helper_pool.HELPER_TIMEOUT):
+        calls.append(list(argv))
+        return (0, '') if argv[0] != 'pkill' else (1, '')
+    monkeypatch.setattr(helper_pool, 'run_helper_command', run)
+    monkeypatch.setattr(helper_pool.platform, 'system', lambda: 'Linux')
+    monkeypatch.setattr('utils.inventory_watcher._watcher', _Inventory())
+
+    # 当前环境缺少commands.open_app的依赖，SystemBackend改为通过辅助进程池执行
+    backend = SystemBackend()
+    assert backend.open_app('visual studio code') == (True, '成功打开应用: Visual Studio Code')
+    success, message = backend.close_app('微信')
+    assert not success and '微信' in message
+    assert calls == [['gio', 'launch', '/usr/share/applications/code.desktop'], ['pkill', '-x', '微信']]
+
+
+def test_backend_uninstalls_through_the_pool(monkeypatch):
+    calls = []
+
+    def run(argv, timeout=helper_pool.HELPER_TIMEOUT):
+        calls.append(list(argv))
+        return 0, ''
+    monkeypatch.setattr(helper_pool, 'run_helper_command', run)
+    monkeypatch.setattr(helper_pool.platform, 'system', lambda: 'Linux')
+    monkeypatch.setattr('utils.inventory_watcher._watcher', _Inventory())
+
+    backend = SystemBackend()
+    # 普通.desktop应用需要包管理器和管理员权限，不通过辅助进程卸载
+    success, message = backend.uninstall_app('Visual Studio Code')
+    assert not success and '不支持' in message
+    assert calls == []
+
+
+@pytest.mark.skipif(shutil.which('pgrep') is None, reason='需要pgrep')
+def test_measure_savings_runs_a_real_helper():
+    result = helper_pool.measure_savings(runs=2)
+    assert result['command'].startswith('pgrep')
+    assert result['pooled_avg_ms'] > 0 and result['oneshot_avg_ms'] > 0
+    assert result['pooled_by_default'] is False
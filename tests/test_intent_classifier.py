@@ -0,0 +1,111 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from utils import intent_classifier, inventory_watcher
+from utils.app_records import AppRecord, ProcessRecord
+from utils.intent_classifier import (IntentClassifier, calibration_split, evaluation_split, extract_parameter,
+                                     seed_examples)
+
+
+@pytest.fixture(scope='module')
+def model():
+    return IntentClassifier.train(seed_examples(), calibration=calibration_split([])[1])
+
+
+@pytest.fixture
+def shared_model(model, monkeypatch):
+    monkeypatch.setattr(intent_classifier._state, 'model', model)
+    return model
+
+
+class _Inventory:
+    def __init__(self, running=(), installed=()):
+        self._running = tuple(ProcessRecord(name) for name in running)
+        self._installed = tuple(AppRecord(name) for name in installed)
+
+    def running(self):
+        return self._running
+
+    def installed(self):
+        return self._installed
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('卸载下载目录里的安装包', '下载目录里的安装包'),
+    ('打开微信', '微信'),
+    ('帮我把微信关掉', '微信'),
+    ('请打开网易云音乐一下', '网易云音乐'),
+])
+def test_extract_app_name_keeps_single_characters(text, expected):
+    command_type = 'uninstall' if text.startswith('卸载') else ('close' if '关' in text else 'open')
+    assert extract_parameter(command_type, text) == (True, expected)
+
+
+def test_extract_app_name_with_trailing_particle_is_unreliable():
+    assert extract_parameter('open', '打开微信吧') == (False, None)
+
+
+def test_calibrated_on_held_out_phrasings(model):
+    _, calibration, evaluation = evaluation_split([])
+    # 评估样本既不参与训练也不参与拟合温度系数
+    assert not {text for text, _ in evaluation} & {text for text, _ in calibration + seed_examples()}
+    result = model.evaluate(evaluation)
+    assert result['accuracy'] >= 0.75
+    assert result['ece'] <= 0.15
+    command_type, confidence = model.predict('打开Chrome')
+    assert command_type == 'open'
+    assert confidence >= intent_classifier.INTENT_CONFIDENCE
+
+
+def test_open_is_short_circuited(shared_model):
+    assert intent_classifier.classify_command('打开Chrome')[:2] == ('open', 'Chrome')
+
+
+@pytest.mark.parametrize('text', ['删除test.txt', '关闭电脑', '退出登录微信', '停止播放音乐', '卸载下载目录里的安装包'])
+def test_destructive_commands_are_not_short_circuited(shared_model, monkeypatch, text):
+    monkeypatch.setattr(inventory_watcher, '_watcher', _Inventory(running=['微信', 'Spotify'], installed=['QQ']))
+    assert intent_classifier.classify_command(text, threshold=0.0) is None
+
+
+def test_close_and_uninstall_need_inventory_agreement(shared_model, monkeypatch):
+    monkeypatch.setattr(inventory_watcher, '_watcher', None)
+    assert intent_classifier.classify_command('把微信关掉', threshold=0.0) is None
+
+    monkeypatch.setattr(inventory_watcher, '_watcher', _Inventory(running=['微信'], installed=['QQ']))
+    assert intent_classifier.classify_command('把微信关掉', threshold=0.0)[:2] == ('close', '微信')
+    assert intent_classifier.classify_command('卸载QQ', threshold=0.0)[:2] == ('uninstall', 'QQ')
+    assert intent_classifier.classify_command('卸载钉钉', threshold=0.0) is None
+
+
+def test_history_is_capped(tmp_path, monkeypatch):
+    history_file = str(tmp_path / 'history.jsonl')
+    monkeypatch.setattr(intent_classifier, 'INTENT_HISTORY_FILE', history_file)
+    monkeypatch.setattr(intent_classifier, 'INTENT_HISTORY_MAX', 20)
+    monkeypatch.setattr(intent_classifier, 'INTENT_RETRAIN_EVERY', 0)
+    monkeypatch.setattr(intent_classifier._state, 'history_lines', None)
+
+    for index in range(100):
+        intent_classifier.record_example(f'打开应用{index}', 'open')
+
+    history = intent_classifier.load_history(history_file)
+    assert len(history) <= 22
+    assert history[-1] == ('打开应用99', 'open')
+
+
+def test_compact_history_removes_duplicates(tmp_path):
+    history_file = str(tmp_path / 'history.jsonl')
+    with open(history_file, 'w', encoding='utf-8') as f:
+        for text in ['a', 'b', 'a', 'c']:
+            f.write(f'{{"text": "{text}", "label": "open"}}\n')
+    assert intent_classifier.compact_history(history_file, 2) == 2
+    assert intent_classifier.load_history(history_file) == [('a', 'open'), ('c', 'open')]
+
+
+def test_evaluation_split_is_disjoint():
+    history = [(f'打开应用{i}', 'open') for i in range(40)]
+    train, calibration, evaluation = evaluation_split(history)
+    assert len(train) == 28
+    assert sorted(train + calibration[len(intent_classifier._CALIBRATION_EXAMPLES):]
+                  + evaluation[len(intent_classifier._EVALUATION_EXAMPLES):]) == sorted(history)
+    assert not set(calibration) & set(evaluation)
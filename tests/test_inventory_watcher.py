@@ -0,0 +1,107 @@
+import os
+import time
+
+import pytest
+
+from utils.inventory_watcher import InventoryWatcher, read_app
+
+
+def _desktop(path, name):
+    with open(path, 'w', encoding='utf-8') as desktop_file:
+        desktop_file.write(f'[Desktop Entry]\nType=Application\nName={name}\n')
+
+
+def _names(watcher):
+    return {record.name for record in watcher.installed() or ()}
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def watch():
+    watchers = []
+
+    def start(*args, **kwargs):
+        kwargs.setdefault('process_interval', 0.05)
+        kwargs.setdefault('usage_interval', 60)
+        kwargs.setdefault('app_interval', 0.05)
+        watcher = InventoryWatcher(*args, **kwargs).start()
+        watchers.append(watcher)
+        assert watcher.wait_ready(5)
+        return watcher
+
+    yield start
+    for watcher in watchers:
+        watcher.stop()
+
+
+@pytest.mark.parametrize('use_inotify', [True, False])
+def test_missing_directory_is_polled_until_it_appears(tmp_path, watch, use_inotify):
+    system_dir, user_dir = tmp_path / 'system', tmp_path / 'user'
+    system_dir.mkdir()
+    _desktop(system_dir / 'editor.desktop', 'Editor')
+    watcher = watch([str(system_dir), str(user_dir)], use_inotify=use_inotify)
+    assert _names(watcher) == {'Editor'}
+    assert str(user_dir) in watcher.stats()['polled_dirs']
+
+    user_dir.mkdir()
+    _desktop(user_dir / 'player.desktop', 'Player')
+    assert _wait_for(lambda: _names(watcher) == {'Editor', 'Player'})
+
+    # 目录出现后继续跟踪其中的变化
+    _desktop(user_dir / 'viewer.desktop', 'Viewer')
+    os.remove(system_dir / 'editor.desktop')
+    assert _wait_for(lambda: _names(watcher) == {'Player', 'Viewer'})
+
+
+def test_removed_directory_is_polled_again(tmp_path, watch):
+    user_dir = tmp_path / 'user'
+    user_dir.mkdir()
+    _desktop(user_dir / 'player.desktop', 'Player')
+    watcher = watch([str(user_dir)])
+    assert _names(watcher) == {'Player'}
+
+    os.remove(user_dir / 'player.desktop')
+    user_dir.rmdir()
+    assert _wait_for(lambda: watcher.installed() is None)
+
+    user_dir.mkdir()
+    _desktop(user_dir / 'player.desktop', 'Player')
+    assert _wait_for(lambda: _names(watcher) == {'Player'})
+
+
+def test_recursive_scan_finds_shortcuts_in_subfolders(tmp_path, watch):
+    programs = tmp_path / 'Programs'
+    (programs / 'Accessories').mkdir(parents=True)
+    (programs / 'Accessories' / 'Notepad.lnk').write_bytes(b'')
+    (programs / 'Chrome.lnk').write_bytes(b'')
+
+    assert _names(watch([str(programs)], use_inotify=False, recursive=True)) == {'Chrome', 'Notepad'}
+    assert _names(watch([str(programs)], use_inotify=False, recursive=False)) == {'Chrome'}
+
+
+def test_recursive_scan_does_not_enter_app_bundles(tmp_path, watch):
+    applications = tmp_path / 'Applications'
+    (applications / 'Utilities' / 'Terminal.app' / 'Contents').mkdir(parents=True)
+    (applications / 'Safari.app' / 'Contents').mkdir(parents=True)
+    (applications / 'Safari.app' / 'Contents' / 'Helper.app').mkdir()
+
+    watcher = watch([str(applications)], use_inotify=False, recursive=True)
+    assert _names(watcher) == {'Safari', 'Terminal'}
+
+
+def test_desktop_spec_version_is_not_the_app_version(tmp_path):
+    path = tmp_path / 'editor.desktop'
+    path.write_text('[Desktop Entry]\nVersion=1.5\nType=Application\nName=Editor\n', encoding='utf-8')
+    assert read_app(str(path)).version == ''
+
+    path.write_text('[Desktop Entry]\nVersion=1.0\nType=Application\nName=Editor\nX-AppImage-Version=2.3.1\n',
+                    encoding='utf-8')
+    assert read_app(str(path)).version == '2.3.1'
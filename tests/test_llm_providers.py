@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import pytest
+
+from utils import llm_providers
+from utils.llm_providers import LLMProvider, ProviderError, ProviderRouter
+
+
+class _Provider(LLMProvider):
+    """延迟可控的提供方"""
+
+    def __init__(self, name, latency, fail=False):
+        super().__init__(name, 'http://127.0.0.1:9', 'model')
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = False
+
+    async def complete(self, prompt, timeout, max_tokens=250, json_mode=False):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            raise ProviderError(f'{self.name}失败')
+        return self.name
+
+
+async def _complete(router, timeout=2.0):
+    started = time.monotonic()
+    content = await router.complete('prompt', timeout)
+    elapsed = time.monotonic() - started
+    # 让被取消的任务处理取消
+    await asyncio.sleep(0)
+    return content, elapsed
+
+
+@pytest.fixture
+def hedge_delay(monkeypatch):
+    # 没有延迟样本时按默认等待时间对冲
+    monkeypatch.setattr(llm_providers, 'LLM_HEDGE_DEFAULT_DELAY', 0.05)
+    monkeypatch.setattr(llm_providers, 'LLM_HEDGE_MIN_DELAY', 0.01)
+
+
+def test_slow_primary_is_hedged_once_and_faster_answer_wins(hedge_delay):
+    slow, fast, spare = _Provider('slow', 1.0), _Provider('fast', 0.05), _Provider('spare', 0.01)
+    router = ProviderRouter([slow, fast, spare], hedge=True)
+
+    content, elapsed = asyncio.run(_complete(router))
+    assert content == 'fast'
+    assert elapsed < 0.5
+    assert router.hedged_requests == 1
+    assert fast.hedged_wins == 1
+    assert spare.calls == 0
+    assert slow.cancelled
+
+
+def test_primary_wins_and_hedge_is_cancelled(hedge_delay):
+    primary, hedge = _Provider('primary', 0.15), _Provider('hedge', 1.0)
+    router = ProviderRouter([primary, hedge], hedge=True)
+
+    content, _ = asyncio.run(_complete(router))
+    assert content == 'primary'
+    assert router.hedged_requests == 1
+    assert hedge.calls == 1 and hedge.cancelled
+    assert primary.hedged_wins == 0
+
+
+def test_failing_primary_fails_over_immediately(monkeypatch):
+    monkeypatch.setattr(llm_providers, 'LLM_HEDGE_DEFAULT_DELAY', 1.0)
+    broken, backup = _Provider('broken', 0.0, fail=True), _Provider('backup', 0.02)
+    router = ProviderRouter([broken, backup], hedge=True)
+
+    content, elapsed = asyncio.run(_complete(router))
+    assert content == 'backup'
+    # 不等对冲延迟
+    assert elapsed < 0.5
+    assert router.hedged_requests == 0
+
+
+def test_deadline_returns_none_and_cancels(hedge_delay):
+    first, second = _Provider('first', 1.0), _Provider('second', 1.0)
+    router = ProviderRouter([first, second], hedge=True)
+
+    content, elapsed = asyncio.run(_complete(router, timeout=0.2))
+    assert content is None
+    assert elapsed < 0.6
+    assert first.cancelled and second.cancelled
+
+
+def test_ranked_prefers_low_latency_providers():
+    slow, fast = _Provider('slow', 0), _Provider('fast', 0)
+    for _ in range(10):
+        slow.record(1.0, False)
+        fast.record(0.1, False)
+    assert ProviderRouter([slow, fast]).ranked() == [fast, slow]
+
+
+class _Response:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+
+class _Client:
+    def __init__(self, response):
+        self.response = response
+        self.payloads = []
+
+    async def post(self, url, headers, json, timeout):
+        self.payloads.append(json)
+        return self.response
+
+
+@pytest.mark.parametrize('text, json_mode', [
+    ('{"error": {"message": "Unknown parameter: response_format"}}', False),
+    ('{"error": {"message": "Model not found: deepseek-chatt"}}', True),
+    ('{"error": {"message": "maximum context length exceeded"}}', True),
+])
+def test_json_mode_disabled_only_for_response_format_errors(monkeypatch, text, json_mode):
+    client = _Client(_Response(400, text))
+    monkeypatch.setattr(llm_providers, 'get_http_client', lambda: client)
+    provider = LLMProvider('test', 'http://127.0.0.1:9', 'model')
+
+    with pytest.raises(ProviderError):
+        asyncio.run(provider.complete('prompt', 1.0, json_mode=True))
+    assert client.payloads[0]['response_format'] == {'type': 'json_object'}
+    assert provider.json_mode is json_mode
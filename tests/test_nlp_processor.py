@@ -0,0 +1,78 @@
+import pytest
+
+from utils.nlp_processor import NLPProcessor
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('打开Chrome', ('open', 'Chrome')),
+    ('帮我打开微信一下', ('open', '微信')),
+    ('打开和平精英', ('open', '和平精英')),
+    ('关闭微信', ('close', '微信')),
+    ('音量调到30', ('set_volume', 30)),
+    ('把音量调高到80', ('set_volume', 80)),
+    ('音量再大点', ('increase_volume', None)),
+    ('关闭声音', ('mute', None)),
+    ('取消静音', ('unmute', None)),
+    ('亮度调成50', ('set_brightness', 50)),
+    ('北京天气怎么样', ('weather', '北京')),
+])
+def test_parse_command_local(text, expected):
+    assert NLPProcessor.parse_command_local(text) == expected
+
+
+def test_parse_command_local_file_commands():
+    cmd_type, parameter = NLPProcessor.parse_command_local('删除下载目录中的test.txt')
+    assert cmd_type == 'delete_file'
+    assert (parameter['path'], parameter['name']) == ('下载', 'test.txt')
+
+    cmd_type, parameter = NLPProcessor.parse_command_local('在桌面创建报告文件夹')
+    assert cmd_type == 'create_directory'
+    assert (parameter['path'], parameter['name']) == ('桌面', '报告')
+
+    cmd_type, parameter = NLPProcessor.parse_command_local('查看app.log最后100行')
+    assert cmd_type == 'read_file'
+    assert (parameter['name'], parameter['mode'], parameter['lines']) == ('app.log', 'tail', 100)
+
+
+def test_parse_command_local_file_is_not_uninstall():
+    cmd_type, _ = NLPProcessor.parse_command_local('删除test.txt')
+    assert cmd_type == 'delete_file'
+
+
+@pytest.mark.parametrize('text', ['', 'hello', '打开', '删除下载目录'])
+def test_parse_command_local_unrecognized(text):
+    assert NLPProcessor.parse_command_local(text) == (None, None)
+
+
+@pytest.mark.parametrize('text', ['音量再大点', '打开和平精英', '打开Chrome', '音量调到30'])
+def test_single_commands_are_not_multi_step(text):
+    assert not NLPProcessor.is_multi_step(text)
+
+
+@pytest.mark.parametrize('text', ['打开微信和Chrome', '打开微信再打开QQ', '打开微信然后静音'])
+def test_multi_step(text):
+    assert NLPProcessor.is_multi_step(text)
+
+
+def test_parse_plan_local_keeps_app_names_intact():
+    plan = NLPProcessor.parse_plan_local('打开和平精英和微信')
+    assert [step.as_parsed() for step in plan.steps] == [('open', '和平精英'), ('open', '微信')]
+
+
+def test_parse_plan_local_stages():
+    plan = NLPProcessor.parse_plan_local('打开微信和Chrome，然后音量调到30，再在桌面创建报告文件夹')
+    steps = plan.steps
+    assert [step.command_type for step in steps] == ['open', 'open', 'set_volume', 'create_directory']
+    assert steps[0].depends_on == [] and steps[1].depends_on == []
+    assert steps[2].depends_on == ['1', '2']
+    assert steps[3].depends_on == ['3']
+
+
+@pytest.mark.parametrize('text, mode, lines', [
+    ('看一下app.log前20行', 'head', 20),
+    ('看下app.log最后10行', 'tail', 10),
+])
+def test_parse_command_local_casual_read_verbs(text, mode, lines):
+    cmd_type, parameter = NLPProcessor.parse_command_local(text)
+    assert cmd_type == 'read_file'
+    assert (parameter['name'], parameter['mode'], parameter['lines']) == ('app.log', mode, lines)
@@ -0,0 +1,47 @@
+import os
+
+from utils.replay import load_corpus, read_logged_commands, replay
+from utils.weather_cache import WeatherProvider, get_weather_cache
+
+FIXTURE_LOG = os.path.join(os.path.dirname(__file__), 'fixtures', 'app.log')
+
+
+def test_read_logged_commands():
+    commands = read_logged_commands(FIXTURE_LOG)
+    assert commands[0] == '打开Chrome'
+    assert len(commands) == 8
+    assert load_corpus(FIXTURE_LOG) == commands
+
+
+def test_offline_replay_on_simulated_backend():
+    commands = read_logged_commands(FIXTURE_LOG)
+    report = replay(commands, rate=0, concurrency=4)
+    summary = report.summary()
+
+    assert summary['commands'] == len(commands)
+    assert summary['llm_requests'] == 0
+    assert not any(error.startswith('exception') for error in summary['errors'])
+    # 只有最后一条不是命令
+    assert summary['succeeded'] == len(commands) - 1
+    assert summary['parse_sources'].get('local', 0) > 0
+    assert 'plan' in summary['by_command_type']
+    assert summary['backend_operations']
+
+
+class _UnreachableProvider(WeatherProvider):
+    name = 'unreachable'
+
+    def fetch(self, location):
+        raise AssertionError('dry-run回放不应访问天气服务')
+
+
+def test_dry_run_replay_uses_stub_weather(monkeypatch):
+    shared = get_weather_cache()
+    monkeypatch.setattr(shared, 'provider', _UnreachableProvider())
+
+    report = replay(['北京天气怎么样', '北京天气怎么样'], rate=0, concurrency=1)
+    summary = report.summary()
+    assert summary['succeeded'] == 2
+    assert report.counters['weather_cache'] == {'hits': 1, 'stale_hits': 0, 'misses': 1}
+    # 共享缓存没有被模拟数据污染
+    assert get_weather_cache() is shared and shared.misses == 0
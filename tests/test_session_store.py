@@ -0,0 +1,130 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+# 包的__init__会导入依赖google-adk的会话服务，存储模块本身只用标准库，按文件路径单独加载
+_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'agents', 'local_app_manager', 'session_store.py')
+_spec = importlib.util.spec_from_file_location('session_store', _PATH)
+session_store = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(session_store)
+SessionStore = session_store.SessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _key(index):
+    return ('app', 'user', f's{index}')
+
+
+def _store(clock=None, **kwargs):
+    kwargs.setdefault('db_path', None)
+    kwargs.setdefault('idle_ttl', 0)
+    return SessionStore(json.dumps, json.loads, clock=clock or FakeClock(), **kwargs)
+
+
+def test_lru_eviction_keeps_recently_used():
+    store = _store(max_sessions=2)
+    store.put(_key(1), {'n': 1})
+    store.put(_key(2), {'n': 2})
+    assert store.get(_key(1)) == {'n': 1}
+
+    store.put(_key(3), {'n': 3})
+    assert len(store) == 2
+    assert store.peek(_key(2)) is None
+    assert store.get(_key(2)) is None
+    assert store.peek(_key(1)) == {'n': 1}
+
+    stats = store.stats()
+    assert stats['evicted_lru'] == 1
+    assert stats['dropped'] == 1
+    assert stats['peak_sessions'] == 2
+    assert stats['stored_sessions'] is None
+
+
+def test_peek_does_not_refresh_order():
+    store = _store(max_sessions=2)
+    store.put(_key(1), 'a')
+    store.put(_key(2), 'b')
+    assert store.peek(_key(1)) == 'a'
+
+    store.put(_key(3), 'c')
+    assert store.peek(_key(1)) is None
+    assert store.peek(_key(2)) == 'b'
+
+
+def test_idle_sessions_are_swept():
+    clock = FakeClock()
+    store = _store(clock, idle_ttl=10)
+    store.put(_key(1), 'old')
+    clock.now = 8
+    store.put(_key(2), 'new')
+
+    # 两次检查之间至少间隔_SWEEP_INTERVAL秒
+    clock.now = 12
+    assert store.get(_key(2)) == 'new'
+    assert store.peek(_key(1)) == 'old'
+    clock.now = 14
+    assert store.get(_key(2)) == 'new'
+    assert store.peek(_key(1)) is None
+    assert store.stats()['evicted_idle'] == 1
+    assert store.stats()['evicted_lru'] == 0
+
+
+def test_resize_and_delete_track_bytes():
+    store = _store()
+    store.put(_key(1), 'x', size=100)
+    store.put(_key(2), 'y', size=50)
+    assert store.stats()['estimated_bytes'] == 150
+
+    store.resize(_key(1), 300)
+    assert store.size_of(_key(1)) == 300
+    assert store.stats()['estimated_bytes'] == 350
+    assert store.stats()['peak_bytes'] == 350
+
+    # 替换已有会话时不重复计算
+    store.put(_key(2), 'y', size=20)
+    store.delete(_key(1))
+    store.resize(_key(1), 999)
+    assert store.stats()['estimated_bytes'] == 20
+    assert store.session_ids('app', 'user') == ['s2']
+
+
+def test_evicted_sessions_persist_and_restore(tmp_path):
+    db_path = str(tmp_path / 'sessions.db')
+    store = _store(max_sessions=1, db_path=db_path)
+    store.put(_key(1), {'n': 1})
+    store.put(_key(2), {'n': 2})
+    assert store.stats()['persisted'] == 1
+    assert store.stats()['stored_sessions'] == 1
+    assert store.session_ids('app', 'user') == ['s1', 's2']
+
+    assert store.get(_key(1)) == {'n': 1}
+    stats = store.stats()
+    assert stats['restored'] == 1
+    assert stats['dropped'] == 0
+    assert store.peek(_key(2)) is None
+
+    store.delete(_key(2))
+    assert store.session_ids('app', 'user') == ['s1']
+
+    store.close()
+    reopened = _store(db_path=db_path)
+    assert reopened.get(_key(1)) == {'n': 1}
+    reopened.close()
+
+
+@pytest.mark.parametrize('max_sessions', [0, -3])
+def test_max_sessions_is_at_least_one(max_sessions):
+    store = _store(max_sessions=max_sessions)
+    store.put(_key(1), 'a')
+    store.put(_key(2), 'b')
+    assert len(store) == 1
+    assert store.peek(_key(2)) == 'b'
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+import app
+from commands.backend import use_backend
+from commands.simulated_backend import SimulatedBackend
+from utils.system_utils import SystemUtils
+
+
+@pytest.fixture
+def backend():
+    simulated = SimulatedBackend(latency={})
+    with use_backend(simulated):
+        yield simulated
+
+
+def test_open_app_end_to_end(backend):
+    success, message = app.process_command('打开Chrome')
+    assert success, message
+    assert backend.operations['open_app'] == 1
+    assert 'Google Chrome' in backend.snapshot()['running']
+
+
+def test_close_app_end_to_end(backend):
+    success, message = app.process_command('关闭微信')
+    assert success, message
+    assert '微信' not in backend.snapshot()['running']
+
+
+def test_set_volume_end_to_end(backend):
+    success, message = app.process_command('音量调到30')
+    assert success, message
+    assert backend.snapshot()['volume'] == 30
+
+
+def test_multi_step_plan_end_to_end(backend):
+    success, message = app.process_command('打开QQ和Spotify，然后静音')
+    assert success, message
+    snapshot = backend.snapshot()
+    assert {'QQ', 'Spotify'} <= set(snapshot['running'])
+    assert snapshot['muted']
+
+
+def test_create_and_delete_file_end_to_end(backend):
+    success, message = app.process_command('在桌面创建报告文件夹')
+    assert success, message
+    assert any(path.endswith(os.path.join('桌面', '报告')) or path.endswith(os.path.join('Desktop', '报告'))
+               for path in backend.snapshot()['directories'])
+
+    downloads = SystemUtils.find_directory_by_name('下载') or SystemUtils.resolve_path('下载')
+    target = os.path.join(os.path.normpath(downloads), 'test.txt')
+    backend.create_directory(os.path.dirname(target))
+    backend.create_file(target, 'hello')
+    success, message = app.process_command('删除下载目录中的test.txt')
+    assert success, message
+    assert target not in backend.snapshot()['files']
+
+
+def test_schema_validated_name_only_parameters_target_the_named_entry(backend):
+    from utils.command_schema import validate
+    cwd = os.path.realpath(os.getcwd())
+
+    parsed = app.normalize_parsed_result(validate('create_directory', 'test'))
+    success, message = app.execute_command('创建test文件夹', parsed)
+    assert success, message
+    assert os.path.join(cwd, 'test') in {os.path.realpath(path) for path in backend.snapshot()['directories']}
+
+    backend.create_file(os.path.join(cwd, 'a.txt'), 'hello')
+    parsed = app.normalize_parsed_result(validate('read_file', {'name': 'a.txt'}))
+    success, message = app.execute_command('读取a.txt', parsed)
+    assert success and 'hello' in message, message
+
+
+def test_unrecognized_command(backend):
+    success, message = app.process_command('今天心情不错')
+    assert not success
+    assert '无法理解命令' in message
+    assert not backend.operations
@@ -0,0 +1,22 @@
+import os
+
+from utils.startup import STARTUP_BUDGET_MS, check_startup_budget
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 只在第一次用到时才加载的重量级依赖
+_LAZY_MODULES = ('httpx', 'requests', 'fastapi', 'uvicorn', 'numpy', 'sklearn', 'google')
+
+
+def test_app_import_stays_within_startup_budget():
+    # 子进程冷启动导入app；偶发的调度抖动不算超出预算，取三次中最快的一次
+    results = []
+    for _ in range(3):
+        ok, import_ms, records = check_startup_budget('app', STARTUP_BUDGET_MS, cwd=ROOT)
+        results.append(import_ms)
+        if ok:
+            break
+    assert ok, f"导入app耗时{min(results):.1f}ms，超出预算{STARTUP_BUDGET_MS:.0f}ms"
+
+    eager = sorted({r.name for r in records if r.name.split('.')[0] in _LAZY_MODULES})
+    assert not eager, f"导入app时加载了应延迟导入的模块: {eager}"
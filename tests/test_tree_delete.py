@@ -0,0 +1,148 @@
+import os
+import threading
+
+import pytest
+
+import app
+from commands.backend import SystemBackend, use_backend
+from utils.tree_delete import PendingDeletions, TreeDeleter, pending_deletions
+
+
+@pytest.fixture
+def backend():
+    with use_backend(SystemBackend()):
+        yield
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / 'build'
+    (root / 'a' / 'b').mkdir(parents=True)
+    (root / 'a' / 'b' / 'x.txt').write_text('x' * 10)
+    (root / 'y.txt').write_text('y')
+    return str(root)
+
+
+@pytest.mark.parametrize('path', ['/', '/home', '/usr', '/etc', '/var', '/usr/local'])
+def test_system_directories_are_protected(path):
+    assert TreeDeleter.is_protected(path)
+
+
+def test_home_and_its_ancestors_are_protected():
+    home = os.path.expanduser('~')
+    assert TreeDeleter.is_protected(home)
+    assert TreeDeleter.is_protected(os.path.dirname(home))
+
+
+def test_ancestor_of_standard_directory_is_protected(tmp_path):
+    # 当前目录（测试中为tmp_path）是标准目录，它的上级目录同样包含受保护目录
+    assert TreeDeleter.is_protected(str(tmp_path))
+    assert TreeDeleter.is_protected(str(tmp_path.parent))
+
+
+def test_extra_protected_paths(tmp_path, monkeypatch):
+    keep = tmp_path / 'data' / 'keep'
+    keep.mkdir(parents=True)
+    monkeypatch.setattr('utils.tree_delete.DELETE_PROTECTED_PATHS', str(keep))
+    assert TreeDeleter.is_protected(str(keep))
+    assert TreeDeleter.is_protected(str(tmp_path / 'data'))
+
+
+def test_ordinary_subdirectory_is_not_protected(tree):
+    assert not TreeDeleter.is_protected(tree)
+    assert not TreeDeleter.is_protected(os.path.join(tree, 'a'))
+
+
+def test_dry_run_then_confirm_deletes(backend, tree):
+    success, message = app.delete_directory(tree)
+    assert success and '确认删除目录' in message
+    assert os.path.isdir(tree)
+
+    success, message = app.handle_confirmation(f'确认删除目录 {tree}')
+    assert success, message
+    assert not os.path.exists(tree)
+
+
+def test_confirmation_without_dry_run_is_rejected(backend, tree):
+    success, message = app.handle_confirmation(f'确认删除目录 {tree}')
+    assert not success
+    assert os.path.isdir(tree)
+
+
+def test_confirmation_from_another_session_is_rejected(backend, tree):
+    app.delete_directory(tree, session='ws:a')
+    success, _ = app.handle_confirmation(f'确认删除目录 {tree}', session='ws:b')
+    assert not success
+    assert os.path.isdir(tree)
+
+    success, _ = app.handle_confirmation(f'确认删除目录 {tree}', session='ws:a')
+    assert success
+    assert not os.path.exists(tree)
+
+
+def test_confirmation_is_single_use(backend, tree):
+    app.delete_directory(tree)
+    assert app.handle_confirmation(f'确认删除目录 {tree}')[0]
+    os.makedirs(tree)
+    success, _ = app.handle_confirmation(f'确认删除目录 {tree}')
+    assert not success
+    assert os.path.isdir(tree)
+
+
+def test_session_end_discards_pending(backend, tree):
+    app.delete_directory(tree, session='ws:a')
+    pending_deletions.discard_session('ws:a')
+    success, _ = app.handle_confirmation(f'确认删除目录 {tree}', session='ws:a')
+    assert not success
+
+
+def test_protected_directory_is_never_deleted(backend, tmp_path):
+    success, message = app.delete_directory(str(tmp_path))
+    assert not success and '受保护' in message
+    success, _ = app.handle_confirmation(f'确认删除目录 {tmp_path}')
+    assert not success
+    assert os.path.isdir(tmp_path)
+
+
+def test_pending_deletion_expires():
+    now = [0.0]
+    pending = PendingDeletions(ttl=10, clock=lambda: now[0])
+    pending.issue('s', '/tmp/x')
+    now[0] = 11
+    assert not pending.consume('s', '/tmp/x')
+
+    pending.issue('s', '/tmp/x/')
+    assert pending.consume('s', '/tmp/x')
+    assert not pending.consume('s', '/tmp/x')
+
+
+def test_files_in_one_directory_are_unlinked_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr('utils.tree_delete.UNLINK_BATCH', 10)
+    root = tmp_path / 'flat'
+    root.mkdir()
+    for i in range(95):
+        (root / f'{i}.txt').write_text('x')
+    (root / 'sub').mkdir()
+    (root / 'sub' / 'z.txt').write_text('z')
+
+    threads = set()
+    unlink = TreeDeleter._unlink
+
+    def recording_unlink(path):
+        threads.add(threading.current_thread().name)
+        unlink(path)
+    monkeypatch.setattr(TreeDeleter, '_unlink', staticmethod(recording_unlink))
+
+    stats = TreeDeleter.delete(str(root), workers=4)
+    assert not root.exists()
+    assert (stats.removed_files, stats.removed_directories, stats.errors) == (96, 2, [])
+    assert all(name.startswith('unlink') for name in threads)
+
+
+def test_delete_progress_reaches_the_caller(backend, tree, monkeypatch):
+    monkeypatch.setattr('utils.tree_delete.PROGRESS_INTERVAL', 0)
+    updates = []
+    app.delete_directory(tree)
+    success, _ = app.handle_confirmation(f'确认删除目录 {tree}', progress=lambda stats: updates.append(stats.to_dict()))
+    assert success
+    assert updates[-1]['removed_files'] == 2 and updates[-1]['removed_directories'] == 3
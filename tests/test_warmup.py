@@ -0,0 +1,78 @@
+import time
+
+from commands.backend import SystemBackend, use_backend
+from commands.simulated_backend import SimulatedBackend
+from utils import warmup
+from utils.warmup import Warmup, warm_backends
+
+
+def test_warm_backends_loads_only_existing_modules():
+    with use_backend(SystemBackend()):
+        loaded = warm_backends()
+
+    assert 'commands.disk_usage' in loaded
+    assert 'utils.file_reader' in loaded
+    # 当前安装中不存在的模块不会被导入
+    assert 'commands.list_running' not in loaded
+    assert 'commands.file_operations' not in loaded
+    assert not warmup._module_exists('commands.list_running')
+    assert warmup._module_exists('commands.disk_usage')
+
+
+def test_warm_backends_skips_simulated_backend():
+    with use_backend(SimulatedBackend(latency={})):
+        assert warm_backends() == []
+
+
+def test_warmup_reports_failed_tasks():
+    def fail():
+        raise RuntimeError('boom')
+
+    task_warmup = Warmup({'ok': lambda: 1, 'bad': fail}).start()
+    assert task_warmup.wait(5)
+
+    stats = {item['name']: item for item in task_warmup.stats()}
+    assert stats['ok']['status'] == 'done' and stats['ok']['detail'] == 1
+    assert stats['bad']['status'] == 'failed' and stats['bad']['detail'] == 'boom'
+
+    report = task_warmup.first_command_report(time.perf_counter(), 12.0)
+    assert '未用到: ok' in report
+    assert '未完成或失败: bad' in report
+
+
+def _finished_warmup(elapsed, details=None):
+    task_warmup = Warmup({name: (lambda: None) for name in elapsed})
+    for task in task_warmup.tasks:
+        task.status = warmup.STATUS_DONE
+        task.elapsed_ms = elapsed[task.name]
+        task.finished_at = 0.0
+        task.detail = (details or {}).get(task.name)
+    return task_warmup
+
+
+def test_first_command_report_counts_only_tasks_on_the_command_path():
+    task_warmup = _finished_warmup(
+        {'llm_connection': 300, 'directories': 40, 'backends': 200, 'intent_classifier': 900,
+         'frequent_commands': 1500},
+        {'intent_classifier': False, 'frequent_commands': [('打开微信', True)]})
+
+    report = task_warmup.first_command_report(1.0, 50.0, '音量调到30', ['set_volume'])
+    # 并行任务取最长的一个，不把耗时相加
+    assert '预热至少节省300ms' in report
+    assert 'llm_connection 300ms、backends 200ms' in report
+    assert '未用到: directories、intent_classifier、frequent_commands' in report
+
+    report = task_warmup.first_command_report(1.0, 50.0, '打开微信', ['open'])
+    assert '预热至少节省1500ms' in report and 'frequent_commands 1500ms' in report
+
+
+def test_first_command_report_for_plan_and_local_commands():
+    task_warmup = _finished_warmup({'directories': 40, 'backends': 200, 'intent_classifier': 900},
+                                   {'intent_classifier': True})
+
+    report = task_warmup.first_command_report(1.0, 50.0, '天气', ['weather'])
+    assert '预热至少节省900ms' in report and '未用到: directories、backends' in report
+
+    report = task_warmup.first_command_report(1.0, 50.0, '打开QQ然后在桌面创建报告文件夹',
+                                              ['open', 'create_directory'])
+    assert '未用到' not in report
@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+
+import pytest
+
+from utils.weather_cache import StubWeatherProvider, WeatherCache
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return str(tmp_path / 'cache' / 'weather.json')
+
+
+def _age(cache, location, seconds):
+    """把缓存条目的获取时间往前推"""
+    cache._entries[cache.normalize_location(location)]['fetched_at'] -= seconds
+
+
+def test_fresh_stale_and_expired(cache_file):
+    provider = StubWeatherProvider()
+    cache = WeatherCache(provider, ttl=60, max_stale=600, cache_file=cache_file)
+
+    assert cache.get('北京市')[1] == 'fetched'
+    assert cache.get('北京')[1] == 'fresh'
+
+    _age(cache, '北京', 120)
+    assert cache.get('北京')[1] == 'stale'
+    cache.wait_for_refresh(5)
+    assert provider.calls == 2
+    assert cache.get('北京')[1] == 'fresh'
+
+    _age(cache, '北京', 1000)
+    assert cache.get('北京')[1] == 'fetched'
+    assert (cache.hits, cache.stale_hits, cache.misses) == (2, 1, 2)
+
+
+def test_expired_entry_is_returned_when_fetch_fails(cache_file):
+    provider = StubWeatherProvider()
+    cache = WeatherCache(provider, ttl=60, max_stale=0, cache_file=cache_file)
+    cache.get('上海')
+    _age(cache, '上海', 1000)
+
+    def fail(location):
+        raise OSError('离线')
+    provider.fetch = fail
+    data, source = cache.get('上海')
+    assert source == 'stale' and data['location'] == '上海'
+    with pytest.raises(OSError):
+        cache.get('广州')
+
+
+def test_cache_survives_restart(cache_file):
+    WeatherCache(StubWeatherProvider(), cache_file=cache_file).get('杭州')
+    provider = StubWeatherProvider()
+    cache = WeatherCache(provider, cache_file=cache_file)
+    assert cache.get('杭州')[1] == 'fresh'
+    assert provider.calls == 0
+
+
+def test_concurrent_gets_and_saves(cache_file):
+    cache = WeatherCache(StubWeatherProvider(), ttl=60, cache_file=cache_file)
+    locations = [f'城市{i}' for i in range(20)]
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def worker():
+        try:
+            barrier.wait()
+            for _ in range(5):
+                for location in locations:
+                    cache.get(location)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert cache.hits + cache.stale_hits + cache.misses == 8 * 5 * len(locations)
+    assert cache.misses >= len(locations)
+
+    # 最后一次保存的是最新快照，且没有遗留临时文件
+    with open(cache_file, encoding='utf-8') as f:
+        assert set(json.load(f)) == {cache.normalize_location(location) for location in locations}
+    assert os.listdir(os.path.dirname(cache_file)) == ['weather.json']
@@ -0,0 +1,188 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import web_server
+from commands.backend import use_backend
+from commands.simulated_backend import SimulatedBackend
+
+
+@pytest.fixture
+def client():
+    with use_backend(SimulatedBackend(latency={})):
+        with TestClient(web_server.create_app()) as test_client:
+            yield test_client
+
+
+def test_command_from_local_page_is_accepted(client):
+    response = client.post('/api/command', json={'command': '打开Chrome'},
+                           headers={'Origin': 'http://localhost:8000'})
+    assert response.status_code == 200
+    assert response.json()['success']
+
+
+def test_command_without_origin_is_accepted(client):
+    response = client.post('/api/command', json={'command': '打开Chrome'})
+    assert response.status_code == 200
+
+
+def test_command_from_foreign_origin_is_rejected(client):
+    response = client.post('/api/command', json={'command': '打开Chrome'},
+                           headers={'Origin': 'http://evil.example'})
+    assert response.status_code == 403
+
+
+def test_allowed_origins(client, monkeypatch):
+    monkeypatch.setattr(web_server, 'WEB_ALLOWED_ORIGINS', {'https://panel.example'})
+    assert client.post('/api/command', json={'command': '打开Chrome'},
+                       headers={'Origin': 'https://panel.example'}).status_code == 200
+    assert client.post('/api/command', json={'command': '打开Chrome'},
+                       headers={'Origin': 'http://localhost:8000'}).status_code == 403
+
+
+def test_token_is_required_when_configured(client, monkeypatch):
+    monkeypatch.setattr(web_server, 'WEB_TOKEN', 'secret')
+    assert client.post('/api/command', json={'command': '打开Chrome'}).status_code == 403
+    assert client.post('/api/command', json={'command': '打开Chrome'},
+                       headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    assert client.post('/api/command', json={'command': '打开Chrome'},
+                       headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect('/ws') as websocket:
+            websocket.receive_json()
+    with client.websocket_connect('/ws?token=secret') as websocket:
+        websocket.send_json({'id': 1, 'command': '打开Chrome'})
+        assert websocket.receive_json()['status'] == 'parsed'
+
+
+def test_websocket_from_foreign_origin_is_rejected(client):
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with client.websocket_connect('/ws', headers={'Origin': 'http://evil.example'}) as websocket:
+            websocket.receive_json()
+    assert excinfo.value.code == 1008
+
+
+@pytest.mark.parametrize('message, error', [
+    ('not json', 'JSON'),
+    ('[1, 2]', 'JSON对象'),
+    ('{"id": 1}', 'command'),
+    ('{"id": [1], "command": "打开Chrome"}', 'id'),
+])
+def test_websocket_rejects_malformed_messages(client, message, error):
+    with client.websocket_connect('/ws') as websocket:
+        websocket.send_text(message)
+        reply = websocket.receive_json()
+        assert reply['status'] == 'error' and error in reply['message']
+
+        # 连接在错误消息之后仍然可用
+        websocket.send_json({'id': 2, 'command': '打开Chrome'})
+        assert websocket.receive_json() == {'id': 2, 'status': 'parsed', 'command_type': 'open'}
+        done = websocket.receive_json()
+        assert done['id'] == 2 and done['status'] == 'done' and done['success']
+
+
+def test_delete_confirmation_is_bound_to_connection(client, tmp_path):
+    target = tmp_path / 'build'
+    target.mkdir()
+    backend = SimulatedBackend(latency={})
+    backend.create_directory(str(target))
+    with use_backend(backend):
+        with client.websocket_connect('/ws') as first, client.websocket_connect('/ws') as second:
+            first.send_json({'id': 1, 'command': '删除build文件夹'})
+            replies = [first.receive_json(), first.receive_json()]
+            assert '确认删除目录' in replies[-1]['message']
+
+            second.send_json({'id': 1, 'command': f'确认删除目录 {target}'})
+            assert not second.receive_json()['success']
+            assert str(target) in backend.snapshot()['directories']
+
+            first.send_json({'id': 2, 'command': f'确认删除目录 {target}'})
+            progress = first.receive_json()
+            assert progress['status'] == 'progress' and progress['removed_directories'] == 1
+            assert first.receive_json()['success']
+            assert str(target) not in backend.snapshot()['directories']
+
+
+def test_inventory_websocket_from_foreign_origin_is_rejected(client):
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with client.websocket_connect('/ws/inventory', headers={'Origin': 'http://evil.example'}) as websocket:
+            websocket.receive_json()
+    assert excinfo.value.code == 1008
+
+
+def test_health_hides_details_without_access(client, monkeypatch):
+    assert 'llm_providers' in client.get('/api/health').json()
+
+    monkeypatch.setattr(web_server, 'WEB_TOKEN', 'secret')
+    assert client.get('/api/health').json() == {'status': 'ok'}
+    assert client.get('/api/health', headers={'Origin': 'http://evil.example'}).json() == {'status': 'ok'}
+    details = client.get('/api/health', headers={'Authorization': 'Bearer secret'}).json()
+    assert 'llm_providers' in details and 'inventory' in details
+
+
+class _Event:
+    def to_dict(self):
+        return {'type': 'app_added', 'name': 'GIMP'}
+
+
+class _Watcher:
+    def __init__(self):
+        self.subscribers = []
+        self.unsubscribed = threading.Event()
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+        def unsubscribe():
+            self.subscribers.remove(callback)
+            self.unsubscribed.set()
+        return unsubscribe
+
+    def stats(self):
+        return {}
+
+    def stop(self):
+        pass
+
+
+def test_inventory_websocket_unsubscribes_idle_client(client, monkeypatch):
+    watcher = _Watcher()
+    monkeypatch.setattr('utils.inventory_watcher._watcher', watcher)
+
+    with client.websocket_connect('/ws/inventory') as websocket:
+        deadline = time.monotonic() + 5
+        while not watcher.subscribers and time.monotonic() < deadline:
+            time.sleep(0.01)
+        watcher.subscribers[0](_Event())
+        assert websocket.receive_json() == {'type': 'app_added', 'name': 'GIMP'}
+
+    # 断开后没有新事件，订阅也会被取消
+    assert watcher.unsubscribed.wait(5)
+    assert watcher.subscribers == []
+
+
+def test_dispatch_runs_the_shared_flow_with_timings(client):
+    dispatcher = web_server.CommandDispatcher(parse_timeout=3)
+
+    async def run():
+        parsed = []
+
+        async def on_parsed(result):
+            parsed.append(result['command_type'])
+        single = await dispatcher.dispatch('打开Chrome', on_parsed)
+        plan = await dispatcher.dispatch('打开QQ和Spotify，然后静音', on_parsed)
+        return parsed, single, plan
+
+    try:
+        parsed, single, plan = asyncio.run(run())
+    finally:
+        dispatcher.shutdown()
+    assert parsed == ['open', 'plan']
+    assert single[0] and {'parse_ms', 'execute_ms', 'total_ms'} <= set(single[2])
+    assert plan[0] and plan[2]['command_type'] == 'plan' and len(plan[2]['steps']) == 3
@@ -5,4 +5,16 @@
 工具函数包，包含各种辅助功能。
 """
 
-from .mac_utils import MacAppController, mac_controller
\ No newline at end of file
+# macOS后端在首次访问时才导入，避免导入utils下任何模块都加载平台相关代码
+_LAZY_EXPORTS = {
+    'MacAppController': 'mac_utils',
+    'mac_controller': 'mac_utils',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        import importlib
+        module = importlib.import_module(f".{_LAZY_EXPORTS[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,578 @@
+"""
+音量/亮度调节调度模块，合并短时间内的连续调节请求。
+
+语音用户经常连续说几次"音量大点"，如果每次都启动一个pactl/amixer/osascript
+子进程，开销远大于调节本身。空闲时的请求立即同步下发，结果如实返回；紧随其后、
+落在时间窗口内的请求合并成一个最终目标值，只下发一次，下发失败会在下一次调节或
+查询时报告。每个设备保持一个长期存在的控制通道（常驻的amixer/osascript进程
+或直接写sysfs背光文件，常驻进程下发后回读确认已生效），并在ADJUST_LEVEL_TTL内缓存最近一次的值，过期后重新读取
+（音量/亮度可能被键盘或其他程序修改）。
+"""
+import os
+import re
+import glob
+import time
+import shutil
+import platform
+import threading
+import subprocess
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 合并请求的时间窗口（秒）：窗口内的新请求会推迟下发
+ADJUST_WINDOW = float(os.getenv('ADJUST_WINDOW', '0.15'))
+
+# 从第一个请求开始最多推迟多久（秒），避免持续输入时一直不生效
+ADJUST_MAX_DELAY = float(os.getenv('ADJUST_MAX_DELAY', '0.5'))
+
+# 缓存的当前值的有效期（秒），过期后查询会重新读取设备
+ADJUST_LEVEL_TTL = float(os.getenv('ADJUST_LEVEL_TTL', '2.0'))
+
+# 增大/减小时的默认步长
+DEFAULT_STEP = 10
+
+# 子进程命令的超时时间（秒）
+COMMAND_TIMEOUT = 3
+
+# 常驻进程下发的设置回读确认时允许的误差（百分点，设备按原始刻度取整）
+_LEVEL_TOLERANCE = 1
+
+
+def _run(args) -> Optional[str]:
+    """执行一次性命令，返回标准输出，失败返回None"""
+    try:
+        result = subprocess.run(args, capture_output=True, text=True, timeout=COMMAND_TIMEOUT)
+        if result.returncode == 0:
+            return result.stdout
+        logger.debug(f"命令执行失败: {args}, {result.stderr.strip()}")
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"命令执行出错: {args}, {str(e)}")
+    return None
+
+
+class ControlChannel:
+    """设备控制通道接口，数值范围为0-100"""
+
+    name = 'base'
+
+    def get_level(self) -> Optional[int]:
+        raise NotImplementedError
+
+    def set_level(self, level: int) -> bool:
+        raise NotImplementedError
+
+    def set_muted(self, muted: bool) -> bool:
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+class _PersistentProcess:
+    """
+    常驻子进程，通过标准输入逐行发送命令，进程退出后自动重启；错误输出记录到日志
+
+    写入标准输入只说明命令已送达，不说明已生效，需要结果的调用方使用send_confirmed()。
+    """
+
+    def __init__(self, args, setup: Optional[List[str]] = None):
+        """
+        Args:
+            args: 命令行
+            setup: 每次（重新）启动进程后先发送的初始化命令
+        """
+        self.args = args
+        self.setup = list(setup or [])
+        self.errors: Deque[str] = deque(maxlen=20)
+        self.error_count = 0
+        self.starts = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen:
+        logger.debug(f"启动常驻控制进程: {self.args}")
+        self.starts += 1
+        process = subprocess.Popen(self.args, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE, text=True, bufsize=1,
+                                   encoding='utf-8', errors='replace')
+        threading.Thread(target=self._read_errors, args=(process,), daemon=True,
+                         name=f"control-{os.path.basename(self.args[0])}-stderr").start()
+        return process
+
+    def _read_errors(self, process: subprocess.Popen) -> None:
+        for line in process.stderr:
+            line = line.strip()
+            if line:
+                self.errors.append(line)
+                self.error_count += 1
+                logger.warning(f"控制进程{self.args[0]}报告错误: {line}")
+
+    def send(self, line: str) -> bool:
+        with self._lock:
+            for _ in range(2):
+                lines = [line]
+                if self._process is None or self._process.poll() is not None:
+                    try:
+                        self._process = self._start()
+                    except OSError as e:
+                        logger.warning(f"无法启动控制进程: {self.args}, {str(e)}")
+                        return False
+                    # 新进程中没有之前的初始化状态，重新发送
+                    lines = self.setup + lines
+                try:
+                    self._process.stdin.write(''.join(item + "\n" for item in lines))
+                    self._process.stdin.flush()
+                    return True
+                except (BrokenPipeError, OSError):
+                    self._process = None
+            return False
+
+    def send_confirmed(self, line: str, confirm: Callable[[], bool], timeout: float = COMMAND_TIMEOUT) -> bool:
+        """
+        发送命令并等待其生效
+
+        Args:
+            line: 命令
+            confirm: 检查命令是否已生效（例如回读设备的当前值）
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            bool: confirm()返回True时成功；无法发送、进程报告了错误或超时未生效时失败
+        """
+        errors = self.error_count
+        if not self.send(line):
+            return False
+        deadline = time.monotonic() + timeout
+        delay = 0.01
+        while True:
+            if self.error_count > errors:
+                logger.warning(f"控制命令未生效: {line}, {self.errors[-1] if self.errors else ''}")
+                return False
+            if confirm():
+                return True
+            if time.monotonic() >= deadline:
+                logger.warning(f"控制命令超时未生效: {line}")
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._process and self._process.poll() is None:
+                try:
+                    self._process.stdin.close()
+                    self._process.wait(timeout=1)
+                except (OSError, subprocess.TimeoutExpired):
+                    self._process.kill()
+            self._process = None
+
+
+def _level_matches(level: Optional[int], target: int) -> bool:
+    return level is not None and abs(level - target) <= _LEVEL_TOLERANCE
+
+
+class AmixerChannel(ControlChannel):
+    """Linux ALSA音量，设置通过常驻的`amixer -s`进程下发，并回读确认已生效"""
+
+    name = 'amixer'
+
+    def __init__(self, control: str = 'Master'):
+        self.control = control
+        self._process = _PersistentProcess(['amixer', '-q', '-s'])
+
+    def _get(self) -> str:
+        return _run(['amixer', 'get', self.control]) or ''
+
+    def get_level(self) -> Optional[int]:
+        match = re.search(r'\[(\d+)%\]', self._get())
+        return int(match.group(1)) if match else None
+
+    def get_muted(self) -> Optional[bool]:
+        match = re.search(r'\[(on|off)\]', self._get())
+        return match.group(1) == 'off' if match else None
+
+    def set_level(self, level: int) -> bool:
+        return self._process.send_confirmed(f"sset {self.control} {level}%",
+                                            lambda: _level_matches(self.get_level(), level))
+
+    def set_muted(self, muted: bool) -> bool:
+        return self._process.send_confirmed(f"sset {self.control} {'mute' if muted else 'unmute'}",
+                                            lambda: self.get_muted() == muted)
+
+    def close(self) -> None:
+        self._process.close()
+
+
+class PactlChannel(ControlChannel):
+    """PulseAudio/PipeWire音量（pactl没有交互模式，每次合并后的调节执行一次）"""
+
+    name = 'pactl'
+
+    def get_level(self) -> Optional[int]:
+        output = _run(['pactl', 'get-sink-volume', '@DEFAULT_SINK@'])
+        match = re.search(r'(\d+)%', output or '')
+        return int(match.group(1)) if match else None
+
+    def set_level(self, level: int) -> bool:
+        return _run(['pactl', 'set-sink-volume', '@DEFAULT_SINK@', f"{level}%"]) is not None
+
+    def set_muted(self, muted: bool) -> bool:
+        return _run(['pactl', 'set-sink-mute', '@DEFAULT_SINK@', '1' if muted else '0']) is not None
+
+
+class OsascriptChannel(ControlChannel):
+    """macOS音量，设置通过常驻的JavaScript for Automation交互进程下发，并回读确认已生效"""
+
+    name = 'osascript'
+
+    _SETUP = "var app = Application.currentApplication(); app.includeStandardAdditions = true;"
+
+    def __init__(self):
+        # 进程重启后初始化语句随第一条命令重新发送
+        self._process = _PersistentProcess(['osascript', '-l', 'JavaScript', '-i'], setup=[self._SETUP])
+
+    def get_level(self) -> Optional[int]:
+        output = _run(['osascript', '-e', 'output volume of (get volume settings)'])
+        return int(output.strip()) if output and output.strip().isdigit() else None
+
+    def get_muted(self) -> Optional[bool]:
+        output = (_run(['osascript', '-e', 'output muted of (get volume settings)']) or '').strip()
+        return output == 'true' if output in ('true', 'false') else None
+
+    def set_level(self, level: int) -> bool:
+        return self._process.send_confirmed(f"app.setVolume(null, {{outputVolume: {level}}});",
+                                            lambda: _level_matches(self.get_level(), level))
+
+    def set_muted(self, muted: bool) -> bool:
+        return self._process.send_confirmed(
+            f"app.setVolume(null, {{outputMuted: {'true' if muted else 'false'}}});",
+            lambda: self.get_muted() == muted)
+
+    def close(self) -> None:
+        self._process.close()
+
+
+class SysfsBacklightChannel(ControlChannel):
+    """Linux背光亮度，直接读写/sys/class/backlight，无需子进程"""
+
+    name = 'sysfs'
+
+    def __init__(self, device_path: str):
+        self.device_path = device_path
+        with open(os.path.join(device_path, 'max_brightness')) as f:
+            self.max_brightness = max(int(f.read().strip()), 1)
+
+    @staticmethod
+    def find() -> Optional['SysfsBacklightChannel']:
+        """查找可写的背光设备"""
+        for device_path in sorted(glob.glob('/sys/class/backlight/*')):
+            if os.access(os.path.join(device_path, 'brightness'), os.W_OK):
+                try:
+                    return SysfsBacklightChannel(device_path)
+                except (OSError, ValueError):
+                    continue
+        return None
+
+    def get_level(self) -> Optional[int]:
+        try:
+            with open(os.path.join(self.device_path, 'brightness')) as f:
+                return round(int(f.read().strip()) * 100 / self.max_brightness)
+        except (OSError, ValueError):
+            return None
+
+    def set_level(self, level: int) -> bool:
+        try:
+            with open(os.path.join(self.device_path, 'brightness'), 'w') as f:
+                f.write(str(round(level * self.max_brightness / 100)))
+            return True
+        except OSError as e:
+            logger.warning(f"写入背光亮度失败: {str(e)}")
+            return False
+
+
+class BrightnessctlChannel(ControlChannel):
+    """Linux背光亮度（无sysfs写权限时通过brightnessctl设置）"""
+
+    name = 'brightnessctl'
+
+    def get_level(self) -> Optional[int]:
+        output = _run(['brightnessctl', '-m'])
+        match = re.search(r',(\d+)%,', output or '')
+        return int(match.group(1)) if match else None
+
+    def set_level(self, level: int) -> bool:
+        return _run(['brightnessctl', '-q', 'set', f"{level}%"]) is not None
+
+
+def detect_channel(device: str) -> Optional[ControlChannel]:
+    """
+    按平台选择设备的控制通道
+
+    Args:
+        device: volume或brightness
+
+    Returns:
+        Optional[ControlChannel]: 控制通道，当前平台不支持时返回None
+    """
+    system = platform.system()
+    if device == 'volume':
+        if system == 'Darwin' and shutil.which('osascript'):
+            return OsascriptChannel()
+        if system == 'Linux':
+            if shutil.which('amixer'):
+                return AmixerChannel()
+            if shutil.which('pactl'):
+                return PactlChannel()
+    elif device == 'brightness' and system == 'Linux':
+        channel = SysfsBacklightChannel.find()
+        if channel:
+            return channel
+        if shutil.which('brightnessctl'):
+            return BrightnessctlChannel()
+    return None
+
+
+class AdjustmentScheduler:
+    """合并连续调节请求并通过控制通道下发"""
+
+    def __init__(self, channel: ControlChannel, window: float = ADJUST_WINDOW,
+                 max_delay: float = ADJUST_MAX_DELAY):
+        self.channel = channel
+        self.window = window
+        self.max_delay = max_delay
+        self.requests = 0
+        self.applied = 0
+        self.failures = 0
+        self._level: Optional[int] = None
+        self._level_at = 0.0
+        self._failed_target: Optional[int] = None
+        self._quiet_until = 0.0
+        self._target: Optional[int] = None
+        self._muted: Optional[bool] = None
+        self._timer: Optional[threading.Timer] = None
+        self._first_request_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flushed = threading.Event()
+        self._flushed.set()
+
+    def current(self) -> Optional[int]:
+        """
+        获取当前值：有待下发的目标时返回目标值，否则返回未过期的缓存值，缓存过期后重新读取设备
+
+        Returns:
+            Optional[int]: 0-100的值，无法获取时返回None
+        """
+        with self._lock:
+            if self._target is not None:
+                return self._target
+            if self._level is not None and time.monotonic() - self._level_at < ADJUST_LEVEL_TTL:
+                return self._level
+        level = self.channel.get_level()
+        with self._lock:
+            if self._target is None:
+                self._level, self._level_at = level, time.monotonic()
+        return level
+
+    def set(self, value: int) -> Tuple[int, Optional[bool]]:
+        """
+        设置为指定值
+
+        Returns:
+            Tuple[int, Optional[bool]]: 目标值，以及是否已成功下发（与前面的请求合并、稍后下发时为None）
+        """
+        return self._schedule(lambda _: value)
+
+    def adjust(self, delta: int) -> Tuple[int, Optional[bool]]:
+        """在当前（或待下发）值的基础上增减，返回值同set"""
+        return self._schedule(lambda base: base + delta)
+
+    def take_failure(self) -> Optional[int]:
+        """
+        取出最近一次合并下发失败的目标值（取出后清除）
+
+        Returns:
+            Optional[int]: 下发失败的目标值，没有失败时返回None
+        """
+        with self._lock:
+            failed, self._failed_target = self._failed_target, None
+        return failed
+
+    def set_muted(self, muted: bool) -> bool:
+        """静音/取消静音（不参与合并，立即下发）"""
+        ok = self.channel.set_muted(muted)
+        if ok:
+            self._muted = muted
+        return ok
+
+    def _schedule(self, compute) -> Tuple[int, Optional[bool]]:
+        base = self.current()
+        with self._lock:
+            if self._target is not None:
+                base = self._target
+            target = max(0, min(100, int(compute(base if base is not None else 50))))
+            idle = self._target is None and time.monotonic() >= self._quiet_until
+            self._target = target
+            self.requests += 1
+            self._flushed.clear()
+        if idle:
+            # 空闲时立即同步下发，调用方得到真实结果；窗口内的后续请求再合并
+            return target, self._write()
+
+        with self._lock:
+            now = time.monotonic()
+            if self._first_request_at is None:
+                self._first_request_at = now
+            delay = min(self.window, max(0.0, self._first_request_at + self.max_delay - now))
+
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+        return target, None
+
+    def flush(self) -> bool:
+        """立即下发待处理的目标值，下发失败时记录下来，由take_failure()报告"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._first_request_at = None
+        ok = self._write()
+        with self._lock:
+            if self._target is None and self._timer is None:
+                self._flushed.set()
+        return ok
+
+    def _write(self) -> bool:
+        """通过控制通道下发最新的目标值（串行执行，保证最后写入的是最新目标）"""
+        with self._write_lock:
+            with self._lock:
+                target = self._target
+            if target is None:
+                return True
+
+            ok = self.channel.set_level(target)
+            with self._lock:
+                # 下发期间如果又有新请求，保留新的目标值
+                if self._target == target:
+                    self._target = None
+                if ok:
+                    self._level, self._level_at = target, time.monotonic()
+                    self.applied += 1
+                else:
+                    self._level = None
+                    self._failed_target = target
+                    self.failures += 1
+                self._quiet_until = time.monotonic() + self.window
+                if self._target is None and self._timer is None:
+                    self._flushed.set()
+        if ok:
+            logger.info(f"已下发{self.channel.name}调节: {target}（累计请求{self.requests}次，实际下发{self.applied}次）")
+        else:
+            logger.warning(f"{self.channel.name}调节下发失败: {target}")
+        return ok
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待待下发的调节完成"""
+        return self._flushed.wait(timeout)
+
+    def close(self) -> None:
+        self.flush()
+        self.channel.close()
+
+
+_schedulers: Dict[str, Optional[AdjustmentScheduler]] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(device: str) -> Optional[AdjustmentScheduler]:
+    """
+    获取设备共享的调度器
+
+    Args:
+        device: volume或brightness
+
+    Returns:
+        Optional[AdjustmentScheduler]: 调度器，当前平台不支持时返回None
+    """
+    with _schedulers_lock:
+        if device not in _schedulers:
+            channel = detect_channel(device)
+            _schedulers[device] = AdjustmentScheduler(channel) if channel else None
+            if channel:
+                logger.info(f"{device}使用控制通道: {channel.name}")
+        return _schedulers[device]
+
+
+def handle_adjustment(device: str, action: str, value: Optional[int] = None) -> Optional[Tuple[bool, str]]:
+    """
+    处理音量/亮度命令
+
+    Args:
+        device: volume或brightness
+        action: get/set/increase/decrease/mute/unmute
+        value: set时为目标值，increase/decrease时为步长
+
+    Returns:
+        Optional[Tuple[bool, str]]: 执行结果和消息；当前平台没有可用通道时返回None，
+            调用方应回退到原有实现
+    """
+    scheduler = get_scheduler(device)
+    if scheduler is None:
+        return None
+    return apply_adjustment(scheduler, device, action, value)
+
+
+def apply_adjustment(scheduler: AdjustmentScheduler, device: str, action: str,
+                     value: Optional[int] = None) -> Tuple[bool, str]:
+    """
+    通过指定的调度器执行音量/亮度命令
+
+    Args:
+        scheduler: 设备的调度器
+        device: volume或brightness
+        action: get/set/increase/decrease/mute/unmute
+        value: set时为目标值，increase/decrease时为步长
+
+    Returns:
+        Tuple[bool, str]: 执行结果和消息
+    """
+    label = '音量' if device == 'volume' else '亮度'
+    try:
+        value = int(value) if value is not None and str(value).strip() != '' else None
+    except (TypeError, ValueError):
+        return False, f"无效的{label}值: {value}"
+
+    failed = scheduler.take_failure()
+    if failed is not None:
+        return False, f"之前的{label}调节（{failed}%）未能生效，请重试"
+
+    if action == 'get':
+        level = scheduler.current()
+        if level is None:
+            return False, f"无法获取当前{label}"
+        return True, f"当前{label}: {level}%"
+    if action in ('set', 'increase', 'decrease'):
+        if action == 'set':
+            if value is None:
+                return False, f"需要指定{label}值"
+            target, applied = scheduler.set(value)
+        else:
+            step = value if value is not None else DEFAULT_STEP
+            target, applied = scheduler.adjust(step if action == 'increase' else -step)
+        if applied is None:
+            return True, f"{label}将调整为 {target}%（与前面的调节合并下发）"
+        if not applied:
+            return False, f"{label}调节失败"
+        return True, f"{label}已{'设置' if action == 'set' else '调整'}为 {target}%"
+    if action in ('mute', 'unmute') and device == 'volume':
+        if scheduler.set_muted(action == 'mute'):
+            return True, "已静音" if action == 'mute' else "已取消静音"
+        return False, "静音操作失败"
+    return False, f"不支持的{label}操作: {action}"
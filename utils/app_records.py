@@ -0,0 +1,177 @@
+"""
+应用/进程记录模块，为大列表提供紧凑的记录类型和流式的筛选、排序、分页。
+
+进程列表可能有上千条，每条一个字典既占内存又慢。这里的记录使用__slots__，
+并保留字典风格的get()以兼容原有代码。筛选和分页在遍历时完成，排序只保留
+到当前页为止的条目（堆），所以峰值内存只与页大小有关，而与列表长度无关。
+"""
+import os
+import re
+import heapq
+import itertools
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# 列表每页显示的条目数
+LIST_PAGE_SIZE = int(os.getenv('LIST_PAGE_SIZE', '50'))
+
+# 可用的排序字段及其说法
+SORT_KEYWORDS = {
+    'cpu': ('cpu', 'CPU', '处理器'),
+    'memory': ('内存', 'memory', 'mem', 'Memory'),
+    'name': ('名称', '名字', 'name'),
+}
+
+_FILTER_PATTERN = re.compile(r'(?:包含|含有|含|带有|带|名为|叫)\s*["“”\']?\s*([^\s"“”\'的]+)')
+_PAGE_PATTERN = re.compile(r'第\s*(\d+)\s*页|page\s*(\d+)', re.IGNORECASE)
+
+
+class AppRecord:
+    """已安装应用"""
+
+    __slots__ = ('name', 'path', 'version')
+
+    def __init__(self, name: str, path: str = '', version: str = ''):
+        self.name = name
+        self.path = path
+        self.version = version
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """与字典相同的取值方式，兼容按字典处理应用信息的代码"""
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __repr__(self) -> str:
+        return f"AppRecord({self.name!r})"
+
+
+class ProcessRecord:
+    """正在运行的进程"""
+
+    __slots__ = ('name', 'pid', 'cpu', 'memory', 'path')
+
+    def __init__(self, name: str, pid: int = 0, cpu: float = 0.0, memory: float = 0.0, path: str = ''):
+        self.name = name
+        self.pid = pid
+        self.cpu = cpu
+        self.memory = memory
+        self.path = path
+
+    get = AppRecord.get
+
+    def __repr__(self) -> str:
+        return f"ProcessRecord({self.name!r}, pid={self.pid})"
+
+
+Record = Union[AppRecord, ProcessRecord]
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(str(value).rstrip('%MBKGmbkg '))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def to_record(item: Any) -> Record:
+    """
+    把命令返回的条目（字典、字符串或记录）转换为紧凑记录
+
+    Args:
+        item: 应用或进程信息
+
+    Returns:
+        Record: 带pid的条目转换为ProcessRecord，其余为AppRecord
+    """
+    if isinstance(item, (AppRecord, ProcessRecord)):
+        return item
+    if isinstance(item, dict):
+        name = item.get('name') or 'Unknown'
+        if item.get('pid'):
+            return ProcessRecord(name, item.get('pid'),
+                                 _number(item.get('cpu', item.get('cpu_percent'))),
+                                 _number(item.get('memory', item.get('memory_percent'))),
+                                 item.get('path') or '')
+        return AppRecord(name, item.get('path') or '', item.get('version') or '')
+    return AppRecord(str(item))
+
+
+class ListingQuery:
+    """列表查询条件：名称筛选、排序和分页"""
+
+    __slots__ = ('keyword', 'sort_by', 'page', 'page_size')
+
+    def __init__(self, keyword: Optional[str] = None, sort_by: Optional[str] = None,
+                 page: int = 1, page_size: int = LIST_PAGE_SIZE):
+        self.keyword = keyword.casefold() if keyword else None
+        self.sort_by = sort_by if sort_by in SORT_KEYWORDS else None
+        self.page = max(int(page or 1), 1)
+        self.page_size = max(int(page_size or LIST_PAGE_SIZE), 1)
+
+    @classmethod
+    def from_parameters(cls, parameters: Optional[Dict[str, Any]], text: str = '') -> 'ListingQuery':
+        """
+        从解析出的参数创建查询条件，参数中没有的条件从命令文本中识别
+
+        例如“运行中的含chrome的进程按内存排序第2页”
+
+        Args:
+            parameters: 解析出的参数（filter/sort/page/page_size）
+            text: 用户输入的命令文本
+
+        Returns:
+            ListingQuery: 查询条件
+        """
+        parameters = parameters or {}
+        keyword = parameters.get('filter')
+        if not keyword:
+            match = _FILTER_PATTERN.search(text)
+            keyword = match.group(1) if match else None
+
+        sort_by = parameters.get('sort')
+        if not sort_by:
+            sort_by = next((field for field, words in SORT_KEYWORDS.items()
+                            if field != 'name' and any(word in text for word in words)), None)
+
+        page = parameters.get('page')
+        if not page:
+            match = _PAGE_PATTERN.search(text)
+            page = int(match.group(1) or match.group(2)) if match else 1
+
+        return cls(keyword, sort_by, page, parameters.get('page_size') or LIST_PAGE_SIZE)
+
+    def matches(self, record: Record) -> bool:
+        return not self.keyword or self.keyword in record.name.casefold()
+
+    def select(self, items: Iterable[Any]) -> Tuple[List[Record], int]:
+        """
+        筛选、排序并取出当前页
+
+        Args:
+            items: 应用或进程条目（可以是生成器）
+
+        Returns:
+            Tuple[List[Record], int]: 当前页的记录和符合条件的总数
+        """
+        matched = (record for record in map(to_record, items) if self.matches(record))
+        start = (self.page - 1) * self.page_size
+        end = start + self.page_size
+        total = 0
+
+        def counted(records: Iterator[Record]) -> Iterator[Record]:
+            nonlocal total
+            for record in records:
+                total += 1
+                yield record
+
+        if self.sort_by == 'name':
+            selected = heapq.nsmallest(end, counted(matched), key=lambda r: r.name.casefold())
+        elif self.sort_by:
+            sort_by = self.sort_by
+            selected = heapq.nlargest(end, counted(matched), key=lambda r: getattr(r, sort_by, 0.0) or 0.0)
+        else:
+            records = counted(matched)
+            selected = list(itertools.islice(records, end))
+            # 继续遍历只为统计总数，不保留记录
+            for _ in records:
+                pass
+        return selected[start:end], total
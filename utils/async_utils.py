@@ -0,0 +1,68 @@
+"""
+异步工具模块，为同步接口提供在异步实现之上运行的桥接。
+
+同步调用统一提交到一个常驻后台线程中的事件循环执行，这样：
+- 同步接口可以在任何线程（包括已有事件循环运行的线程）中调用；
+- 多次同步调用共享同一个事件循环，异步HTTP客户端的连接池得以复用。
+"""
+import asyncio
+import threading
+import logging
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _get_bridge_loop() -> asyncio.AbstractEventLoop:
+    """获取（必要时启动）后台事件循环"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='async-bridge', daemon=True)
+                thread.start()
+                _loop = loop
+                logger.debug("已启动同步接口使用的后台事件循环")
+    return _loop
+
+
+def run_sync(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """
+    在后台事件循环中运行协程并阻塞等待结果
+
+    Args:
+        coro: 协程对象
+        timeout: 最长等待时间（秒），超时后取消协程并抛出TimeoutError
+
+    Returns:
+        协程的返回值
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _get_bridge_loop())
+    try:
+        return future.result(timeout)
+    except BaseException:
+        # 超时或调用线程被中断（如KeyboardInterrupt）时取消协程，避免其继续占用资源
+        future.cancel()
+        raise
+
+
+async def run_blocking(func: Callable[..., T], *args: Any) -> T:
+    """
+    在默认线程池中运行阻塞函数（兼容Python 3.8，等价于asyncio.to_thread）
+
+    Args:
+        func: 阻塞函数
+        *args: 位置参数
+
+    Returns:
+        函数的返回值
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, func, *args)
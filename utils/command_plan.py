@@ -0,0 +1,219 @@
+"""
+多步骤命令计划模块，按依赖关系并行执行一条指令中的多个操作。
+
+用户一句话中可能包含多个操作，例如“打开微信和Chrome，然后音量调到30，再在桌面创建报告文件夹”。
+解析器一次大模型调用即可得到一个计划：若干步骤及步骤之间的先后依赖（有向无环图）。
+调度器让互不依赖的步骤并发执行，只有依赖某个失败步骤的后续步骤会被跳过，
+并记录每个步骤的开始时间和耗时。
+"""
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 步骤状态
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_SKIPPED = 'skipped'
+
+_STATUS_PREFIX = {
+    STATUS_DONE: '✅',
+    STATUS_FAILED: '❌',
+    STATUS_SKIPPED: '⏭️',
+}
+
+
+class PlanStep:
+    """计划中的一个步骤"""
+
+    __slots__ = ('step_id', 'command_type', 'parameter', 'depends_on', 'description')
+
+    def __init__(self, step_id: Any, command_type: str, parameter: Any = None,
+                 depends_on: Optional[List[Any]] = None, description: Optional[str] = None):
+        self.step_id = str(step_id)
+        self.command_type = command_type
+        self.parameter = parameter
+        self.depends_on = [str(dep) for dep in (depends_on or []) if str(dep) != self.step_id]
+        self.description = description or f"{command_type} {parameter if parameter is not None else ''}".strip()
+
+    def as_parsed(self) -> Tuple[str, Any]:
+        """与NLPProcessor.parse_command相同格式的(命令类型, 参数)"""
+        return self.command_type, self.parameter
+
+    def __repr__(self) -> str:
+        return f"PlanStep({self.step_id!r}, {self.command_type!r}, depends_on={self.depends_on})"
+
+
+class CommandPlan:
+    """由多个步骤组成的命令计划"""
+
+    def __init__(self, steps: List[PlanStep]):
+        self.steps = steps
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def validate(self) -> None:
+        """
+        检查计划：步骤编号唯一、依赖的步骤存在且没有循环依赖
+
+        Raises:
+            ValueError: 计划不合法
+        """
+        ids = [step.step_id for step in self.steps]
+        if len(set(ids)) != len(ids):
+            raise ValueError(f"步骤编号重复: {ids}")
+        known = set(ids)
+        for step in self.steps:
+            missing = [dep for dep in step.depends_on if dep not in known]
+            if missing:
+                raise ValueError(f"步骤{step.step_id}依赖的步骤不存在: {missing}")
+        self.topological_order()
+
+    def topological_order(self) -> List[PlanStep]:
+        """
+        按依赖关系排序的步骤
+
+        Raises:
+            ValueError: 存在循环依赖
+        """
+        by_id = {step.step_id: step for step in self.steps}
+        remaining = {step.step_id: set(step.depends_on) for step in self.steps}
+        order = []
+        while remaining:
+            ready = [step_id for step_id, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"步骤之间存在循环依赖: {sorted(remaining)}")
+            for step_id in ready:
+                del remaining[step_id]
+                order.append(by_id[step_id])
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+
+class StepResult:
+    """单个步骤的执行结果"""
+
+    __slots__ = ('step', 'status', 'message', 'start_ms', 'elapsed_ms')
+
+    def __init__(self, step: PlanStep, status: str, message: str,
+                 start_ms: float = 0.0, elapsed_ms: float = 0.0):
+        self.step = step
+        self.status = status
+        self.message = message
+        self.start_ms = start_ms
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def success(self) -> bool:
+        return self.status == STATUS_DONE
+
+
+class PlanResult:
+    """整个计划的执行结果"""
+
+    def __init__(self, results: List[StepResult], total_ms: float):
+        self.results = results
+        self.total_ms = total_ms
+
+    @property
+    def success(self) -> bool:
+        return all(result.success for result in self.results)
+
+    def timings(self) -> List[Dict[str, Any]]:
+        """每个步骤的状态和耗时（毫秒）"""
+        return [{'id': result.step.step_id, 'command_type': result.step.command_type,
+                 'status': result.status, 'start_ms': result.start_ms, 'elapsed_ms': result.elapsed_ms}
+                for result in self.results]
+
+    def report(self) -> str:
+        """
+        生成执行报告
+
+        Returns:
+            str: 每个步骤的结果和耗时
+        """
+        done = sum(1 for result in self.results if result.success)
+        lines = [f"执行计划：共{len(self.results)}个步骤，成功{done}个，总耗时{self.total_ms:.0f}ms"]
+        for result in self.results:
+            timing = f"（{result.elapsed_ms:.0f}ms）" if result.status != STATUS_SKIPPED else ''
+            lines.append(f"  {_STATUS_PREFIX[result.status]} [{result.step.step_id}] {result.step.description}{timing}")
+            for line in (result.message or '').splitlines():
+                lines.append(f"      {line}")
+        return "\n".join(lines)
+
+
+class PlanScheduler:
+    """按依赖关系调度计划步骤，互不依赖的步骤并发执行"""
+
+    def __init__(self, max_concurrency: Optional[int] = None, step_timeout: Optional[float] = None):
+        """
+        Args:
+            max_concurrency: 同时执行的步骤数上限，None表示不限制
+            step_timeout: 单个步骤的超时时间（秒），None表示不限制
+        """
+        self.max_concurrency = max_concurrency
+        self.step_timeout = step_timeout
+
+    async def run(self, plan: CommandPlan,
+                  execute: Callable[[PlanStep], Awaitable[Tuple[bool, str]]]) -> PlanResult:
+        """
+        执行计划
+
+        Args:
+            plan: 命令计划
+            execute: 执行单个步骤的协程函数，返回(是否成功, 结果消息)
+
+        Returns:
+            PlanResult: 各步骤结果，顺序与计划中的步骤一致
+
+        Raises:
+            ValueError: 计划不合法
+        """
+        plan.validate()
+        started = time.perf_counter()
+        slots = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        finished = {step.step_id: asyncio.Event() for step in plan.steps}
+        results: Dict[str, StepResult] = {}
+
+        def elapsed_ms(since: float) -> float:
+            return round((time.perf_counter() - since) * 1000, 1)
+
+        async def execute_step(step: PlanStep) -> StepResult:
+            step_started = time.perf_counter()
+            start_ms = elapsed_ms(started)
+            try:
+                success, message = await asyncio.wait_for(execute(step), self.step_timeout)
+                status = STATUS_DONE if success else STATUS_FAILED
+            except asyncio.TimeoutError:
+                status, message = STATUS_FAILED, f"步骤执行超时（{self.step_timeout}秒）"
+            except Exception as e:
+                logger.exception(f"执行步骤{step.step_id}时出错: {str(e)}")
+                status, message = STATUS_FAILED, f"执行出错: {str(e)}"
+            return StepResult(step, status, message, start_ms, elapsed_ms(step_started))
+
+        async def run_step(step: PlanStep) -> None:
+            try:
+                for dep in step.depends_on:
+                    await finished[dep].wait()
+                blocked = [dep for dep in step.depends_on if not results[dep].success]
+                if blocked:
+                    results[step.step_id] = StepResult(step, STATUS_SKIPPED,
+                                                       f"前置步骤{'、'.join(blocked)}未成功，已跳过",
+                                                       elapsed_ms(started))
+                elif slots:
+                    async with slots:
+                        results[step.step_id] = await execute_step(step)
+                else:
+                    results[step.step_id] = await execute_step(step)
+                logger.info(f"步骤{step.step_id}（{step.command_type}）: {results[step.step_id].status}, "
+                            f"耗时{results[step.step_id].elapsed_ms}ms")
+            finally:
+                finished[step.step_id].set()
+
+        await asyncio.gather(*(run_step(step) for step in plan.steps))
+        return PlanResult([results[step.step_id] for step in plan.steps], elapsed_ms(started))
@@ -0,0 +1,333 @@
+"""
+大模型解析结果的参数格式声明和校验。
+
+每种命令类型声明一次参数格式（CommandSchema），同一份声明用于：
+- 校验并规整模型返回的参数：一次遍历完成类型检查和转换（路径、数字、名称等），
+  例如"80%"转换为80、超出范围的音量截断到0-100、路径字符串转换为统一的字典格式；
+- 校验失败时生成简短的修复提示词（只包含该命令的参数格式），让模型用很少的token改正一次。
+
+没有声明格式的命令类型只检查命令类型本身，参数原样返回。
+校验失败按命令类型计数，通过validation_stats()查看。
+"""
+import re
+import json
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 修复提示词中保留的原回复长度
+_REPAIR_CONTENT_CHARS = 400
+
+_FENCE_PATTERN = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL | re.IGNORECASE)
+_LINE_COMMENT_PATTERN = re.compile(r'//[^\n"]*$', re.MULTILINE)
+_TRAILING_COMMA_PATTERN = re.compile(r',\s*([}\]])')
+_NUMBER_PATTERN = re.compile(r'-?\d+(?:\.\d+)?')
+# 名称两端的引号、空白和标点（不含英文句点，以免去掉.bashrc这类文件名的开头）
+_NAME_STRIP = ' \t\r\n"\'“”‘’「」《》。,，!！?？'
+
+
+class SchemaError(ValueError):
+    """模型回复不符合声明的格式"""
+
+    def __init__(self, message: str, command_type: Optional[str] = None):
+        super().__init__(message)
+        self.command_type = command_type
+
+
+class Field:
+    """参数字段：名称、类型（str/name/path/int/str_list）、是否必填、默认值、可选值和取值范围"""
+
+    __slots__ = ('name', 'kind', 'required', 'default', 'choices', 'minimum', 'maximum')
+
+    def __init__(self, name: str, kind: str = 'str', required: bool = False, default: Any = None,
+                 choices: Optional[Tuple[str, ...]] = None, minimum: Optional[int] = None,
+                 maximum: Optional[int] = None):
+        self.name = name
+        self.kind = kind
+        self.required = required
+        self.default = default
+        self.choices = choices
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def coerce(self, value: Any, command_type: str) -> Any:
+        """
+        把字段值转换为声明的类型
+
+        Raises:
+            SchemaError: 必填字段缺失或无法转换
+        """
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == '' or value == []:
+            if self.required:
+                raise SchemaError(f"缺少参数{self.name}", command_type)
+            return self.default
+
+        if self.kind == 'int':
+            if isinstance(value, bool):
+                raise SchemaError(f"参数{self.name}应为整数: {value!r}", command_type)
+            if isinstance(value, (int, float)):
+                number = int(round(value))
+            else:
+                match = _NUMBER_PATTERN.search(str(value))
+                if not match:
+                    # 可选的数值（如“调高一点”的幅度）无法识别时使用默认值，不必为此重新请求
+                    if not self.required:
+                        return self.default
+                    raise SchemaError(f"参数{self.name}应为整数: {value!r}", command_type)
+                number = int(round(float(match.group())))
+            if self.minimum is not None:
+                number = max(number, self.minimum)
+            if self.maximum is not None:
+                number = min(number, self.maximum)
+            return number
+
+        if self.kind == 'str_list':
+            items = value if isinstance(value, (list, tuple)) else [value]
+            return [str(item).strip() for item in items if item is not None and str(item).strip()]
+
+        if isinstance(value, (dict, list)):
+            raise SchemaError(f"参数{self.name}应为字符串: {value!r}", command_type)
+        text = str(value)
+        if self.kind in ('name', 'path'):
+            text = text.strip(_NAME_STRIP) if self.kind == 'name' else text.strip(' \t\r\n"\'“”‘’「」')
+        if not text:
+            if self.required:
+                raise SchemaError(f"缺少参数{self.name}", command_type)
+            return self.default
+        if self.choices:
+            text = text.lower()
+            if text not in self.choices:
+                if self.required:
+                    raise SchemaError(f"参数{self.name}应为{'/'.join(self.choices)}之一: {value!r}", command_type)
+                return self.default
+        return text
+
+    def describe(self) -> str:
+        """字段格式的简短说明（用于修复提示词）"""
+        if self.choices:
+            text = '|'.join(self.choices)
+        elif self.kind == 'int':
+            if self.minimum is not None and self.maximum is not None:
+                text = f"{self.minimum}-{self.maximum}的整数"
+            else:
+                text = "整数"
+        elif self.kind == 'str_list':
+            text = "字符串数组"
+        else:
+            text = "字符串"
+        return f"{text}（必填）" if self.required else text
+
+
+class CommandSchema:
+    """
+    一种命令的参数格式
+
+    参数有三种形式：没有参数（fields为空）、单个值（scalar为字段）、字典（fields为字段列表，
+    模型返回单个值时作为primary字段的值）。
+    """
+
+    __slots__ = ('command_type', 'scalar', 'fields', 'primary')
+
+    def __init__(self, command_type: str, scalar: Optional[Field] = None, fields: Iterable[Field] = (),
+                 primary: Optional[str] = None):
+        self.command_type = command_type
+        self.scalar = scalar
+        self.fields = tuple(fields)
+        self.primary = primary
+
+    def normalize(self, parameter: Any) -> Any:
+        """
+        校验并规整参数
+
+        Raises:
+            SchemaError: 参数不符合格式
+        """
+        if self.scalar is not None:
+            # 模型有时把单个值包在字典里
+            if isinstance(parameter, dict):
+                parameter = parameter.get(self.scalar.name, parameter.get('value', parameter.get('name')))
+            return self.scalar.coerce(parameter, self.command_type)
+
+        if not self.fields:
+            return None
+
+        if parameter is None:
+            parameter = {}
+        elif not isinstance(parameter, dict):
+            if not self.primary:
+                raise SchemaError(f"参数应为对象: {parameter!r}", self.command_type)
+            parameter = {self.primary: parameter}
+        normalized = dict(parameter)
+        for field in self.fields:
+            value = field.coerce(parameter.get(field.name), self.command_type)
+            # 没有值的字段不出现在结果中，由命令模块使用自己的默认值
+            if value is None:
+                normalized.pop(field.name, None)
+            else:
+                normalized[field.name] = value
+        return normalized
+
+    def describe(self) -> str:
+        """参数格式的简短说明（用于修复提示词）"""
+        if self.scalar is not None:
+            return self.scalar.describe()
+        if not self.fields:
+            return 'null'
+        return '{' + ', '.join(f'"{field.name}": {field.describe()}' for field in self.fields) + '}'
+
+
+def _path_fields(*extra: Field, name_required: bool = False, with_name: bool = True) -> List[Field]:
+    # 只给出名称时在当前目录下查找（与本地解析一致），app.normalize_parsed_result据此拼出完整路径
+    fields = [Field('path', 'path', default='.' if with_name else None),
+              Field('path_alternatives', 'str_list', default=[])]
+    if with_name:
+        fields.append(Field('name', 'name', required=name_required))
+    return fields + list(extra)
+
+
+# 各命令的参数格式（命令类型与NLPProcessor.CMD_*一致）
+SCHEMAS: Dict[str, CommandSchema] = {schema.command_type: schema for schema in (
+    CommandSchema('open', Field('app_name', 'name', required=True)),
+    CommandSchema('close', Field('app_name', 'name', required=True)),
+    CommandSchema('uninstall', Field('app_name', 'name', required=True)),
+    CommandSchema('list_running', fields=(Field('filter', 'name'), Field('sort', choices=('cpu', 'memory', 'name')),
+                                          Field('page', 'int', default=1, minimum=1)), primary='filter'),
+    CommandSchema('list_installed', fields=(Field('filter', 'name'), Field('sort', choices=('cpu', 'memory', 'name')),
+                                            Field('page', 'int', default=1, minimum=1)), primary='filter'),
+    CommandSchema('get_volume'),
+    CommandSchema('mute'),
+    CommandSchema('unmute'),
+    CommandSchema('get_brightness'),
+    CommandSchema('set_volume', Field('value', 'int', required=True, minimum=0, maximum=100)),
+    CommandSchema('set_brightness', Field('value', 'int', required=True, minimum=0, maximum=100)),
+    CommandSchema('increase_volume', Field('value', 'int', minimum=0, maximum=100)),
+    CommandSchema('decrease_volume', Field('value', 'int', minimum=0, maximum=100)),
+    CommandSchema('increase_brightness', Field('value', 'int', minimum=0, maximum=100)),
+    CommandSchema('decrease_brightness', Field('value', 'int', minimum=0, maximum=100)),
+    CommandSchema('create_directory', fields=_path_fields(name_required=True), primary='name'),
+    CommandSchema('delete_file', fields=_path_fields(name_required=True), primary='name'),
+    CommandSchema('delete_directory', fields=_path_fields(name_required=True), primary='name'),
+    CommandSchema('list_subdirectories', fields=_path_fields(with_name=False), primary='path'),
+    CommandSchema('read_file', fields=_path_fields(
+        Field('mode', choices=('head', 'tail', 'range', 'page')), Field('lines', 'int', default=100, minimum=1),
+        Field('start', 'int', default=1, minimum=1), Field('page', 'int', default=1, minimum=1),
+        name_required=True), primary='name'),
+    CommandSchema('disk_usage', fields=_path_fields(Field('top', 'int', default=10, minimum=1, maximum=100),
+                                                    with_name=False), primary='path'),
+    CommandSchema('weather', Field('location', 'name')),
+)}
+
+_validated: 'Counter[str]' = Counter()
+_failures: 'Counter[str]' = Counter()
+_repairs: 'Counter[str]' = Counter()
+_stats_lock = threading.Lock()
+
+
+def loads_json(content: str) -> Any:
+    """
+    解析模型回复中的JSON
+
+    先直接解析（JSON模式下的回复就是JSON）；失败时再去掉代码块标记、取出最外层的对象，
+    并去掉模型照抄提示词示例带来的//注释和多余的逗号。
+
+    Raises:
+        SchemaError: 回复中没有合法的JSON
+    """
+    try:
+        return json.loads(content)
+    except (TypeError, ValueError):
+        pass
+    text = content or ''
+    fence = _FENCE_PATTERN.search(text)
+    if fence:
+        text = fence.group(1)
+    start, end = text.find('{'), text.rfind('}')
+    if start >= 0 and end > start:
+        text = text[start:end + 1]
+    text = _TRAILING_COMMA_PATTERN.sub(r'\1', _LINE_COMMENT_PATTERN.sub('', text))
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        raise SchemaError(f"回复不是合法的JSON: {str(e)}") from e
+
+
+def validate(command_type: str, parameter: Any) -> Tuple[str, Any]:
+    """
+    按命令的参数格式校验并规整参数（命令类型需已确认存在）
+
+    Args:
+        command_type: 命令类型
+        parameter: 模型返回的参数
+
+    Returns:
+        Tuple[str, Any]: 命令类型和规整后的参数
+
+    Raises:
+        SchemaError: 参数不符合格式
+    """
+    schema = SCHEMAS.get(command_type)
+    return command_type, schema.normalize(parameter) if schema else parameter
+
+
+def repair_prompt(text: str, content: str, error: SchemaError, command_types: Iterable[str]) -> str:
+    """
+    构建修复提示词：只包含错误、原回复和相关的参数格式，远短于完整的解析提示词
+
+    Args:
+        text: 用户指令
+        content: 不符合格式的回复
+        error: 校验错误
+        command_types: 可用的命令类型
+
+    Returns:
+        str: 提示词
+    """
+    schema = SCHEMAS.get(error.command_type) if error.command_type else None
+    if schema is not None:
+        hint = f'{{"command_type": "{schema.command_type}", "parameter": {schema.describe()}}}'
+    else:
+        hint = f'{{"command_type": "{"|".join(command_types)}或null", "parameter": ...}}'
+    return (f"你上一次的回复不符合格式要求：{str(error)}\n"
+            f"用户指令: {text}\n"
+            f"上一次的回复: {(content or '')[:_REPAIR_CONTENT_CHARS]}\n"
+            f"请只返回修正后的JSON对象，不要其他内容，格式：{hint}")
+
+
+def record_result(command_type: Optional[str], ok: bool) -> None:
+    """记录一次校验结果（command_type为None表示回复无法解析或命令类型未知）"""
+    with _stats_lock:
+        if ok:
+            _validated[command_type or 'unknown'] += 1
+        else:
+            _failures[command_type or 'unknown'] += 1
+
+
+def record_repair(ok: bool, wasted_chars: int = 0) -> None:
+    """记录一次修复请求及其结果，wasted_chars为被丢弃的回复长度"""
+    with _stats_lock:
+        _repairs['attempts'] += 1
+        _repairs['repaired' if ok else 'failed'] += 1
+        _repairs['wasted_chars'] += wasted_chars
+
+
+def validation_stats() -> Dict[str, Any]:
+    """
+    校验统计
+
+    Returns:
+        Dict[str, Any]: 各命令类型的通过数和失败数、失败率以及修复请求的次数和结果
+    """
+    with _stats_lock:
+        validated, failures = sum(_validated.values()), sum(_failures.values())
+        total = validated + failures
+        return {
+            'validated': dict(_validated),
+            'failures': dict(_failures),
+            'failure_rate': round(failures / total, 3) if total else 0.0,
+            'repair_attempts': _repairs['attempts'],
+            'repaired': _repairs['repaired'],
+            'repair_failed': _repairs['failed'],
+            'wasted_chars': _repairs['wasted_chars'],
+        }
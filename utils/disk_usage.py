@@ -0,0 +1,170 @@
+"""
+磁盘占用统计模块，并行遍历目录并缓存每个子目录的统计结果。
+
+缓存以目录路径为键，并记录目录的修改时间。目录中新增、删除或重命名条目时
+其修改时间会变化，只有这些目录需要重新扫描；未变化的目录直接复用缓存，
+再次查询时只需对每个目录做一次stat。缓存按最近使用淘汰，最多保留
+DISK_USAGE_CACHE_SIZE个目录。
+
+注意：已有文件原地增大或缩小（追加日志、覆盖写入）不会改变所在目录的修改时间，
+这类变化要等目录本身有条目增删后才会反映出来；需要精确结果时先调用clear_cache()。
+"""
+import os
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from utils.file_transfer import FileTransfer
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 最多缓存多少个目录的统计
+DISK_USAGE_CACHE_SIZE = int(os.getenv('DISK_USAGE_CACHE_SIZE', '200000'))
+
+
+class _DirRecord:
+    """单个目录的直接内容统计（不含子目录）"""
+
+    __slots__ = ('mtime_ns', 'file_bytes', 'file_count', 'subdirs')
+
+    def __init__(self, mtime_ns: int, file_bytes: int, file_count: int, subdirs: Tuple[str, ...]):
+        self.mtime_ns = mtime_ns
+        self.file_bytes = file_bytes
+        self.file_count = file_count
+        self.subdirs = subdirs
+
+
+class DiskUsage:
+    """目录大小统计工具"""
+
+    # 目录路径 -> _DirRecord，按最近使用排序
+    _cache: 'OrderedDict[str, _DirRecord]' = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    @staticmethod
+    def _scan_dir(path: str, stats: Dict[str, int]) -> Optional[_DirRecord]:
+        """获取单个目录的统计，目录未变化时直接返回缓存（只检测条目增删，见模块说明）"""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        with DiskUsage._cache_lock:
+            cached = DiskUsage._cache.get(path)
+            if cached is not None and cached.mtime_ns == mtime_ns:
+                DiskUsage._cache.move_to_end(path)
+                stats['cache_hits'] += 1
+                return cached
+
+        file_bytes, file_count, subdirs = 0, 0, []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        else:
+                            file_bytes += entry.stat(follow_symlinks=False).st_size
+                            file_count += 1
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.debug(f"无法读取目录: {path}, {str(e)}")
+
+        record = _DirRecord(mtime_ns, file_bytes, file_count, tuple(subdirs))
+        with DiskUsage._cache_lock:
+            DiskUsage._cache[path] = record
+            DiskUsage._cache.move_to_end(path)
+            while len(DiskUsage._cache) > DISK_USAGE_CACHE_SIZE:
+                DiskUsage._cache.popitem(last=False)
+            stats['scanned'] += 1
+        return record
+
+    @staticmethod
+    def measure(path: str, workers: Optional[int] = None) -> Tuple[Dict[str, Tuple[int, int]], Dict[str, int]]:
+        """
+        并行统计目录树中每个目录的总大小
+
+        Args:
+            path: 根目录
+            workers: 线程数，默认按存储介质自动选择
+
+        Returns:
+            Tuple[Dict[str, Tuple[int, int]], Dict[str, int]]:
+                每个目录的(总字节数, 总文件数)，以及扫描统计(scanned/cache_hits)
+        """
+        path = os.path.abspath(path)
+        workers = workers or FileTransfer.default_workers(path)
+        stats = {'scanned': 0, 'cache_hits': 0}
+        records: Dict[str, _DirRecord] = {}
+        levels: List[List[str]] = []
+
+        # 按层并行遍历
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            current = [path]
+            while current:
+                levels.append(current)
+                children: List[str] = []
+                for directory, record in zip(current, executor.map(lambda d: DiskUsage._scan_dir(d, stats), current)):
+                    if record is not None:
+                        records[directory] = record
+                        children.extend(record.subdirs)
+                current = children
+
+        # 自底向上汇总
+        totals: Dict[str, Tuple[int, int]] = {}
+        for level in reversed(levels):
+            for directory in level:
+                record = records.get(directory)
+                if record is None:
+                    continue
+                size, count = record.file_bytes, record.file_count
+                for sub in record.subdirs:
+                    sub_size, sub_count = totals.get(sub, (0, 0))
+                    size += sub_size
+                    count += sub_count
+                totals[directory] = (size, count)
+
+        logger.info(f"目录大小统计完成: {path}, 扫描{stats['scanned']}个目录, 缓存命中{stats['cache_hits']}个")
+        return totals, stats
+
+    @staticmethod
+    def top_entries(path: str, top: int = 10,
+                    workers: Optional[int] = None) -> Tuple[int, int, List[Tuple[str, int, bool]], Dict[str, int]]:
+        """
+        统计目录的总大小及其中最大的若干项（子目录和文件）
+
+        Args:
+            path: 目录路径
+            top: 返回的条目数
+            workers: 线程数
+
+        Returns:
+            Tuple: (总字节数, 总文件数, [(名称, 字节数, 是否目录)], 扫描统计)
+        """
+        path = os.path.abspath(path)
+        totals, stats = DiskUsage.measure(path, workers)
+        total_size, total_count = totals.get(path, (0, 0))
+
+        entries: List[Tuple[str, int, bool]] = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        entries.append((entry.name, totals.get(entry.path, (0, 0))[0], True))
+                    else:
+                        entries.append((entry.name, entry.stat(follow_symlinks=False).st_size, False))
+                except OSError:
+                    continue
+
+        entries.sort(key=lambda item: item[1], reverse=True)
+        return total_size, total_count, entries[:max(top, 0)], stats
+
+    @staticmethod
+    def clear_cache() -> None:
+        """清空目录大小缓存"""
+        with DiskUsage._cache_lock:
+            DiskUsage._cache.clear()
@@ -0,0 +1,312 @@
+"""
+文件分页读取模块，基于mmap实现对大文件的头部/尾部/区间/分页读取。
+
+读取时不会把整个文件载入内存：尾部读取从文件末尾反向查找换行符，
+区间和分页读取使用按需构建的稀疏行偏移索引。索引和编码检测结果
+按(设备, inode, 修改时间, 大小)缓存，文件变化后自动失效。
+"""
+import os
+import mmap
+import codecs
+import threading
+import logging
+from array import array
+from collections import OrderedDict
+from typing import List, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 编码检测时读取的样本大小
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# 稀疏索引的步长：每隔多少行记录一次行首偏移
+INDEX_STRIDE = 1024
+
+# 最多缓存多少个文件的索引
+INDEX_CACHE_SIZE = 32
+
+# 单次读取允许返回的最大行数
+MAX_LINES = 10000
+
+# 字节序标记及其对应的编码
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+
+class _LineIndex:
+    """单个文件的编码信息和稀疏行偏移索引"""
+
+    __slots__ = ('encoding', 'bom_len', 'newline', 'size', 'lock',
+                 'checkpoints', 'scanned_offset', 'scanned_lines', 'complete')
+
+    def __init__(self, encoding: str, bom_len: int, size: int):
+        self.encoding = encoding
+        self.bom_len = bom_len
+        self.newline = '\n'.encode(encoding)
+        self.size = size
+        self.lock = threading.Lock()
+        # checkpoints[k] 为第 k*INDEX_STRIDE 行（从0开始）的起始偏移
+        self.checkpoints = array('Q', [bom_len])
+        self.scanned_offset = bom_len
+        self.scanned_lines = 0
+        self.complete = size <= bom_len
+
+
+class FileReader:
+    """大文件分页读取工具"""
+
+    _index_cache: 'OrderedDict[Tuple[int, int, int, int], _LineIndex]' = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    @staticmethod
+    def detect_encoding(sample: bytes) -> Tuple[str, int]:
+        """
+        根据文件开头的样本检测编码
+
+        Args:
+            sample: 文件开头的字节
+
+        Returns:
+            Tuple[str, int]: 编码名称和BOM长度
+        """
+        for bom, encoding in _BOMS:
+            if sample.startswith(bom):
+                return encoding, len(bom)
+
+        # 样本末尾可能截断了多字节字符，使用增量解码器忽略不完整的尾部
+        for encoding in ('utf-8', 'gb18030'):
+            try:
+                codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+                return encoding, 0
+            except UnicodeDecodeError:
+                continue
+        return 'latin-1', 0
+
+    @staticmethod
+    def _get_index(path: str, fd: int) -> _LineIndex:
+        """获取文件的索引对象，不存在或已失效时新建"""
+        st = os.fstat(fd)
+        key = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+        with FileReader._cache_lock:
+            index = FileReader._index_cache.get(key)
+            if index is not None:
+                FileReader._index_cache.move_to_end(key)
+                return index
+
+        sample = os.pread(fd, ENCODING_SAMPLE_SIZE, 0) if hasattr(os, 'pread') else None
+        if sample is None:
+            with open(path, 'rb') as f:
+                sample = f.read(ENCODING_SAMPLE_SIZE)
+        encoding, bom_len = FileReader.detect_encoding(sample)
+        index = _LineIndex(encoding, bom_len, st.st_size)
+        logger.debug(f"新建文件索引: {path}, 编码={encoding}, 大小={st.st_size}")
+
+        with FileReader._cache_lock:
+            FileReader._index_cache[key] = index
+            while len(FileReader._index_cache) > INDEX_CACHE_SIZE:
+                FileReader._index_cache.popitem(last=False)
+        return index
+
+    @staticmethod
+    def _find(mm: mmap.mmap, index: _LineIndex, start: int) -> int:
+        """从start开始查找下一个换行符，处理UTF-16的对齐问题"""
+        step = len(index.newline)
+        pos = mm.find(index.newline, start)
+        while step > 1 and pos != -1 and (pos - index.bom_len) % step:
+            pos = mm.find(index.newline, pos + 1)
+        return pos
+
+    @staticmethod
+    def _rfind(mm: mmap.mmap, index: _LineIndex, end: int) -> int:
+        """在end之前反向查找换行符，处理UTF-16的对齐问题"""
+        step = len(index.newline)
+        pos = mm.rfind(index.newline, index.bom_len, end)
+        while step > 1 and pos != -1 and (pos - index.bom_len) % step:
+            pos = mm.rfind(index.newline, index.bom_len, pos + step - 1)
+        return pos
+
+    @staticmethod
+    def _extend_index(mm: mmap.mmap, index: _LineIndex, target_line: int) -> None:
+        """把索引扫描推进到至少包含target_line（从0开始）的检查点"""
+        step = len(index.newline)
+        offset, line = index.scanned_offset, index.scanned_lines
+        while not index.complete and line < target_line:
+            pos = FileReader._find(mm, index, offset)
+            if pos == -1:
+                index.complete = True
+                break
+            offset = pos + step
+            line += 1
+            if offset >= index.size:
+                index.complete = True
+            if line % INDEX_STRIDE == 0 and line // INDEX_STRIDE == len(index.checkpoints):
+                index.checkpoints.append(offset)
+        index.scanned_offset, index.scanned_lines = offset, line
+
+    @staticmethod
+    def _seek_line(mm: mmap.mmap, index: _LineIndex, line: int) -> int:
+        """返回第line行（从0开始）的起始偏移，超出文件末尾返回-1"""
+        with index.lock:
+            FileReader._extend_index(mm, index, line)
+        slot = min(line // INDEX_STRIDE, len(index.checkpoints) - 1)
+        offset, current = index.checkpoints[slot], slot * INDEX_STRIDE
+        step = len(index.newline)
+        while current < line:
+            pos = FileReader._find(mm, index, offset)
+            if pos == -1 or pos + step >= index.size:
+                return -1
+            offset, current = pos + step, current + 1
+        return offset if offset < index.size else -1
+
+    @staticmethod
+    def _decode_lines(data: bytes, index: _LineIndex) -> List[str]:
+        text = data.decode(index.encoding, errors='replace')
+        return text.splitlines()
+
+    @staticmethod
+    def _open(path: str):
+        """打开文件并建立只读映射，空文件返回None映射"""
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            index = FileReader._get_index(path, fd)
+            mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ) if index.size else None
+        except Exception:
+            os.close(fd)
+            raise
+        return fd, mm, index
+
+    @staticmethod
+    def read_lines(path: str, start: int = 1, count: int = 100) -> List[str]:
+        """
+        读取从第start行开始的count行
+
+        Args:
+            path: 文件路径
+            start: 起始行号（从1开始）
+            count: 行数
+
+        Returns:
+            List[str]: 读取到的行
+        """
+        count = max(0, min(count, MAX_LINES))
+        fd, mm, index = FileReader._open(path)
+        try:
+            if mm is None or count == 0:
+                return []
+            begin = FileReader._seek_line(mm, index, max(start, 1) - 1)
+            if begin == -1:
+                return []
+            end, step = begin, len(index.newline)
+            for _ in range(count):
+                pos = FileReader._find(mm, index, end)
+                if pos == -1:
+                    end = index.size
+                    break
+                end = pos + step
+            return FileReader._decode_lines(mm[begin:end], index)
+        finally:
+            if mm is not None:
+                mm.close()
+            os.close(fd)
+
+    @staticmethod
+    def head(path: str, count: int = 100) -> List[str]:
+        """读取文件开头的count行"""
+        return FileReader.read_lines(path, 1, count)
+
+    @staticmethod
+    def tail(path: str, count: int = 100) -> List[str]:
+        """
+        读取文件末尾的count行，从文件末尾反向查找，不需要扫描整个文件
+
+        Args:
+            path: 文件路径
+            count: 行数
+
+        Returns:
+            List[str]: 读取到的行
+        """
+        count = max(0, min(count, MAX_LINES))
+        fd, mm, index = FileReader._open(path)
+        try:
+            if mm is None or count == 0:
+                return []
+            step = len(index.newline)
+            end = index.size
+            # 忽略文件末尾的换行符
+            if mm[end - step:end] == index.newline:
+                end -= step
+            begin = end
+            for _ in range(count):
+                pos = FileReader._rfind(mm, index, begin)
+                if pos == -1:
+                    begin = index.bom_len
+                    break
+                begin = pos
+            else:
+                begin += step
+            return FileReader._decode_lines(mm[begin:end], index)
+        finally:
+            if mm is not None:
+                mm.close()
+            os.close(fd)
+
+    @staticmethod
+    def page(path: str, page: int = 1, page_size: int = 100) -> Tuple[List[str], bool]:
+        """
+        按页读取文件
+
+        Args:
+            path: 文件路径
+            page: 页码（从1开始）
+            page_size: 每页行数
+
+        Returns:
+            Tuple[List[str], bool]: 当前页内容和是否还有下一页
+        """
+        page = max(page, 1)
+        lines = FileReader.read_lines(path, (page - 1) * page_size + 1, page_size + 1)
+        return lines[:page_size], len(lines) > page_size
+
+    @staticmethod
+    def read(path: str, mode: str = 'head', lines: int = 100, start: int = 1,
+             page: int = 1) -> Tuple[bool, str]:
+        """
+        按指定模式读取文件，返回格式化后的文本
+
+        Args:
+            path: 文件路径
+            mode: head/tail/range/page
+            lines: 行数（page模式下为每页行数）
+            start: range模式的起始行号
+            page: page模式的页码
+
+        Returns:
+            Tuple[bool, str]: 操作是否成功和结果消息
+        """
+        if not path or not os.path.isfile(path):
+            return False, f"文件不存在: {path}"
+
+        try:
+            lines = int(lines or 100)
+            if mode == 'tail':
+                content, title = FileReader.tail(path, lines), f"{path} 最后{lines}行"
+            elif mode == 'range':
+                start = int(start or 1)
+                content, title = FileReader.read_lines(path, start, lines), f"{path} 第{start}-{start + lines - 1}行"
+            elif mode == 'page':
+                page = int(page or 1)
+                content, has_more = FileReader.page(path, page, lines)
+                title = f"{path} 第{page}页" + ("（还有更多）" if has_more else "（已到末尾）")
+            else:
+                content, title = FileReader.head(path, lines), f"{path} 前{lines}行"
+        except (OSError, ValueError) as e:
+            logger.error(f"读取文件失败: {path}, {str(e)}")
+            return False, f"读取文件失败: {str(e)}"
+
+        return True, f"{title}:\n" + "\n".join(content)
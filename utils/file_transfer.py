@@ -0,0 +1,469 @@
+"""
+文件传输模块，提供高性能的文件复制和移动功能。
+
+优先使用内核辅助的零拷贝接口（os.copy_file_range / os.sendfile），
+不可用时回退到大缓冲区读写。目录树复制使用线程池并行处理，
+中断的复制可以在下次执行时从断点继续。
+"""
+import os
+import sys
+import errno
+import shutil
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 回退读写时使用的缓冲区大小
+BUFFER_SIZE = 1024 * 1024
+
+# 单次零拷贝调用传输的最大字节数
+CHUNK_SIZE = 64 * 1024 * 1024
+
+# 进度回调的最小间隔（秒）
+PROGRESS_INTERVAL = 0.2
+
+# 目录复制进行中时写在目标目录里的标记文件，内容为源目录的路径，复制成功后删除
+RESUME_MARKER = '.transfer-source'
+
+# 内核零拷贝不可用时会出现的错误码，遇到这些错误时回退到下一种方式
+_FALLBACK_ERRNOS = {
+    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF,
+    getattr(errno, 'EOPNOTSUPP', errno.EINVAL),
+    getattr(errno, 'ENOTSUP', errno.EINVAL),
+}
+
+
+class TransferProgress:
+    """传输进度统计，线程安全"""
+
+    def __init__(self, callback: Optional[Callable[['TransferProgress'], None]] = None):
+        self.total_files = 0
+        self.total_bytes = 0
+        self.files_done = 0
+        self.files_skipped = 0
+        self.bytes_done = 0
+        self.bytes_resumed = 0
+        self.errors: List[Tuple[str, str]] = []
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self._callback = callback
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def elapsed(self) -> float:
+        """已用时间（秒）"""
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return max(end - self.started_at, 1e-9)
+
+    @property
+    def throughput(self) -> float:
+        """平均吞吐量（字节/秒），不含断点续传跳过的部分"""
+        return self.bytes_done / self.elapsed
+
+    def add_bytes(self, count: int) -> None:
+        with self._lock:
+            self.bytes_done += count
+        self._report()
+
+    def add_resumed(self, count: int) -> None:
+        with self._lock:
+            self.bytes_resumed += count
+
+    def file_done(self, skipped: bool = False) -> None:
+        with self._lock:
+            self.files_done += 1
+            if skipped:
+                self.files_skipped += 1
+        self._report()
+
+    def add_error(self, path: str, message: str) -> None:
+        with self._lock:
+            self.errors.append((path, message))
+
+    def finish(self) -> None:
+        self.finished_at = time.monotonic()
+        self._report(force=True)
+
+    def _report(self, force: bool = False) -> None:
+        if not self._callback:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        try:
+            self._callback(self)
+        except Exception as e:
+            logger.debug(f"进度回调出错: {str(e)}")
+
+    def summary(self) -> str:
+        """生成可读的统计摘要"""
+        mb = self.bytes_done / (1024 * 1024)
+        speed = self.throughput / (1024 * 1024)
+        text = f"{self.files_done}/{self.total_files}个文件, {mb:.1f}MB, 耗时{self.elapsed:.2f}秒, {speed:.1f}MB/s"
+        if self.files_skipped:
+            text += f", 跳过已完成{self.files_skipped}个"
+        if self.bytes_resumed:
+            text += f", 续传{self.bytes_resumed / (1024 * 1024):.1f}MB"
+        if self.errors:
+            text += f", 失败{len(self.errors)}个"
+        return text
+
+
+class FileTransfer:
+    """文件复制/移动引擎"""
+
+    @staticmethod
+    def default_workers(path: str) -> int:
+        """
+        根据存储介质选择并行复制的线程数
+
+        机械硬盘上并发随机读写会降低吞吐量，因此只使用少量线程；
+        SSD和网络存储可以从更多并发中获益。
+
+        Args:
+            path: 目标路径（用于检测所在设备）
+
+        Returns:
+            int: 线程数
+        """
+        configured = os.getenv('TRANSFER_WORKERS')
+        if configured and configured.isdigit() and int(configured) > 0:
+            return int(configured)
+
+        cpu_count = os.cpu_count() or 4
+        if FileTransfer._is_rotational(path):
+            return 2
+        return min(16, cpu_count * 2)
+
+    @staticmethod
+    def _is_rotational(path: str) -> bool:
+        """检查路径所在的块设备是否为机械硬盘（仅Linux）"""
+        try:
+            st = os.stat(path)
+            dev = f"{os.major(st.st_dev)}:{os.minor(st.st_dev)}"
+            for candidate in (f"/sys/dev/block/{dev}/queue/rotational",
+                              f"/sys/dev/block/{dev}/../queue/rotational"):
+                if os.path.exists(candidate):
+                    with open(candidate) as f:
+                        return f.read().strip() == '1'
+        except (OSError, AttributeError, ValueError):
+            pass
+        return False
+
+    @staticmethod
+    def _part_path(dst: str, st: os.stat_result) -> str:
+        """断点续传的临时文件名，包含源文件大小和修改时间，源文件变化后不会误续传"""
+        return f"{dst}.{st.st_size:x}-{st.st_mtime_ns:x}.part"
+
+    @staticmethod
+    def _is_up_to_date(dst: str, st: os.stat_result) -> bool:
+        """目标文件已存在且大小和修改时间与源文件一致"""
+        try:
+            dst_st = os.stat(dst)
+        except OSError:
+            return False
+        return dst_st.st_size == st.st_size and dst_st.st_mtime_ns == st.st_mtime_ns
+
+    @staticmethod
+    def _copy_range(src_fd: int, dst_fd: int, offset: int, size: int,
+                    progress: Optional[TransferProgress]) -> int:
+        """
+        从offset开始把源文件剩余内容写到目标文件的当前位置
+
+        依次尝试copy_file_range、sendfile和缓冲区读写。
+
+        Returns:
+            int: 复制结束时的偏移量
+        """
+        # copy_file_range: 同一文件系统上可由内核直接完成（甚至reflink）
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while offset < size:
+                    copied = os.copy_file_range(src_fd, dst_fd, min(CHUNK_SIZE, size - offset), offset)
+                    if copied == 0:
+                        break
+                    offset += copied
+                    if progress:
+                        progress.add_bytes(copied)
+                return offset
+            except OSError as e:
+                if e.errno not in _FALLBACK_ERRNOS:
+                    raise
+                logger.debug(f"copy_file_range不可用，回退: {str(e)}")
+
+        # sendfile: Linux上支持文件到文件的传输
+        if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+            try:
+                while offset < size:
+                    sent = os.sendfile(dst_fd, src_fd, offset, min(CHUNK_SIZE, size - offset))
+                    if sent == 0:
+                        break
+                    offset += sent
+                    if progress:
+                        progress.add_bytes(sent)
+                return offset
+            except OSError as e:
+                if e.errno not in _FALLBACK_ERRNOS:
+                    raise
+                logger.debug(f"sendfile不可用，回退: {str(e)}")
+
+        # 大缓冲区读写
+        os.lseek(src_fd, offset, os.SEEK_SET)
+        buffer = bytearray(BUFFER_SIZE)
+        view = memoryview(buffer)
+        with open(src_fd, 'rb', buffering=0, closefd=False) as reader:
+            while True:
+                count = reader.readinto(buffer)
+                if not count:
+                    break
+                written = 0
+                while written < count:
+                    written += os.write(dst_fd, view[written:count])
+                offset += count
+                if progress:
+                    progress.add_bytes(count)
+        return offset
+
+    @staticmethod
+    def copy_file(src: str, dst: str, progress: Optional[TransferProgress] = None,
+                  resume: bool = True) -> bool:
+        """
+        复制单个文件，保留修改时间和权限
+
+        数据先写入带源文件标识的.part临时文件，完成后再原子重命名为目标文件，
+        中断后再次调用会从.part文件的末尾继续。
+
+        Args:
+            src: 源文件路径
+            dst: 目标文件路径
+            progress: 进度统计对象
+            resume: 是否跳过已完成文件并续传未完成文件
+
+        Returns:
+            bool: 实际发生了复制返回True，目标已是最新返回False
+        """
+        st = os.stat(src)
+        if resume and FileTransfer._is_up_to_date(dst, st):
+            if progress:
+                progress.file_done(skipped=True)
+            return False
+
+        part = FileTransfer._part_path(dst, st)
+        offset = 0
+        if resume and os.path.exists(part):
+            offset = min(os.path.getsize(part), st.st_size)
+            if progress and offset:
+                progress.add_resumed(offset)
+            logger.info(f"续传文件: {src} 从{offset}字节开始")
+
+        src_fd = os.open(src, os.O_RDONLY)
+        try:
+            flags = os.O_WRONLY | os.O_CREAT | (0 if offset else os.O_TRUNC)
+            dst_fd = os.open(part, flags, 0o600)
+            try:
+                os.ftruncate(dst_fd, offset)
+                os.lseek(dst_fd, offset, os.SEEK_SET)
+                end = FileTransfer._copy_range(src_fd, dst_fd, offset, st.st_size, progress)
+                if end != st.st_size:
+                    raise OSError(errno.EIO, f"复制不完整: {end}/{st.st_size}", src)
+            finally:
+                os.close(dst_fd)
+        finally:
+            os.close(src_fd)
+
+        shutil.copystat(src, part)
+        os.replace(part, dst)
+        if progress:
+            progress.file_done()
+        return True
+
+    @staticmethod
+    def _scan_tree(src: str, dst: str, progress: TransferProgress) -> List[Tuple[str, str]]:
+        """遍历源目录，创建目标目录结构并收集待复制文件"""
+        jobs = []
+        stack = [(src, dst)]
+        while stack:
+            src_dir, dst_dir = stack.pop()
+            os.makedirs(dst_dir, exist_ok=True)
+            with os.scandir(src_dir) as it:
+                for entry in it:
+                    target = os.path.join(dst_dir, entry.name)
+                    try:
+                        if entry.is_symlink():
+                            if not os.path.lexists(target):
+                                os.symlink(os.readlink(entry.path), target)
+                        elif entry.is_dir():
+                            stack.append((entry.path, target))
+                        elif entry.is_file():
+                            jobs.append((entry.path, target))
+                            progress.total_files += 1
+                            progress.total_bytes += entry.stat().st_size
+                    except OSError as e:
+                        progress.add_error(entry.path, str(e))
+        return jobs
+
+    @staticmethod
+    def _is_partial_copy(src: str, dst: str) -> bool:
+        """目标目录是之前中断的、来自同一源目录的复制"""
+        try:
+            with open(os.path.join(dst, RESUME_MARKER), encoding='utf-8') as marker:
+                return marker.read() == os.path.realpath(src)
+        except OSError:
+            return False
+
+    @staticmethod
+    def copy_tree(src: str, dst: str, workers: Optional[int] = None,
+                  progress: Optional[TransferProgress] = None,
+                  resume: bool = True) -> TransferProgress:
+        """
+        并行复制目录树
+
+        复制期间目标目录中保留RESUME_MARKER标记，全部成功后才删除，
+        中断后再次复制到同一目标时据此识别为续传。
+
+        Args:
+            src: 源目录
+            dst: 目标目录
+            workers: 线程数，默认按存储介质自动选择
+            progress: 进度统计对象
+            resume: 是否跳过已完成文件并续传未完成文件
+
+        Returns:
+            TransferProgress: 传输统计
+        """
+        progress = progress or TransferProgress()
+        os.makedirs(dst, exist_ok=True)
+        marker = os.path.join(dst, RESUME_MARKER)
+        with open(marker, 'w', encoding='utf-8') as marker_file:
+            marker_file.write(os.path.realpath(src))
+        jobs = FileTransfer._scan_tree(src, dst, progress)
+        workers = workers or FileTransfer.default_workers(os.path.dirname(os.path.abspath(dst)))
+        logger.info(f"开始复制目录: {src} -> {dst}, {progress.total_files}个文件, {workers}个线程")
+
+        def run(job: Tuple[str, str]) -> None:
+            try:
+                FileTransfer.copy_file(job[0], job[1], progress, resume)
+            except OSError as e:
+                progress.add_error(job[0], str(e))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # 大文件优先提交，避免最后只剩一个大文件在单线程复制
+            jobs.sort(key=lambda job: os.path.getsize(job[0]), reverse=True)
+            list(executor.map(run, jobs))
+
+        if not progress.errors:
+            os.unlink(marker)
+
+        # 目录的修改时间在写入子项后才能设置
+        for root, _, _ in os.walk(src):
+            target = os.path.join(dst, os.path.relpath(root, src))
+            try:
+                shutil.copystat(root, target)
+            except OSError:
+                pass
+
+        progress.finish()
+        logger.info(f"目录复制完成: {progress.summary()}")
+        return progress
+
+    @staticmethod
+    def copy(src: str, dst: str, workers: Optional[int] = None,
+             progress: Optional[TransferProgress] = None) -> TransferProgress:
+        """
+        复制文件或目录，目标为已存在的目录时复制到其中
+
+        目标目录本身是之前中断的、来自同一源目录的复制时，继续复制到该目录而不是其中。
+
+        Args:
+            src: 源路径
+            dst: 目标路径
+            workers: 目录复制的线程数
+            progress: 进度统计对象
+
+        Returns:
+            TransferProgress: 传输统计
+        """
+        if os.path.isdir(dst) and not FileTransfer._is_partial_copy(src, dst):
+            dst = os.path.join(dst, os.path.basename(os.path.normpath(src)))
+
+        if os.path.isdir(src):
+            return FileTransfer.copy_tree(src, dst, workers, progress)
+
+        progress = progress or TransferProgress()
+        progress.total_files = 1
+        progress.total_bytes = os.path.getsize(src)
+        FileTransfer.copy_file(src, dst, progress)
+        progress.finish()
+        return progress
+
+    @staticmethod
+    def _verify(src: str, dst: str) -> bool:
+        """校验复制结果：文件数量和每个文件的大小一致"""
+        if os.path.isfile(src):
+            return os.path.isfile(dst) and os.path.getsize(src) == os.path.getsize(dst)
+        for root, dirs, files in os.walk(src):
+            target_root = os.path.join(dst, os.path.relpath(root, src))
+            for name in files:
+                source = os.path.join(root, name)
+                target = os.path.join(target_root, name)
+                if os.path.islink(source):
+                    if not os.path.islink(target):
+                        return False
+                elif not os.path.isfile(target) or os.path.getsize(source) != os.path.getsize(target):
+                    return False
+        return True
+
+    @staticmethod
+    def move(src: str, dst: str, workers: Optional[int] = None,
+             progress: Optional[TransferProgress] = None) -> TransferProgress:
+        """
+        移动文件或目录
+
+        同一文件系统内直接重命名；跨设备时先复制、校验，确认无误后再删除源文件。
+        中断后再次移动到同一目标时续传之前的复制。
+
+        Args:
+            src: 源路径
+            dst: 目标路径
+            workers: 跨设备复制的线程数
+            progress: 进度统计对象
+
+        Returns:
+            TransferProgress: 传输统计
+        """
+        resuming = os.path.isdir(dst) and FileTransfer._is_partial_copy(src, dst)
+        if os.path.isdir(dst) and not resuming:
+            dst = os.path.join(dst, os.path.basename(os.path.normpath(src)))
+
+        if resuming:
+            logger.info(f"续传之前中断的跨设备移动: {src} -> {dst}")
+        else:
+            try:
+                os.rename(src, dst)
+                progress = progress or TransferProgress()
+                progress.total_files = progress.files_done = 1
+                progress.finish()
+                return progress
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                logger.info(f"跨设备移动，使用复制+校验+删除: {src} -> {dst}")
+
+        progress = FileTransfer.copy(src, dst, workers, progress)
+        if progress.errors:
+            raise OSError(errno.EIO, f"复制过程中有{len(progress.errors)}个文件失败，已保留源文件", src)
+        if not FileTransfer._verify(src, dst):
+            raise OSError(errno.EIO, "复制结果校验失败，已保留源文件", src)
+
+        if os.path.isdir(src) and not os.path.islink(src):
+            shutil.rmtree(src)
+        else:
+            os.unlink(src)
+        return progress
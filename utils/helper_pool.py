@@ -0,0 +1,609 @@
+"""
+辅助进程池模块，复用常驻的shell/PowerShell进程执行系统命令。
+
+打开、关闭、卸载应用时需要调用xdg-open、pkill、osascript、PowerShell等外部工具。
+PowerShell每次启动要几百毫秒，是Windows上每条命令的主要固定开销。进程池预先启动若干
+常驻辅助进程，通过基于行的请求/响应协议下发命令：每条命令后追加一个带随机标记的结束行，
+读到该行即表示命令完成并得到退出码。
+
+- 命令以参数列表的形式传入，按辅助进程的语法逐个加引号，参数中的特殊字符不会被解释；
+- 辅助进程崩溃或超时后会被结束，下次使用时自动重启；
+- 每个请求都有超时时间；
+- 不使用进程池时一次性启动子进程：POSIX上直接exec目标程序（不经过shell），
+  Windows上启动一次PowerShell。
+
+POSIX上常驻shell执行外部工具同样要fork/exec，再加上请求/响应的往返，反而比直接exec慢，
+所以默认（HELPER_POOL=Auto）只在Windows上启用进程池，python -m utils.helper_pool
+可以测量当前平台的实际差别。
+
+打开/关闭/卸载应用（open_application/close_application/uninstall_application）
+通过共享进程池调用当前平台的工具。
+
+用法:
+    code, output = run_helper_command(['xdg-open', 'https://example.com'])
+
+    # 测量进程池在当前平台节省的时间
+    python -m utils.helper_pool
+"""
+import os
+import re
+import queue
+import shlex
+import platform
+import threading
+import subprocess
+import time
+import uuid
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 是否启用辅助进程池：Auto只在进程池确实更快的平台（Windows PowerShell）启用，True/False强制启用/禁用
+HELPER_POOL = os.getenv('HELPER_POOL', 'Auto').lower()
+
+# 进程池大小
+HELPER_POOL_SIZE = int(os.getenv('HELPER_POOL_SIZE', '2'))
+
+# 单个请求的默认超时时间（秒）
+HELPER_TIMEOUT = float(os.getenv('HELPER_TIMEOUT', '15'))
+
+_MARKER = '__HELPER_DONE__'
+
+# PowerShell参数名（如-Name），不加引号，否则会被当作普通字符串参数
+_PS_PARAMETER = re.compile(r'^-[A-Za-z][A-Za-z0-9]*$')
+
+
+class HelperCrashed(OSError):
+    """辅助进程在执行命令期间退出（命令可能已部分执行，不能重试）"""
+
+
+class HelperKind:
+    """辅助进程类型：启动参数、命令封装方式和一次性执行方式"""
+
+    # HELPER_POOL=Auto时是否使用进程池
+    pooled_by_default = False
+
+    def __init__(self, name: str, args: List[str], oneshot_args: List[str]):
+        self.name = name
+        self.args = args
+        self.oneshot_args = oneshot_args
+
+    def quote(self, argv: Sequence[str]) -> str:
+        """把参数列表转换为该辅助进程中的一条命令，每个参数都按字面量传递"""
+        raise NotImplementedError
+
+    def oneshot_argv(self, argv: Sequence[str]) -> List[str]:
+        """一次性执行参数列表形式的命令时启动的进程"""
+        return self.oneshot_args + [self.quote(argv)]
+
+    def wrap(self, command: str, token: str) -> str:
+        raise NotImplementedError
+
+
+class ShellKind(HelperKind):
+    """POSIX shell（Linux/macOS）"""
+
+    def __init__(self):
+        super().__init__('sh', ['/bin/sh'], ['/bin/sh', '-c'])
+
+    def quote(self, argv: Sequence[str]) -> str:
+        return ' '.join(shlex.quote(arg) for arg in argv)
+
+    def oneshot_argv(self, argv: Sequence[str]) -> List[str]:
+        # 直接exec目标程序，不经过shell
+        return list(argv)
+
+    def wrap(self, command: str, token: str) -> str:
+        # 在子shell中执行，命令中的exit/cd等不会影响常驻进程；
+        # 标准输入重定向到/dev/null，避免读走后续请求
+        return f"( {command}\n) </dev/null 2>&1\nprintf '\\n{_MARKER}{token} %d\\n' $?\n"
+
+
+class PowerShellKind(HelperKind):
+    """Windows PowerShell"""
+
+    pooled_by_default = True
+
+    def __init__(self):
+        base = ['powershell', '-NoLogo', '-NoProfile', '-NonInteractive']
+        super().__init__('powershell', base + ['-Command', '-'], base + ['-Command'])
+
+    def quote(self, argv: Sequence[str]) -> str:
+        # 单引号字符串中只有单引号需要转义（写两次）；换行会被wrap合并，不允许出现在参数中。
+        # 参数名只含字母数字，原样传递
+        if any('\n' in arg or '\r' in arg for arg in argv):
+            raise ValueError("PowerShell参数中不能包含换行")
+        return '& ' + ' '.join(arg if index and _PS_PARAMETER.match(arg) else "'" + arg.replace("'", "''") + "'"
+                               for index, arg in enumerate(argv))
+
+    def wrap(self, command: str, token: str) -> str:
+        # -Command - 模式下按行执行，多行命令合并为一行
+        command = '; '.join(line.strip() for line in command.splitlines() if line.strip())
+        return ("$__ok = $true; try { " + command + " } catch { $__ok = $false; Write-Output $_ }; "
+                "if (-not $?) { $__ok = $false }; "
+                f"Write-Output \"`n{_MARKER}{token} $(if ($__ok) {{0}} else {{1}})\"\n")
+
+
+def default_kind() -> HelperKind:
+    """当前平台默认的辅助进程类型"""
+    return PowerShellKind() if platform.system() == 'Windows' else ShellKind()
+
+
+def pool_enabled(kind: HelperKind) -> bool:
+    """按HELPER_POOL决定该类型的辅助进程是否使用进程池"""
+    if HELPER_POOL == 'auto':
+        return kind.pooled_by_default
+    return HELPER_POOL in ('true', '1', 't')
+
+
+class HelperWorker:
+    """单个常驻辅助进程"""
+
+    def __init__(self, kind: HelperKind):
+        self.kind = kind
+        self.process: Optional[subprocess.Popen] = None
+        self.restarts = -1
+        self._lines: 'queue.Queue[Optional[str]]' = queue.Queue()
+
+    def _start(self) -> None:
+        self.process = subprocess.Popen(self.kind.args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, text=True, bufsize=1,
+                                        encoding='utf-8', errors='replace')
+        self._lines = queue.Queue()
+        self.restarts += 1
+        reader = threading.Thread(target=self._read, args=(self.process, self._lines),
+                                  name=f"helper-{self.kind.name}-reader", daemon=True)
+        reader.start()
+        logger.debug(f"已启动辅助进程: {self.kind.name} (pid={self.process.pid})")
+
+    @staticmethod
+    def _read(process: subprocess.Popen, lines: 'queue.Queue[Optional[str]]') -> None:
+        for line in process.stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def kill(self) -> None:
+        if self.process is not None:
+            try:
+                self.process.kill()
+                self.process.wait(timeout=1)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        self.process = None
+
+    def run(self, command: str, timeout: float) -> Tuple[int, str]:
+        """
+        在辅助进程中执行命令
+
+        Args:
+            command: 命令文本
+            timeout: 超时时间（秒）
+
+        Returns:
+            Tuple[int, str]: 退出码和输出
+
+        Raises:
+            TimeoutError: 命令超时（辅助进程会被结束）
+            HelperCrashed: 辅助进程在执行命令期间退出
+            OSError: 辅助进程无法启动或命令无法发送
+        """
+        if not self.is_alive():
+            self._start()
+
+        token = uuid.uuid4().hex
+        marker = f"{_MARKER}{token} "
+        try:
+            self.process.stdin.write(self.kind.wrap(command, token))
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            self.kill()
+            raise OSError("辅助进程已退出")
+
+        deadline = time.monotonic() + timeout
+        output: List[str] = []
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                line = self._lines.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                self.kill()
+                raise TimeoutError(f"命令执行超时（{timeout}秒）: {command}")
+            if line is None:
+                self.kill()
+                raise HelperCrashed("辅助进程在执行命令时意外退出")
+            if line.startswith(marker):
+                code = int(line[len(marker):].strip() or 1)
+                return code, ''.join(output).strip()
+            output.append(line)
+
+
+class HelperPool:
+    """常驻辅助进程池"""
+
+    def __init__(self, size: int = HELPER_POOL_SIZE, kind: Optional[HelperKind] = None,
+                 enabled: Optional[bool] = None):
+        """
+        Args:
+            size: 辅助进程数
+            kind: 辅助进程类型，默认按当前平台选择
+            enabled: 是否使用进程池，默认按HELPER_POOL决定
+        """
+        self.kind = kind or default_kind()
+        self.enabled = pool_enabled(self.kind) if enabled is None else enabled
+        self.size = max(size, 1)
+        self._idle: 'queue.Queue[HelperWorker]' = queue.Queue()
+        self._workers: List[HelperWorker] = []
+        self._lock = threading.Lock()
+        self._stats: Dict[str, List[float]] = {'pooled': [], 'oneshot': []}
+        if enabled:
+            for _ in range(self.size):
+                worker = HelperWorker(self.kind)
+                self._workers.append(worker)
+                self._idle.put(worker)
+
+    def start(self) -> None:
+        """预先启动所有辅助进程（否则在首次使用时启动）"""
+        for worker in self._workers:
+            if not worker.is_alive():
+                try:
+                    worker._start()
+                except OSError as e:
+                    logger.warning(f"预启动辅助进程失败: {str(e)}")
+
+    def _record(self, mode: str, elapsed: float) -> None:
+        with self._lock:
+            samples = self._stats[mode]
+            samples.append(elapsed)
+            if len(samples) > 1000:
+                del samples[:500]
+
+    def _spawn(self, args: List[str], timeout: float) -> Tuple[int, str]:
+        started = time.perf_counter()
+        try:
+            result = subprocess.run(args, capture_output=True, text=True,
+                                    timeout=timeout, stdin=subprocess.DEVNULL,
+                                    encoding='utf-8', errors='replace')
+            return result.returncode, (result.stdout + result.stderr).strip()
+        except subprocess.TimeoutExpired:
+            raise TimeoutError(f"命令执行超时（{timeout}秒）: {' '.join(args)}")
+        finally:
+            self._record('oneshot', time.perf_counter() - started)
+
+    def run_oneshot(self, command: str, timeout: float = HELPER_TIMEOUT) -> Tuple[int, str]:
+        """一次性启动shell/PowerShell执行命令文本"""
+        return self._spawn(self.kind.oneshot_args + [command], timeout)
+
+    def run_oneshot_argv(self, argv: Sequence[str], timeout: float = HELPER_TIMEOUT) -> Tuple[int, str]:
+        """
+        一次性执行参数列表形式的命令（POSIX上直接exec，不经过shell）
+
+        Raises:
+            OSError: 程序不存在或无法启动
+        """
+        return self._spawn(self.kind.oneshot_argv(argv), timeout)
+
+    def run_argv(self, argv: Sequence[str], timeout: float = HELPER_TIMEOUT) -> Tuple[int, str]:
+        """
+        执行参数列表形式的命令，优先使用进程池
+
+        Args:
+            argv: 程序（或PowerShell命令）及其参数
+            timeout: 超时时间（秒）
+
+        Returns:
+            Tuple[int, str]: 退出码和输出
+        """
+        if isinstance(argv, str) or not argv:
+            raise TypeError("argv必须是非空的参数列表")
+        if not self.enabled:
+            return self.run_oneshot_argv(argv, timeout)
+        return self.run(self.kind.quote(argv), timeout)
+
+    def run(self, command: str, timeout: float = HELPER_TIMEOUT) -> Tuple[int, str]:
+        """
+        执行命令，优先使用进程池
+
+        Args:
+            command: 已按辅助进程语法转义的命令文本，外部输入应通过run_argv传入
+            timeout: 超时时间（秒）
+
+        Returns:
+            Tuple[int, str]: 退出码和输出
+        """
+        if not self.enabled:
+            return self.run_oneshot(command, timeout)
+
+        started = time.perf_counter()
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"等待空闲辅助进程超时（{timeout}秒）")
+        try:
+            remaining = max(timeout - (time.perf_counter() - started), 0.1)
+            for attempt in range(2):
+                try:
+                    return worker.run(command, remaining)
+                except (TimeoutError, HelperCrashed):
+                    raise
+                except OSError as e:
+                    # 命令发送前发现辅助进程不可用时重启一次再试，仍失败则回退为一次性执行
+                    if attempt == 0:
+                        logger.warning(f"辅助进程异常，重启后重试: {str(e)}")
+                    else:
+                        logger.warning(f"辅助进程不可用，回退为一次性执行: {str(e)}")
+            return self.run_oneshot(command, timeout)
+        finally:
+            self._idle.put(worker)
+            self._record('pooled', time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        执行耗时统计
+
+        Returns:
+            Dict[str, float]: 进程池和一次性执行的请求数及平均耗时（毫秒）、辅助进程重启次数
+        """
+        with self._lock:
+            result = {}
+            for mode, samples in self._stats.items():
+                result[f"{mode}_count"] = len(samples)
+                result[f"{mode}_avg_ms"] = round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0
+        result['restarts'] = sum(max(worker.restarts, 0) for worker in self._workers)
+        return result
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.kill()
+
+
+_pool: Optional[HelperPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_helper_pool() -> HelperPool:
+    """获取进程内共享的辅助进程池"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HelperPool()
+    return _pool
+
+
+def run_helper_command(argv: Sequence[str], timeout: float = HELPER_TIMEOUT) -> Tuple[int, str]:
+    """
+    通过共享进程池执行系统命令
+
+    Args:
+        argv: 程序（或PowerShell命令）及其参数，每个参数都按字面量传递
+        timeout: 超时时间（秒）
+
+    Returns:
+        Tuple[int, str]: 退出码和输出
+
+    Raises:
+        TypeError: 传入的不是参数列表
+    """
+    return get_helper_pool().run_argv(argv, timeout)
+
+
+def _find_record(records, app_name: str):
+    """在实时清单中按名称查找应用或进程（忽略大小写和.exe后缀）"""
+    key = app_name.casefold()
+    for record in records or ():
+        name = record.name.casefold()
+        if name == key or (name.endswith('.exe') and name[:-4] == key):
+            return record
+    return None
+
+
+def open_app_argv(app_name: str, path: str = '') -> List[str]:
+    """
+    当前平台打开应用的命令
+
+    Args:
+        app_name: 应用名称
+        path: 应用的.desktop文件、.app应用包或开始菜单快捷方式（已知时优先使用）
+
+    Returns:
+        List[str]: 参数列表
+    """
+    system = platform.system()
+    if system == 'Windows':
+        return ['Start-Process', path or app_name]
+    if system == 'Darwin':
+        return ['open', path] if path.endswith('.app') else ['open', '-a', app_name]
+    if path.endswith('.desktop'):
+        return ['gio', 'launch', path]
+    return ['gtk-launch', app_name]
+
+
+def close_app_argv(app_name: str) -> List[str]:
+    """
+    当前平台关闭应用的命令
+
+    Args:
+        app_name: 应用（进程）名称
+
+    Returns:
+        List[str]: 参数列表
+    """
+    system = platform.system()
+    if system == 'Windows':
+        name = app_name[:-4] if app_name.lower().endswith('.exe') else app_name
+        return ['Stop-Process', '-Name', name]
+    if system == 'Darwin':
+        escaped = app_name.replace('\\', '\\\\').replace('"', '\\"')
+        return ['osascript', '-e', f'quit app "{escaped}"']
+    return ['pkill', '-x', app_name]
+
+
+def uninstall_app_argv(app_name: str, path: str = '') -> Optional[List[str]]:
+    """
+    当前平台卸载应用的命令
+
+    Linux上只支持Flatpak和Snap安装的应用（由.desktop文件的位置判断），
+    其他包管理器需要管理员权限，交给原有实现处理。
+
+    Args:
+        app_name: 应用名称
+        path: 应用的.desktop文件、.app应用包或开始菜单快捷方式
+
+    Returns:
+        Optional[List[str]]: 参数列表，当前平台或安装方式不支持时返回None
+    """
+    system = platform.system()
+    if system == 'Windows':
+        return ['Uninstall-Package', '-Name', app_name, '-Force']
+    if system == 'Darwin':
+        bundle = path if path.endswith('.app') else f"/Applications/{app_name}.app"
+        escaped = bundle.replace('\\', '\\\\').replace('"', '\\"')
+        return ['osascript', '-e', f'tell application "Finder" to delete POSIX file "{escaped}"']
+    desktop_id = os.path.basename(path)[:-len('.desktop')] if path.endswith('.desktop') else ''
+    if desktop_id and '/flatpak/' in path:
+        return ['flatpak', 'uninstall', '-y', '--noninteractive', desktop_id]
+    if desktop_id and '/snapd/' in path:
+        # snap的.desktop文件名为<snap名>_<应用名>.desktop
+        return ['snap', 'remove', desktop_id.split('_', 1)[0]]
+    return None
+
+
+def open_application(app_name: str) -> Tuple[bool, str]:
+    """
+    通过辅助进程池打开应用，实时清单已启动时使用其中记录的应用路径
+
+    Args:
+        app_name: 应用名称
+
+    Returns:
+        Tuple[bool, str]: 操作是否成功和结果消息
+    """
+    from utils.inventory_watcher import get_watcher
+    watcher = get_watcher()
+    record = _find_record(watcher.installed() if watcher else None, app_name)
+    name, path = (record.name, record.path) if record else (app_name, '')
+    try:
+        code, output = run_helper_command(open_app_argv(name, path))
+    except (OSError, ValueError) as e:
+        logger.error(f"打开应用时出错: {str(e)}")
+        return False, f"打开应用时出错: {str(e)}"
+    if code != 0:
+        logger.warning(f"无法打开应用 {name}: {output}")
+        return False, f"无法打开应用: {name}"
+    return True, f"成功打开应用: {name}"
+
+
+def close_application(app_name: str) -> Tuple[bool, str]:
+    """
+    通过辅助进程池关闭应用，实时清单已启动时使用其中记录的进程名
+
+    Args:
+        app_name: 应用名称
+
+    Returns:
+        Tuple[bool, str]: 执行结果（成功/失败）和结果消息
+    """
+    from utils.inventory_watcher import get_watcher
+    watcher = get_watcher()
+    record = _find_record(watcher.running() if watcher else None, app_name)
+    name = record.name if record else app_name
+    try:
+        code, output = run_helper_command(close_app_argv(name))
+    except (OSError, ValueError) as e:
+        logger.error(f"关闭应用时出错: {str(e)}")
+        return False, f"关闭应用时出错: {str(e)}"
+    if code != 0:
+        logger.warning(f"关闭应用程序失败 {name}: {output}")
+        return False, f"关闭应用程序失败: {name}。可能该应用未在运行。"
+    return True, f"成功关闭应用程序: {name}"
+
+
+def uninstall_application(app_name: str) -> Tuple[bool, str]:
+    """
+    通过辅助进程池卸载应用，实时清单已启动时使用其中记录的应用路径
+
+    Args:
+        app_name: 应用名称
+
+    Returns:
+        Tuple[bool, str]: 执行结果（成功/失败）和结果消息
+    """
+    from utils.inventory_watcher import get_watcher
+    watcher = get_watcher()
+    record = _find_record(watcher.installed() if watcher else None, app_name)
+    name, path = (record.name, record.path) if record else (app_name, '')
+    argv = uninstall_app_argv(name, path)
+    if argv is None:
+        return False, f"当前平台不支持自动卸载该应用: {name}"
+    try:
+        code, output = run_helper_command(argv)
+    except (OSError, ValueError) as e:
+        logger.error(f"卸载应用时出错: {str(e)}")
+        return False, f"卸载应用时出错: {str(e)}"
+    if code != 0:
+        logger.warning(f"卸载应用程序失败 {name}: {output}")
+        return False, f"卸载应用程序失败: {name}"
+    return True, f"成功卸载应用程序: {name}"
+
+
+def benchmark_argv() -> List[str]:
+    """
+    测量用的命令：关闭应用时使用的同一类进程查询工具，查询一个不存在的进程，没有副作用
+
+    Returns:
+        List[str]: 参数列表
+    """
+    if platform.system() == 'Windows':
+        return ['Get-Process', '-Name', '__helper_pool_benchmark__', '-ErrorAction', 'SilentlyContinue']
+    return ['pgrep', '-x', '__helper_pool_benchmark__']
+
+
+def measure_savings(argv: Optional[Sequence[str]] = None, runs: int = 20) -> Dict[str, float]:
+    """
+    测量进程池相对不使用进程池时节省的时间
+
+    两种方式都执行同一个外部工具；对照组与禁用进程池时的执行方式相同
+    （POSIX上直接exec，Windows上启动一次PowerShell），结果为负表示进程池更慢。
+
+    Args:
+        argv: 测试命令，默认为benchmark_argv()
+        runs: 每种方式执行的次数
+
+    Returns:
+        Dict[str, float]: 两种方式的平均耗时（毫秒）、每次节省的时间以及默认是否启用进程池
+    """
+    kind = default_kind()
+    argv = list(argv or benchmark_argv())
+    pool = HelperPool(size=1, kind=kind, enabled=True)
+    try:
+        pool.start()
+        pool.run_argv(argv)
+        pooled = oneshot = 0.0
+        for _ in range(runs):
+            started = time.perf_counter()
+            pool.run_argv(argv)
+            pooled += time.perf_counter() - started
+            started = time.perf_counter()
+            pool.run_oneshot_argv(argv)
+            oneshot += time.perf_counter() - started
+    finally:
+        pool.close()
+    pooled_ms, oneshot_ms = pooled / runs * 1000, oneshot / runs * 1000
+    return {
+        'platform': platform.system(),
+        'kind': kind.name,
+        'command': ' '.join(argv),
+        'pooled_avg_ms': round(pooled_ms, 2),
+        'oneshot_avg_ms': round(oneshot_ms, 2),
+        'saved_per_call_ms': round(oneshot_ms - pooled_ms, 2),
+        'pooled_by_default': pool_enabled(kind),
+    }
+
+
+if __name__ == "__main__":
+    print(measure_savings())
@@ -0,0 +1,698 @@
+"""
+本地意图分类模块：字符n-gram TF-IDF + 多分类逻辑回归（NumPy实现）。
+
+大部分命令都很简单，用不着调用大模型，但规则解析又覆盖不了各种说法。
+这个分类器：
+- 以NLPProcessor.COMMANDS中的关键词为种子，按模板扩充出训练样本；
+- 记录大模型解析成功的(文本, 命令类型)，积累到一定数量后在后台重新训练；
+- 用不参与训练的真实说法（内置样本和留出的历史记录）拟合温度系数，使输出的置信度经过校准；
+- 模型保存为一个npz文件，加载只需几毫秒，单次预测远低于1毫秒；
+- 训练过程固定随机种子，离线可复现。
+
+用法:
+    python -m utils.intent_classifier train      # 用种子和历史记录训练并保存模型
+    python -m utils.intent_classifier eval       # 真实说法上的准确率和校准误差
+    python -m utils.intent_classifier predict 把声音开大一点
+"""
+import os
+import re
+import sys
+import json
+import time
+import threading
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 是否启用本地意图分类器
+INTENT_CLASSIFIER_ENABLED = os.getenv('INTENT_CLASSIFIER', 'True').lower() in ('true', '1', 't')
+
+# 置信度达到该值时直接使用本地分类结果，不再调用大模型（关闭和卸载还需要实时清单中有对应的应用）
+INTENT_CONFIDENCE = float(os.getenv('INTENT_CONFIDENCE', '0.85'))
+
+# 模型文件和训练历史文件
+INTENT_MODEL_FILE = os.getenv('INTENT_MODEL_FILE', 'intent_model.npz')
+INTENT_HISTORY_FILE = os.getenv('INTENT_HISTORY_FILE', 'intent_history.jsonl')
+
+# 每新增多少条历史记录重新训练一次，0表示不自动重新训练
+INTENT_RETRAIN_EVERY = int(os.getenv('INTENT_RETRAIN_EVERY', '50'))
+
+# 训练历史文件最多保留的记录数（超出后只保留最新的记录），0表示不限制
+INTENT_HISTORY_MAX = int(os.getenv('INTENT_HISTORY_MAX', '5000'))
+
+# 不属于任何命令的文本（闲聊等）使用的类别
+NONE_LABEL = '__none__'
+
+# 种子关键词之外补充的样本
+_EXTRA_SEEDS = {
+    'open': ['打开一下', '开一下', '帮我开'],
+    'close': ['关掉', '关了', '关上', '杀掉', '退掉'],
+    'uninstall': ['卸了', '卸掉', '删掉这个应用'],
+    'list_running': ['哪些程序在跑', '在运行的程序', '开着哪些应用', '现在运行着什么'],
+    'list_installed': ['装了哪些软件', '电脑上有什么应用', '安装的程序'],
+    'unmute': ['取消静音', '解除静音', '恢复声音', '打开声音', '把声音打开', 'unmute'],
+    'weather': ['天气怎么样', '今天天气', '明天会下雨吗', '查一下天气', '北京天气', '外面冷不冷', 'weather'],
+    NONE_LABEL: ['你好', '谢谢', '你是谁', '讲个笑话', '现在几点', '今天星期几', '帮我写一首诗',
+                 '1加1等于几', 'hello', 'thanks', '好的', '没事了'],
+}
+
+# 扩充样本用的应用名称、文件名、前后缀
+_APP_SAMPLES = ['微信', 'QQ', 'Chrome', '浏览器', '网易云音乐', '钉钉', 'Word', 'Excel',
+                '记事本', '计算器', 'VS Code', 'Safari', 'Firefox', '终端', 'Spotify', '企业微信']
+_FILE_SAMPLES = ['test.txt', 'report.docx', 'notes.md', 'app.log', '照片.jpg', 'data.csv', '合同.pdf']
+_PREFIXES = ['', '帮我', '请', '麻烦', '给我', '能不能']
+_SUFFIXES = ['', '一下', '吧', '谢谢']
+
+# 拟合温度系数用的真实说法（不由模板生成），与种子样本的写法不同，置信度才不会偏高；
+# 包括容易被误判为关闭、卸载的非命令和文件操作
+_CALIBRATION_EXAMPLES = [
+    ('打开Chrome', 'open'), ('开一下微信', 'open'), ('启动网易云音乐', 'open'), ('帮我把钉钉打开', 'open'),
+    ('运行一下终端', 'open'), ('open safari', 'open'), ('把QQ打开吧', 'open'),
+    ('关闭微信', 'close'), ('把Chrome关了', 'close'), ('退出钉钉', 'close'), ('quit spotify', 'close'),
+    ('卸载QQ', 'uninstall'), ('把企业微信卸了', 'uninstall'), ('uninstall zoom', 'uninstall'),
+    ('删除test.txt', 'delete_file'), ('删掉桌面上的report.docx', 'delete_file'),
+    ('删除下载目录里的旧照片文件夹', 'delete_directory'), ('卸载下载目录里的安装包', NONE_LABEL),
+    ('关闭电脑', NONE_LABEL), ('退出登录微信', NONE_LABEL), ('停止播放音乐', NONE_LABEL),
+    ('关机', NONE_LABEL), ('结束这个会议', NONE_LABEL), ('删除聊天记录', NONE_LABEL),
+    ('现在有哪些程序开着', 'list_running'), ('看看运行中的应用', 'list_running'),
+    ('电脑上装了什么软件', 'list_installed'), ('列出已安装的应用', 'list_installed'),
+    ('声音大一点', 'increase_volume'), ('音量调高', 'increase_volume'), ('声音小点', 'decrease_volume'),
+    ('音量调到30', 'set_volume'), ('把音量设为50%', 'set_volume'), ('静音', 'mute'), ('取消静音', 'unmute'),
+    ('屏幕亮一点', 'increase_brightness'), ('屏幕暗一点', 'decrease_brightness'), ('亮度调到80', 'set_brightness'),
+    ('现在音量是多少', 'get_volume'), ('当前亮度', 'get_brightness'),
+    ('查看app.log最后100行', 'read_file'), ('下载目录占用多大', 'disk_usage'),
+    ('明天北京会下雨吗', 'weather'), ('你好呀', NONE_LABEL), ('讲个笑话吧', NONE_LABEL), ('几点了', NONE_LABEL),
+]
+
+# 评估用的真实说法：既不参与训练也不参与拟合温度系数，在其上测得的准确率和ECE才不是自证；
+# 与_CALIBRATION_EXAMPLES、种子样本都不重复
+_EVALUATION_EXAMPLES = [
+    ('帮忙打开计算器', 'open'), ('启动一下VS Code', 'open'), ('打开Firefox浏览器', 'open'), ('把记事本开起来', 'open'),
+    ('关掉网易云音乐', 'close'), ('把Excel关闭', 'close'), ('退出企业微信', 'close'), ('close chrome', 'close'),
+    ('把钉钉卸载了', 'uninstall'), ('把网易云音乐卸载掉', 'uninstall'), ('uninstall spotify', 'uninstall'),
+    ('删除notes.md', 'delete_file'), ('把桌面上的合同.pdf删了', 'delete_file'),
+    ('删除桌面上的旧项目文件夹', 'delete_directory'),
+    ('关闭窗口', NONE_LABEL), ('退出群聊', NONE_LABEL), ('结束通话', NONE_LABEL), ('删除好友', NONE_LABEL),
+    ('今天吃什么', NONE_LABEL), ('谢谢你', NONE_LABEL), ('你叫什么名字', NONE_LABEL),
+    ('有哪些程序在运行', 'list_running'), ('显示一下正在跑的进程', 'list_running'),
+    ('我装了哪些应用', 'list_installed'), ('查看已安装的软件', 'list_installed'),
+    ('音量大一点', 'increase_volume'), ('把声音调大些', 'increase_volume'), ('音量调低一点', 'decrease_volume'),
+    ('音量设置为20', 'set_volume'), ('把声音调到40', 'set_volume'), ('把声音关掉吧', 'mute'), ('声音恢复一下', 'unmute'),
+    ('把屏幕调亮', 'increase_brightness'), ('亮度低一点', 'decrease_brightness'), ('亮度设为60', 'set_brightness'),
+    ('音量现在多大', 'get_volume'), ('屏幕亮度是多少', 'get_brightness'),
+    ('看看notes.md的内容', 'read_file'), ('文档目录占了多少空间', 'disk_usage'),
+    ('上海今天天气怎么样', 'weather'), ('后天会下雪吗', 'weather'),
+]
+
+# 应用名称前后的修饰词（只去掉多字的修饰词，单字可能是应用名称的一部分，如"下载"、"了了"）
+_PREFIX_FILLER = re.compile(r'^(帮我|请你|麻烦你|麻烦|给我|能不能|可以|一下)+')
+_SUFFIX_FILLER = re.compile(r'(一下|谢谢|这个应用|应用程序|应用|程序|软件)+$')
+# "把微信关掉"中关键词在应用名称之后，名称从"把"、"将"后开始
+_OBJECT_MARKER = re.compile(r'^.*?(把|将)')
+# 名称以语气词结尾时无法确定语气词是否属于名称，交给大模型
+_TRAILING_PARTICLE = re.compile(r'[吧了啊呀呢嘛]$')
+_NUMBER_PATTERN = re.compile(r'(\d+(?:\.\d+)?)')
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.casefold().split())
+
+
+def _ngrams(text: str, n_min: int = 1, n_max: int = 3) -> List[str]:
+    """字符n-gram（两端加边界符，短命令的首尾字符也能形成特征）"""
+    text = f"^{_normalize(text)}$"
+    grams = []
+    for n in range(n_min, n_max + 1):
+        grams.extend(text[i:i + n] for i in range(len(text) - n + 1))
+    return grams
+
+
+def seed_examples(seed: int = 0) -> List[Tuple[str, str]]:
+    """
+    由COMMANDS关键词按模板生成种子样本（固定随机种子，结果可复现）
+
+    Returns:
+        List[Tuple[str, str]]: (文本, 命令类型)列表
+    """
+    from utils.nlp_processor import NLPProcessor
+
+    rng = np.random.default_rng(seed)
+    app_commands = (NLPProcessor.CMD_OPEN, NLPProcessor.CMD_CLOSE, NLPProcessor.CMD_UNINSTALL)
+    valued = (NLPProcessor.CMD_SET_VOLUME, NLPProcessor.CMD_SET_BRIGHTNESS,
+              NLPProcessor.CMD_INCREASE_VOLUME, NLPProcessor.CMD_DECREASE_VOLUME,
+              NLPProcessor.CMD_INCREASE_BRIGHTNESS, NLPProcessor.CMD_DECREASE_BRIGHTNESS)
+
+    phrases: Dict[str, List[str]] = {label: list(words) for label, words in NLPProcessor.COMMANDS.items()}
+    for label, words in _EXTRA_SEEDS.items():
+        phrases.setdefault(label, []).extend(words)
+
+    examples = []
+    for label, words in phrases.items():
+        for word in words:
+            examples.append((word, label))
+            if label in app_commands:
+                # 每个关键词与每个应用名称都组合一次，应用名称的n-gram不会偏向某个命令
+                for app in _APP_SAMPLES:
+                    prefix = _PREFIXES[rng.integers(len(_PREFIXES))]
+                    suffix = _SUFFIXES[rng.integers(len(_SUFFIXES))]
+                    if rng.random() < 0.6:
+                        examples.append((f"{prefix}{word}{app}{suffix}", label))
+                    else:
+                        examples.append((f"{prefix}把{app}{word}{suffix}", label))
+                continue
+            for _ in range(3):
+                prefix = _PREFIXES[rng.integers(len(_PREFIXES))]
+                suffix = _SUFFIXES[rng.integers(len(_SUFFIXES))]
+                if label in valued:
+                    value = int(rng.integers(0, 101))
+                    examples.append((f"{prefix}{word}{value}{'%' if rng.random() < 0.5 else ''}", label))
+                elif label in (NLPProcessor.CMD_DELETE_FILE, NLPProcessor.CMD_READ_FILE):
+                    examples.append((f"{prefix}{word}{_FILE_SAMPLES[rng.integers(len(_FILE_SAMPLES))]}{suffix}", label))
+                else:
+                    examples.append((f"{prefix}{word}{suffix}", label))
+    return examples
+
+
+def load_history(path: str = INTENT_HISTORY_FILE) -> List[Tuple[str, str]]:
+    """读取记录的(文本, 命令类型)，忽略损坏的行"""
+    examples = []
+    if not path or not os.path.exists(path):
+        return examples
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+                if item.get('text') and item.get('label'):
+                    examples.append((item['text'], item['label']))
+            except ValueError:
+                continue
+    return examples
+
+
+class IntentClassifier:
+    """字符n-gram TF-IDF特征上的多分类逻辑回归"""
+
+    def __init__(self, vocabulary: List[str], idf: np.ndarray, weights: np.ndarray,
+                 bias: np.ndarray, classes: List[str], temperature: float = 1.0):
+        self.vocabulary = vocabulary
+        self.index = {gram: i for i, gram in enumerate(vocabulary)}
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+        self.classes = classes
+        self.temperature = temperature
+
+    # ---- 特征 ----
+
+    def _features(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """单条文本的稀疏TF-IDF特征（列下标, 值），已做L2归一化"""
+        counts: Dict[int, int] = {}
+        for gram in _ngrams(text):
+            column = self.index.get(gram)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+        if not counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        columns = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = (1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))) * self.idf[columns]
+        values /= np.linalg.norm(values) or 1.0
+        return columns, values
+
+    def _matrix(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """多条文本的稀疏特征（COO格式：行、列、值）"""
+        rows, columns, values = [], [], []
+        for row, text in enumerate(texts):
+            cols, vals = self._features(text)
+            rows.append(np.full(len(cols), row, dtype=np.int64))
+            columns.append(cols)
+            values.append(vals)
+        return np.concatenate(rows), np.concatenate(columns), np.concatenate(values)
+
+    # ---- 训练 ----
+
+    @staticmethod
+    def _build_vocabulary(texts: List[str]) -> Tuple[List[str], np.ndarray]:
+        document_frequency: Dict[str, int] = {}
+        for text in texts:
+            for gram in set(_ngrams(text)):
+                document_frequency[gram] = document_frequency.get(gram, 0) + 1
+        vocabulary = sorted(document_frequency)
+        df = np.array([document_frequency[gram] for gram in vocabulary], dtype=np.float32)
+        idf = np.log((1 + len(texts)) / (1 + df)) + 1.0
+        return vocabulary, idf.astype(np.float32)
+
+    @staticmethod
+    def _softmax(scores: np.ndarray) -> np.ndarray:
+        scores = scores - scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    @classmethod
+    def _fit(cls, texts: List[str], labels: List[str], classes: List[str],
+             epochs: int = 120, learning_rate: float = 4.0, l2: float = 1e-4) -> 'IntentClassifier':
+        vocabulary, idf = cls._build_vocabulary(texts)
+        model = cls(vocabulary, idf, np.zeros((len(vocabulary), len(classes)), dtype=np.float32),
+                    np.zeros(len(classes), dtype=np.float32), classes)
+        rows, columns, values = model._matrix(texts)
+        class_index = {label: i for i, label in enumerate(classes)}
+        target = np.zeros((len(texts), len(classes)), dtype=np.float32)
+        target[np.arange(len(texts)), [class_index[label] for label in labels]] = 1.0
+
+        # 稀疏矩阵乘法：特征按行连续存放，X·W按行分段求和；
+        # Xᵀ·G先按列排序，再按列分段求和（词表来自训练文本，每行至少有一个特征）
+        row_starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        by_column = np.argsort(columns, kind='stable')
+        sorted_columns = columns[by_column]
+        column_starts = np.flatnonzero(np.r_[True, sorted_columns[1:] != sorted_columns[:-1]])
+        used_columns = sorted_columns[column_starts]
+        column_rows, column_values = rows[by_column], values[by_column, None]
+
+        # 带动量的全批量梯度下降
+        velocity_w = np.zeros_like(model.weights)
+        velocity_b = np.zeros_like(model.bias)
+        for _ in range(epochs):
+            scores = np.add.reduceat(values[:, None] * model.weights[columns], row_starts, axis=0)
+            gradient = (cls._softmax(scores + model.bias) - target) / len(texts)
+            grad_w = l2 * model.weights
+            grad_w[used_columns] += np.add.reduceat(column_values * gradient[column_rows], column_starts, axis=0)
+            velocity_w = 0.9 * velocity_w - learning_rate * grad_w
+            velocity_b = 0.9 * velocity_b - learning_rate * gradient.sum(axis=0)
+            model.weights += velocity_w
+            model.bias += velocity_b
+        return model
+
+    @classmethod
+    def train(cls, examples: Iterable[Tuple[str, str]], seed: int = 0,
+              calibration: Optional[Iterable[Tuple[str, str]]] = None) -> 'IntentClassifier':
+        """
+        训练模型
+
+        给出calibration时在全部样本上训练，并用calibration（不参与训练的真实说法）拟合温度系数；
+        否则先在80%样本上训练并用其余20%拟合温度系数，再用全部样本训练最终模型。
+        模板生成的种子样本彼此相近，在其留出集上拟合的温度会让置信度偏高，应尽量提供calibration。
+
+        Args:
+            examples: (文本, 命令类型)样本
+            seed: 随机种子（决定留出集划分）
+            calibration: 拟合温度系数用的(文本, 命令类型)样本
+
+        Returns:
+            IntentClassifier: 训练好的模型
+        """
+        examples = list(dict.fromkeys((text, label) for text, label in examples if text and label))
+        texts = [text for text, _ in examples]
+        labels = [label for _, label in examples]
+        classes = sorted(set(labels))
+
+        if calibration is not None:
+            model = cls._fit(texts, labels, classes)
+            held_out = [(text, label) for text, label in calibration if label in classes]
+            model.temperature = model._fit_temperature([text for text, _ in held_out], [label for _, label in held_out])
+        else:
+            order = np.random.default_rng(seed).permutation(len(examples))
+            split = int(len(order) * 0.8)
+            train_idx, holdout_idx = order[:split], order[split:]
+            draft = cls._fit([texts[i] for i in train_idx], [labels[i] for i in train_idx], classes)
+            temperature = draft._fit_temperature([texts[i] for i in holdout_idx], [labels[i] for i in holdout_idx])
+            model = cls._fit(texts, labels, classes)
+            model.temperature = temperature
+        logger.info(f"意图分类器训练完成: {len(examples)}条样本, {len(classes)}个类别, "
+                    f"词表{len(model.vocabulary)}, 温度{model.temperature:.2f}")
+        return model
+
+    def _logits(self, texts: List[str]) -> np.ndarray:
+        rows, columns, values = self._matrix(texts)
+        scores = np.zeros((len(texts), len(self.classes)), dtype=np.float32)
+        np.add.at(scores, rows, values[:, None] * self.weights[columns])
+        return scores + self.bias
+
+    def _fit_temperature(self, texts: List[str], labels: List[str]) -> float:
+        """在留出集上选择使负对数似然最小的温度系数"""
+        if not texts:
+            return 1.0
+        logits = self._logits(texts)
+        class_index = {label: i for i, label in enumerate(self.classes)}
+        target = np.array([class_index[label] for label in labels])
+        best, best_nll = 1.0, float('inf')
+        for temperature in np.linspace(0.25, 4.0, 31):
+            probabilities = self._softmax(logits / temperature)
+            nll = -np.log(probabilities[np.arange(len(texts)), target] + 1e-9).mean()
+            if nll < best_nll:
+                best, best_nll = float(temperature), nll
+        return best
+
+    # ---- 预测 ----
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        """
+        预测命令类型
+
+        Args:
+            text: 命令文本
+
+        Returns:
+            Tuple[Optional[str], float]: 命令类型（闲聊等非命令为None）和校准后的置信度
+        """
+        columns, values = self._features(text)
+        if not len(columns):
+            return None, 0.0
+        scores = (values @ self.weights[columns] + self.bias) / self.temperature
+        scores -= scores.max()
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum()
+        best = int(probabilities.argmax())
+        label = self.classes[best]
+        return (None if label == NONE_LABEL else label), float(probabilities[best])
+
+    def evaluate(self, examples: List[Tuple[str, str]], bins: int = 10) -> Dict[str, float]:
+        """
+        评估准确率和期望校准误差（ECE）
+
+        Args:
+            examples: (文本, 命令类型)样本
+            bins: 计算ECE的置信度分桶数
+
+        Returns:
+            Dict[str, float]: accuracy、ece和平均预测耗时（微秒）
+        """
+        correct, confidences = [], []
+        started = time.perf_counter()
+        for text, label in examples:
+            predicted, confidence = self.predict(text)
+            correct.append((predicted or NONE_LABEL) == label)
+            confidences.append(confidence)
+        elapsed = time.perf_counter() - started
+        correct_arr, confidence_arr = np.array(correct, dtype=np.float32), np.array(confidences)
+        ece = 0.0
+        for low in np.linspace(0, 1, bins, endpoint=False):
+            mask = (confidence_arr > low) & (confidence_arr <= low + 1.0 / bins)
+            if mask.any():
+                ece += mask.mean() * abs(correct_arr[mask].mean() - confidence_arr[mask].mean())
+        return {'accuracy': round(float(correct_arr.mean()), 4), 'ece': round(float(ece), 4),
+                'predict_us': round(elapsed / max(len(examples), 1) * 1e6, 1)}
+
+    # ---- 保存和加载 ----
+
+    def save(self, path: str = INTENT_MODEL_FILE) -> None:
+        """保存模型（先写临时文件再替换）"""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, vocabulary=np.array(self.vocabulary), idf=self.idf, weights=self.weights,
+                 bias=self.bias, classes=np.array(self.classes), temperature=np.float32(self.temperature))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = INTENT_MODEL_FILE) -> 'IntentClassifier':
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['vocabulary'].tolist(), data['idf'], data['weights'], data['bias'],
+                       data['classes'].tolist(), float(data['temperature']))
+
+
+def extract_parameter(command_type: str, text: str) -> Tuple[bool, Any]:
+    """
+    为分类出的命令提取参数（只处理参数简单的命令）
+
+    Args:
+        command_type: 命令类型
+        text: 命令文本
+
+    Returns:
+        Tuple[bool, Any]: 能否可靠提取和参数
+    """
+    from utils.nlp_processor import NLPProcessor
+
+    number = _NUMBER_PATTERN.search(text)
+    value = int(float(number.group(1))) if number else None
+
+    if command_type in (NLPProcessor.CMD_OPEN, NLPProcessor.CMD_CLOSE, NLPProcessor.CMD_UNINSTALL):
+        # 去掉最长的命令关键词和修饰词，剩下的就是应用名称
+        keywords = sorted(NLPProcessor.COMMANDS.get(command_type, []) + _EXTRA_SEEDS.get(command_type, []),
+                          key=len, reverse=True)
+        lowered = text.casefold()
+        keyword = next((word for word in keywords if word.casefold() in lowered), None)
+        if keyword is None:
+            return False, None
+        position = lowered.index(keyword.casefold())
+        # 名称通常在关键词之后（"打开微信"），关键词在句末时在其之前（"把微信关掉"）
+        app_name = _SUFFIX_FILLER.sub('', text[position + len(keyword):].strip()).strip()
+        if not app_name:
+            before = _OBJECT_MARKER.sub('', text[:position].strip())
+            app_name = _SUFFIX_FILLER.sub('', _PREFIX_FILLER.sub('', before)).strip()
+        if not app_name or _TRAILING_PARTICLE.search(app_name):
+            return False, None
+        return True, app_name
+
+    if command_type in (NLPProcessor.CMD_SET_VOLUME, NLPProcessor.CMD_SET_BRIGHTNESS):
+        return value is not None, value
+
+    if command_type in (NLPProcessor.CMD_INCREASE_VOLUME, NLPProcessor.CMD_DECREASE_VOLUME,
+                        NLPProcessor.CMD_INCREASE_BRIGHTNESS, NLPProcessor.CMD_DECREASE_BRIGHTNESS):
+        return True, value
+
+    if command_type in (NLPProcessor.CMD_LIST_RUNNING, NLPProcessor.CMD_LIST_INSTALLED,
+                        NLPProcessor.CMD_GET_VOLUME, NLPProcessor.CMD_MUTE, NLPProcessor.CMD_UNMUTE,
+                        NLPProcessor.CMD_GET_BRIGHTNESS):
+        return True, None
+
+    # 文件操作、天气等命令的参数（路径、地点）交给大模型或规则解析
+    return False, None
+
+
+class _ClassifierState:
+    """进程内共享的分类器及重新训练状态"""
+
+    def __init__(self):
+        self.model: Optional[IntentClassifier] = None
+        self.lock = threading.Lock()
+        self.new_examples = 0
+        self.retraining = False
+        # 历史文件的记录数（首次记录样本时统计）
+        self.history_lines: Optional[int] = None
+
+
+_state = _ClassifierState()
+
+
+def calibration_split(history: List[Tuple[str, str]], seed: int = 0) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """
+    划分训练样本和校准样本：历史记录（真实说法）中留出20%，与内置的真实说法一起拟合温度系数
+
+    Returns:
+        Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]: 参与训练的历史记录和校准样本
+    """
+    history = list(dict.fromkeys(history))
+    order = np.random.default_rng(seed).permutation(len(history))
+    split = int(len(order) * 0.8)
+    return ([history[i] for i in order[:split]],
+            list(_CALIBRATION_EXAMPLES) + [history[i] for i in order[split:]])
+
+
+def evaluation_split(history: List[Tuple[str, str]], seed: int = 0) -> Tuple[
+        List[Tuple[str, str]], List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """
+    划分训练、校准和评估样本，三者互不重叠：历史记录按70%/15%/15%划分，
+    内置的真实说法分别加入校准样本和评估样本
+
+    Returns:
+        Tuple: 参与训练的历史记录、校准样本和评估样本
+    """
+    history = list(dict.fromkeys(history))
+    order = np.random.default_rng(seed).permutation(len(history))
+    train_end, calibration_end = int(len(order) * 0.7), int(len(order) * 0.85)
+    return ([history[i] for i in order[:train_end]],
+            list(_CALIBRATION_EXAMPLES) + [history[i] for i in order[train_end:calibration_end]],
+            list(_EVALUATION_EXAMPLES) + [history[i] for i in order[calibration_end:]])
+
+
+def train_and_save(model_file: str = INTENT_MODEL_FILE, history_file: str = INTENT_HISTORY_FILE) -> IntentClassifier:
+    """用种子样本和历史记录训练模型并保存"""
+    history, calibration = calibration_split(load_history(history_file))
+    model = IntentClassifier.train(seed_examples() + history, calibration=calibration)
+    if model_file:
+        try:
+            model.save(model_file)
+        except OSError as e:
+            logger.warning(f"保存意图分类模型失败: {str(e)}")
+    return model
+
+
+def _retrain_in_background() -> None:
+    """在后台线程中训练，完成后替换共享模型（调用方需先把retraining置为True）"""
+    def run():
+        try:
+            model = train_and_save()
+            _state.model = model
+        except Exception as e:
+            logger.warning(f"训练意图分类器失败: {str(e)}")
+        finally:
+            _state.retraining = False
+
+    threading.Thread(target=run, name='intent-retrain', daemon=True).start()
+
+
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    """
+    获取共享的分类器
+
+    优先加载模型文件；没有可用的模型文件时在后台用种子样本训练，训练完成前返回None，
+    避免第一条命令等待训练。
+    """
+    if _state.model is None:
+        with _state.lock:
+            if _state.model is None and not _state.retraining:
+                try:
+                    _state.model = IntentClassifier.load(INTENT_MODEL_FILE)
+                except (OSError, KeyError, ValueError):
+                    logger.info("未找到可用的意图分类模型，在后台使用种子样本训练")
+                    _state.retraining = True
+                    _retrain_in_background()
+    return _state.model
+
+
+def compact_history(path: str = INTENT_HISTORY_FILE, keep: int = INTENT_HISTORY_MAX) -> int:
+    """
+    压缩训练历史：去掉重复的记录，只保留最新的keep条（先写临时文件再替换）
+
+    Args:
+        path: 历史文件
+        keep: 保留的记录数
+
+    Returns:
+        int: 压缩后的记录数
+    """
+    latest: Dict[Tuple[str, str], None] = {}
+    for example in load_history(path):
+        # 重复的记录移到末尾，保留的是最近一次出现的位置
+        latest.pop(example, None)
+        latest[example] = None
+    examples = list(latest)[-keep:] if keep else list(latest)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for text, label in examples:
+            f.write(json.dumps({'text': text, 'label': label}, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, path)
+    return len(examples)
+
+
+def record_example(text: str, command_type: Optional[str]) -> None:
+    """
+    记录一条大模型解析结果作为训练样本，积累INTENT_RETRAIN_EVERY条后在后台重新训练；
+    历史文件超过INTENT_HISTORY_MAX条时只保留最新的记录
+
+    Args:
+        text: 命令文本
+        command_type: 大模型给出的命令类型
+    """
+    if not command_type or not INTENT_HISTORY_FILE:
+        return
+
+    with _state.lock:
+        try:
+            if _state.history_lines is None:
+                _state.history_lines = len(load_history(INTENT_HISTORY_FILE))
+            with open(INTENT_HISTORY_FILE, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'text': text, 'label': command_type}, ensure_ascii=False) + '\n')
+            _state.history_lines += 1
+            # 超出上限10%时才压缩，避免每条记录都重写文件
+            if INTENT_HISTORY_MAX and _state.history_lines > INTENT_HISTORY_MAX + max(INTENT_HISTORY_MAX // 10, 1):
+                _state.history_lines = compact_history(INTENT_HISTORY_FILE, INTENT_HISTORY_MAX)
+        except OSError as e:
+            logger.warning(f"记录意图样本失败: {str(e)}")
+            return
+
+        _state.new_examples += 1
+        if not INTENT_RETRAIN_EVERY or _state.new_examples < INTENT_RETRAIN_EVERY or _state.retraining:
+            return
+        _state.new_examples = 0
+        _state.retraining = True
+    _retrain_in_background()
+
+
+def _inventory_agrees(command_type: str, app_name: str) -> bool:
+    """
+    实时清单中是否有要关闭（正在运行）或要卸载（已安装）的应用
+
+    关闭和卸载不可撤销，分类器把"关闭电脑"、"删除test.txt"这类指令误判为关闭、卸载时，
+    对象不会出现在清单中；没有实时清单时一律交给大模型。
+    """
+    from utils.inventory_watcher import get_watcher
+    from utils.nlp_processor import NLPProcessor
+
+    watcher = get_watcher()
+    if watcher is None:
+        return False
+    records = watcher.running() if command_type == NLPProcessor.CMD_CLOSE else watcher.installed()
+    if not records:
+        return False
+    wanted = app_name.casefold()
+    for record in records:
+        name = record.name.casefold()
+        if name.endswith('.exe'):
+            name = name[:-4]
+        if name == wanted or (len(wanted) > 1 and wanted in name):
+            return True
+    return False
+
+
+def classify_command(text: str, threshold: float = INTENT_CONFIDENCE) -> Optional[Tuple[str, Any, float]]:
+    """
+    本地分类命令，置信度足够且参数可以可靠提取时返回结果
+
+    关闭和卸载还需要实时清单中有对应的应用，否则交给大模型确认；
+    文件操作的参数不由分类器提取，因此删除文件、目录等操作不会被本地分类器直接执行。
+
+    Args:
+        text: 命令文本
+        threshold: 置信度阈值
+
+    Returns:
+        Optional[Tuple[str, Any, float]]: 命令类型、参数和置信度，不满足条件时返回None
+    """
+    from utils.nlp_processor import NLPProcessor
+
+    model = get_intent_classifier()
+    if model is None:
+        return None
+    command_type, confidence = model.predict(text)
+    if not command_type or confidence < threshold:
+        return None
+    ok, parameter = extract_parameter(command_type, text)
+    if not ok:
+        return None
+    if command_type in (NLPProcessor.CMD_CLOSE, NLPProcessor.CMD_UNINSTALL) and not _inventory_agrees(command_type, parameter):
+        logger.info(f"本地分类结果{command_type}({parameter})未得到实时清单确认，交给大模型解析")
+        return None
+    return command_type, parameter, confidence
+
+
+def main() -> None:
+    action = sys.argv[1] if len(sys.argv) > 1 else 'train'
+    if action == 'train':
+        started = time.perf_counter()
+        model = train_and_save()
+        print(f"训练完成: {len(model.classes)}个类别, 词表{len(model.vocabulary)}, "
+              f"温度{model.temperature:.2f}, 耗时{time.perf_counter() - started:.1f}秒, 已保存到{INTENT_MODEL_FILE}")
+    elif action == 'eval':
+        # 在既不参与训练也不参与拟合温度系数的真实说法上评估
+        # （模板生成的留出样本与训练样本过于相似，校准样本上的ECE偏乐观）
+        history, calibration, evaluation = evaluation_split(load_history(), seed=1)
+        model = IntentClassifier.train(seed_examples() + history, calibration=calibration)
+        print(model.evaluate(evaluation))
+    elif action == 'predict':
+        text = ' '.join(sys.argv[2:])
+        try:
+            model = IntentClassifier.load(INTENT_MODEL_FILE)
+        except (OSError, KeyError, ValueError):
+            model = train_and_save()
+        command_type, confidence = model.predict(text)
+        print(f"命令类型: {command_type}, 置信度: {confidence:.3f}, 参数: {extract_parameter(command_type or '', text)}")
+    else:
+        print("用法: python -m utils.intent_classifier [train|eval|predict 文本]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,641 @@
+"""
+已安装应用和运行中进程的实时清单（可选，供常驻的Web服务使用）。
+
+后台线程持续维护两份状态，list_installed/list_running直接读取当前快照，不再每次全量扫描：
+- 已安装应用：Linux上用inotify监视应用目录（.desktop文件），只重新读取发生变化的文件；
+  inotify不可用、在其他平台上，或目录暂时不存在/无法监视时，定期扫描这些目录并与上次结果比较
+  （目录出现后改为inotify监视）；Windows开始菜单的快捷方式位于子文件夹中，扫描时递归进入子目录；
+- 运行中进程：定期列出进程号并与上次比较，只读取新进程的信息（Linux上直接读/proc，
+  其他平台使用psutil）；CPU和内存占用按较长的间隔批量刷新。
+
+状态变化以InventoryEvent发布，其他组件可以通过subscribe()订阅。
+"""
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import logging
+import platform
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from utils.app_records import AppRecord, ProcessRecord
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 是否在Web服务中启用实时清单
+INVENTORY_WATCH = os.getenv('INVENTORY_WATCH', 'False').lower() in ('true', '1', 't')
+
+# 检查进程启动/退出的间隔（秒）
+INVENTORY_PROCESS_INTERVAL = float(os.getenv('INVENTORY_PROCESS_INTERVAL', '1.0'))
+
+# 刷新进程CPU和内存占用的间隔（秒）
+INVENTORY_USAGE_INTERVAL = float(os.getenv('INVENTORY_USAGE_INTERVAL', '5.0'))
+
+# 定期扫描未被inotify监视的应用目录的间隔（秒）
+INVENTORY_APP_INTERVAL = float(os.getenv('INVENTORY_APP_INTERVAL', '30.0'))
+
+# 应用目录，多个目录用路径分隔符分隔，为空时使用当前平台的默认目录
+INVENTORY_APP_DIRS = os.getenv('INVENTORY_APP_DIRS', '')
+
+# 事件类型
+APP_ADDED = 'app_added'
+APP_REMOVED = 'app_removed'
+PROCESS_STARTED = 'process_started'
+PROCESS_EXITED = 'process_exited'
+
+# inotify常量（linux/inotify.h）
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_IN_EVENT_HEADER = struct.Struct('iIII')
+
+
+def default_app_dirs() -> List[str]:
+    """当前平台的应用目录"""
+    if INVENTORY_APP_DIRS:
+        return [path for path in INVENTORY_APP_DIRS.split(os.pathsep) if path]
+    home = os.path.expanduser('~')
+    system = platform.system()
+    if system == 'Darwin':
+        return ['/Applications', '/System/Applications', os.path.join(home, 'Applications')]
+    if system == 'Windows':
+        return [os.path.join(os.getenv('PROGRAMDATA', r'C:\ProgramData'), r'Microsoft\Windows\Start Menu\Programs'),
+                os.path.join(os.getenv('APPDATA', ''), r'Microsoft\Windows\Start Menu\Programs')]
+    data_home = os.getenv('XDG_DATA_HOME') or os.path.join(home, '.local', 'share')
+    return [os.path.join(data_home, 'applications'), '/usr/share/applications', '/usr/local/share/applications',
+            '/var/lib/flatpak/exports/share/applications', '/var/lib/snapd/desktop/applications']
+
+
+def read_app(path: str) -> Optional[AppRecord]:
+    """
+    读取应用目录中的一个条目
+
+    Args:
+        path: .desktop文件、.app应用包或开始菜单快捷方式的路径
+
+    Returns:
+        Optional[AppRecord]: 应用记录，不是（可显示的）应用时返回None
+    """
+    base, extension = os.path.splitext(os.path.basename(path))
+    if extension in ('.app', '.lnk'):
+        return AppRecord(base, path)
+    if extension != '.desktop':
+        return None
+    fields: Dict[str, str] = {}
+    try:
+        with open(path, encoding='utf-8', errors='replace') as desktop_file:
+            in_entry = False
+            for line in desktop_file:
+                line = line.strip()
+                if line.startswith('['):
+                    if in_entry:
+                        break
+                    in_entry = line == '[Desktop Entry]'
+                elif in_entry and '=' in line:
+                    key, value = line.split('=', 1)
+                    fields.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+    if fields.get('Type', 'Application') != 'Application' or not fields.get('Name'):
+        return None
+    if fields.get('NoDisplay', '').lower() == 'true' or fields.get('Hidden', '').lower() == 'true':
+        return None
+    # Version是所遵循的Desktop Entry规范的版本，不是应用的版本
+    return AppRecord(fields['Name'], path, fields.get('X-AppImage-Version', ''))
+
+
+class InventoryEvent:
+    """清单变化事件"""
+
+    __slots__ = ('kind', 'record', 'timestamp')
+
+    def __init__(self, kind: str, record: Any):
+        self.kind = kind
+        self.record = record
+        self.timestamp = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {'kind': self.kind, 'name': self.record.name, 'path': self.record.path, 'timestamp': self.timestamp}
+        if isinstance(self.record, ProcessRecord):
+            data['pid'] = self.record.pid
+        return data
+
+    def __repr__(self) -> str:
+        return f"InventoryEvent({self.kind!r}, {self.record!r})"
+
+
+class _Inotify:
+    """最小的inotify封装（通过ctypes调用libc）"""
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1失败')
+        self._get_errno = ctypes.get_errno
+        self.directories: Dict[int, str] = {}
+        # 被删除或卸载、监视已失效的目录，由调用方取走后改为定期扫描
+        self.dropped: List[str] = []
+
+    def watch(self, directory: str) -> bool:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _IN_WATCH_MASK)
+        if wd < 0:
+            logger.debug(f"无法监视目录 {directory}: {os.strerror(self._get_errno())}")
+            return False
+        self.directories[wd] = directory
+        return True
+
+    def read(self) -> Tuple[List[str], bool]:
+        """
+        读取已发生的事件
+
+        Returns:
+            Tuple[List[str], bool]: 发生变化的路径，以及事件队列是否溢出（需要全量重新扫描）
+        """
+        paths, overflow = [], False
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            offset = 0
+            while offset + _IN_EVENT_HEADER.size <= len(data):
+                wd, mask, _, length = _IN_EVENT_HEADER.unpack_from(data, offset)
+                offset += _IN_EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & _IN_Q_OVERFLOW:
+                    overflow = True
+                elif mask & _IN_IGNORED:
+                    if wd in self.directories:
+                        self.dropped.append(self.directories.pop(wd))
+                elif name and wd in self.directories:
+                    paths.append(os.path.join(self.directories[wd], os.fsdecode(name)))
+        return paths, overflow
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class _ProcScanner:
+    """直接读取/proc的进程扫描（Linux）"""
+
+    def __init__(self):
+        self._ticks = os.sysconf('SC_CLK_TCK')
+        self._page_size = os.sysconf('SC_PAGE_SIZE')
+        self._memory_total = os.sysconf('SC_PHYS_PAGES') * self._page_size
+        self._cpu_times: Dict[int, Tuple[float, float]] = {}
+
+    @staticmethod
+    def pids() -> Set[int]:
+        return {int(name) for name in os.listdir('/proc') if name.isdigit()}
+
+    @staticmethod
+    def describe(pid: int) -> Optional[ProcessRecord]:
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as cmdline_file:
+                cmdline = cmdline_file.read()
+            # 内核线程没有命令行
+            if not cmdline:
+                return None
+            with open(f'/proc/{pid}/comm', encoding='utf-8', errors='replace') as comm_file:
+                name = comm_file.read().strip()
+        except OSError:
+            return None
+        try:
+            path = os.readlink(f'/proc/{pid}/exe')
+        except OSError:
+            path = os.fsdecode(cmdline.split(b'\0', 1)[0])
+        return ProcessRecord(name or os.path.basename(path), pid, path=path)
+
+    def usage(self, processes: Dict[int, ProcessRecord]) -> None:
+        now = time.monotonic()
+        cpu_times = {}
+        for pid, record in processes.items():
+            try:
+                with open(f'/proc/{pid}/stat', 'rb') as stat_file:
+                    fields = stat_file.read().rsplit(b')', 1)[1].split()
+            except (OSError, IndexError):
+                continue
+            # 字段从state（第3项）开始：utime为第14项，stime为第15项，rss为第24项
+            ticks = int(fields[11]) + int(fields[12])
+            cpu_times[pid] = (ticks, now)
+            previous = self._cpu_times.get(pid)
+            if previous and now > previous[1]:
+                record.cpu = round((ticks - previous[0]) / self._ticks / (now - previous[1]) * 100, 1)
+            record.memory = round(int(fields[21]) * self._page_size / self._memory_total * 100, 1)
+        self._cpu_times = cpu_times
+
+
+class _PsutilScanner:
+    """基于psutil的进程扫描（非Linux平台）"""
+
+    def __init__(self):
+        import psutil
+        self._psutil = psutil
+        self._handles: Dict[int, Any] = {}
+
+    def pids(self) -> Set[int]:
+        return set(self._psutil.pids())
+
+    def describe(self, pid: int) -> Optional[ProcessRecord]:
+        try:
+            process = self._psutil.Process(pid)
+            record = ProcessRecord(process.name(), pid, path=process.exe() or '')
+        except (self._psutil.Error, OSError):
+            return None
+        self._handles[pid] = process
+        return record
+
+    def usage(self, processes: Dict[int, ProcessRecord]) -> None:
+        for pid in set(self._handles) - set(processes):
+            del self._handles[pid]
+        for pid, record in processes.items():
+            process = self._handles.get(pid)
+            if process is None:
+                continue
+            try:
+                record.cpu = round(process.cpu_percent(None), 1)
+                record.memory = round(process.memory_percent(), 1)
+            except self._psutil.Error:
+                continue
+
+
+class InventoryWatcher:
+    """在后台线程中维护已安装应用和运行中进程的实时清单"""
+
+    def __init__(self, app_dirs: Optional[List[str]] = None,
+                 process_interval: float = INVENTORY_PROCESS_INTERVAL,
+                 usage_interval: float = INVENTORY_USAGE_INTERVAL,
+                 app_interval: float = INVENTORY_APP_INTERVAL,
+                 use_inotify: bool = True, recursive: Optional[bool] = None):
+        """
+        Args:
+            app_dirs: 应用目录，默认为当前平台的应用目录；暂不存在的目录会定期检查
+            process_interval: 检查进程启动/退出的间隔（秒）
+            usage_interval: 刷新CPU和内存占用的间隔（秒）
+            app_interval: 定期扫描未被inotify监视的应用目录的间隔（秒）
+            use_inotify: 可用时是否使用inotify监视应用目录
+            recursive: 扫描时是否进入子目录（不进入.app应用包），默认只在Windows上递归
+        """
+        self.app_dirs = list(app_dirs if app_dirs is not None else default_app_dirs())
+        self.process_interval = process_interval
+        self.usage_interval = usage_interval
+        self.app_interval = app_interval
+        self.use_inotify = use_inotify and sys.platform.startswith('linux')
+        self.recursive = platform.system() == 'Windows' if recursive is None else recursive
+        # 已由inotify监视的目录和上次扫描时存在的目录
+        self._watched: Set[str] = set()
+        self._present: Set[str] = set()
+        self._apps: Dict[str, AppRecord] = {}
+        self._processes: Dict[int, ProcessRecord] = {}
+        # 对外提供的快照，状态变化时整体替换，读取方无需加锁
+        self._app_view: Tuple[AppRecord, ...] = ()
+        self._process_view: Tuple[ProcessRecord, ...] = ()
+        self._subscribers: List[Callable[[InventoryEvent], None]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+        self._scanner: Any = None
+        self.mode = {'apps': 'none', 'processes': 'none'}
+        self.counters = {APP_ADDED: 0, APP_REMOVED: 0, PROCESS_STARTED: 0, PROCESS_EXITED: 0,
+                         'app_rescans': 0, 'process_polls': 0}
+
+    # 查询
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def installed(self) -> Optional[Tuple[AppRecord, ...]]:
+        """
+        当前已安装的应用
+
+        Returns:
+            Optional[Tuple[AppRecord, ...]]: 按名称排序的应用快照，尚未就绪或应用目录都不存在时返回None
+        """
+        if not self.ready or not self._present:
+            return None
+        return self._app_view
+
+    def running(self) -> Optional[Tuple[ProcessRecord, ...]]:
+        """
+        当前运行中的进程
+
+        Returns:
+            Optional[Tuple[ProcessRecord, ...]]: 进程快照，尚未就绪或无法扫描进程时返回None
+        """
+        if not self.ready or self._scanner is None:
+            return None
+        return self._process_view
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """等待首次扫描完成"""
+        return self._ready.wait(timeout)
+
+    # 订阅
+    def subscribe(self, callback: Callable[[InventoryEvent], None]) -> Callable[[], None]:
+        """
+        订阅清单变化事件，回调在监视线程中调用，不应阻塞
+
+        Args:
+            callback: 事件回调
+
+        Returns:
+            Callable[[], None]: 取消订阅的函数
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def _publish(self, events: List[InventoryEvent]) -> None:
+        if not events:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for event in events:
+            self.counters[event.kind] += 1
+            for callback in subscribers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logger.warning(f"清单事件回调出错: {str(e)}")
+
+    # 生命周期
+    def start(self) -> 'InventoryWatcher':
+        """启动监视线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='inventory-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """停止监视线程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        try:
+            self._setup()
+            self._scan_apps(publish=False)
+            self._poll_processes(publish=False)
+            self._refresh_usage()
+        except Exception as e:
+            logger.exception(f"清单首次扫描失败: {str(e)}")
+        finally:
+            self._ready.set()
+        logger.info(f"实时清单已就绪: 应用{len(self._app_view)}个({self.mode['apps']}), "
+                    f"进程{len(self._process_view)}个({self.mode['processes']})")
+
+        now = time.monotonic()
+        next_processes = now + self.process_interval
+        next_usage = now + self.usage_interval
+        next_apps = now + self.app_interval
+        while not self._stop.is_set():
+            try:
+                now = time.monotonic()
+                if now >= next_processes:
+                    self._poll_processes()
+                    next_processes = now + self.process_interval
+                if now >= next_usage:
+                    self._refresh_usage()
+                    next_usage = now + self.usage_interval
+                polled = self._polled_dirs()
+                if polled and now >= next_apps:
+                    self._poll_apps(polled)
+                    next_apps = now + self.app_interval
+
+                deadline = min(next_processes, next_usage)
+                if polled:
+                    deadline = min(deadline, next_apps)
+                timeout = max(deadline - time.monotonic(), 0)
+                if self._inotify is not None:
+                    readable, _, _ = select.select([self._inotify.fd], [], [], timeout)
+                    if readable:
+                        self._handle_inotify()
+                else:
+                    self._stop.wait(timeout)
+            except Exception as e:
+                logger.exception(f"更新实时清单时出错: {str(e)}")
+                self._stop.wait(self.process_interval)
+
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _setup(self) -> None:
+        if self.app_dirs:
+            self.mode['apps'] = 'polling'
+            if self.use_inotify:
+                try:
+                    self._inotify = _Inotify()
+                    self.mode['apps'] = 'inotify'
+                    self._watch([directory for directory in self.app_dirs if os.path.isdir(directory)])
+                except (OSError, AttributeError) as e:
+                    logger.info(f"inotify不可用，改为定期扫描应用目录: {str(e)}")
+
+        try:
+            self._scanner = _ProcScanner() if os.path.isdir('/proc/self') else _PsutilScanner()
+            self.mode['processes'] = 'proc' if isinstance(self._scanner, _ProcScanner) else 'psutil'
+        except (ImportError, OSError, ValueError) as e:
+            logger.info(f"无法扫描进程，运行中的应用仍由命令模块查询: {str(e)}")
+
+    # 应用
+    def _watch(self, directories: List[str]) -> None:
+        """用inotify监视目录，无法监视的目录留给定期扫描"""
+        for directory in directories:
+            if self._inotify.watch(directory):
+                self._watched.add(directory)
+
+    def _polled_dirs(self) -> List[str]:
+        """需要定期扫描的目录：没有inotify时为全部目录，否则为尚未被监视的目录（包括暂不存在的）"""
+        return [directory for directory in self.app_dirs if directory not in self._watched]
+
+    def _poll_apps(self, directories: List[str]) -> None:
+        """定期扫描：新出现的目录先尝试加入inotify监视，再扫描这些目录"""
+        if self._inotify is not None:
+            appeared = [directory for directory in directories
+                        if directory not in self._present and os.path.isdir(directory)]
+            if appeared:
+                logger.info(f"应用目录已出现，开始监视: {appeared}")
+                self._watch(appeared)
+        self._scan_apps(directories)
+
+    def _list_apps(self, directory: str) -> List[str]:
+        """列出目录中的条目，递归时进入子目录（.app应用包本身是一个条目）"""
+        paths = []
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        paths.append(entry.path)
+                        if (self.recursive and not entry.name.endswith('.app')
+                                and entry.is_dir(follow_symlinks=False)):
+                            pending.append(entry.path)
+            except OSError:
+                if current == directory:
+                    raise
+        return paths
+
+    def _scan_apps(self, directories: Optional[List[str]] = None, publish: bool = True) -> None:
+        """
+        扫描应用目录并与当前状态比较
+
+        Args:
+            directories: 要扫描的目录，默认为全部应用目录
+            publish: 是否发布变化事件
+        """
+        self.counters['app_rescans'] += 1
+        directories = self.app_dirs if directories is None else directories
+        paths = set()
+        for directory in directories:
+            try:
+                paths.update(self._list_apps(directory))
+                self._present.add(directory)
+            except OSError:
+                self._present.discard(directory)
+        # 只比较这些目录下已知的条目，其他目录中的应用不受影响
+        prefixes = tuple(os.path.join(directory, '') for directory in directories)
+        changed = paths | {path for path in self._apps if path.startswith(prefixes)}
+        self._update_apps(changed, publish)
+
+    def _handle_inotify(self) -> None:
+        paths, overflow = self._inotify.read()
+        if self._inotify.dropped:
+            # 被监视的目录已删除，之后定期检查它是否重新出现
+            dropped, self._inotify.dropped = self._inotify.dropped, []
+            self._watched.difference_update(dropped)
+            logger.info(f"应用目录不再被监视，改为定期扫描: {dropped}")
+            self._scan_apps(dropped)
+        if overflow:
+            logger.info("inotify事件队列溢出，重新扫描应用目录")
+            self._scan_apps()
+        elif paths:
+            self._update_apps(set(paths))
+
+    def _update_apps(self, paths: Set[str], publish: bool = True) -> None:
+        """重新读取指定路径的应用条目"""
+        events = []
+        for path in paths:
+            record = read_app(path) if os.path.exists(path) else None
+            old = self._apps.get(path)
+            if record is None:
+                if old is not None:
+                    del self._apps[path]
+                    events.append(InventoryEvent(APP_REMOVED, old))
+            elif old is None or old.name != record.name or old.version != record.version:
+                self._apps[path] = record
+                if old is not None:
+                    events.append(InventoryEvent(APP_REMOVED, old))
+                events.append(InventoryEvent(APP_ADDED, record))
+        if events or not self._app_view:
+            # 同名应用（例如用户目录覆盖系统目录中的同一应用）只保留第一个
+            unique: Dict[str, AppRecord] = {}
+            for record in self._apps.values():
+                unique.setdefault(record.name.casefold(), record)
+            self._app_view = tuple(sorted(unique.values(), key=lambda record: record.name.casefold()))
+        if publish:
+            self._publish(events)
+
+    # 进程
+    def _poll_processes(self, publish: bool = True) -> None:
+        """比较进程号集合，只读取新进程的信息"""
+        if self._scanner is None:
+            return
+        self.counters['process_polls'] += 1
+        pids = self._scanner.pids()
+        known = set(self._processes)
+        events = []
+        for pid in known - pids:
+            events.append(InventoryEvent(PROCESS_EXITED, self._processes.pop(pid)))
+        for pid in pids - known:
+            record = self._scanner.describe(pid)
+            if record is not None:
+                self._processes[pid] = record
+                events.append(InventoryEvent(PROCESS_STARTED, record))
+        if events or not self._process_view:
+            self._process_view = tuple(self._processes.values())
+        if publish:
+            self._publish(events)
+
+    def _refresh_usage(self) -> None:
+        if self._scanner is not None:
+            self._scanner.usage(self._processes)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        清单状态和事件计数
+
+        Returns:
+            Dict[str, Any]: 是否就绪、监视方式、应用和进程数量以及各类事件的次数
+        """
+        return {
+            'ready': self.ready,
+            'mode': dict(self.mode),
+            'app_dirs': list(self.app_dirs),
+            'watched_dirs': sorted(self._watched),
+            'polled_dirs': self._polled_dirs(),
+            'apps': len(self._app_view),
+            'processes': len(self._process_view),
+            'subscribers': len(self._subscribers),
+            **self.counters,
+        }
+
+
+_watcher: Optional[InventoryWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def get_watcher() -> Optional[InventoryWatcher]:
+    """获取正在运行的实时清单，未启动时返回None"""
+    return _watcher
+
+
+def start_watcher(**kwargs) -> InventoryWatcher:
+    """
+    启动进程内共享的实时清单（已启动时直接返回）
+
+    Args:
+        **kwargs: 传给InventoryWatcher的参数
+
+    Returns:
+        InventoryWatcher: 实时清单
+    """
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = InventoryWatcher(**kwargs).start()
+        return _watcher
+
+
+def stop_watcher() -> None:
+    """停止共享的实时清单"""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is not None:
+            _watcher.stop()
+            _watcher = None
@@ -0,0 +1,361 @@
+"""
+大模型服务提供方模块，支持任意OpenAI兼容接口（DeepSeek、OpenAI、本地llama.cpp服务等）。
+
+ProviderRouter按观测到的延迟和错误率为请求选择提供方；当首选提供方的响应时间
+超过它自己的p95延迟时，向下一个提供方发送一个对冲（hedged）请求，采用先返回的结果，
+另一个请求被取消。这样只有约5%的请求会多发一次，却能明显降低长尾延迟。
+
+提供方通过环境变量配置：LLM_PROVIDERS 列出启用的提供方名称（默认deepseek,openai,local），
+每个提供方读取 <NAME>_API_BASE、<NAME>_API_KEY、<NAME>_MODEL，以及是否支持JSON模式
+（response_format，<NAME>_JSON_MODE，默认支持）；没有配置密钥（本地服务为没有配置地址）的提供方会被跳过。
+"""
+import os
+import time
+import asyncio
+import logging
+import weakref
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 是否启用对冲请求
+LLM_HEDGE = os.getenv('LLM_HEDGE', 'True').lower() in ('true', '1', 't')
+
+# 延迟样本不足时，等待多久（秒）后发送对冲请求
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv('LLM_HEDGE_DEFAULT_DELAY', '2.0'))
+
+# 对冲等待时间的下限（秒），避免p95很小时几乎每个请求都被对冲
+LLM_HEDGE_MIN_DELAY = float(os.getenv('LLM_HEDGE_MIN_DELAY', '0.3'))
+
+# 空闲连接保持时间（秒），启动预热建立的连接可以留给第一条命令使用
+LLM_KEEPALIVE = float(os.getenv('LLM_KEEPALIVE', '60'))
+
+# 计算p95至少需要的延迟样本数
+_MIN_SAMPLES = 5
+
+# 各提供方的默认配置：(默认地址, 默认模型, 是否需要密钥)
+_PROVIDER_DEFAULTS = {
+    'deepseek': ('https://api.deepseek.com/v1', 'deepseek-chat', True),
+    'openai': ('https://api.openai.com/v1', 'gpt-4o-mini', True),
+    'local': (None, 'local-model', False),
+}
+
+# 每个事件循环各自的异步HTTP客户端（客户端不能跨事件循环使用）
+_http_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]' = weakref.WeakKeyDictionary()
+
+
+class ProviderError(Exception):
+    """提供方请求失败"""
+
+
+def get_http_client():
+    """
+    获取当前事件循环共享的异步HTTP客户端（复用连接池）
+
+    Returns:
+        httpx.AsyncClient: 异步HTTP客户端
+    """
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        import httpx
+        client = httpx.AsyncClient(limits=httpx.Limits(max_connections=100, max_keepalive_connections=20,
+                                                       keepalive_expiry=LLM_KEEPALIVE))
+        _http_clients[loop] = client
+    return client
+
+
+class LLMProvider:
+    """一个OpenAI兼容的对话接口，并记录其延迟和错误率"""
+
+    def __init__(self, name: str, api_base: str, model: str, api_key: Optional[str] = None,
+                 window: int = 200, json_mode: bool = True):
+        self.name = name
+        self.api_base = api_base.rstrip('/')
+        self.model = model
+        self.api_key = api_key
+        # 是否支持response_format，提供方拒绝该参数后自动关闭
+        self.json_mode = json_mode
+        self.latencies: Deque[float] = deque(maxlen=window)
+        # 错误率的指数移动平均
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.hedged_wins = 0
+        self.tokens = 0
+
+    def record(self, latency: float, error: bool) -> None:
+        """记录一次请求的耗时（秒）和是否出错"""
+        self.requests += 1
+        self.error_rate = 0.8 * self.error_rate + (0.2 if error else 0.0)
+        if error:
+            self.errors += 1
+        else:
+            self.latencies.append(latency)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """延迟分位数（秒），样本不足时返回None"""
+        if len(self.latencies) < _MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+    def score(self) -> float:
+        """路由评分（秒），越小越好：中位延迟按错误率加权，没有成功样本时按默认对冲等待时间估计"""
+        median = self.percentile(0.5)
+        if median is None:
+            median = LLM_HEDGE_DEFAULT_DELAY
+        return median * (1.0 + 4.0 * self.error_rate) + 10.0 * self.error_rate
+
+    def hedge_delay(self) -> float:
+        """等待多久后发送对冲请求（秒）"""
+        p95 = self.percentile(0.95)
+        return LLM_HEDGE_DEFAULT_DELAY if p95 is None else max(p95, LLM_HEDGE_MIN_DELAY)
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            'name': self.name,
+            'requests': self.requests,
+            'errors': self.errors,
+            'error_rate': round(self.error_rate, 3),
+            'p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+            'p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+            'hedged_wins': self.hedged_wins,
+            'tokens': self.tokens,
+            'json_mode': self.json_mode,
+        }
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    async def warm_up(self, timeout: float) -> bool:
+        """
+        预先建立到提供方的连接（DNS解析、TCP和TLS握手），连接留在连接池中供后续请求复用
+
+        只请求模型列表接口，不计入延迟统计；返回非200的状态码也说明连接已建立。
+
+        Args:
+            timeout: 超时时间（秒）
+
+        Returns:
+            bool: 是否建立了连接
+        """
+        try:
+            await get_http_client().get(f"{self.api_base}/models", headers=self._headers(), timeout=timeout)
+        except Exception as e:
+            logger.debug(f"预先连接{self.name}失败: {str(e) or type(e).__name__}")
+            return False
+        return True
+
+    async def complete(self, prompt: str, timeout: float, max_tokens: int = 250, json_mode: bool = False) -> str:
+        """
+        发送对话请求
+
+        Args:
+            prompt: 提示词
+            timeout: 请求超时时间（秒）
+            max_tokens: 回复的最大token数
+            json_mode: 要求回复为JSON对象（提供方支持时）
+
+        Returns:
+            str: 模型回复的文本
+
+        Raises:
+            ProviderError: 请求失败
+        """
+        headers = self._headers()
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.1,
+            "max_tokens": max_tokens
+        }
+        json_mode = json_mode and self.json_mode
+        if json_mode:
+            payload["response_format"] = {"type": "json_object"}
+
+        started = time.perf_counter()
+        try:
+            response = await get_http_client().post(f"{self.api_base}/chat/completions",
+                                                    headers=headers, json=payload, timeout=timeout)
+            if response.status_code != 200:
+                if (json_mode and response.status_code in (400, 422)
+                        and 'response_format' in response.text.lower()):
+                    # 提供方明确拒绝了response_format（模型名错误、上下文过长等其他400不算）：
+                    # 之后的请求不再发送该参数
+                    self.json_mode = False
+                    logger.warning(f"{self.name}不支持JSON模式，已关闭")
+                raise ProviderError(f"{self.name}接口调用失败: {response.status_code}, {response.text[:200]}")
+            data = response.json()
+            content = data["choices"][0]["message"]["content"]
+            self.tokens += (data.get("usage") or {}).get("total_tokens") or 0
+        except asyncio.CancelledError:
+            # 被取消（对冲请求已先返回）时以已耗时作为延迟的下限计入，避免p95被低估
+            self.record(time.perf_counter() - started, False)
+            raise
+        except ProviderError:
+            self.record(time.perf_counter() - started, True)
+            raise
+        except Exception as e:
+            self.record(time.perf_counter() - started, True)
+            raise ProviderError(f"{self.name}请求出错: {str(e) or type(e).__name__}") from e
+        self.record(time.perf_counter() - started, False)
+        return content
+
+
+def providers_from_env() -> List[LLMProvider]:
+    """
+    根据环境变量创建提供方列表
+
+    Returns:
+        List[LLMProvider]: 已配置的提供方，顺序即没有延迟数据时的优先顺序
+    """
+    names = [name.strip().lower() for name in os.getenv('LLM_PROVIDERS', 'deepseek,openai,local').split(',')
+             if name.strip()]
+    providers = []
+    for name in names:
+        default_base, default_model, needs_key = _PROVIDER_DEFAULTS.get(name, (None, 'default', False))
+        prefix = 'LOCAL_LLM' if name == 'local' else name.upper()
+        api_base = os.getenv(f'{prefix}_API_BASE', default_base)
+        api_key = os.getenv(f'{prefix}_API_KEY')
+        if not api_base or (needs_key and (not api_key or api_key == 'your_api_key_here')):
+            continue
+        json_mode = os.getenv(f'{prefix}_JSON_MODE', 'True').lower() in ('true', '1', 't')
+        providers.append(LLMProvider(name, api_base, os.getenv(f'{prefix}_MODEL', default_model), api_key,
+                                     json_mode=json_mode))
+    return providers
+
+
+class ProviderRouter:
+    """按延迟和错误率选择提供方，并对慢请求发送对冲请求"""
+
+    def __init__(self, providers: List[LLMProvider], hedge: bool = LLM_HEDGE):
+        self.providers = providers
+        self.hedge = hedge
+        self.hedged_requests = 0
+
+    def ranked(self) -> List[LLMProvider]:
+        """
+        按优先级排列的提供方：请求数不足的先按配置顺序使用（以便积累数据），
+        其余按评分排序
+        """
+        order = {id(provider): index for index, provider in enumerate(self.providers)}
+        return sorted(self.providers, key=lambda p: (p.requests >= _MIN_SAMPLES, p.score(), order[id(p)]))
+
+    async def complete(self, prompt: str, timeout: float, max_tokens: int = 250,
+                       json_mode: bool = False) -> Optional[str]:
+        """
+        在时间预算内获取模型回复
+
+        首选提供方失败时立即改用下一个；超过其p95仍未返回时向下一个提供方发送对冲请求，
+        采用先成功返回的结果。
+
+        Args:
+            prompt: 提示词
+            timeout: 总时间预算（秒）
+            max_tokens: 回复的最大token数
+            json_mode: 要求回复为JSON对象（提供方支持时）
+
+        Returns:
+            Optional[str]: 模型回复的文本，所有提供方都失败时返回None
+        """
+        candidates = self.ranked()
+        if not candidates:
+            logger.warning("未配置任何大模型提供方")
+            return None
+
+        deadline = time.monotonic() + timeout
+        running: Dict[asyncio.Task, LLMProvider] = {}
+
+        def launch() -> bool:
+            remaining = deadline - time.monotonic()
+            if not candidates or remaining <= 0:
+                return False
+            provider = candidates.pop(0)
+            task = asyncio.ensure_future(provider.complete(prompt, remaining, max_tokens, json_mode))
+            running[task] = provider
+            return True
+
+        launch()
+        primary = next(iter(running.values()))
+        hedged = False
+        try:
+            while running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                wait = remaining
+                if self.hedge and not hedged and candidates and len(running) == 1:
+                    first = next(iter(running.values()))
+                    wait = min(wait, first.hedge_delay())
+                done, _ = await asyncio.wait(list(running), timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # 超过首选提供方的p95仍未返回，发送对冲请求
+                    if self.hedge and not hedged and candidates:
+                        hedged = True
+                        self.hedged_requests += 1
+                        logger.info(f"{next(iter(running.values())).name}响应较慢，向{candidates[0].name}发送对冲请求")
+                        launch()
+                    continue
+
+                for task in done:
+                    provider = running.pop(task)
+                    try:
+                        content = task.result()
+                    except ProviderError as e:
+                        logger.warning(str(e))
+                        # 失败时改用下一个提供方（对冲请求仍在进行时无需补发）
+                        if not running:
+                            launch()
+                        continue
+                    if hedged and provider is not primary:
+                        provider.hedged_wins += 1
+                    return content
+        finally:
+            for task in running:
+                task.cancel()
+
+        logger.warning(f"所有大模型提供方均未在{timeout}秒内返回结果")
+        return None
+
+    async def warm_up(self, timeout: float = 5.0) -> Dict[str, bool]:
+        """
+        同时预先连接所有提供方（需要在之后发送请求的同一个事件循环中调用）
+
+        Args:
+            timeout: 超时时间（秒）
+
+        Returns:
+            Dict[str, bool]: 各提供方是否已建立连接
+        """
+        results = await asyncio.gather(*(provider.warm_up(timeout) for provider in self.providers))
+        return {provider.name: ok for provider, ok in zip(self.providers, results)}
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """各提供方的请求数、错误率和延迟分位数"""
+        return [provider.stats() for provider in self.providers]
+
+
+_router: Optional[ProviderRouter] = None
+
+
+def get_router() -> ProviderRouter:
+    """获取进程内共享的提供方路由器"""
+    global _router
+    if _router is None:
+        _router = ProviderRouter(providers_from_env())
+        logger.info(f"已配置大模型提供方: {[provider.name for provider in _router.providers]}")
+    return _router
+
+
+def set_router(router: ProviderRouter) -> None:
+    """替换共享的路由器（例如测试时使用自定义提供方）"""
+    global _router
+    _router = router
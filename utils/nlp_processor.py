@@ -4,19 +4,70 @@
 import os
 import re
 import json
+import asyncio
 import logging
-import requests
 import time
+import threading
+from collections import Counter, OrderedDict
 from typing import Dict, List, Tuple, Optional, Any, Union
-from dotenv import load_dotenv
 from utils.system_utils import SystemUtils
+from utils.async_utils import run_sync
+from utils.startup import load_environment
+from utils.command_plan import CommandPlan, PlanStep
+from utils import command_schema
+from utils.command_schema import SchemaError
 
 # 加载环境变量
-load_dotenv()
+load_environment()
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# DeepSeek请求的默认超时时间（秒）
+DEEPSEEK_TIMEOUT = 10.0
+
+# 缓存的大模型解析结果条数（0表示不缓存），相同的命令文本不再重复调用大模型
+PARSE_CACHE_SIZE = int(os.getenv('PARSE_CACHE_SIZE', '256'))
+
+_parse_cache: 'OrderedDict[str, Tuple[str, Any]]' = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+# 回复不符合参数格式时是否让模型修正一次（只发送简短的修复提示词）
+LLM_SCHEMA_REPAIR = os.getenv('LLM_SCHEMA_REPAIR', 'True').lower() in ('true', '1', 't', 'yes', 'y')
+
+# 剩余时间不足该值（秒）时不再发送修复请求
+_REPAIR_MIN_TIME = 0.5
+
+# 修复请求回复的最大token数
+_REPAIR_MAX_TOKENS = 150
+
+# 各解析途径的使用次数：local_model（本地意图分类器）、cache（解析缓存）、llm（大模型）、local（本地规则），
+# 执行计划为plan_llm和plan_local
+PARSE_SOURCES: 'Counter[str]' = Counter()
+
+# 表示多个操作的连接词：先后顺序和并列关系（带分组，拆分时保留连接词以便不拆分时还原）
+_SEQUENCE_SPLIT = re.compile(r'(然后|接着|随后|之后|再)')
+_PARALLEL_SPLIT = re.compile(r'([，,；;、]|并且|同时|和)')
+
+# 只用于连接两个操作的连接词；"再"、"和"、逗号等也常出现在单个命令或应用名称中（"音量再大点"、"和平精英"）
+_STRONG_CONNECTOR = re.compile(r'然后|接着|随后|之后|并且|同时|[；;]')
+
+# 本地规则解析：命令前后的客套话、数字、文件名和明确写出的路径
+_LOCAL_FILLER = re.compile(r'^(请你|请|帮我|麻烦你|麻烦|给我|能不能|可以|先)+|(一下|吧|好吗|可以吗|谢谢)+$')
+_LOCAL_NUMBER = re.compile(r'(\d+)')
+_LOCAL_FILE_NAME = re.compile(r'([^\s/\\，,。的里中]+\.[A-Za-z0-9]{1,8})(?![A-Za-z0-9])')
+_LOCAL_EXPLICIT_PATH = re.compile(r'(~?/[^\s，,。\u4e00-\u9fff]*|[A-Za-z]:\\[^\s，,。\u4e00-\u9fff]*)')
+_LOCAL_FILE_VERB = re.compile(r'^(查看|读取|显示|打开|删除|删掉|移除|看看|看一下|看下|看)')
+# 应用名称后面可以省略的描述词
+_LOCAL_APP_SUFFIX = re.compile(r'(这个|那个)?(应用程序|应用|软件|程序|app)$', re.IGNORECASE)
+# 名称中间写明了对象的文件操作（"在桌面创建报告文件夹"、"删除test目录"）
+_LOCAL_CREATE_DIRECTORY = re.compile(r'(?:创建|新建|建立|建)(?:一个)?(?:名为|叫)?(.+?)(?:的)?(?:文件夹|目录)$')
+_LOCAL_DELETE_DIRECTORY = re.compile(r'(?:删除|删掉|移除|清除)(?:名为|叫)?(.+?)(?:这个)?(?:文件夹|目录)$')
+# 音量、亮度的调节方向
+_LOCAL_DEVICE_WORDS = (('volume', ('音量', '声音')), ('brightness', ('亮度',)))
+_LOCAL_INCREASE = re.compile(r'大|高|增|提|响|亮')
+_LOCAL_DECREASE = re.compile(r'小|低|减|降|轻|暗')
+
 
 class NLPProcessor:
     """自然语言处理器，用于解析用户指令"""
@@ -47,6 +98,21 @@ class NLPProcessor:
     CMD_CREATE_DIRECTORY = 'create_directory'
     CMD_DELETE_FILE = 'delete_file'
     CMD_DELETE_DIRECTORY = 'delete_directory'
+    CMD_LIST_FILES = 'list_files'
+    CMD_CREATE_FILE = 'create_file'
+    CMD_MOVE_FILE = 'move_file'
+    CMD_COPY_FILE = 'copy_file'
+    CMD_RENAME_FILE = 'rename_file'
+    CMD_READ_FILE = 'read_file'
+    CMD_WRITE_FILE = 'write_file'
+    CMD_DISK_USAGE = 'disk_usage'
+    
+    # 由app.py统一分发的复合命令（通过action参数区分具体操作）
+    CMD_VOLUME = 'volume'
+    CMD_BRIGHTNESS = 'brightness'
+    
+    # 其他命令
+    CMD_WEATHER = 'weather'
     
     # 命令关键词
     COMMANDS = {
@@ -62,6 +128,7 @@ class NLPProcessor:
         CMD_INCREASE_VOLUME: ['增大音量', '提高音量', '调高音量', '音量增加', '音量调高', '声音调大', '声音增大', '音量大点', '音量开大点', '声音大一点', 'increase volume', 'volume up', 'louder'],
         CMD_DECREASE_VOLUME: ['减小音量', '降低音量', '调低音量', '音量减少', '音量调低', '声音调小', '声音减小', '音量小点', '音量开小点', '声音小一点', 'decrease volume', 'volume down', 'quieter'],
         CMD_MUTE: ['静音', '关闭声音', '关掉声音', '没有声音', '音量关闭', '音量静音', 'mute', 'silence'],
+        CMD_UNMUTE: ['取消静音', '解除静音', '恢复声音', '打开声音', 'unmute'],
         
         # 亮度控制关键词
         CMD_GET_BRIGHTNESS: ['当前亮度', '查看亮度', '显示亮度', '获取亮度', '亮度是多少', '屏幕亮度', 'get brightness', 'show brightness', 'current brightness'],
@@ -101,6 +168,16 @@ class NLPProcessor:
             '在目录中删除文件夹', '在目录下删除文件夹', '在目录里删除文件夹',
             'delete folder', 'delete directory', 'remove folder', 'remove directory',
             'erase folder', 'erase directory'
+        ],
+        CMD_READ_FILE: [
+            '查看文件', '读取文件', '打开文件内容', '显示文件内容', '查看内容',
+            '最后几行', '最后100行', '前100行', '开头几行', '末尾', '第几页',
+            'read file', 'show file', 'cat', 'head', 'tail'
+        ],
+        CMD_DISK_USAGE: [
+            '占用多大', '占用多少', '占了多少空间', '有多大', '多大空间', '磁盘占用', '空间占用',
+            '哪些文件夹最大', '最大的文件夹', '哪些文件最大', '最大的文件', '什么占用空间',
+            'disk usage', 'folder size', 'directory size', 'largest folders', 'du'
         ]
     }
     
@@ -133,26 +210,18 @@ class NLPProcessor:
     }
     
     @staticmethod
-    def parse_with_deepseek(text: str) -> Tuple[Optional[str], Optional[Any]]:
+    def _build_deepseek_prompt(text: str) -> str:
         """
-        使用DeepSeek大模型解析用户指令
+        构建DeepSeek解析提示词
         
         Args:
             text: 用户输入的命令文本
             
         Returns:
-            Tuple[Optional[str], Optional[Any]]: 命令类型和参数
+            str: 提示词
         """
-        api_key = os.getenv('DEEPSEEK_API_KEY')
-        api_base = os.getenv('DEEPSEEK_API_BASE', 'https://api.deepseek.com/v1')
-        
-        if not api_key:
-            logger.warning("未配置DeepSeek API密钥，无法使用DeepSeek解析")
-            return None, None
-        
-        try:
-            # 构建提示词 - 减少硬编码指令，使用更灵活的描述
-            prompt = f"""请分析以下用户自然语言指令，提取操作类型和参数。
+        # 减少硬编码指令，使用更灵活的描述
+        return f"""请分析以下用户自然语言指令，提取操作类型和参数。
 
 操作类型包括：
 1. 应用操作类：
@@ -171,6 +240,8 @@ class NLPProcessor:
    - list_subdirectories: 列出子文件夹（例如"列出目录下的文件夹"、"查看下载文件夹中的子目录"等）
    - delete_file: 删除文件（例如"删除文件"、"移除下载目录中的测试.txt文件"等）
    - delete_directory: 删除文件夹（例如"删除文件夹"、"移除下载目录中的测试目录"等）
+   - disk_usage: 统计目录占用空间并列出最大的文件夹/文件（例如"下载目录占用多大"、"哪些文件夹最大"、"桌面上最大的5个文件"等）
+   - read_file: 查看文件内容（例如"查看app.log最后100行"、"读取下载目录中的notes.txt前20行"、"看readme.md第3页"等）
 
 注意事项：
 - 应理解混合指令：比如"把音量调高到80%"同时包含increase_volume和set_volume语义，应判断为set_volume
@@ -242,80 +313,211 @@ class NLPProcessor:
   }}
 }}
 
+对于read_file，parameter中额外包含读取方式：
+{{
+  "command_type": "read_file",
+  "parameter": {{
+    "path": "文件所在目录，未提及时为当前目录",
+    "path_alternatives": [],
+    "name": "文件名",
+    "mode": "head或tail或range或page",  // 开头/末尾/从第N行开始/第N页
+    "lines": 100,  // 行数（page模式下为每页行数）
+    "start": 1,  // 仅range模式需要，起始行号
+    "page": 1  // 仅page模式需要，页码
+  }}
+}}
+
+对于list_running和list_installed，用户要求筛选、排序或翻页时（例如"运行中的含chrome的进程"、"按内存排序的进程"），parameter为：
+{{
+  "command_type": "list_running",
+  "parameter": {{
+    "filter": "名称中包含的关键字，没有则为null",
+    "sort": "cpu或memory或name，没有则为null",
+    "page": 1
+  }}
+}}
+
+对于disk_usage，parameter中额外包含要列出的条目数：
+{{
+  "command_type": "disk_usage",
+  "parameter": {{
+    "path": "要统计的目录，未提及时为主目录",
+    "path_alternatives": [],
+    "top": 10  // 列出最大的条目数
+  }}
+}}
+
 当解析路径时，若遇到"xxx目录"或"xxx文件夹"这样的表达，请始终将"xxx"作为第一优先选项放在path字段，而将完整表达"xxx目录"放入path_alternatives。
 
 若无法确定操作类型，command_type返回null。"""
+    
+    @staticmethod
+    def command_types() -> List[str]:
+        """所有命令类型"""
+        return [value for name, value in vars(NLPProcessor).items() if name.startswith('CMD_')]
+    
+    @staticmethod
+    def _check_command(cmd_type: Any, parameter: Any) -> Tuple[Optional[str], Optional[Any]]:
+        """
+        检查模型给出的命令类型，并按该命令的参数格式校验、规整参数
+        
+        Args:
+            cmd_type: 命令类型
+            parameter: 参数
             
-            # 调用DeepSeek API
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
+        Returns:
+            Tuple[Optional[str], Optional[Any]]: 命令类型和规整后的参数，模型表示无法确定（null）时返回(None, None)
             
-            payload = {
-                "model": "deepseek-chat",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.1,
-                "max_tokens": 250
-            }
+        Raises:
+            SchemaError: 命令类型未知或参数不符合格式
+        """
+        if cmd_type is None:
+            return None, None
+        if not isinstance(cmd_type, str) or not hasattr(NLPProcessor, f"CMD_{cmd_type.strip().upper()}"):
+            raise SchemaError(f"未知命令类型: {cmd_type}")
+        return command_schema.validate(cmd_type.strip().lower(), parameter)
+    
+    @staticmethod
+    def _check_content(content: str) -> Tuple[Optional[str], Optional[Any]]:
+        """
+        从模型回复中提取命令类型和参数，并记录校验结果
+        
+        Raises:
+            SchemaError: 回复不是合法的JSON或不符合参数格式
+        """
+        try:
+            parsed = command_schema.loads_json(content)
+            if not isinstance(parsed, dict):
+                raise SchemaError(f"回复应为JSON对象: {str(parsed)[:100]}")
+            cmd_type, parameter = NLPProcessor._check_command(parsed.get("command_type"), parsed.get("parameter"))
+        except SchemaError as e:
+            command_schema.record_result(e.command_type, False)
+            raise
+        if cmd_type:
+            command_schema.record_result(cmd_type, True)
+        return cmd_type, parameter
+    
+    @staticmethod
+    def _validate_command(cmd_type: Optional[str], parameter: Any) -> Tuple[Optional[str], Optional[Any]]:
+        """
+        检查模型给出的命令类型并统一参数格式
+        
+        Args:
+            cmd_type: 命令类型
+            parameter: 参数
             
-            response = requests.post(f"{api_base}/chat/completions", 
-                                    headers=headers, 
-                                    json=payload, 
-                                    timeout=10)
+        Returns:
+            Tuple[Optional[str], Optional[Any]]: 命令类型和参数，命令类型未知或参数不符合格式时返回(None, None)
+        """
+        try:
+            cmd_type, parameter = NLPProcessor._check_command(cmd_type, parameter)
+        except SchemaError as e:
+            command_schema.record_result(e.command_type, False)
+            logger.warning(f"大模型解析结果不符合格式: {str(e)}")
+            return None, None
+        if cmd_type:
+            command_schema.record_result(cmd_type, True)
+        return cmd_type, parameter
+    
+    @staticmethod
+    def _parse_deepseek_content(content: str) -> Tuple[Optional[str], Optional[Any]]:
+        """
+        从DeepSeek的回复内容中提取命令类型和参数
+        
+        Args:
+            content: 模型回复的文本
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result["choices"][0]["message"]["content"]
-                
-                # 尝试从响应中提取JSON
-                try:
-                    # 提取JSON内容（可能被包含在代码块中）
-                    json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
-                    if json_match:
-                        content = json_match.group(1)
-                    elif content.strip().startswith('{') and content.strip().endswith('}'):
-                        # 直接是JSON格式
-                        content = content.strip()
-                    
-                    parsed = json.loads(content)
-                    cmd_type = parsed.get("command_type")
-                    parameter = parsed.get("parameter")
-                    
-                    # 检查并处理文件操作的特殊格式
-                    if cmd_type in ["create_directory", "list_subdirectories", "delete_file", "delete_directory"]:
-                        if isinstance(parameter, dict):
-                            # 参数已经是字典格式，直接使用
-                            logger.info(f"DeepSeek成功解析文件操作命令: {cmd_type}, 参数: {parameter}")
-                        elif isinstance(parameter, str) and cmd_type == "list_subdirectories":
-                            # 如果参数是字符串，转换为统一的字典格式
-                            parameter = {"path": parameter, "path_alternatives": []}
-                            logger.info(f"DeepSeek解析出路径字符串，已转换为字典: {parameter}")
-                    
-                    # 验证命令类型是否在已定义的命令列表中
-                    if cmd_type and hasattr(NLPProcessor, f"CMD_{cmd_type.upper()}"):
-                        logger.info(f"DeepSeek成功解析命令: {cmd_type}, 参数: {parameter}")
-                        return cmd_type, parameter
-                    elif cmd_type:
-                        logger.warning(f"DeepSeek解析出未知命令类型: {cmd_type}")
-                
-                except (json.JSONDecodeError, KeyError) as e:
-                    logger.error(f"解析DeepSeek响应失败: {str(e)}, 响应内容: {content}")
-            else:
-                logger.error(f"DeepSeek API调用失败: {response.status_code}, {response.text}")
+        Returns:
+            Tuple[Optional[str], Optional[Any]]: 命令类型和参数
+        """
+        try:
+            return NLPProcessor._check_content(content)
+        except SchemaError as e:
+            logger.error(f"解析DeepSeek响应失败: {str(e)}, 响应内容: {content}")
+        return None, None
+    
+    @staticmethod
+    async def _request_llm_async(prompt: str, timeout: float = DEEPSEEK_TIMEOUT,
+                                 max_tokens: int = 250, json_mode: bool = True) -> Optional[str]:
+        """
+        调用大模型对话接口（按延迟和错误率在已配置的提供方之间路由，慢请求会对冲到其他提供方）
         
+        Args:
+            prompt: 提示词
+            timeout: 时间预算（秒）
+            max_tokens: 回复的最大token数
+            json_mode: 要求回复为JSON对象（提供方支持时）
+            
+        Returns:
+            Optional[str]: 模型回复的文本，失败时返回None
+        """
+        from utils.llm_providers import get_router
+        
+        try:
+            return await get_router().complete(prompt, timeout, max_tokens, json_mode)
         except Exception as e:
-            logger.error(f"调用DeepSeek时出错: {str(e)}")
+            # asyncio.CancelledError不是Exception的子类，调用方的取消会正常向上传播
+            logger.error(f"调用大模型时出错: {str(e) or type(e).__name__}")
+            return None
+    
+    @staticmethod
+    async def parse_with_deepseek_async(text: str, timeout: float = DEEPSEEK_TIMEOUT) -> Tuple[Optional[str], Optional[Any]]:
+        """
+        使用大模型异步解析用户指令（DeepSeek或其他已配置的OpenAI兼容提供方）
         
-        return None, None
+        Args:
+            text: 用户输入的命令文本
+            timeout: 请求超时时间（秒）
+            
+        Returns:
+            Tuple[Optional[str], Optional[Any]]: 命令类型和参数
+        """
+        deadline = time.monotonic() + timeout
+        content = await NLPProcessor._request_llm_async(NLPProcessor._build_deepseek_prompt(text), timeout)
+        if content is None:
+            return None, None
+        try:
+            return NLPProcessor._check_content(content)
+        except SchemaError as e:
+            logger.warning(f"大模型回复不符合格式: {str(e)}, 响应内容: {content}")
+            error = e
+        
+        # 只修正一次，提示词只包含错误和相关命令的参数格式
+        remaining = deadline - time.monotonic()
+        if not LLM_SCHEMA_REPAIR or remaining < _REPAIR_MIN_TIME:
+            return None, None
+        prompt = command_schema.repair_prompt(text, content, error, NLPProcessor.command_types())
+        repaired = await NLPProcessor._request_llm_async(prompt, remaining, _REPAIR_MAX_TOKENS)
+        try:
+            result = NLPProcessor._check_content(repaired) if repaired is not None else (None, None)
+        except SchemaError as e:
+            logger.warning(f"修正后的回复仍不符合格式: {str(e)}, 响应内容: {repaired}")
+            result = None, None
+        command_schema.record_repair(bool(result[0]), len(content))
+        return result
+    
+    @staticmethod
+    def parse_with_deepseek(text: str) -> Tuple[Optional[str], Optional[Any]]:
+        """
+        使用DeepSeek大模型解析用户指令（parse_with_deepseek_async的同步封装）
+        
+        Args:
+            text: 用户输入的命令文本
+            
+        Returns:
+            Tuple[Optional[str], Optional[Any]]: 命令类型和参数
+        """
+        return run_sync(NLPProcessor.parse_with_deepseek_async(text))
     
     @staticmethod
-    def parse_command(text: str) -> Tuple[Optional[str], Optional[Any]]:
+    async def parse_command_async(text: str, timeout: Optional[float] = None) -> Tuple[Optional[str], Optional[Any]]:
         """
-        解析用户输入的命令文本，识别命令类型和目标应用程序
+        异步解析用户输入的命令文本，识别命令类型和目标应用程序
         
         Args:
             text: 用户输入的命令文本
+            timeout: 调用方给出的时间预算（秒），大模型请求不会超过该时间，
+                超时后回退到本地解析
             
         Returns:
             Tuple[Optional[str], Optional[Any]]: 命令类型和参数，如果无法识别则返回(None, None)
@@ -326,16 +528,38 @@ class NLPProcessor:
             
         logger.info(f"开始解析命令: '{text}'")
         
+        # 本地意图分类器有足够把握时直接使用其结果，省去大模型调用
+        local_result = NLPProcessor.classify_with_local_model(text)
+        if local_result:
+            PARSE_SOURCES['local_model'] += 1
+            return local_result
+        
+        # 相同命令之前（或启动预热时）已由大模型解析过
+        cached = NLPProcessor._cached_parse(text)
+        if cached:
+            logger.info(f"使用缓存的解析结果: {cached[0]}, 参数: {cached[1]}")
+            PARSE_SOURCES['cache'] += 1
+            return cached
+        
         # 检查是否启用大模型解析
         use_ai = os.getenv('USE_DEEPSEEK', 'True').lower() in ('true', '1', 't', 'yes', 'y')
         
         # 首选大模型解析
         if use_ai:
             logger.info("尝试使用大模型解析命令")
-            cmd_type, parameter = NLPProcessor.parse_with_deepseek(text)
+            request_timeout = DEEPSEEK_TIMEOUT if timeout is None else min(timeout, DEEPSEEK_TIMEOUT)
+            try:
+                cmd_type, parameter = await asyncio.wait_for(
+                    NLPProcessor.parse_with_deepseek_async(text, request_timeout), request_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"大模型解析超时（{request_timeout}秒）")
+                cmd_type, parameter = None, None
             
             if cmd_type:
                 logger.info(f"大模型成功解析命令: {cmd_type}, 参数: {parameter}")
+                NLPProcessor.record_training_example(text, cmd_type)
+                NLPProcessor._store_parse(text, (cmd_type, parameter))
+                PARSE_SOURCES['llm'] += 1
                 return cmd_type, parameter
             else:
                 logger.warning("大模型解析失败，回退到本地解析")
@@ -343,4 +567,509 @@ class NLPProcessor:
             logger.info("大模型解析已禁用，直接使用本地解析")
         
         # 回退到本地解析
-        return NLPProcessor.parse_command_local(text)
\ No newline at end of file
+        PARSE_SOURCES['local'] += 1
+        return NLPProcessor.parse_command_local(text)
+    
+    @staticmethod
+    def _cached_parse(text: str) -> Optional[Tuple[str, Any]]:
+        """查找缓存的大模型解析结果（参数为字典时返回副本）"""
+        with _parse_cache_lock:
+            result = _parse_cache.get(text.strip())
+            if result is None:
+                return None
+            _parse_cache.move_to_end(text.strip())
+        cmd_type, parameter = result
+        return cmd_type, dict(parameter) if isinstance(parameter, dict) else parameter
+    
+    @staticmethod
+    def _store_parse(text: str, result: Tuple[str, Any]) -> None:
+        """缓存大模型解析结果，超过PARSE_CACHE_SIZE时淘汰最久未用的条目"""
+        if PARSE_CACHE_SIZE <= 0:
+            return
+        cmd_type, parameter = result
+        with _parse_cache_lock:
+            _parse_cache[text.strip()] = (cmd_type, dict(parameter) if isinstance(parameter, dict) else parameter)
+            _parse_cache.move_to_end(text.strip())
+            while len(_parse_cache) > PARSE_CACHE_SIZE:
+                _parse_cache.popitem(last=False)
+    
+    @staticmethod
+    async def prefetch_async(text: str, timeout: float = DEEPSEEK_TIMEOUT) -> Optional[Tuple[str, Any]]:
+        """
+        预先用大模型解析命令并缓存结果（不执行命令，也不记录为训练样本），
+        用于启动预热时解析常用命令
+        
+        Args:
+            text: 命令文本
+            timeout: 请求超时时间（秒）
+            
+        Returns:
+            Optional[Tuple[str, Any]]: 缓存的命令类型和参数，无法解析时返回None
+        """
+        if not text or not text.strip() or PARSE_CACHE_SIZE <= 0:
+            return None
+        cached = NLPProcessor._cached_parse(text)
+        if cached:
+            return cached
+        if os.getenv('USE_DEEPSEEK', 'True').lower() not in ('true', '1', 't', 'yes', 'y'):
+            return None
+        try:
+            cmd_type, parameter = await asyncio.wait_for(
+                NLPProcessor.parse_with_deepseek_async(text, timeout), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if not cmd_type:
+            return None
+        NLPProcessor._store_parse(text, (cmd_type, parameter))
+        return cmd_type, parameter
+    
+    @staticmethod
+    def classify_with_local_model(text: str) -> Optional[Tuple[str, Any]]:
+        """
+        使用本地意图分类器解析命令（只接受高置信度且参数简单的结果）
+        
+        Args:
+            text: 用户输入的命令文本
+            
+        Returns:
+            Optional[Tuple[str, Any]]: 命令类型和参数，没有把握时返回None
+        """
+        try:
+            from utils import intent_classifier
+        except ImportError:
+            # 未安装numpy时不使用本地分类器
+            return None
+        if not intent_classifier.INTENT_CLASSIFIER_ENABLED:
+            return None
+        
+        started = time.perf_counter()
+        result = intent_classifier.classify_command(text)
+        if result is None:
+            return None
+        cmd_type, parameter, confidence = result
+        logger.info(f"本地意图分类器解析命令: {cmd_type}, 参数: {parameter}, "
+                    f"置信度: {confidence:.3f}, 耗时: {(time.perf_counter() - started) * 1000:.2f}ms")
+        return cmd_type, parameter
+    
+    @staticmethod
+    def record_training_example(text: str, cmd_type: str) -> None:
+        """把大模型的解析结果记录为本地意图分类器的训练样本"""
+        try:
+            from utils import intent_classifier
+        except ImportError:
+            return
+        if intent_classifier.INTENT_CLASSIFIER_ENABLED:
+            intent_classifier.record_example(text, cmd_type)
+    
+    @staticmethod
+    def parse_command(text: str, timeout: Optional[float] = None) -> Tuple[Optional[str], Optional[Any]]:
+        """
+        解析用户输入的命令文本（parse_command_async的同步封装）
+        
+        Args:
+            text: 用户输入的命令文本
+            timeout: 时间预算（秒）
+            
+        Returns:
+            Tuple[Optional[str], Optional[Any]]: 命令类型和参数，如果无法识别则返回(None, None)
+        """
+        return run_sync(NLPProcessor.parse_command_async(text, timeout))
+    
+    @staticmethod
+    def parse_command_local(text: str) -> Tuple[Optional[str], Optional[Any]]:
+        """
+        使用本地规则解析单个命令（大模型不可用或解析失败时使用）
+        
+        依次尝试：调节到指定值的混合表达、写明对象的文件夹操作、命令关键词（取最长的匹配）、
+        音量和亮度的调节方向、天气查询。结果按与大模型相同的参数格式校验。
+        
+        Args:
+            text: 用户输入的命令文本
+            
+        Returns:
+            Tuple[Optional[str], Optional[Any]]: 命令类型和参数，如果无法识别则返回(None, None)
+        """
+        text = _LOCAL_FILLER.sub('', (text or '').strip(' \t\r\n。.!！?？，,')).strip()
+        if not text:
+            return None, None
+        
+        try:
+            cmd_type, parameter = NLPProcessor._match_local(text)
+            if not cmd_type:
+                return None, None
+            return command_schema.validate(cmd_type, parameter)
+        except SchemaError as e:
+            logger.info(f"本地规则无法确定命令参数: {text}, {str(e)}")
+            return None, None
+    
+    @staticmethod
+    def _match_local(text: str) -> Tuple[Optional[str], Optional[Any]]:
+        """按本地规则识别命令类型和参数（参数尚未校验）"""
+        # 调节到指定值："把音量调高到80"
+        for (_, set_type), patterns in NLPProcessor.MIXED_COMMANDS.items():
+            for pattern in patterns:
+                match = re.search(pattern, text)
+                if match:
+                    return set_type, int(match.group(match.lastindex))
+        
+        directory, rest = NLPProcessor._extract_local_directory(text)
+        path = directory or '.'
+        
+        # 写明了对象的文件夹操作
+        match = _LOCAL_CREATE_DIRECTORY.search(rest)
+        if match:
+            return NLPProcessor.CMD_CREATE_DIRECTORY, {'path': path, 'name': match.group(1)}
+        match = _LOCAL_DELETE_DIRECTORY.search(rest)
+        if match and not _LOCAL_FILE_NAME.search(match.group(1)):
+            return NLPProcessor.CMD_DELETE_DIRECTORY, {'path': path, 'name': match.group(1)}
+        
+        cmd_type, keyword = NLPProcessor._match_local_keyword(text)
+        file_path, file_name = NLPProcessor._extract_local_file(rest)
+        remainder = NLPProcessor._strip_local_keyword(rest, keyword)
+        
+        if file_name and cmd_type in (NLPProcessor.CMD_UNINSTALL, NLPProcessor.CMD_DELETE_FILE):
+            return NLPProcessor.CMD_DELETE_FILE, {'path': file_path or path, 'name': file_name}
+        if file_name and (cmd_type in (None, NLPProcessor.CMD_OPEN, NLPProcessor.CMD_READ_FILE)
+                          or re.search(r'行|页|查看|读取|显示', rest)):
+            return NLPProcessor.CMD_READ_FILE, dict(NLPProcessor._local_read_mode(rest),
+                                                   path=file_path or path, name=file_name)
+        
+        if cmd_type == NLPProcessor.CMD_UNINSTALL and re.search(r'文件|目录', text):
+            # "删除下载目录里的旧报告"这类指令的对象是文件或文件夹，不是应用
+            return (NLPProcessor.CMD_DELETE_DIRECTORY, {'path': path, 'name': remainder}) if remainder else (None, None)
+        
+        if cmd_type in (NLPProcessor.CMD_OPEN, NLPProcessor.CMD_CLOSE, NLPProcessor.CMD_UNINSTALL):
+            name = re.sub(r'^(把|将)', '', NLPProcessor._strip_local_keyword(text, keyword))
+            return cmd_type, _LOCAL_APP_SUFFIX.sub('', name).strip() or None
+        if cmd_type in (NLPProcessor.CMD_LIST_RUNNING, NLPProcessor.CMD_LIST_INSTALLED):
+            return cmd_type, None
+        if cmd_type == NLPProcessor.CMD_LIST_SUBDIRECTORIES:
+            return cmd_type, {'path': path}
+        if cmd_type == NLPProcessor.CMD_DISK_USAGE:
+            number = _LOCAL_NUMBER.search(rest)
+            return cmd_type, {'path': directory or '~', 'top': int(number.group(1)) if number else None}
+        if cmd_type in (NLPProcessor.CMD_CREATE_DIRECTORY, NLPProcessor.CMD_DELETE_DIRECTORY):
+            return cmd_type, {'path': path, 'name': remainder}
+        if cmd_type in (NLPProcessor.CMD_DELETE_FILE, NLPProcessor.CMD_READ_FILE):
+            return cmd_type, {'path': file_path or path, 'name': file_name or remainder}
+        if cmd_type:
+            # 音量和亮度命令，数值可选
+            number = _LOCAL_NUMBER.search(text)
+            return cmd_type, int(number.group(1)) if number else None
+        
+        device_command = NLPProcessor._match_local_device(text)
+        if device_command[0]:
+            return device_command
+        if '天气' in text:
+            location = re.sub(r'天气|怎么样|如何|查询|查看|今天|现在|的', '', text).strip()
+            return NLPProcessor.CMD_WEATHER, location or None
+        return None, None
+    
+    @staticmethod
+    def _match_local_keyword(text: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        查找命令关键词，取最长的匹配（"关闭声音"优先于"关闭"，"删除文件夹"优先于"删除"）
+        
+        Returns:
+            Tuple[Optional[str], Optional[str]]: 命令类型和匹配到的关键词
+        """
+        lowered = text.lower()
+        best_type, best_keyword = None, None
+        for cmd_type, keywords in NLPProcessor.COMMANDS.items():
+            for keyword in keywords:
+                if best_keyword and len(keyword) <= len(best_keyword):
+                    continue
+                if keyword.isascii():
+                    # 英文关键词按单词匹配，避免"du"匹配到"duck"
+                    if not re.search(rf'(?<![a-z]){re.escape(keyword)}(?![a-z])', lowered):
+                        continue
+                elif keyword not in text:
+                    continue
+                best_type, best_keyword = cmd_type, keyword
+        return best_type, best_keyword
+    
+    @staticmethod
+    def _strip_local_keyword(text: str, keyword: Optional[str]) -> str:
+        """去掉命令关键词和对象的描述词，剩下的作为名称"""
+        if keyword:
+            text = re.sub(re.escape(keyword), '', text, count=1, flags=re.IGNORECASE)
+        text = re.sub(r'^(一个|名为|叫做|叫)', '', text.strip())
+        return re.sub(r'(这个)?(文件夹|目录|文件)$', '', text).strip(' 的')
+    
+    @staticmethod
+    def _extract_local_directory(text: str) -> Tuple[Optional[str], str]:
+        """
+        提取"下载目录中的"、"在桌面上"这类目录描述
+        
+        Returns:
+            Tuple[Optional[str], str]: 目录名称（如"下载"）和去掉目录描述后的文本
+        """
+        names = sorted(SystemUtils.SPECIAL_DIRS, key=len, reverse=True)
+        pattern = (r'(?:在|从)?(' + '|'.join(map(re.escape, names)) +
+                   r')(?:目录|文件夹)?(?:里面|下面|上面|中|里|下|上)?(?:的)?')
+        match = re.search(pattern, text)
+        if not match:
+            return None, text
+        return match.group(1), (text[:match.start()] + text[match.end():]).strip()
+    
+    @staticmethod
+    def _extract_local_file(text: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        提取带扩展名的文件名，写明完整路径时同时给出所在目录
+        
+        Returns:
+            Tuple[Optional[str], Optional[str]]: 文件所在目录（未写明时为None）和文件名
+        """
+        match = _LOCAL_EXPLICIT_PATH.search(text)
+        if match and _LOCAL_FILE_NAME.fullmatch(os.path.basename(match.group(1))):
+            return os.path.dirname(match.group(1)) or None, os.path.basename(match.group(1))
+        match = _LOCAL_FILE_NAME.search(text)
+        return None, _LOCAL_FILE_VERB.sub('', match.group(1)) if match else None
+    
+    @staticmethod
+    def _local_read_mode(text: str) -> Dict[str, Any]:
+        """从"最后100行"、"前20行"、"第3页"、"从第50行"中提取读取方式"""
+        match = re.search(r'(?:最后|末尾|后)(\d+)行', text)
+        if match:
+            return {'mode': 'tail', 'lines': int(match.group(1))}
+        match = re.search(r'(?:前|开头)(\d+)行', text)
+        if match:
+            return {'mode': 'head', 'lines': int(match.group(1))}
+        match = re.search(r'第(\d+)页', text)
+        if match:
+            return {'mode': 'page', 'page': int(match.group(1))}
+        match = re.search(r'从第(\d+)行', text)
+        if match:
+            return {'mode': 'range', 'start': int(match.group(1))}
+        return {}
+    
+    @staticmethod
+    def _match_local_device(text: str) -> Tuple[Optional[str], Optional[Any]]:
+        """识别没有命中关键词的音量、亮度调节（"音量再大点"、"亮度调成50"）"""
+        for device, words in _LOCAL_DEVICE_WORDS:
+            word = next((word for word in words if word in text), None)
+            if not word:
+                continue
+            if device == 'volume' and re.search(r'(取消|解除)静音', text):
+                return NLPProcessor.CMD_UNMUTE, None
+            if device == 'volume' and '静音' in text:
+                return NLPProcessor.CMD_MUTE, None
+            rest = text.replace(word, '')
+            number = _LOCAL_NUMBER.search(rest)
+            value = int(number.group(1)) if number else None
+            if number and re.search(r'到|至|成|为|设', rest):
+                return f'set_{device}', value
+            if _LOCAL_INCREASE.search(rest):
+                return f'increase_{device}', value
+            if _LOCAL_DECREASE.search(rest):
+                return f'decrease_{device}', value
+            return (f'set_{device}', value) if number else (f'get_{device}', None)
+        return None, None
+    
+    @staticmethod
+    def is_multi_step(text: str) -> bool:
+        """
+        判断指令是否包含多个操作
+        
+        "然后"、"同时"、分号等只用于连接操作，出现即认为包含多个操作；
+        "再"、"和"、逗号等也常出现在单个命令里（"音量再大点"、"打开和平精英"），
+        只有两侧都能单独解析为命令时才认为包含多个操作。
+        
+        Args:
+            text: 用户输入的命令文本
+            
+        Returns:
+            bool: 包含多个操作时返回True
+        """
+        text = (text or '').strip().rstrip('。.!！')
+        if _STRONG_CONNECTOR.search(text):
+            return True
+        if not (_SEQUENCE_SPLIT.search(text) or _PARALLEL_SPLIT.search(text)):
+            return False
+        plan = NLPProcessor.parse_plan_local(text)
+        return plan is not None and len(plan) > 1
+    
+    @staticmethod
+    def _split_clauses(text: str, pattern: 're.Pattern') -> List[str]:
+        """
+        按连接词拆分指令，拆开后两侧不是两个操作时保留连接词（不拆分）
+        
+        Args:
+            text: 指令文本
+            pattern: 带分组的连接词模式
+            
+        Returns:
+            List[str]: 拆分后的片段
+        """
+        pieces = pattern.split(text)
+        clauses = [pieces[0]]
+        for connector, piece in zip(pieces[1::2], pieces[2::2]):
+            if NLPProcessor._separates_commands(clauses[-1], piece):
+                clauses.append(piece)
+            else:
+                clauses[-1] += connector + piece
+        clauses = [clause.strip(' 。.!！，,') for clause in clauses]
+        return [clause for clause in clauses if clause]
+    
+    @staticmethod
+    def _separates_commands(left: str, right: str) -> bool:
+        """连接词两侧是否是两个操作：两侧都能单独解析，或右侧是省略了动词的应用名称（"打开微信和Chrome"）"""
+        app_commands = (NLPProcessor.CMD_OPEN, NLPProcessor.CMD_CLOSE, NLPProcessor.CMD_UNINSTALL)
+        if not right.strip(' 。.!！，,'):
+            return False
+        left_type, _ = NLPProcessor.parse_command_local(left)
+        if not left_type:
+            return False
+        right_type, _ = NLPProcessor.parse_command_local(right)
+        return bool(right_type) or left_type in app_commands
+    
+    @staticmethod
+    def _build_plan_prompt(text: str) -> str:
+        """
+        构建多步骤计划的解析提示词（单个操作仍按原格式返回）
+        
+        Args:
+            text: 用户输入的命令文本
+            
+        Returns:
+            str: 提示词
+        """
+        return NLPProcessor._build_deepseek_prompt(text) + """
+
+如果指令包含多个操作（例如"打开微信和Chrome，然后音量调到30，再在桌面创建报告文件夹"），改为返回执行计划，
+每个步骤的command_type和parameter格式与上面相同：
+{
+  "steps": [
+    {"id": 1, "command_type": "open", "parameter": "微信", "depends_on": [], "text": "打开微信"},
+    {"id": 2, "command_type": "open", "parameter": "Chrome", "depends_on": [], "text": "打开Chrome"},
+    {"id": 3, "command_type": "set_volume", "parameter": 30, "depends_on": [1, 2], "text": "音量调到30"},
+    {"id": 4, "command_type": "create_directory", "parameter": {"path": "桌面", "path_alternatives": ["桌面目录", "Desktop", "~/Desktop"], "name": "报告"}, "depends_on": [3], "text": "在桌面创建报告文件夹"}
+  ]
+}
+
+depends_on列出必须先完成的步骤编号：用户用"然后"、"再"、"之后"等表示先后顺序，或后一步要用到前一步的结果
+（如先创建文件夹再在其中创建文件）时填写；互不相关的操作留空，以便同时执行。"""
+    
+    @staticmethod
+    def _parse_plan_content(content: str) -> Optional[CommandPlan]:
+        """
+        从模型回复中提取执行计划
+        
+        Args:
+            content: 模型回复的文本
+            
+        Returns:
+            Optional[CommandPlan]: 执行计划，回复为单个命令时返回只有一个步骤的计划，无法解析时返回None
+        """
+        try:
+            parsed = command_schema.loads_json(content)
+            raw_steps = parsed.get("steps") if isinstance(parsed, dict) else None
+            if raw_steps is None:
+                cmd_type, parameter = NLPProcessor._validate_command(parsed.get("command_type"), parsed.get("parameter"))
+                return CommandPlan([PlanStep(1, cmd_type, parameter)]) if cmd_type else None
+            
+            steps = []
+            for index, raw_step in enumerate(raw_steps, 1):
+                cmd_type, parameter = NLPProcessor._validate_command(raw_step.get("command_type"), raw_step.get("parameter"))
+                if not cmd_type:
+                    # 任何一步无法识别时放弃整个计划，避免执行不完整的操作序列
+                    return None
+                steps.append(PlanStep(raw_step.get("id", index), cmd_type, parameter,
+                                      raw_step.get("depends_on"), raw_step.get("text")))
+            
+            plan = CommandPlan(steps)
+            plan.validate()
+            return plan if steps else None
+        
+        except (json.JSONDecodeError, KeyError, AttributeError, TypeError, ValueError) as e:
+            logger.error(f"解析执行计划失败: {str(e)}, 响应内容: {content}")
+        
+        return None
+    
+    @staticmethod
+    def parse_plan_local(text: str) -> Optional[CommandPlan]:
+        """
+        使用本地规则把指令拆分为执行计划
+        
+        按"然后"、"再"等拆分为依次执行的阶段，每个阶段再按逗号、"和"等拆分为可同时执行的步骤，
+        后一阶段的步骤依赖前一阶段的所有步骤。"打开微信和Chrome"这类省略动词的并列写法沿用前一步的命令。
+        连接词两侧不是两个操作时不拆分（"音量再大点"、"打开和平精英"）。
+        
+        Args:
+            text: 用户输入的命令文本
+            
+        Returns:
+            Optional[CommandPlan]: 执行计划，有无法识别的片段时返回None
+        """
+        app_commands = (NLPProcessor.CMD_OPEN, NLPProcessor.CMD_CLOSE, NLPProcessor.CMD_UNINSTALL)
+        steps: List[PlanStep] = []
+        previous_stage: List[str] = []
+        for stage_text in NLPProcessor._split_clauses(text or '', _SEQUENCE_SPLIT):
+            stage: List[str] = []
+            last_type = None
+            for fragment in NLPProcessor._split_clauses(stage_text, _PARALLEL_SPLIT):
+                cmd_type, parameter = NLPProcessor.parse_command_local(fragment)
+                description = fragment
+                if not cmd_type and last_type in app_commands:
+                    cmd_type, parameter, description = last_type, _LOCAL_APP_SUFFIX.sub('', fragment).strip(), None
+                if not cmd_type or (cmd_type in app_commands and not parameter):
+                    logger.info(f"本地规则无法识别计划片段: {fragment}")
+                    return None
+                step = PlanStep(len(steps) + 1, cmd_type, parameter, previous_stage, description)
+                steps.append(step)
+                stage.append(step.step_id)
+                last_type = cmd_type
+            if stage:
+                previous_stage = stage
+        return CommandPlan(steps) if steps else None
+    
+    @staticmethod
+    async def parse_plan_async(text: str, timeout: Optional[float] = None) -> Optional[CommandPlan]:
+        """
+        把可能包含多个操作的指令解析为执行计划（只调用一次大模型）
+        
+        Args:
+            text: 用户输入的命令文本
+            timeout: 时间预算（秒），超时后回退到本地规则
+            
+        Returns:
+            Optional[CommandPlan]: 执行计划，无法解析时返回None
+        """
+        if not text or not text.strip():
+            return None
+        
+        use_ai = os.getenv('USE_DEEPSEEK', 'True').lower() in ('true', '1', 't', 'yes', 'y')
+        if use_ai:
+            request_timeout = DEEPSEEK_TIMEOUT if timeout is None else min(timeout, DEEPSEEK_TIMEOUT)
+            try:
+                content = await asyncio.wait_for(
+                    NLPProcessor._request_llm_async(NLPProcessor._build_plan_prompt(text), request_timeout,
+                                                    max_tokens=800),
+                    request_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"大模型解析执行计划超时（{request_timeout}秒）")
+                content = None
+            
+            plan = NLPProcessor._parse_plan_content(content) if content else None
+            if plan:
+                logger.info(f"大模型解析出执行计划: {plan.steps}")
+                PARSE_SOURCES['plan_llm'] += 1
+                return plan
+            logger.warning("大模型解析执行计划失败，回退到本地解析")
+        
+        PARSE_SOURCES['plan_local'] += 1
+        return NLPProcessor.parse_plan_local(text)
+    
+    @staticmethod
+    def parse_plan(text: str, timeout: Optional[float] = None) -> Optional[CommandPlan]:
+        """
+        把指令解析为执行计划（parse_plan_async的同步封装）
+        
+        Args:
+            text: 用户输入的命令文本
+            timeout: 时间预算（秒）
+            
+        Returns:
+            Optional[CommandPlan]: 执行计划，无法解析时返回None
+        """
+        return run_sync(NLPProcessor.parse_plan_async(text, timeout))
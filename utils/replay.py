@@ -0,0 +1,402 @@
+"""
+命令回放压测工具，用真实的命令历史驱动process_command，评估守护进程和大模型配额的容量。
+
+命令来源可以是app.log中process_command记录的“用户输入:”行，也可以是语料文件
+（每行一条命令，或每行一个{"text": ...}的JSON）。回放按指定的速率（开环，按计划时间
+发出，不受处理快慢影响）和并发数调用app.process_command_async，默认使用模拟执行后端
+（commands.simulated_backend）：应用、文件和音量亮度操作都作用在内存中的模拟状态上，
+不会触及真实系统，天气查询使用StubWeatherProvider和独立的内存缓存，不会访问天气服务，
+也不会写入天气缓存文件；解析和分发走的仍是与真实执行相同的代码路径。
+
+报告内容：吞吐量，按阶段（排队、解析、执行、总计）和命令类型的延迟分位数，
+解析缓存/本地分类器/天气缓存的命中率，发往大模型的请求数，以及错误分类统计。
+
+    python -m utils.replay --log app.log --rate 20 --concurrency 8
+    python -m utils.replay --corpus commands.txt --count 1000 --rate 0 --json
+"""
+import re
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import contextvars
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# app.log中记录用户输入的行
+_INPUT_PATTERN = re.compile(r' - 用户输入: (.+)$')
+
+# app.log中的日志行（时间 - 模块 - 级别 - 消息）
+_LOG_LINE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d+ - \S+ - [A-Z]+ - ')
+
+# 报告中的延迟分位数
+_PERCENTILES = (0.5, 0.9, 0.99)
+
+# 报告中的阶段
+STAGES = ('queue', 'parse', 'execute', 'total')
+
+# 当前回放命令的阶段耗时记录
+_trace: 'contextvars.ContextVar[Optional[Dict[str, Any]]]' = contextvars.ContextVar('replay_trace', default=None)
+
+
+def read_logged_commands(log_file: str = 'app.log', max_bytes: Optional[int] = None) -> List[str]:
+    """
+    从日志中提取用户输入的命令（按记录顺序）
+
+    Args:
+        log_file: 日志文件
+        max_bytes: 只读取文件末尾的字节数，None表示读取整个文件
+
+    Returns:
+        List[str]: 命令列表，日志不存在时为空
+    """
+    try:
+        with open(log_file, 'rb') as f:
+            if max_bytes:
+                f.seek(0, 2)
+                f.seek(max(f.tell() - max_bytes, 0))
+            content = f.read().decode('utf-8', errors='ignore')
+    except OSError:
+        return []
+    commands = []
+    for line in content.splitlines():
+        match = _INPUT_PATTERN.search(line)
+        if match and match.group(1).strip():
+            commands.append(match.group(1).strip())
+    return commands
+
+
+def load_corpus(path: str) -> List[str]:
+    """
+    读取命令语料：每行一条命令、每行一个{"text": ...}的JSON，或app.log格式的日志行
+
+    空行、以#开头的行和日志中的其他记录被忽略。
+
+    Args:
+        path: 语料文件
+
+    Returns:
+        List[str]: 命令列表
+    """
+    commands = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            match = _INPUT_PATTERN.search(line)
+            if match:
+                commands.append(match.group(1).strip())
+                continue
+            if _LOG_LINE_PATTERN.match(line):
+                continue
+            if line.startswith('{'):
+                try:
+                    text = json.loads(line).get('text')
+                except (ValueError, AttributeError):
+                    text = None
+                if text:
+                    commands.append(str(text).strip())
+                continue
+            commands.append(line)
+    return commands
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """已排序数值的分位数（最近秩），空列表返回0"""
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+@contextmanager
+def _instrument(nlp_processor: type) -> Iterator[None]:
+    """记录每条回放命令的解析耗时和命令类型，并停止记录训练样本"""
+    parse_command = nlp_processor.parse_command_async
+    parse_plan = nlp_processor.parse_plan_async
+    record_training_example = nlp_processor.record_training_example
+
+    async def timed(parse, text: str, timeout: Optional[float] = None):
+        started = time.perf_counter()
+        result = None
+        try:
+            result = await parse(text, timeout)
+            return result
+        finally:
+            trace = _trace.get()
+            if trace is not None:
+                trace['parse'] = trace.get('parse', 0.0) + (time.perf_counter() - started) * 1000
+                if isinstance(result, tuple):
+                    trace['command_type'] = result[0]
+                elif result is not None and len(result) > 1:
+                    trace['command_type'] = 'plan'
+                elif result is not None:
+                    trace['command_type'] = result.steps[0].command_type
+
+    async def timed_parse_command(text: str, timeout: Optional[float] = None):
+        return await timed(parse_command, text, timeout)
+
+    async def timed_parse_plan(text: str, timeout: Optional[float] = None):
+        return await timed(parse_plan, text, timeout)
+
+    nlp_processor.parse_command_async = staticmethod(timed_parse_command)
+    nlp_processor.parse_plan_async = staticmethod(timed_parse_plan)
+    # 回放不应改变本地分类器的训练数据
+    nlp_processor.record_training_example = staticmethod(lambda text, cmd_type: None)
+    try:
+        yield
+    finally:
+        nlp_processor.parse_command_async = staticmethod(parse_command)
+        nlp_processor.parse_plan_async = staticmethod(parse_plan)
+        nlp_processor.record_training_example = staticmethod(record_training_example)
+
+
+class ReplaySample:
+    """一条回放命令的结果"""
+
+    __slots__ = ('text', 'command_type', 'success', 'error', 'stages')
+
+    def __init__(self, text: str, command_type: Optional[str], success: bool, error: Optional[str],
+                 stages: Dict[str, float]):
+        self.text = text
+        self.command_type = command_type
+        self.success = success
+        self.error = error
+        self.stages = stages
+
+
+class ReplayReport:
+    """回放结果统计"""
+
+    def __init__(self, samples: List[ReplaySample], elapsed: float, counters: Dict[str, Any]):
+        self.samples = samples
+        self.elapsed = elapsed
+        self.counters = counters
+
+    @staticmethod
+    def _latency(samples: List[ReplaySample]) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for stage in STAGES:
+            values = sorted(sample.stages[stage] for sample in samples if stage in sample.stages)
+            if values:
+                result[stage] = {f"p{int(q * 100)}": round(percentile(values, q), 1) for q in _PERCENTILES}
+                result[stage]['max'] = round(values[-1], 1)
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        汇总统计
+
+        Returns:
+            Dict[str, Any]: 吞吐量、各阶段/各命令类型的延迟分位数（毫秒）、命中率和错误分类
+        """
+        by_type: Dict[str, List[ReplaySample]] = defaultdict(list)
+        for sample in self.samples:
+            by_type[sample.command_type or 'unparsed'].append(sample)
+        errors = Counter(sample.error for sample in self.samples if sample.error)
+
+        sources = self.counters.get('parse_sources', {})
+        parses = sum(count for name, count in sources.items() if not name.startswith('plan_'))
+        hit_rates = {name: round(sources.get(name, 0) / parses, 3) for name in ('cache', 'local_model')} if parses else {}
+        weather = self.counters.get('weather_cache', {})
+        weather_total = sum(weather.values())
+        if weather_total:
+            hit_rates['weather_cache'] = round((weather.get('hits', 0) + weather.get('stale_hits', 0)) / weather_total, 3)
+
+        return {
+            'commands': len(self.samples),
+            'succeeded': sum(1 for sample in self.samples if sample.success),
+            'elapsed_s': round(self.elapsed, 3),
+            'throughput_per_s': round(len(self.samples) / self.elapsed, 2) if self.elapsed else 0.0,
+            'latency_ms': self._latency(self.samples),
+            'by_command_type': {command_type: {'count': len(samples), 'latency_ms': self._latency(samples)}
+                                for command_type, samples in sorted(by_type.items(), key=lambda item: -len(item[1]))},
+            'parse_sources': dict(sources),
+            'hit_rates': hit_rates,
+            # 实际发往各提供方的请求数（含对冲、失败和超时的请求），用于估算大模型配额
+            'llm_requests': self.counters.get('llm_requests', 0),
+            'llm_requests_per_s': round(self.counters.get('llm_requests', 0) / self.elapsed, 2) if self.elapsed else 0.0,
+            'backend_operations': dict(self.counters.get('backend_operations', {})),
+            # 大模型回复不符合参数格式的次数（按命令类型）和修复请求的结果
+            'schema_failures': dict(self.counters.get('schema_failures', {})),
+            'schema_repairs': dict(self.counters.get('schema_repairs', {})),
+            'errors': dict(errors.most_common(20)),
+        }
+
+    def format(self) -> str:
+        """
+        生成文本报告
+
+        Returns:
+            str: 报告
+        """
+        summary = self.summary()
+        lines = [f"回放{summary['commands']}条命令，成功{summary['succeeded']}条，耗时{summary['elapsed_s']}s，"
+                 f"吞吐量{summary['throughput_per_s']}条/秒，大模型请求{summary['llm_requests']}次"
+                 f"（{summary['llm_requests_per_s']}次/秒）"]
+
+        def latency_lines(latency: Dict[str, Dict[str, float]], indent: str) -> None:
+            for stage, values in latency.items():
+                lines.append(f"{indent}{stage:<8} " + "  ".join(f"{name}={value:.1f}ms" for name, value in values.items()))
+
+        lines.append("\n各阶段延迟:")
+        latency_lines(summary['latency_ms'], '  ')
+        lines.append("\n按命令类型:")
+        for command_type, info in summary['by_command_type'].items():
+            lines.append(f"  {command_type}（{info['count']}条）")
+            latency_lines(info['latency_ms'], '    ')
+        if summary['hit_rates']:
+            lines.append("\n命中率: " + "，".join(f"{name} {rate:.1%}" for name, rate in summary['hit_rates'].items()))
+        if summary['parse_sources']:
+            lines.append("解析途径: " + "，".join(f"{name} {count}" for name, count in summary['parse_sources'].items()))
+        if summary['schema_failures']:
+            repairs = summary['schema_repairs']
+            lines.append("回复格式错误: " + "，".join(f"{name} {count}" for name, count in summary['schema_failures'].items())
+                         + f"；修复请求{repairs.get('repair_attempts', 0)}次，成功{repairs.get('repaired', 0)}次")
+        if summary['backend_operations']:
+            lines.append("执行后端的操作: " + "，".join(f"{name} {count}" for name, count in summary['backend_operations'].items()))
+        if summary['errors']:
+            lines.append("\n错误分类:")
+            for error, count in summary['errors'].items():
+                lines.append(f"  {count:>5}  {error}")
+        return "\n".join(lines)
+
+
+def _classify_error(command_type: Optional[str], message: str) -> str:
+    """按命令类型和消息的第一行归类失败"""
+    first_line = (message or '').splitlines()[0] if message else ''
+    # 去掉消息中随命令变化的部分（冒号后的名称、路径等）
+    head = re.split(r'[:：]', first_line, 1)[0][:40]
+    return f"{command_type or 'unparsed'}: {head}"
+
+
+async def replay_async(commands: List[str], rate: float = 0.0, concurrency: int = 8,
+                       timeout: Optional[float] = None, dry_run: bool = True) -> ReplayReport:
+    """
+    回放命令
+
+    Args:
+        commands: 按顺序发出的命令
+        rate: 每秒发出的命令数，0表示不限速
+        concurrency: 同时处理的命令数上限
+        timeout: 每条命令的解析时间预算（秒）
+        dry_run: 是否使用模拟执行后端和模拟天气数据（否则使用当前配置的后端和天气服务）
+
+    Returns:
+        ReplayReport: 回放结果
+    """
+    import app as app_module
+    from commands.backend import get_backend, use_backend
+    from commands.simulated_backend import SimulatedBackend
+    from utils import command_schema, nlp_processor
+    from utils.nlp_processor import NLPProcessor
+    from utils.llm_providers import get_router
+    from utils.weather_cache import StubWeatherProvider, WeatherCache, get_weather_cache, use_weather_cache
+
+    router = get_router()
+    requests_before = sum(provider.requests for provider in router.providers)
+    weather_cache = WeatherCache(StubWeatherProvider(), cache_file=None) if dry_run else get_weather_cache()
+    weather_before = (weather_cache.hits, weather_cache.stale_hits, weather_cache.misses)
+    sources_before = Counter(nlp_processor.PARSE_SOURCES)
+    validation_before = command_schema.validation_stats()
+    backend = SimulatedBackend() if dry_run else get_backend()
+    slots = asyncio.Semaphore(max(concurrency, 1))
+    samples: List[ReplaySample] = []
+
+    async def run_one(index: int, text: str) -> None:
+        started = time.perf_counter()
+        if rate > 0:
+            await asyncio.sleep(max(replay_started + index / rate - started, 0))
+        scheduled = time.perf_counter()
+        async with slots:
+            trace: Dict[str, Any] = {'queue': (time.perf_counter() - scheduled) * 1000}
+            _trace.set(trace)
+            command_started = time.perf_counter()
+            error = None
+            try:
+                success, message = await app_module.process_command_async(text, timeout)
+            except Exception as e:
+                success, message = False, str(e)
+                error = f"exception: {type(e).__name__}"
+            total = (time.perf_counter() - command_started) * 1000
+        command_type = trace.get('command_type')
+        if app_module.is_confirmation(text):
+            command_type = 'confirmation'
+        if not success and error is None:
+            error = _classify_error(command_type, message)
+        stages = {'queue': trace['queue'], 'total': total}
+        if 'parse' in trace:
+            stages['parse'] = trace['parse']
+            stages['execute'] = max(total - trace['parse'], 0.0)
+        samples.append(ReplaySample(text, command_type, success, error, stages))
+
+    with _instrument(NLPProcessor), use_backend(backend), use_weather_cache(weather_cache):
+        replay_started = time.perf_counter()
+        # 每条命令在独立的任务（上下文）中运行，阶段记录互不干扰
+        await asyncio.gather(*(run_one(index, text) for index, text in enumerate(commands)))
+        elapsed = time.perf_counter() - replay_started
+
+    sources = Counter(nlp_processor.PARSE_SOURCES)
+    sources.subtract(sources_before)
+    counters = {
+        'parse_sources': {name: count for name, count in sources.items() if count > 0},
+        'weather_cache': dict(zip(('hits', 'stale_hits', 'misses'),
+                                  (after - before for after, before in
+                                   zip((weather_cache.hits, weather_cache.stale_hits, weather_cache.misses),
+                                       weather_before)))),
+        'backend_operations': dict(getattr(backend, 'operations', {})),
+        'llm_requests': sum(provider.requests for provider in router.providers) - requests_before,
+    }
+    validation = command_schema.validation_stats()
+    failures = Counter(validation['failures'])
+    failures.subtract(validation_before['failures'])
+    counters['schema_failures'] = {name: count for name, count in failures.items() if count > 0}
+    counters['schema_repairs'] = {name: validation[name] - validation_before[name]
+                                  for name in ('repair_attempts', 'repaired', 'repair_failed')}
+    return ReplayReport(samples, elapsed, counters)
+
+
+def replay(commands: List[str], rate: float = 0.0, concurrency: int = 8,
+           timeout: Optional[float] = None, dry_run: bool = True) -> ReplayReport:
+    """replay_async的同步封装（在新的事件循环中运行）"""
+    return asyncio.run(replay_async(commands, rate, concurrency, timeout, dry_run))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='用命令历史回放压测process_command')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--log', default='app.log', help='提取“用户输入:”行的日志文件')
+    source.add_argument('--corpus', help='命令语料文件（每行一条命令或{"text": ...}）')
+    parser.add_argument('--count', type=int, default=0, help='回放的命令数，超过命令条数时循环回放，0表示回放一遍')
+    parser.add_argument('--rate', type=float, default=10.0, help='每秒发出的命令数，0表示不限速')
+    parser.add_argument('--concurrency', type=int, default=8, help='同时处理的命令数上限')
+    parser.add_argument('--timeout', type=float, default=None, help='每条命令的解析时间预算（秒）')
+    parser.add_argument('--live', action='store_true', help='使用当前配置的执行后端真正执行（默认使用模拟后端）')
+    parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    args = parser.parse_args()
+
+    # 在导入app之前配置日志，回放的命令不会再写入app.log
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    commands = load_corpus(args.corpus) if args.corpus else read_logged_commands(args.log)
+    if not commands:
+        print("没有可回放的命令")
+        sys.exit(1)
+    if args.count > 0:
+        commands = [commands[index % len(commands)] for index in range(args.count)]
+
+    report = replay(commands, args.rate, args.concurrency, args.timeout, dry_run=not args.live)
+    if args.json:
+        print(json.dumps(report.summary(), ensure_ascii=False, indent=2))
+    else:
+        print(report.format())
+
+
+if __name__ == "__main__":
+    main()
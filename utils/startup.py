@@ -0,0 +1,224 @@
+"""
+启动相关工具模块：统一加载环境变量、延迟导入和启动耗时分析。
+
+- load_environment() 只加载一次.env，各模块都调用它而不是各自调用load_dotenv()；
+- lazy_import() 返回延迟加载的模块，首次访问其属性时才真正导入，
+  命令模块及其平台后端只在第一次用到时加载；
+- import_time_tree() 在子进程中用 -X importtime 冷启动导入，得到按模块的导入耗时树；
+- profile_call() 用cProfile分析一次调用（例如第一条命令）；
+- check_startup_budget() 检查导入耗时是否超出预算，可在基准测试/CI中使用:
+
+    python -m utils.startup --module app --budget 300
+"""
+import os
+import io
+import sys
+import time
+import logging
+import argparse
+import subprocess
+import importlib
+import importlib.util
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 启动（导入主模块）耗时预算（毫秒）
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', '300'))
+
+_environment_loaded = False
+
+
+def load_environment() -> None:
+    """加载.env中的环境变量（整个进程只加载一次）"""
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    _environment_loaded = True
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        logger.debug("未安装python-dotenv，跳过加载.env")
+        return
+    load_dotenv()
+
+
+class MissingModule(ModuleType):
+    """找不到的模块：导入错误推迟到首次访问属性时才抛出，不影响调用方本身的导入和构造"""
+
+    def __init__(self, name: str, reason: str):
+        super().__init__(name)
+        self.__dict__['_reason'] = reason
+
+    def __getattr__(self, attribute: str) -> Any:
+        if attribute.startswith('__'):
+            raise AttributeError(attribute)
+        raise ModuleNotFoundError(self.__dict__['_reason'], name=self.__name__)
+
+    def __bool__(self) -> bool:
+        return False
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    延迟导入模块，首次访问模块属性时才执行模块代码
+
+    找不到模块时返回MissingModule（布尔值为False），访问其属性时抛出ModuleNotFoundError；
+    模块存在但其依赖缺失时，ImportError同样在首次访问属性时抛出。
+
+    Args:
+        name: 模块的完整名称，如commands.open_app
+
+    Returns:
+        ModuleType: 模块对象（已导入时直接返回）
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError) as e:
+        return MissingModule(name, str(e))
+    if spec is None or spec.loader is None:
+        return MissingModule(name, f"No module named {name!r}")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class ImportRecord:
+    """-X importtime输出中的一条记录"""
+
+    __slots__ = ('name', 'depth', 'self_us', 'cumulative_us')
+
+    def __init__(self, name: str, depth: int, self_us: int, cumulative_us: int):
+        self.name = name
+        self.depth = depth
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+
+
+def import_time_tree(module: str = 'app', cwd: Optional[str] = None) -> Tuple[List[ImportRecord], float]:
+    """
+    在新的解释器中导入模块，统计每个模块的导入耗时
+
+    Args:
+        module: 要导入的模块
+        cwd: 子进程的工作目录，默认为当前目录
+
+    Returns:
+        Tuple[List[ImportRecord], float]: 按导入顺序排列的记录（子模块在父模块之前）和总耗时（毫秒）
+
+    Raises:
+        RuntimeError: 导入失败
+    """
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, cwd=cwd,
+                            env=dict(os.environ, PYTHONDONTWRITEBYTECODE='1'))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    records = []
+    other_lines = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            other_lines.append(line)
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        # 模块名前有一个空格，之后每级嵌套缩进两个空格
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append(ImportRecord(name.strip(), depth, int(self_us), int(cumulative_us)))
+    if result.returncode != 0:
+        raise RuntimeError(f"导入{module}失败:\n" + "\n".join(other_lines[-20:]))
+    return records, elapsed_ms
+
+
+def format_import_tree(records: List[ImportRecord], min_ms: float = 1.0) -> str:
+    """
+    把导入记录格式化为树（父模块在前），只显示累计耗时不少于min_ms的模块
+
+    Args:
+        records: import_time_tree返回的记录
+        min_ms: 显示阈值（毫秒）
+
+    Returns:
+        str: 导入耗时树
+    """
+    # importtime按导入完成的顺序输出，子模块先于父模块；
+    # 每条记录收走紧挨在它之前、深度比它大一级的记录作为子节点
+    pending: Dict[int, List[Tuple[ImportRecord, list]]] = {}
+    for record in records:
+        children = pending.pop(record.depth + 1, [])
+        pending.setdefault(record.depth, []).append((record, children))
+
+    lines = [f"{'累计':>11} {'自身':>10}  模块"]
+
+    def walk(nodes: List[Tuple[ImportRecord, list]]) -> None:
+        for record, children in nodes:
+            if record.cumulative_us < min_ms * 1000:
+                continue
+            lines.append(f"{record.cumulative_us / 1000:9.1f}ms {record.self_us / 1000:8.1f}ms  "
+                         f"{'  ' * record.depth}{record.name}")
+            walk(children)
+
+    walk(pending.get(0, []))
+    return "\n".join(lines)
+
+
+def profile_call(func: Callable[..., Any], *args: Any, limit: int = 25) -> Tuple[Any, str]:
+    """
+    用cProfile分析一次函数调用
+
+    Args:
+        func: 被分析的函数
+        *args: 位置参数
+        limit: 报告中显示的函数数
+
+    Returns:
+        Tuple[Any, str]: 函数返回值和按累计耗时排序的报告
+    """
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args)
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(limit)
+    return result, output.getvalue()
+
+
+def check_startup_budget(module: str = 'app', budget_ms: float = STARTUP_BUDGET_MS,
+                         cwd: Optional[str] = None) -> Tuple[bool, float, List[ImportRecord]]:
+    """
+    检查导入模块的耗时是否在预算内（取导入树的根记录，不含解释器本身的启动时间）
+
+    Args:
+        module: 要检查的模块
+        budget_ms: 预算（毫秒）
+        cwd: 子进程的工作目录
+
+    Returns:
+        Tuple[bool, float, List[ImportRecord]]: 是否在预算内、导入耗时（毫秒）和导入记录
+    """
+    records, _ = import_time_tree(module, cwd)
+    import_ms = next((r.cumulative_us for r in reversed(records) if r.name == module), 0) / 1000
+    return import_ms <= budget_ms, import_ms, records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='检查启动导入耗时是否超出预算')
+    parser.add_argument('--module', default='app', help='要检查的模块')
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET_MS, help='预算（毫秒）')
+    parser.add_argument('--min-ms', type=float, default=1.0, help='导入树中显示的最小耗时（毫秒）')
+    args = parser.parse_args()
+
+    ok, import_ms, records = check_startup_budget(args.module, args.budget)
+    print(format_import_tree(records, args.min_ms))
+    print(f"\n导入{args.module}耗时: {import_ms:.1f}ms，预算: {args.budget:.0f}ms，{'通过' if ok else '超出预算'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -133,6 +133,24 @@ class SystemUtils:
         
         return dirs
     
+    @staticmethod
+    def format_size(size: int) -> str:
+        """
+        把字节数格式化为可读字符串
+        
+        Args:
+            size: 字节数
+            
+        Returns:
+            str: 如"512B"、"1.5MB"
+        """
+        value = float(size)
+        for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+            if value < 1024 or unit == 'TB':
+                return f"{value:.0f}{unit}" if unit == 'B' else f"{value:.1f}{unit}"
+            value /= 1024
+        return f"{size}B"
+    
     @staticmethod
     def resolve_path(path: str) -> str:
         """
@@ -0,0 +1,371 @@
+"""
+目录树删除模块，提供并行删除和删除前的影响评估（dry-run）。
+
+使用os.scandir逐层遍历目录，每个目录下的文件按批分发到有界线程池中并行unlink
+（单个目录下有大量文件时同样并行），目录在其内容清空后自底向上删除。
+
+删除前先做dry-run并请求确认，PendingDeletions记录每个会话中已做过dry-run的目录，
+只有与之匹配的确认才会真正执行删除。
+"""
+import os
+import stat
+import threading
+import time
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from utils.file_transfer import FileTransfer
+from utils.system_utils import SystemUtils
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 进度回调的最小间隔（秒）
+PROGRESS_INTERVAL = 0.2
+
+# 每个unlink任务删除的文件数
+UNLINK_BATCH = 64
+
+# 删除确认的有效期（秒），超过后需要重新发出删除请求
+DELETE_CONFIRM_TTL = float(os.getenv('DELETE_CONFIRM_TTL', '300'))
+
+# 额外的受保护目录，用os.pathsep分隔
+DELETE_PROTECTED_PATHS = os.getenv('DELETE_PROTECTED_PATHS', '')
+
+# 命令行进程只有一个会话
+DEFAULT_SESSION = 'local'
+
+# 根目录的直接子目录之外，同样不允许整体删除的系统目录
+_SYSTEM_DIRECTORIES = ('/usr/local', '/usr/share', '/usr/lib', '/var/lib', '/var/log',
+                       '/System/Library', '/Library/Application Support', '/Library/Preferences')
+
+# Windows系统目录对应的环境变量
+_SYSTEM_DIRECTORY_VARIABLES = ('SystemRoot', 'ProgramFiles', 'ProgramFiles(x86)', 'ProgramData',
+                               'APPDATA', 'LOCALAPPDATA')
+
+
+class DeletionStats:
+    """删除统计（dry-run和实际删除共用），线程安全"""
+
+    def __init__(self, callback: Optional[Callable[['DeletionStats'], None]] = None):
+        self.files = 0
+        self.directories = 0
+        self.bytes = 0
+        self.removed_files = 0
+        self.removed_directories = 0
+        self.errors: List[Tuple[str, str]] = []
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self._callback = callback
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def elapsed(self) -> float:
+        """已用时间（秒）"""
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return max(end - self.started_at, 1e-9)
+
+    def add_scanned(self, files: int, directories: int, size: int) -> None:
+        with self._lock:
+            self.files += files
+            self.directories += directories
+            self.bytes += size
+        self._report()
+
+    def add_removed(self, files: int, directories: int = 0) -> None:
+        with self._lock:
+            self.removed_files += files
+            self.removed_directories += directories
+        self._report()
+
+    def add_error(self, path: str, message: str) -> None:
+        with self._lock:
+            self.errors.append((path, message))
+
+    def finish(self) -> None:
+        self.finished_at = time.monotonic()
+        self._report(force=True)
+
+    def _report(self, force: bool = False) -> None:
+        if not self._callback:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        try:
+            self._callback(self)
+        except Exception as e:
+            logger.debug(f"进度回调出错: {str(e)}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """当前进度（用于推送给调用方）"""
+        return {'files': self.files, 'directories': self.directories, 'bytes': self.bytes,
+                'removed_files': self.removed_files, 'removed_directories': self.removed_directories,
+                'errors': len(self.errors), 'elapsed': round(self.elapsed, 3)}
+
+    def impact(self) -> str:
+        """删除影响的可读描述"""
+        return f"{self.files}个文件、{self.directories}个文件夹，共{SystemUtils.format_size(self.bytes)}"
+
+    def summary(self) -> str:
+        """删除结果的可读描述"""
+        text = (f"已删除{self.removed_files}个文件、{self.removed_directories}个文件夹，"
+                f"耗时{self.elapsed:.2f}秒")
+        if self.errors:
+            text += f"，失败{len(self.errors)}个"
+        return text
+
+
+class PendingDeletions:
+    """
+    各会话中已完成dry-run、等待确认的目录，线程安全
+
+    确认命令只有在同一会话中先对同一目录做过dry-run且未过期时才有效，每次dry-run只能确认一次。
+    """
+
+    def __init__(self, ttl: float = DELETE_CONFIRM_TTL, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._pending: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(session: str, path: str) -> Tuple[str, str]:
+        return session, os.path.normcase(os.path.normpath(path))
+
+    def _expire(self, now: float) -> None:
+        for key in [k for k, expires in self._pending.items() if expires <= now]:
+            del self._pending[key]
+
+    def issue(self, session: str, path: str) -> None:
+        """
+        记录一次dry-run
+
+        Args:
+            session: 会话标识
+            path: dry-run的目录（绝对路径）
+        """
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            self._pending[self._key(session, path)] = now + self.ttl
+
+    def consume(self, session: str, path: str) -> bool:
+        """
+        取出与确认匹配的dry-run
+
+        Args:
+            session: 会话标识
+            path: 确认删除的目录（绝对路径）
+
+        Returns:
+            bool: 同一会话中有未过期的dry-run返回True（随即失效）
+        """
+        with self._lock:
+            self._expire(self._clock())
+            return self._pending.pop(self._key(session, path), None) is not None
+
+    def discard_session(self, session: str) -> None:
+        """丢弃会话中所有待确认的删除（会话结束时调用）"""
+        with self._lock:
+            for key in [k for k in self._pending if k[0] == session]:
+                del self._pending[key]
+
+
+# 进程内共享的待确认删除
+pending_deletions = PendingDeletions()
+
+
+class TreeDeleter:
+    """目录树删除引擎"""
+
+    @staticmethod
+    def protected_directories() -> Set[str]:
+        """
+        不允许整体删除的目录：系统目录、用户主目录、系统标准目录和DELETE_PROTECTED_PATHS
+
+        Returns:
+            Set[str]: 规范化后的绝对路径
+        """
+        paths = list(SystemUtils.get_standard_directories().values())
+        paths.append(os.path.expanduser("~"))
+        paths.extend(_SYSTEM_DIRECTORIES)
+        paths.extend(os.environ[name] for name in _SYSTEM_DIRECTORY_VARIABLES if os.environ.get(name))
+        paths.extend(p for p in DELETE_PROTECTED_PATHS.split(os.pathsep) if p)
+        return {os.path.normcase(os.path.realpath(p)) for p in paths}
+
+    @staticmethod
+    def is_protected(path: str) -> bool:
+        """
+        检查路径是否为不允许整体删除的目录
+
+        根目录及其直接子目录（/home、/usr、/etc、C:\\Windows等）、受保护目录本身，
+        以及包含受保护目录的上级目录都不允许删除。
+
+        Args:
+            path: 绝对路径
+
+        Returns:
+            bool: 受保护返回True
+        """
+        real = os.path.normcase(os.path.realpath(path))
+        parent = os.path.dirname(real)
+        if real == parent or parent == os.path.dirname(parent):
+            return True
+        prefix = real.rstrip(os.sep) + os.sep
+        return any(p == real or p.startswith(prefix) for p in TreeDeleter.protected_directories())
+
+    @staticmethod
+    def _walk(path: str, visit: Callable[[str], List[str]], workers: int) -> List[List[str]]:
+        """
+        按层并行遍历目录树
+
+        Args:
+            path: 根目录
+            visit: 处理单个目录的函数，返回其子目录列表
+            workers: 线程数
+
+        Returns:
+            List[List[str]]: 每一层的目录列表（第0层为根目录）
+        """
+        levels = [[path]]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            current = [path]
+            while current:
+                children: List[str] = []
+                for subdirs in executor.map(visit, current):
+                    children.extend(subdirs)
+                if children:
+                    levels.append(children)
+                current = children
+        return levels
+
+    @staticmethod
+    def dry_run(path: str, workers: Optional[int] = None,
+                stats: Optional[DeletionStats] = None) -> DeletionStats:
+        """
+        统计删除目录将影响的文件数、文件夹数和字节数，不做任何修改
+
+        Args:
+            path: 目录路径
+            workers: 线程数，默认按存储介质自动选择
+            stats: 统计对象
+
+        Returns:
+            DeletionStats: 统计结果
+        """
+        stats = stats or DeletionStats()
+        workers = workers or FileTransfer.default_workers(path)
+
+        def visit(directory: str) -> List[str]:
+            subdirs, files, size = [], 0, 0
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.path)
+                            else:
+                                files += 1
+                                size += entry.stat(follow_symlinks=False).st_size
+                        except OSError as e:
+                            stats.add_error(entry.path, str(e))
+            except OSError as e:
+                stats.add_error(directory, str(e))
+            stats.add_scanned(files, len(subdirs), size)
+            return subdirs
+
+        TreeDeleter._walk(path, visit, workers)
+        stats.finish()
+        logger.info(f"删除影响评估: {path}, {stats.impact()}, 耗时{stats.elapsed:.2f}秒")
+        return stats
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        """删除文件，遇到只读文件（Windows）时去掉只读属性后重试"""
+        try:
+            os.unlink(path)
+        except PermissionError:
+            os.chmod(path, stat.S_IWRITE)
+            os.unlink(path)
+
+    @staticmethod
+    def delete(path: str, workers: Optional[int] = None,
+               stats: Optional[DeletionStats] = None) -> DeletionStats:
+        """
+        并行删除目录树
+
+        遍历时把每个目录下的文件按UNLINK_BATCH分批提交到删除线程池，
+        全部文件删除后从最深层开始删除空目录。
+
+        Args:
+            path: 目录路径
+            workers: 线程数，默认按存储介质自动选择
+            stats: 统计对象（可用于进度回调）
+
+        Returns:
+            DeletionStats: 删除统计
+        """
+        stats = stats or DeletionStats()
+        workers = workers or FileTransfer.default_workers(path)
+
+        if os.path.islink(path) or not os.path.isdir(path):
+            TreeDeleter._unlink(path)
+            stats.add_removed(1)
+            stats.finish()
+            return stats
+
+        def unlink_batch(batch: List[str]) -> None:
+            removed = 0
+            for file_path in batch:
+                try:
+                    TreeDeleter._unlink(file_path)
+                    removed += 1
+                except OSError as e:
+                    stats.add_error(file_path, str(e))
+            stats.add_removed(removed)
+
+        # 遍历线程只扫描目录，unlink在单独的线程池中执行，避免遍历线程等待自己提交的任务
+        unlinker = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='unlink')
+        pending: List[Future] = []
+
+        def visit(directory: str) -> List[str]:
+            subdirs, files = [], []
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            (subdirs if entry.is_dir(follow_symlinks=False) else files).append(entry.path)
+                        except OSError as e:
+                            stats.add_error(entry.path, str(e))
+            except OSError as e:
+                stats.add_error(directory, str(e))
+            for start in range(0, len(files), UNLINK_BATCH):
+                pending.append(unlinker.submit(unlink_batch, files[start:start + UNLINK_BATCH]))
+            return subdirs
+
+        try:
+            levels = TreeDeleter._walk(path, visit, workers)
+            wait(pending)
+        finally:
+            unlinker.shutdown(wait=True)
+
+        # 同一层的目录互不依赖，可以并行删除；层与层之间必须自底向上
+        def remove_dir(directory: str) -> int:
+            try:
+                os.rmdir(directory)
+                return 1
+            except OSError as e:
+                stats.add_error(directory, str(e))
+                return 0
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for level in reversed(levels):
+                stats.add_removed(0, sum(executor.map(remove_dir, level)))
+
+        stats.finish()
+        logger.info(f"目录删除完成: {path}, {stats.summary()}")
+        return stats
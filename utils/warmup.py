@@ -0,0 +1,358 @@
+"""
+启动预热模块，在后台线程中提前完成第一条命令原本要付出的初始化开销。
+
+第一条命令通常最慢：要与大模型服务建立TLS连接、第一次扫描标准目录、在AppFinder中
+枚举应用，还要加载命令模块及其平台后端。交互模式打印欢迎信息的同时，这些工作在
+后台线程中进行，不阻塞输入；第一条命令到来时还没完成的部分照常在命令中完成。
+
+预热任务：
+- llm_connection: 预先连接各大模型提供方，连接留在同步接口事件循环的连接池中；
+- directories: 扫描并缓存系统标准目录；
+- backends: 加载命令模块及其平台后端（应用查找、设备控制等）；
+- intent_classifier: 加载本地意图分类模型；
+- frequent_commands: 从日志中找出最常用的命令，预先解析并缓存解析结果，
+  应用类命令同时在AppFinder中查找一次目标应用（只查找，不执行命令）。
+
+第一条命令完成后用first_command_report()记录其耗时以及预热节省的时间，
+只计算该命令实际用到的任务。
+"""
+import os
+import time
+import logging
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 是否在启动时预热
+WARMUP = os.getenv('WARMUP', 'True').lower() in ('true', '1', 't')
+
+# 预先解析的常用命令条数（0表示不预先解析）
+WARMUP_FREQUENT_COMMANDS = int(os.getenv('WARMUP_FREQUENT_COMMANDS', '3'))
+
+# 单个预热任务中网络请求的超时时间（秒）
+WARMUP_TIMEOUT = float(os.getenv('WARMUP_TIMEOUT', '5'))
+
+# 查找常用命令时读取的日志末尾大小（字节）
+_LOG_TAIL_BYTES = 2 * 1024 * 1024
+
+# 预热时加载的模块（SystemBackend在第一次使用时才导入的命令模块等），
+# 当前安装中不存在的模块在预热时跳过
+_BACKEND_MODULES = (
+    'commands.open_app',
+    'commands.close_app',
+    'commands.uninstall_app',
+    'commands.list_running',
+    'commands.list_installed',
+    'commands.volume_control',
+    'commands.brightness_control',
+    'commands.file_operations',
+    'commands.disk_usage',
+    'utils.file_reader',
+)
+
+# 会用到标准目录的命令类型（解析路径时按名称查找标准目录）
+_DIRECTORY_COMMANDS = frozenset((
+    'list_subdirectories', 'create_directory', 'delete_file', 'delete_directory', 'list_files',
+    'create_file', 'move_file', 'copy_file', 'rename_file', 'read_file', 'write_file', 'disk_usage',
+))
+
+# 不经过执行后端的命令类型
+_NO_BACKEND_COMMANDS = frozenset(('weather', 'unknown'))
+
+# 任务状态
+STATUS_PENDING = 'pending'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class WarmupTask:
+    """一个预热任务及其结果"""
+
+    __slots__ = ('name', 'func', 'status', 'elapsed_ms', 'finished_at', 'detail')
+
+    def __init__(self, name: str, func: Callable[[], Any]):
+        self.name = name
+        self.func = func
+        self.status = STATUS_PENDING
+        self.elapsed_ms = 0.0
+        self.finished_at: Optional[float] = None
+        self.detail: Any = None
+
+
+class Warmup:
+    """在后台线程中并行执行预热任务"""
+
+    def __init__(self, tasks: Dict[str, Callable[[], Any]]):
+        """
+        Args:
+            tasks: 任务名称到任务函数的映射，函数的返回值作为任务详情
+        """
+        self.tasks = [WarmupTask(name, func) for name, func in tasks.items()]
+        self._threads: List[threading.Thread] = []
+        self.started_at: Optional[float] = None
+
+    def start(self) -> 'Warmup':
+        """启动所有任务（立即返回）"""
+        self.started_at = time.perf_counter()
+        for task in self.tasks:
+            thread = threading.Thread(target=self._run, args=(task,), name=f'warmup-{task.name}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _run(self, task: WarmupTask) -> None:
+        started = time.perf_counter()
+        try:
+            task.detail = task.func()
+            task.status = STATUS_DONE
+        except Exception as e:
+            task.detail = str(e) or type(e).__name__
+            task.status = STATUS_FAILED
+            logger.debug(f"预热任务{task.name}失败: {task.detail}")
+        task.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        task.finished_at = time.perf_counter()
+        logger.debug(f"预热任务{task.name}: {task.status}, 耗时{task.elapsed_ms}ms")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待所有任务完成
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            bool: 是否全部完成
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        return self.done
+
+    @property
+    def done(self) -> bool:
+        return all(task.status != STATUS_PENDING for task in self.tasks)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """各任务的状态、耗时（毫秒）和详情"""
+        return [{'name': task.name, 'status': task.status, 'elapsed_ms': task.elapsed_ms, 'detail': task.detail}
+                for task in self.tasks]
+
+    def on_path(self, task: WarmupTask, command_text: str, command_types: Iterable[str]) -> bool:
+        """
+        任务是否在第一条命令的执行路径上（没有预热时这条命令要自己付出该任务的开销）
+
+        Args:
+            task: 预热任务
+            command_text: 第一条命令
+            command_types: 第一条命令解析出的命令类型（多步骤计划为各步骤的类型）
+
+        Returns:
+            bool: 是否在路径上
+        """
+        command_types = set(command_types)
+        if task.name == 'llm_connection':
+            return bool(command_types)
+        if task.name == 'intent_classifier':
+            return task.detail is True
+        if task.name == 'frequent_commands':
+            return any(command == command_text and ok for command, ok in task.detail or [])
+        if task.name == 'directories':
+            return bool(command_types & _DIRECTORY_COMMANDS)
+        if task.name == 'backends':
+            return bool(command_types - _NO_BACKEND_COMMANDS)
+        return False
+
+    def first_command_report(self, command_started: float, command_ms: float,
+                             command_text: str = '', command_types: Iterable[str] = ()) -> str:
+        """
+        生成第一条命令的耗时报告
+
+        只有在第一条命令开始前已完成、且在这条命令执行路径上的任务才算作节省。
+        这些任务是并行执行的，各自的耗时里包含相互争抢CPU的时间，
+        因此取其中最长的一个作为节省时间的保守估计，而不是把耗时相加。
+
+        Args:
+            command_started: 第一条命令开始时的time.perf_counter()
+            command_ms: 第一条命令的耗时（毫秒）
+            command_text: 第一条命令
+            command_types: 第一条命令解析出的命令类型
+
+        Returns:
+            str: 报告
+        """
+        command_types = list(command_types)
+        ready = [task for task in self.tasks
+                 if task.status == STATUS_DONE and task.finished_at is not None and task.finished_at <= command_started]
+        used = [task for task in ready if self.on_path(task, command_text, command_types)]
+        unused = [task.name for task in ready if task not in used]
+        pending = [task.name for task in self.tasks if task not in ready]
+        saved_ms = max((task.elapsed_ms for task in used), default=0.0)
+        details = '、'.join(f"{task.name} {task.elapsed_ms:.0f}ms" for task in used) or '无'
+        report = f"第一条命令耗时{command_ms:.0f}ms，预热至少节省{saved_ms:.0f}ms（用到的预热: {details}）"
+        if unused:
+            report += f"，未用到: {'、'.join(unused)}"
+        if pending:
+            report += f"，未完成或失败: {'、'.join(pending)}"
+        return report
+
+def frequent_commands(log_file: str = 'app.log', limit: int = WARMUP_FREQUENT_COMMANDS) -> List[str]:
+    """
+    从日志中找出最常用的命令（至少出现两次，不含确认命令）
+
+    Args:
+        log_file: 日志文件
+        limit: 返回的命令条数
+
+    Returns:
+        List[str]: 按出现次数从多到少排列的命令
+    """
+    if limit <= 0:
+        return []
+    from utils.replay import read_logged_commands
+    counts = Counter(command for command in read_logged_commands(log_file, _LOG_TAIL_BYTES) if '确认' not in command)
+    return [command for command, count in counts.most_common(limit) if count >= 2]
+
+
+def warm_llm_connection(timeout: float = WARMUP_TIMEOUT) -> Dict[str, bool]:
+    """在同步接口使用的后台事件循环中预先连接各大模型提供方"""
+    from utils.async_utils import run_sync
+    from utils.llm_providers import get_router
+    return run_sync(get_router().warm_up(timeout), timeout + 1)
+
+
+def warm_directories() -> int:
+    """扫描并缓存系统标准目录"""
+    from utils.system_utils import SystemUtils
+    return len(SystemUtils.get_standard_directories())
+
+
+def _module_exists(name: str) -> bool:
+    """模块是否存在于当前安装中（只查找，不执行模块）"""
+    import importlib.util
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def warm_backends() -> List[str]:
+    """
+    创建执行后端并加载命令模块及其平台后端
+
+    Returns:
+        List[str]: 已加载的模块（不存在的模块和当前平台缺少依赖的模块被跳过）
+    """
+    import importlib
+    from commands.backend import get_backend
+    if get_backend().name != 'system':
+        return []
+    loaded = []
+    for name in _BACKEND_MODULES:
+        if not _module_exists(name):
+            continue
+        try:
+            module = importlib.import_module(name)
+            # 延迟导入的模块在第一次访问属性时才真正执行
+            getattr(module, '__doc__')
+        except ImportError as e:
+            logger.debug(f"预热时跳过模块{name}: {str(e)}")
+            continue
+        loaded.append(name)
+    return loaded
+
+
+def warm_intent_classifier() -> bool:
+    """加载本地意图分类模型（没有模型文件时会在后台开始训练）"""
+    try:
+        from utils import intent_classifier
+    except ImportError:
+        return False
+    if not intent_classifier.INTENT_CLASSIFIER_ENABLED:
+        return False
+    return intent_classifier.get_intent_classifier() is not None
+
+
+def warm_frequent_commands(log_file: str = 'app.log', limit: int = WARMUP_FREQUENT_COMMANDS,
+                           timeout: float = WARMUP_TIMEOUT) -> List[Tuple[str, bool]]:
+    """
+    预先解析最常用的命令并缓存解析结果，应用类命令在AppFinder中查找一次目标应用
+
+    Args:
+        log_file: 日志文件
+        limit: 预先解析的命令条数
+        timeout: 每条命令的解析超时时间（秒）
+
+    Returns:
+        List[Tuple[str, bool]]: 每条命令及其是否已有可用的解析结果
+    """
+    from utils.async_utils import run_sync
+    from utils.nlp_processor import NLPProcessor
+
+    results = []
+    for command in frequent_commands(log_file, limit):
+        if NLPProcessor.is_multi_step(command):
+            continue
+        parsed = NLPProcessor.classify_with_local_model(command)
+        if parsed is None:
+            parsed = run_sync(NLPProcessor.prefetch_async(command, timeout), timeout + 1)
+        results.append((command, parsed is not None))
+        if parsed:
+            _find_app(*parsed)
+    return results
+
+
+def _find_app(cmd_type: str, parameter: Any) -> None:
+    """在AppFinder中查找应用类命令的目标应用，填充应用缓存"""
+    from utils.nlp_processor import NLPProcessor
+    if cmd_type not in (NLPProcessor.CMD_OPEN, NLPProcessor.CMD_CLOSE, NLPProcessor.CMD_UNINSTALL):
+        return
+    app_name = parameter.get('app_name') if isinstance(parameter, dict) else parameter
+    if not app_name or not isinstance(app_name, str):
+        return
+    try:
+        from utils.app_finder import AppFinder
+    except ImportError:
+        return
+    AppFinder.find_app(app_name)
+
+
+def default_tasks(log_file: str = 'app.log', connect_llm: bool = True) -> Dict[str, Callable[[], Any]]:
+    """
+    默认的预热任务
+
+    Args:
+        log_file: 查找常用命令的日志文件
+        connect_llm: 是否预先连接大模型（连接池按事件循环区分，
+            Web服务在自己的事件循环中连接，这里不需要）
+
+    Returns:
+        Dict[str, Callable[[], Any]]: 任务名称到任务函数的映射
+    """
+    tasks: Dict[str, Callable[[], Any]] = {}
+    if connect_llm:
+        tasks['llm_connection'] = warm_llm_connection
+    tasks['directories'] = warm_directories
+    tasks['backends'] = warm_backends
+    tasks['intent_classifier'] = warm_intent_classifier
+    if WARMUP_FREQUENT_COMMANDS > 0:
+        tasks['frequent_commands'] = lambda: warm_frequent_commands(log_file)
+    return tasks
+
+
+def start_warmup(log_file: str = 'app.log', connect_llm: bool = True) -> Optional[Warmup]:
+    """
+    在后台线程中开始预热（立即返回）
+
+    Args:
+        log_file: 查找常用命令的日志文件
+        connect_llm: 是否预先连接大模型
+
+    Returns:
+        Optional[Warmup]: 预热对象，未启用预热时返回None
+    """
+    if not WARMUP:
+        return None
+    return Warmup(default_tasks(log_file, connect_llm)).start()
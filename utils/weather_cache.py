@@ -0,0 +1,305 @@
+"""
+天气缓存模块，为天气查询提供带过期时间的持久化缓存。
+
+缓存以规范化后的地点为键，在有效期内直接返回缓存结果；过期但仍在
+可接受的陈旧时间内时，先返回旧数据，同时在后台线程中刷新
+（stale-while-revalidate）。缓存会写入JSON文件，重启后仍然有效。
+数据提供方可以替换，离线测试时使用StubWeatherProvider即可。
+"""
+import os
+import json
+import time
+import tempfile
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 缓存有效期（秒）
+WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', '1800'))
+
+# 过期后仍可先返回旧数据的最长时间（秒）
+WEATHER_CACHE_MAX_STALE = int(os.getenv('WEATHER_CACHE_MAX_STALE', '21600'))
+
+# 缓存文件路径
+WEATHER_CACHE_FILE = os.getenv('WEATHER_CACHE_FILE', 'weather_cache.json')
+
+# 数据提供方：wttr（在线）或 stub（离线固定数据）
+WEATHER_PROVIDER = os.getenv('WEATHER_PROVIDER', 'wttr')
+
+# 表示"当前位置"的说法，统一为空字符串（由提供方按IP定位）
+_CURRENT_LOCATION_ALIASES = {'', '当前位置', '当前', '本地', '这里', 'current', 'here', 'local'}
+
+
+class WeatherProvider:
+    """天气数据提供方接口"""
+
+    name = 'base'
+
+    def fetch(self, location: str) -> Dict[str, Any]:
+        """
+        获取指定地点的天气
+
+        Args:
+            location: 规范化后的地点，空字符串表示当前位置
+
+        Returns:
+            Dict[str, Any]: 包含location/condition/temperature/humidity/wind等字段的字典
+        """
+        raise NotImplementedError
+
+
+class WttrProvider(WeatherProvider):
+    """基于wttr.in的天气提供方，使用连接池复用HTTP连接"""
+
+    name = 'wttr'
+
+    def __init__(self, base_url: str = 'https://wttr.in', timeout: float = 5.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def _get_session(self):
+        """延迟创建共享的requests会话，后续请求复用TCP/TLS连接"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
+
+    def fetch(self, location: str) -> Dict[str, Any]:
+        response = self._get_session().get(
+            f"{self.base_url}/{location}",
+            params={'format': 'j1', 'lang': 'zh'},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        data = response.json()
+        current = data['current_condition'][0]
+        area = (data.get('nearest_area') or [{}])[0]
+        area_name = (area.get('areaName') or [{}])[0].get('value') or location or '当前位置'
+        condition = (current.get('lang_zh') or current.get('weatherDesc') or [{}])[0].get('value', '')
+        return {
+            'location': area_name,
+            'condition': condition,
+            'temperature': current.get('temp_C'),
+            'feels_like': current.get('FeelsLikeC'),
+            'humidity': current.get('humidity'),
+            'wind': f"{current.get('winddir16Point', '')} {current.get('windspeedKmph', '')}km/h".strip(),
+        }
+
+
+class StubWeatherProvider(WeatherProvider):
+    """离线使用的固定数据提供方，可记录调用次数便于测试"""
+
+    name = 'stub'
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, delay: float = 0.0):
+        self.data = data or {'condition': '晴', 'temperature': '20', 'feels_like': '20',
+                             'humidity': '50', 'wind': 'N 10km/h'}
+        self.delay = delay
+        self.calls = 0
+
+    def fetch(self, location: str) -> Dict[str, Any]:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return dict(self.data, location=location or '当前位置')
+
+
+_PROVIDERS = {
+    WttrProvider.name: WttrProvider,
+    StubWeatherProvider.name: StubWeatherProvider,
+}
+
+
+class WeatherCache:
+    """带TTL、持久化和后台刷新的天气缓存"""
+
+    def __init__(self, provider: Optional[WeatherProvider] = None,
+                 ttl: int = WEATHER_CACHE_TTL, max_stale: int = WEATHER_CACHE_MAX_STALE,
+                 cache_file: Optional[str] = WEATHER_CACHE_FILE):
+        self.provider = provider or _PROVIDERS.get(WEATHER_PROVIDER, WttrProvider)()
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.cache_file = cache_file
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._refreshing: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+        # 串行写缓存文件，后写入的一定是更新的快照
+        self._save_lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def normalize_location(location: Optional[str]) -> str:
+        """
+        规范化地点名称作为缓存键
+
+        Args:
+            location: 用户给出的地点
+
+        Returns:
+            str: 规范化后的地点，当前位置为空字符串
+        """
+        text = ' '.join((location or '').split()).casefold()
+        for suffix in ('的天气', '天气'):
+            if text.endswith(suffix):
+                text = text[:-len(suffix)]
+        if text in _CURRENT_LOCATION_ALIASES:
+            return ''
+        # "北京市"与"北京"视为同一地点
+        if len(text) > 2 and text.endswith('市'):
+            text = text[:-1]
+        return text
+
+    def _load(self) -> None:
+        """从缓存文件加载，文件不存在或损坏时忽略"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self._entries = entries
+                logger.debug(f"已加载天气缓存: {len(entries)}条")
+        except (OSError, ValueError) as e:
+            logger.warning(f"加载天气缓存失败: {str(e)}")
+
+    def _save(self) -> None:
+        """
+        写入缓存文件
+
+        先写入同目录下唯一命名的临时文件再替换，避免中途退出损坏缓存；
+        保存过程串行执行，并在持有保存锁后才取快照，多个线程同时保存时不会用旧快照覆盖新数据。
+        """
+        if not self.cache_file:
+            return
+        with self._save_lock:
+            with self._lock:
+                snapshot = dict(self._entries)
+            tmp_path = None
+            try:
+                directory = os.path.dirname(os.path.abspath(self.cache_file))
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(self.cache_file)}.", suffix='.tmp',
+                                                dir=directory)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, ensure_ascii=False)
+                os.replace(tmp_path, self.cache_file)
+            except OSError as e:
+                logger.warning(f"保存天气缓存失败: {str(e)}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+
+    def _fetch_and_store(self, key: str) -> Dict[str, Any]:
+        data = self.provider.fetch(key)
+        with self._lock:
+            self._entries[key] = {'data': data, 'fetched_at': time.time()}
+        self._save()
+        return data
+
+    def _refresh_in_background(self, key: str) -> None:
+        """后台刷新，同一地点同时只有一个刷新线程"""
+        def run():
+            try:
+                self._fetch_and_store(key)
+                logger.info(f"后台刷新天气完成: {key or '当前位置'}")
+            except Exception as e:
+                logger.warning(f"后台刷新天气失败: {key or '当前位置'}, {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.pop(key, None)
+
+        with self._lock:
+            if key in self._refreshing:
+                return
+            thread = threading.Thread(target=run, name=f"weather-refresh-{key}", daemon=True)
+            self._refreshing[key] = thread
+        thread.start()
+
+    def get(self, location: Optional[str]) -> Tuple[Dict[str, Any], str]:
+        """
+        获取天气数据
+
+        Args:
+            location: 地点
+
+        Returns:
+            Tuple[Dict[str, Any], str]: 天气数据和来源（fresh/stale/fetched）
+        """
+        key = self.normalize_location(location)
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.time() - entry['fetched_at'] if entry else None
+            if entry and age < self.ttl:
+                self.hits += 1
+                return entry['data'], 'fresh'
+            stale = entry is not None and age < self.ttl + self.max_stale
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.misses += 1
+
+        if stale:
+            self._refresh_in_background(key)
+            return entry['data'], 'stale'
+
+        try:
+            return self._fetch_and_store(key), 'fetched'
+        except Exception:
+            # 无法获取新数据时，即使超过陈旧上限也优先返回旧数据
+            if entry:
+                logger.warning(f"获取天气失败，返回过期缓存: {key or '当前位置'}")
+                return entry['data'], 'stale'
+            raise
+
+    def wait_for_refresh(self, timeout: Optional[float] = None) -> None:
+        """等待所有后台刷新完成（用于测试和退出前）"""
+        with self._lock:
+            threads = list(self._refreshing.values())
+        for thread in threads:
+            thread.join(timeout)
+
+
+_default_cache: Optional[WeatherCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_weather_cache() -> WeatherCache:
+    """获取进程内共享的天气缓存"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = WeatherCache()
+    return _default_cache
+
+
+def set_weather_provider(provider: WeatherProvider) -> None:
+    """替换共享缓存使用的天气提供方（例如离线测试时使用StubWeatherProvider）"""
+    get_weather_cache().provider = provider
+
+
+@contextmanager
+def use_weather_cache(cache: WeatherCache) -> Iterator[WeatherCache]:
+    """在with块内临时使用指定的天气缓存（例如不联网、不写缓存文件的模拟缓存）"""
+    global _default_cache
+    previous = _default_cache
+    _default_cache = cache
+    try:
+        yield cache
+    finally:
+        _default_cache = previous
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地应用管理助手Web服务入口
+
+基于FastAPI/uvicorn的异步HTTP和WebSocket服务。命令解析直接在事件循环上异步进行，
+会阻塞的系统操作（commands.*）放到有界线程池中执行，并按命令类型限制并发。
+待处理的请求超过上限时直接返回429，避免请求无限排队。
+
+服务默认只监听本机地址，并且只接受来自本机页面（或WEB_ALLOWED_ORIGINS中列出的来源）的请求；
+设置WEB_TOKEN后，每个请求都必须携带该令牌（HTTP用Authorization: Bearer头，WebSocket用token查询参数）。
+
+用法:
+    python web_server.py [--host 127.0.0.1] [--port 8000]
+"""
+
+import os
+import hmac
+import json
+import time
+import uuid
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+import app as app_module
+from utils.nlp_processor import NLPProcessor
+from utils.command_plan import PlanResult
+from utils.llm_providers import get_router
+from utils.command_schema import validation_stats
+from utils.tree_delete import DEFAULT_SESSION, pending_deletions
+from utils.warmup import WARMUP, WARMUP_TIMEOUT, start_warmup
+from utils.inventory_watcher import INVENTORY_WATCH, get_watcher, start_watcher, stop_watcher
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 执行系统操作的线程数
+WEB_WORKERS = int(os.getenv('WEB_WORKERS', '8'))
+
+# 解析命令（调用大模型）的最大并发数
+WEB_PARSE_CONCURRENCY = int(os.getenv('WEB_PARSE_CONCURRENCY', '32'))
+
+# 同时处理的请求上限，超过后返回429
+WEB_MAX_PENDING = int(os.getenv('WEB_MAX_PENDING', '64'))
+
+# 每条命令解析（含大模型请求）的时间预算（秒），超时后回退到本地规则
+WEB_PARSE_TIMEOUT = float(os.getenv('WEB_PARSE_TIMEOUT', '10'))
+
+# 允许访问的页面来源（逗号分隔），为空时只允许本机页面；不带Origin头的客户端（如curl）不受限制
+WEB_ALLOWED_ORIGINS = {o.strip().rstrip('/') for o in os.getenv('WEB_ALLOWED_ORIGINS', '').split(',') if o.strip()}
+
+# 访问令牌，为空时不校验
+WEB_TOKEN = os.getenv('WEB_TOKEN', '')
+
+# 本机地址
+_LOOPBACK_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+# 各类命令的并发上限，未列出的命令使用默认值
+COMMAND_CONCURRENCY = {
+    'uninstall': 1,
+    'volume': 1,
+    'brightness': 1,
+    'delete': 2,
+    'transfer': 2,
+    'open_close': 4,
+    'default': 4,
+}
+
+# 命令类型到并发组的映射
+_COMMAND_GROUPS = {
+    # 卸载/删除的确认
+    'confirmation': 'uninstall',
+    NLPProcessor.CMD_UNINSTALL: 'uninstall',
+    NLPProcessor.CMD_OPEN: 'open_close',
+    NLPProcessor.CMD_CLOSE: 'open_close',
+    NLPProcessor.CMD_VOLUME: 'volume',
+    NLPProcessor.CMD_GET_VOLUME: 'volume',
+    NLPProcessor.CMD_SET_VOLUME: 'volume',
+    NLPProcessor.CMD_INCREASE_VOLUME: 'volume',
+    NLPProcessor.CMD_DECREASE_VOLUME: 'volume',
+    NLPProcessor.CMD_MUTE: 'volume',
+    NLPProcessor.CMD_UNMUTE: 'volume',
+    NLPProcessor.CMD_BRIGHTNESS: 'brightness',
+    NLPProcessor.CMD_GET_BRIGHTNESS: 'brightness',
+    NLPProcessor.CMD_SET_BRIGHTNESS: 'brightness',
+    NLPProcessor.CMD_INCREASE_BRIGHTNESS: 'brightness',
+    NLPProcessor.CMD_DECREASE_BRIGHTNESS: 'brightness',
+    NLPProcessor.CMD_DELETE_FILE: 'delete',
+    NLPProcessor.CMD_DELETE_DIRECTORY: 'delete',
+    NLPProcessor.CMD_COPY_FILE: 'transfer',
+    NLPProcessor.CMD_MOVE_FILE: 'transfer',
+}
+
+
+def check_access(headers: Mapping[str, str], query: Mapping[str, str]) -> Optional[str]:
+    """
+    检查请求的来源和令牌
+
+    Args:
+        headers: 请求头
+        query: 查询参数
+
+    Returns:
+        Optional[str]: 拒绝的原因，允许访问时返回None
+    """
+    origin = headers.get('origin')
+    if origin:
+        origin = origin.rstrip('/')
+        try:
+            host = urlsplit(origin).hostname
+        except ValueError:
+            host = None
+        if origin not in WEB_ALLOWED_ORIGINS and (WEB_ALLOWED_ORIGINS or host not in _LOOPBACK_HOSTS):
+            return f"不允许的来源: {origin}"
+
+    if WEB_TOKEN:
+        authorization = headers.get('authorization', '')
+        token = authorization[len('Bearer '):] if authorization.startswith('Bearer ') else query.get('token', '')
+        if not hmac.compare_digest(token.encode('utf-8'), WEB_TOKEN.encode('utf-8')):
+            return "缺少或错误的访问令牌"
+    return None
+
+
+def parse_message(text: str) -> Tuple[Any, str]:
+    """
+    解析WebSocket消息，消息为{"id": ..., "command": "..."}或命令字符串本身（JSON字符串）
+
+    Args:
+        text: 收到的文本
+
+    Returns:
+        Tuple[Any, str]: 请求ID和命令文本
+
+    Raises:
+        ValueError: 不是合法的JSON或消息格式不对
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"消息不是合法的JSON: {e.msg}")
+    if isinstance(data, str):
+        return None, data
+    if not isinstance(data, dict):
+        raise ValueError("消息必须是JSON对象或字符串")
+    request_id, command = data.get('id'), data.get('command')
+    if request_id is not None and (isinstance(request_id, bool) or not isinstance(request_id, (str, int))):
+        raise ValueError("id必须是字符串或整数")
+    if not isinstance(command, str):
+        raise ValueError("command必须是字符串")
+    return request_id, command
+
+
+class Overloaded(Exception):
+    """待处理请求过多"""
+
+
+class CommandRequest(BaseModel):
+    command: str
+    # 删除目录的确认必须与先前的dry-run使用同一会话；未指定时按客户端地址区分
+    session: Optional[str] = None
+
+
+class _DispatchHooks(app_module.CommandHooks):
+    """在调度器的并发限制下执行命令的各阶段，并记录阶段耗时"""
+
+    def __init__(self, dispatcher: 'CommandDispatcher', info: Dict[str, Any], started: float,
+                 on_parsed=None, on_progress=None):
+        self.dispatcher = dispatcher
+        self.info = info
+        self.started = started
+        self.on_parsed = on_parsed
+        self.on_progress = on_progress
+        self.parsed_at: Optional[float] = None
+        self._loop = asyncio.get_running_loop()
+
+    async def parse(self, parse):
+        # 大模型调用是异步网络I/O，不占用执行系统操作的线程
+        async with self.dispatcher._parse_slots:
+            return await parse()
+
+    async def parsed(self, parsed: Optional[Dict[str, Any]]) -> None:
+        self.parsed_at = time.perf_counter()
+        self.info['parse_ms'] = round((self.parsed_at - self.started) * 1000, 1)
+        self.info['command_type'] = parsed.get('command_type') if parsed else None
+        if self.on_parsed:
+            await self.on_parsed(parsed)
+
+    async def execute(self, command_type: Optional[str], func, *args) -> Tuple[bool, str]:
+        if command_type == 'confirmation':
+            self.info['command_type'] = command_type
+        return await self.dispatcher._run_blocking(self.dispatcher.group_of(command_type), func, *args)
+
+    def plan_finished(self, result: PlanResult) -> None:
+        self.info['steps'] = result.timings()
+
+    def progress(self, stats) -> None:
+        # 在执行删除的工作线程中调用，回到事件循环中推送
+        if self.on_progress:
+            asyncio.run_coroutine_threadsafe(self.on_progress(stats.to_dict()), self._loop)
+
+
+class CommandDispatcher:
+    """异步命令调度器：解析、限流并把阻塞操作分发到线程池"""
+
+    def __init__(self, workers: int = WEB_WORKERS, max_pending: int = WEB_MAX_PENDING,
+                 parse_concurrency: int = WEB_PARSE_CONCURRENCY, parse_timeout: float = WEB_PARSE_TIMEOUT):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='command')
+        self.max_pending = max_pending
+        self.parse_timeout = parse_timeout
+        self.pending = 0
+        self.rejected = 0
+        self._parse_slots = asyncio.Semaphore(parse_concurrency)
+        self._group_slots = {group: asyncio.Semaphore(limit) for group, limit in COMMAND_CONCURRENCY.items()}
+
+    @staticmethod
+    def group_of(command_type: Optional[str]) -> str:
+        """命令类型对应的并发组"""
+        return _COMMAND_GROUPS.get(command_type, 'default')
+
+    async def _run_blocking(self, group: str, func, *args):
+        """在指定并发组的限制下，把阻塞函数放到线程池执行"""
+        async with self._group_slots[group]:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+
+    async def dispatch(self, command_text: str, on_parsed=None,
+                       session: str = DEFAULT_SESSION, on_progress=None) -> Tuple[bool, str, Dict[str, Any]]:
+        """
+        处理一条命令（流程与app.process_command_async相同，只增加并发限制和耗时统计）
+
+        Args:
+            command_text: 命令文本
+            on_parsed: 解析完成后的异步回调，参数为解析结果（用于WebSocket流式返回）
+            session: 会话标识，删除目录的确认只接受同一会话中先前的dry-run
+            on_progress: 删除目录进度的异步回调，参数为DeletionStats.to_dict()
+
+        Returns:
+            Tuple[bool, str, Dict[str, Any]]: 执行结果、结果消息和阶段耗时等信息
+
+        Raises:
+            Overloaded: 待处理请求超过上限
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise Overloaded()
+
+        self.pending += 1
+        started = time.perf_counter()
+        info: Dict[str, Any] = {'command_type': None}
+        hooks = _DispatchHooks(self, info, started, on_parsed, on_progress)
+        try:
+            success, message = await app_module.process_command_async(
+                (command_text or '').strip(), self.parse_timeout, session, hooks)
+        finally:
+            self.pending -= 1
+            finished = time.perf_counter()
+            if hooks.parsed_at is not None:
+                info['execute_ms'] = round((finished - hooks.parsed_at) * 1000, 1)
+            info['total_ms'] = round((finished - started) * 1000, 1)
+
+        return success, message, info
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False)
+
+
+def create_app() -> FastAPI:
+    """创建FastAPI应用"""
+    dispatcher: Optional[CommandDispatcher] = None
+    warmup = None
+
+    @asynccontextmanager
+    async def lifespan(_):
+        nonlocal dispatcher, warmup
+        # 信号量需要在事件循环中创建
+        dispatcher = CommandDispatcher()
+        # 后台预热，不推迟服务就绪；大模型连接池属于服务自己的事件循环，在这里预先连接
+        warmup = start_warmup(connect_llm=False)
+        connecting = asyncio.ensure_future(get_router().warm_up(WARMUP_TIMEOUT)) if WARMUP else None
+        if INVENTORY_WATCH:
+            start_watcher()
+        logger.info(f"Web服务已启动: {WEB_WORKERS}个执行线程, 待处理上限{WEB_MAX_PENDING}")
+        try:
+            yield
+        finally:
+            if connecting:
+                connecting.cancel()
+            stop_watcher()
+            dispatcher.shutdown()
+
+    web_app = FastAPI(title='本地应用管理助手', lifespan=lifespan)
+
+    @web_app.get('/api/health')
+    async def health(http_request: Request) -> Dict[str, Any]:
+        # 未通过访问检查的调用方只能得到存活状态，运行统计（提供方、目录等）需要令牌
+        if check_access(http_request.headers, http_request.query_params):
+            return {'status': 'ok'}
+        return {'status': 'ok', 'pending': dispatcher.pending, 'rejected': dispatcher.rejected,
+                'llm_providers': get_router().stats(), 'parse_validation': validation_stats(),
+                'warmup': warmup.stats() if warmup else None,
+                'inventory': get_watcher().stats() if get_watcher() else None}
+
+    @web_app.post('/api/command')
+    async def run_command(request: CommandRequest, http_request: Request):
+        denied = check_access(http_request.headers, http_request.query_params)
+        if denied:
+            logger.warning(f"拒绝HTTP请求: {denied}")
+            return JSONResponse(status_code=403, content={'success': False, 'message': denied})
+        client = http_request.client.host if http_request.client else 'unknown'
+        session = f"http:{client}:{request.session or ''}"
+        try:
+            success, message, info = await dispatcher.dispatch(request.command, session=session)
+        except Overloaded:
+            return JSONResponse(status_code=429, content={'success': False, 'message': '服务繁忙，请稍后重试'},
+                                headers={'Retry-After': '1'})
+        return {'success': success, 'message': message, **info}
+
+    @web_app.websocket('/ws')
+    async def websocket_commands(websocket: WebSocket) -> None:
+        """
+        WebSocket接口：客户端发送{"id": ..., "command": ...}，
+        服务端依次推送parsed和done消息，多条命令可以并发处理；格式不对的消息返回error
+        """
+        denied = check_access(websocket.headers, websocket.query_params)
+        if denied:
+            logger.warning(f"拒绝WebSocket连接: {denied}")
+            await websocket.close(code=1008, reason=denied)
+            return
+        await websocket.accept()
+        send_lock = asyncio.Lock()
+        tasks = set()
+        # 每个连接是一个会话，连接上的删除确认只对本连接发出的删除请求有效
+        session = f"ws:{uuid.uuid4().hex}"
+
+        async def send(payload: Dict[str, Any]) -> None:
+            async with send_lock:
+                await websocket.send_json(payload)
+
+        async def handle(request_id: Any, command_text: str) -> None:
+            async def on_parsed(parsed: Optional[Dict[str, Any]]) -> None:
+                await send({'id': request_id, 'status': 'parsed',
+                            'command_type': parsed.get('command_type') if parsed else None})
+
+            async def on_progress(progress: Dict[str, Any]) -> None:
+                await send({'id': request_id, 'status': 'progress', **progress})
+            try:
+                success, message, info = await dispatcher.dispatch(command_text, on_parsed, session, on_progress)
+                await send({'id': request_id, 'status': 'done', 'success': success, 'message': message, **info})
+            except Overloaded:
+                await send({'id': request_id, 'status': 'rejected', 'code': 429, 'message': '服务繁忙，请稍后重试'})
+            except Exception as e:
+                logger.exception(f"处理WebSocket命令时出错: {str(e)}")
+                await send({'id': request_id, 'status': 'error', 'message': str(e)})
+
+        try:
+            while True:
+                try:
+                    request_id, command_text = parse_message(await websocket.receive_text())
+                except ValueError as e:
+                    await send({'id': None, 'status': 'error', 'message': str(e)})
+                    continue
+                task = asyncio.create_task(handle(request_id, command_text))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except WebSocketDisconnect:
+            logger.info("WebSocket连接已断开")
+        finally:
+            for task in tasks:
+                task.cancel()
+            pending_deletions.discard_session(session)
+
+    @web_app.websocket('/ws/inventory')
+    async def websocket_inventory(websocket: WebSocket) -> None:
+        """WebSocket接口：推送已安装应用和运行中进程的变化事件（需要启用INVENTORY_WATCH）"""
+        denied = check_access(websocket.headers, websocket.query_params)
+        if denied:
+            logger.warning(f"拒绝清单WebSocket连接: {denied}")
+            await websocket.close(code=1008, reason=denied)
+            return
+        await websocket.accept()
+        watcher = get_watcher()
+        if watcher is None:
+            await websocket.close(code=1013, reason='inventory watcher disabled')
+            return
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue(maxsize=1000)
+
+        def on_event(event) -> None:
+            # 在监视线程中调用，转交给事件循环；客户端跟不上时丢弃事件
+            loop.call_soon_threadsafe(lambda: events.full() or events.put_nowait(event.to_dict()))
+
+        async def forward() -> None:
+            while True:
+                await websocket.send_json(await events.get())
+
+        async def until_disconnected() -> None:
+            # 客户端不发送消息，接收只用于在没有事件时也能及时发现连接已断开
+            while (await websocket.receive())['type'] != 'websocket.disconnect':
+                pass
+
+        unsubscribe = watcher.subscribe(on_event)
+        tasks = [asyncio.ensure_future(forward()), asyncio.ensure_future(until_disconnected())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                # 向已关闭的连接发送可能抛出WebSocketDisconnect以外的异常，都视为连接已断开
+                if error is not None and not isinstance(error, WebSocketDisconnect):
+                    logger.debug(f"清单WebSocket发送失败: {error!r}")
+            logger.info("清单WebSocket连接已断开")
+        finally:
+            for task in tasks:
+                task.cancel()
+            unsubscribe()
+
+    return web_app
+
+
+def main():
+    """
+    Web服务主入口函数
+    """
+    parser = argparse.ArgumentParser(description='本地应用管理助手Web服务')
+    parser.add_argument('--host', default=os.getenv('WEB_HOST', '127.0.0.1'), help='监听地址')
+    parser.add_argument('--port', type=int, default=int(os.getenv('WEB_PORT', '8000')), help='监听端口')
+    args = parser.parse_args()
+    if args.host not in _LOOPBACK_HOSTS and not WEB_TOKEN:
+        logger.warning(f"服务监听在{args.host}上但未设置WEB_TOKEN，局域网内的任何客户端都可以执行命令")
+
+    import uvicorn
+    uvicorn.run(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()